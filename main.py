@@ -1,3 +1,4 @@
+import asyncio
 import os
 import sys
 from typing import Dict, List
@@ -12,8 +13,16 @@ try:
     from fan import fanManager
     from fuse_manager import FuseManager
     from gpu import gpuManager
+    from hardware_cache import format_startup_phases, startup_phase
+    from power_arbiter import powerArbiter
     from power_manager import PowerManager
-    from sysInfo import sysInfoManager
+    from profile_learner import ProfileLearner
+    from reactor import reactor
+    from service_registry import serviceRegistry
+    from state_reconciler import StateReconciler
+    from sysInfo import read_client_language, sysInfoManager
+    from telemetry import TelemetryCollector
+    from utils import close_ryzenadj_lib, close_sysfs_nodes
 
     sys.path.append(f"{decky.DECKY_PLUGIN_DIR}/py_modules/site-packages")
 except Exception as e:
@@ -23,7 +32,11 @@ except Exception as e:
 class Plugin:
     def __init__(self):
         self.confManager = confManager
-        self.powerManager = PowerManager()
+        with startup_phase("power_manager"):
+            self.powerManager = PowerManager()
+        self.stateReconciler = StateReconciler(self.powerManager)
+        self.telemetry = TelemetryCollector(self.powerManager)
+        self.profileLearner = ProfileLearner(self.powerManager)
         # 使用单例模式，不再存储 fuseManager 实例
         # 而是每次通过 FuseManager.get_instance() 获取
 
@@ -41,14 +54,41 @@ class Plugin:
 
     async def _main(self):
         decky.logger.info("start _main")
-        self.powerManager.load()
+        # 硬件探测并发进行，RPC 只等待自己用到的服务
+        serviceRegistry.prefetch(
+            on_done=lambda: logger.info(f"启动耗时: {format_startup_phases()}")
+        )
+        with startup_phase("power_manager_load"):
+            self.powerManager.load()
+        self.telemetry.start_history()
+
+        # 风扇曲线在后端执行，状态通过事件推送给前端
+        await serviceRegistry.wait_ready("fan")
+        loop = asyncio.get_running_loop()
+        fanManager.start_fanControl(
+            lambda status: asyncio.run_coroutine_threadsafe(
+                decky.emit("fan_status", status), loop
+            )
+        )
 
     async def _unload(self):
         decky.logger.info("start _unload")
-        gpuManager.unload()
+        # 只清理已经创建的服务，避免在卸载时才初始化
+        if serviceRegistry.peek("cpu"):
+            cpuManager.unload()
+        if serviceRegistry.peek("gpu"):
+            gpuManager.unload()
+        self.profileLearner.stop()
+        powerArbiter.stop()
+        if serviceRegistry.peek("fan"):
+            fanManager.stop_fanControl()
+        self.telemetry.stop()
         # 使用单例模式获取实例并卸载
         # FuseManager.get_instance().unload()
         self.powerManager.unload()
+        reactor.stop()
+        close_sysfs_nodes()
+        close_ryzenadj_lib()
         logger.info("End PowerControl")
 
     async def get_settings(self):
@@ -59,6 +99,7 @@ class Plugin:
         return True
 
     async def get_hasRyzenadj(self):
+        await serviceRegistry.wait_ready("cpu")
         try:
             return cpuManager.get_hasRyzenadj()
         except Exception as e:
@@ -66,6 +107,7 @@ class Plugin:
             return False
 
     async def get_cpuMaxNum(self):
+        await serviceRegistry.wait_ready("cpu")
         try:
             return cpuManager.get_cpuMaxNum()
         except Exception as e:
@@ -73,6 +115,7 @@ class Plugin:
             return 0
 
     async def supports_smt(self):
+        await serviceRegistry.wait_ready("cpu")
         try:
             return cpuManager.get_isSupportSMT()
         except Exception as e:
@@ -80,6 +123,7 @@ class Plugin:
             return False
 
     async def get_tdpMax(self):
+        await serviceRegistry.wait_ready("cpu")
         try:
             logger.info("Main get_tdpMax")
             tdpMax = self.powerManager.get_tdpMax()
@@ -90,6 +134,7 @@ class Plugin:
             return 0
 
     async def get_tdpMin(self):
+        await serviceRegistry.wait_ready("cpu")
         try:
             logger.info("Main get_tdpMin")
             tdpMin = self.powerManager.get_tdpMin()
@@ -107,6 +152,7 @@ class Plugin:
             return ""
 
     async def get_gpuFreqRange(self):
+        await serviceRegistry.wait_ready("gpu")
         try:
             return gpuManager.get_gpuFreqRange()
         except Exception as e:
@@ -115,6 +161,7 @@ class Plugin:
 
     # 弃用
     async def get_cpu_AvailableFreq(self):
+        await serviceRegistry.wait_ready("cpu")
         try:
             return cpuManager.get_cpu_AvailableFreq()
         except Exception as e:
@@ -123,12 +170,90 @@ class Plugin:
 
     async def get_language(self):
         try:
-            return sysInfoManager.get_language()
+            return read_client_language()
         except Exception as e:
             logger.error(e, exc_info=True)
             return ""
 
+    async def get_sysinfo_collect_interval(self):
+        await serviceRegistry.wait_ready("sysinfo")
+        try:
+            return sysInfoManager.get_collect_interval()
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return 0
+
+    async def set_sysinfo_collect_interval(self, interval: float):
+        await serviceRegistry.wait_ready("sysinfo")
+        try:
+            return sysInfoManager.set_collect_interval(interval)
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return False
+
+    async def get_telemetry_snapshot(self):
+        await serviceRegistry.wait_ready("cpu", "fan", "sysinfo")
+        try:
+            return self.telemetry.get_snapshot()
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return {}
+
+    async def get_history(self, channel, since, resolution):
+        await serviceRegistry.wait_ready("sysinfo")
+        try:
+            return self.telemetry.get_history(channel, since, resolution)
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return {}
+
+    async def get_power_arbiter_status(self):
+        try:
+            return powerArbiter.get_status()
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return {}
+
+    async def set_profile_app(self, app_id):
+        await serviceRegistry.wait_ready("cpu", "gpu", "sysinfo")
+        try:
+            return self.profileLearner.set_app(app_id)
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return False
+
+    async def get_profile_learning(self):
+        try:
+            return self.profileLearner.enabled
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return False
+
+    async def set_profile_learning(self, enabled: bool):
+        await serviceRegistry.wait_ready("cpu", "gpu", "sysinfo")
+        try:
+            return self.profileLearner.set_enabled(enabled)
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return False
+
+    async def get_app_profile(self, app_id):
+        await serviceRegistry.wait_ready("cpu", "gpu")
+        try:
+            return self.profileLearner.get_profile(app_id)
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return {}
+
+    async def reset_app_profile(self, app_id):
+        try:
+            return self.profileLearner.reset_profile(app_id)
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return False
+
     async def get_fanRPM(self, index):
+        await serviceRegistry.wait_ready("fan")
         try:
             return fanManager.get_fanRPM(index)
         except Exception as e:
@@ -136,6 +261,7 @@ class Plugin:
             return 0
 
     async def get_fanRPMPercent(self, index):
+        await serviceRegistry.wait_ready("fan")
         try:
             return fanManager.get_fanRPMPercent(index)
         except Exception as e:
@@ -143,6 +269,7 @@ class Plugin:
             return 0
 
     async def get_fanTemp(self, index):
+        await serviceRegistry.wait_ready("fan")
         try:
             return fanManager.get_fanTemp(index)
         except Exception as e:
@@ -150,6 +277,7 @@ class Plugin:
             return 0
 
     async def get_fanIsAuto(self, index):
+        await serviceRegistry.wait_ready("fan")
         try:
             return fanManager.get_fanIsAuto(index)
         except Exception as e:
@@ -157,6 +285,7 @@ class Plugin:
             return 0
 
     async def get_fanConfigList(self):
+        await serviceRegistry.wait_ready("fan")
         try:
             return fanManager.get_fanConfigList()
         except Exception as e:
@@ -164,6 +293,7 @@ class Plugin:
             return []
 
     async def set_fanAuto(self, index: int, value: bool):
+        await serviceRegistry.wait_ready("fan")
         try:
             return fanManager.set_fanAuto(index, value)
         except Exception as e:
@@ -171,6 +301,7 @@ class Plugin:
             return False
 
     async def set_fanPercent(self, index: int, value: int):
+        await serviceRegistry.wait_ready("fan")
         try:
             return fanManager.set_fanPercent(index, value)
         except Exception as e:
@@ -178,42 +309,87 @@ class Plugin:
             return False
 
     async def set_fanCurve(self, index: int, temp_list: List[int], pwm_list: List[int]):
+        await serviceRegistry.wait_ready("fan")
         try:
             return fanManager.set_fanCurve(index, temp_list, pwm_list)
         except Exception as e:
             logger.error(e, exc_info=True)
             return False
 
+    async def set_fanControl(
+        self,
+        index: int,
+        mode: str,
+        fix_percent: int,
+        temp_list: List[int],
+        pwm_list: List[int],
+    ):
+        await serviceRegistry.wait_ready("fan")
+        try:
+            return fanManager.set_fanControl(
+                index, mode, fix_percent, temp_list, pwm_list
+            )
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return False
+
+    async def get_fanStatus(self):
+        await serviceRegistry.wait_ready("fan")
+        try:
+            return fanManager.get_fanStatus()
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return []
+
     async def set_gpuAuto(self, value: bool):
+        await serviceRegistry.wait_ready("gpu", "sysinfo")
         try:
+            self.stateReconciler.invalidate("gpu_auto")
             return gpuManager.set_gpuAuto(value)
         except Exception as e:
             logger.error(e, exc_info=True)
             return False
 
     async def set_gpuAutoFreqRange(self, min: int, max: int):
+        await serviceRegistry.wait_ready("gpu")
         try:
+            self.stateReconciler.invalidate("gpu_auto_freq_range")
             return gpuManager.set_gpuAutoFreqRange(min, max)
         except Exception as e:
             logger.error(e, exc_info=True)
             return False
 
+    async def set_gpuFrameTimeTarget(self, app_id: str, target_ms: float, guard: float):
+        await serviceRegistry.wait_ready("gpu")
+        try:
+            self.stateReconciler.invalidate("gpu_frametime_target")
+            return gpuManager.set_gpuFrameTimeTarget(app_id, target_ms, guard)
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return False
+
     async def set_gpuFreq(self, value: int):
+        await serviceRegistry.wait_ready("gpu", "sysinfo")
         try:
+            self.stateReconciler.invalidate("gpu_freq")
             return gpuManager.set_gpuFreqFix(value)
         except Exception as e:
             logger.error(e, exc_info=True)
             return False
 
     async def set_gpuFreqRange(self, value: int, value2: int):
+        await serviceRegistry.wait_ready("gpu", "sysinfo")
         try:
+            self.stateReconciler.invalidate("gpu_freq_range")
             return gpuManager.set_gpuFreqRange(value, value2)
         except Exception as e:
             logger.error(e, exc_info=True)
             return False
 
     async def set_cpuTDP(self, value: int):
+        await serviceRegistry.wait_ready("cpu")
         try:
+            self.stateReconciler.invalidate("tdp")
             # return cpuManager.set_cpuTDP(value)
             return self.powerManager.set_tdp(value)
         except Exception as e:
@@ -221,14 +397,17 @@ class Plugin:
             return False
 
     async def set_cpuTDP_unlimited(self):
+        await serviceRegistry.wait_ready("cpu")
         logger.info("Main set_cpuTDP_unlimited")
         try:
+            self.stateReconciler.invalidate("tdp")
             return self.powerManager.set_tdp_unlimited()
         except Exception as e:
             logger.error(e, exc_info=True)
             return False
 
     async def is_intel(self):
+        await serviceRegistry.wait_ready("cpu")
         try:
             return cpuManager.is_intel()
         except Exception as e:
@@ -236,27 +415,34 @@ class Plugin:
             return False
 
     async def set_cpuOnline(self, value: int):
+        await serviceRegistry.wait_ready("cpu")
         try:
+            self.stateReconciler.invalidate("cpu_num")
             return cpuManager.set_cpuOnline(value)
         except Exception as e:
             logger.error(e, exc_info=True)
             return False
 
     async def set_smt(self, value: bool):
+        await serviceRegistry.wait_ready("cpu")
         try:
+            self.stateReconciler.invalidate("smt")
             return cpuManager.set_smt(value)
         except Exception as e:
             logger.error(e, exc_info=True)
             return False
 
     async def set_cpuBoost(self, value: bool):
+        await serviceRegistry.wait_ready("cpu")
         try:
+            self.stateReconciler.invalidate("cpu_boost")
             return cpuManager.set_cpuBoost(value)
         except Exception as e:
             logger.error(e, exc_info=True)
             return False
 
     async def set_cpuFreq(self, value: int):
+        await serviceRegistry.wait_ready("cpu")
         try:
             return cpuManager.set_cpuFreq(value)
         except Exception as e:
@@ -264,6 +450,7 @@ class Plugin:
             return False
 
     async def set_cpu_freq_by_core_type(self, freq_config: Dict[str, int]):
+        await serviceRegistry.wait_ready("cpu")
         try:
             logger.info(f"设置按核心类型CPU频率: {freq_config}")
             return cpuManager.set_cpu_freq_by_core_type(freq_config)
@@ -273,6 +460,7 @@ class Plugin:
 
     async def get_cpu_core_info(self):
         """获取CPU核心类型详细信息"""
+        await serviceRegistry.wait_ready("cpu")
         try:
             return cpuManager.get_cpu_core_info()
         except Exception as e:
@@ -286,6 +474,7 @@ class Plugin:
 
     async def get_cpu_topology_for_ui(self):
         """获取CPU拓扑信息（供前端核心选择UI使用）"""
+        await serviceRegistry.wait_ready("cpu")
         try:
             return cpuManager.get_cpu_topology_for_ui()
         except Exception as e:
@@ -298,21 +487,56 @@ class Plugin:
 
     async def set_cpu_online_list(self, online_list: list):
         """按逻辑核心列表设置CPU在线状态"""
+        await serviceRegistry.wait_ready("cpu")
         try:
+            self.stateReconciler.invalidate("cpu_online_list")
             logger.info(f"设置CPU在线列表: {online_list}")
             return cpuManager.set_cpu_online_list(online_list)
         except Exception as e:
             logger.error(f"设置CPU在线列表失败: {e}", exc_info=True)
             return False
 
+    async def set_cpu_hotplug_interval(self, interval_ms: float):
+        """设置两次CPU上线/下线之间的间隔(毫秒)，0为不限速"""
+        await serviceRegistry.wait_ready("cpu")
+        try:
+            self.stateReconciler.invalidate("cpu_hotplug_interval")
+            return cpuManager.set_hotplug_interval(interval_ms)
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return False
+
+    async def get_cpu_hotplug_stats(self):
+        """CPU 上线/下线的次数和耗时统计"""
+        await serviceRegistry.wait_ready("cpu")
+        try:
+            return cpuManager.get_hotplug_stats()
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return {}
+
+    async def apply_state(self, desired: dict):
+        """按期望状态调和硬件设置，只写入发生变化的项"""
+        await serviceRegistry.wait_ready("cpu", "gpu", "sysinfo")
+        try:
+            return self.stateReconciler.apply_state(desired)
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return {}
+
     async def receive_suspendEvent(self):
+        await serviceRegistry.wait_ready("fan")
         try:
+            # 休眠唤醒后硬件状态可能被重置，下次 apply_state 需要完整写入
+            self.stateReconciler.invalidate()
+            fanManager.curveController.invalidate()
             return True
         except Exception as e:
             logger.error(e, exc_info=True)
             return False
 
     async def fix_gpuFreqSlider(self):
+        await serviceRegistry.wait_ready("gpu")
         try:
             return gpuManager.fix_gpuFreqSlider()
         except Exception as e:
@@ -320,6 +544,7 @@ class Plugin:
             return False
 
     async def start_gpu_notify(self):
+        await serviceRegistry.wait_ready("gpu", "inotify")
         try:
             return gpuManager.start_gpu_notify()
         except Exception as e:
@@ -327,6 +552,7 @@ class Plugin:
             return False
 
     async def stop_gpu_notify(self):
+        await serviceRegistry.wait_ready("gpu", "inotify")
         try:
             return gpuManager.stop_gpu_notify()
         except Exception as e:
@@ -353,10 +579,12 @@ class Plugin:
             return ""
 
     async def get_ryzenadj_info(self):
+        await serviceRegistry.wait_ready("cpu")
         return cpuManager.get_ryzenadj_info()
 
     async def check_ryzenadj_coall(self) -> bool:
         """检测并缓存 RyzenAdj 降压支持情况"""
+        await serviceRegistry.wait_ready("cpu")
         try:
             result = cpuManager.check_ryzenadj_coall_support()
             # 保存检测结果到配置
@@ -371,7 +599,9 @@ class Plugin:
 
     async def set_ryzenadj_undervolt(self, enable: bool, value: int) -> bool:
         """设置 RyzenAdj 降压值"""
+        await serviceRegistry.wait_ready("cpu")
         try:
+            self.stateReconciler.invalidate("ryzenadj_undervolt")
             logger.info(f"Main 设置降压: enable={enable}, value={value}")
             return self.powerManager.set_ryzenadj_undervolt(enable, value)
         except Exception as e:
@@ -379,13 +609,16 @@ class Plugin:
             return False
 
     async def get_rapl_info(self):
+        await serviceRegistry.wait_ready("cpu")
         logger.info("Main get_rapl_info")
         return cpuManager.get_rapl_info()
 
     async def get_power_info(self):
+        await serviceRegistry.wait_ready("cpu")
         return self.powerManager.get_power_info()
 
     async def get_tdp_backends(self):
+        await serviceRegistry.wait_ready("cpu")
         try:
             return self.powerManager.get_tdp_backends()
         except Exception as e:
@@ -399,6 +632,7 @@ class Plugin:
             }
 
     async def set_tdp_backend(self, backend_id: str):
+        await serviceRegistry.wait_ready("cpu")
         try:
             return self.powerManager.set_tdp_backend(backend_id)
         except Exception as e:
@@ -406,6 +640,7 @@ class Plugin:
             return False
 
     async def get_max_perf_pct(self):
+        await serviceRegistry.wait_ready("cpu")
         try:
             return cpuManager.get_max_perf_pct()
         except Exception as e:
@@ -413,21 +648,42 @@ class Plugin:
             return 0
 
     async def set_max_perf_pct(self, value: int):
+        await serviceRegistry.wait_ready("cpu")
         try:
+            self.stateReconciler.invalidate("max_perf_pct")
             return cpuManager.set_max_perf_pct(value)
         except Exception as e:
             logger.error(e, exc_info=True)
             return False
 
     async def set_auto_cpumax_pct(self, value: bool):
+        await serviceRegistry.wait_ready("cpu", "sysinfo")
         try:
+            self.stateReconciler.invalidate("auto_cpumax_pct")
             return cpuManager.set_auto_cpumax_pct(value)
         except Exception as e:
             logger.error(e, exc_info=True)
             return False
 
+    async def get_auto_cpumax_controller(self):
+        await serviceRegistry.wait_ready("cpu")
+        try:
+            return cpuManager.get_auto_cpumax_controller()
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return {}
+
+    async def set_auto_cpumax_controller(self, mode: str, tunables: dict = None):
+        await serviceRegistry.wait_ready("cpu")
+        try:
+            return cpuManager.set_auto_cpumax_controller(mode, tunables)
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return False
+
     async def get_cpu_governor(self):
         """获取当前 CPU 调度器"""
+        await serviceRegistry.wait_ready("cpu")
         try:
             return cpuManager.get_cpu_governor()
         except Exception as e:
@@ -436,6 +692,7 @@ class Plugin:
 
     async def get_available_governors(self):
         """获取所有可用的 CPU 调度器"""
+        await serviceRegistry.wait_ready("cpu")
         try:
             return cpuManager.get_available_governors()
         except Exception as e:
@@ -448,8 +705,10 @@ class Plugin:
         Args:
             governor (str): 调度器名称
         """
+        await serviceRegistry.wait_ready("cpu")
         logger.debug(f"Main 设置 CPU 调度器为 {governor}")
         try:
+            self.stateReconciler.invalidate("cpu_governor")
             return cpuManager.set_cpu_governor(governor)
         except Exception as e:
             logger.error(e, exc_info=True)
@@ -457,6 +716,7 @@ class Plugin:
 
     async def supported_epp(self):
         """检查系统是否支持 EPP 功能。"""
+        await serviceRegistry.wait_ready("cpu")
         try:
             return cpuManager.is_epp_supported()
         except Exception as e:
@@ -465,6 +725,7 @@ class Plugin:
 
     async def get_epp_modes(self):
         """获取可用的 EPP 模式列表。"""
+        await serviceRegistry.wait_ready("cpu")
         try:
             return cpuManager.get_epp_modes()
         except Exception as e:
@@ -473,6 +734,7 @@ class Plugin:
 
     async def get_current_epp(self):
         """获取当前的 EPP 模式。"""
+        await serviceRegistry.wait_ready("cpu")
         try:
             return cpuManager.get_current_epp()
         except Exception as e:
@@ -481,7 +743,9 @@ class Plugin:
 
     async def set_epp(self, mode: str):
         """设置 EPP 模式。"""
+        await serviceRegistry.wait_ready("cpu")
         try:
+            self.stateReconciler.invalidate("epp")
             return cpuManager.set_epp(mode)
         except Exception as e:
             logger.error(e, exc_info=True)
@@ -528,6 +792,7 @@ class Plugin:
         """
         logger.debug(f"Main 设置 sched_ext 调度器为 {scheduler}, 参数: {param}")
         try:
+            self.stateReconciler.invalidate("sched_ext")
             return self.powerManager.set_sched_ext(scheduler, param)
         except Exception as e:
             logger.error(e, exc_info=True)
@@ -648,6 +913,7 @@ class Plugin:
         Returns:
             操作是否成功
         """
+        await serviceRegistry.wait_ready("cpu")
         try:
             settings = self.confManager.getSettings()
             settings["enableNativeTDPSlider"] = enabled
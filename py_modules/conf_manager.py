@@ -12,6 +12,10 @@ class ConfManager:
             name="fans_config",
             settings_directory=decky.DECKY_PLUGIN_SETTINGS_DIR,
         )
+        self.profileSettings = SettingsManager(
+            name="app_profiles",
+            settings_directory=decky.DECKY_PLUGIN_SETTINGS_DIR,
+        )
 
     def getSettings(self):
         return self.sysSettings.getSetting(CONFIG_KEY) or {}
@@ -27,5 +31,12 @@ class ConfManager:
         self.fansSettings.setSetting(key, value)
         return True
 
+    def getAppProfile(self, app_id):
+        return self.profileSettings.getSetting(str(app_id)) or {}
+
+    def setAppProfile(self, app_id, profile):
+        self.profileSettings.setSetting(str(app_id), profile)
+        return True
+
 
 confManager = ConfManager()
@@ -4,7 +4,8 @@ import logging
 import os
 
 import yaml
-from logging_handler import SystemdHandler
+from hardware_cache import hardwareCache, startup_phase
+from logging_handler import create_systemd_handler
 
 import decky
 
@@ -18,9 +19,8 @@ def setup_logger():
     file_format = "[%(asctime)s | %(filename)s:%(lineno)s:%(funcName)s] %(levelname)s: %(message)s"
     systemd_format = "[%(filename)s:%(lineno)s:%(funcName)s] %(levelname)s: %(message)s"
 
-    # 创建并配置 handlers
-    systemd_handler = SystemdHandler()
-    systemd_handler.setFormatter(logging.Formatter(systemd_format))
+    # 创建并配置 handlers (journald 写入在后台线程中异步完成)
+    systemd_handler = create_systemd_handler(logging.Formatter(systemd_format))
 
     file_handler = logging.FileHandler(filename=LOG_LOCATION, mode="w")
     file_handler.setFormatter(logging.Formatter(file_format))
@@ -46,6 +46,7 @@ DECKY_PLUGIN_DIR = decky.DECKY_PLUGIN_DIR
 DECKY_PLUGIN_PY_DIR = f"{DECKY_PLUGIN_DIR}/py_modules"
 SH_PATH = "{}/backend/sh_tools.sh".format(DECKY_PLUGIN_DIR)
 RYZENADJ_PATH = "{}/bin/ryzenadj".format(DECKY_PLUGIN_DIR)
+LIBRYZENADJ_PATH = "{}/bin/libryzenadj.so".format(DECKY_PLUGIN_DIR)
 # AMD_GPU_DEVICE_PATH = glob.glob("/sys/class/drm/card?/device")[0]
 # AMD_GPUFREQ_PATH = "{}/pp_od_clk_voltage".format(AMD_GPU_DEVICE_PATH)
 # AMD_GPULEVEL_PATH = "{}/power_dpm_force_performance_level".format(AMD_GPU_DEVICE_PATH)
@@ -294,11 +295,18 @@ def get_device_ec_fans(p_name, p_version):
     return []
 
 
-# 风扇配置
+# 风扇配置，解析结果按硬件指纹缓存
 try:
-    FAN_HWMON_LIST = get_all_howmon_fans()
-
-    FAN_EC_CONFIG = get_device_ec_fans(PRODUCT_NAME, PRODUCT_VERSION)
+    with startup_phase("fan_config"):
+        fan_configs = hardwareCache.get("fan_config")
+        if fan_configs is None:
+            fan_configs = {
+                "hwmon": get_all_howmon_fans(),
+                "ec": get_device_ec_fans(PRODUCT_NAME, PRODUCT_VERSION),
+            }
+            hardwareCache.set("fan_config", fan_configs)
+    FAN_HWMON_LIST = fan_configs["hwmon"]
+    FAN_EC_CONFIG = fan_configs["ec"]
 
     logger.info(f"FAN_EC_CONFIG: {FAN_EC_CONFIG}")
 
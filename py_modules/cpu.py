@@ -6,13 +6,37 @@ import subprocess
 import threading
 import time
 import traceback
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import sysInfo
+from conf_manager import confManager
 from config import CPU_VENDOR, SH_PATH, logger
+from cpu_controller import (
+    CONTROLLER_MODES,
+    CONTROLLER_STEP,
+    create_controller,
+    normalize_tunables,
+)
 from cpu_detector import create_cpu_detector
-from utils import get_env, getMaxTDP, get_ryzenadj_candidates, run_ryzenadj
+from cpu_hotplug import HotplugPlanner
+from hardware_cache import hardwareCache
+from power_arbiter import DOMAIN_CPU, ArbiterSample, powerArbiter
+from service_registry import serviceRegistry
+from uevent import UeventListener
+from utils import (
+    SysfsNode,
+    get_env,
+    getMaxTDP,
+    get_ryzenadj_candidates,
+    get_ryzenadj_lib,
+    get_sysfs_node,
+    run_ryzenadj,
+    sysfs_invalidate,
+    sysfs_read,
+    sysfs_read_int,
+    sysfs_write,
+)
 
 
 @dataclass
@@ -35,12 +59,38 @@ class CPUCoreInfo:
     package_cpus: List[int] = field(default_factory=list)
 
 
+CPU_SYSFS_PATH = "/sys/devices/system/cpu"
+
+
+def parse_cpu_list(text: str) -> List[int]:
+    """解析 "0-3,6,8-11" 格式的 CPU 列表"""
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        cpus.extend(range(int(start), int(end or start) + 1))
+    return cpus
+
+
 class CPUTopology:
-    """CPU拓扑管理器"""
+    """CPU拓扑管理器
+
+    除静态的核心信息外，还在内存中维护在线状态和每个核心的 cpufreq 节点:
+    在线状态用位掩码表示(第 N 位对应逻辑 CPU N)，由 CPU 热插拔 uevent
+    和本插件的写入更新，查询时不再逐个读取 cpuN/online。
+    核心类型同样保存为位掩码，"在线的 P-Core" 只需一次按位与。
+    """
 
     def __init__(self):
         self.cores: Dict[int, CPUCoreInfo] = {}
 
+        # 运行时状态，不写入硬件缓存
+        self._lock = threading.Lock()
+        self.online_mask: int = 0
+        self._typeMasks: Dict[str, int] = {}
+        self._freqNodes: Dict[int, SysfsNode] = {}
+
     def add_core(self, core_info: CPUCoreInfo):
         """添加CPU核心信息"""
         self.cores[core_info.logical_id] = core_info
@@ -92,6 +142,17 @@ class CPUTopology:
             result[core_id].sort()
         return result
 
+    def to_list(self) -> List[dict]:
+        """序列化为可以写入硬件缓存的列表"""
+        return [asdict(self.cores[i]) for i in self.get_all_logical_ids()]
+
+    @classmethod
+    def from_list(cls, cores: List[dict]) -> "CPUTopology":
+        topology = cls()
+        for core in cores:
+            topology.add_core(CPUCoreInfo(**core))
+        return topology
+
     def get_core_info(self, logical_id: int) -> Optional[CPUCoreInfo]:
         """获取指定逻辑CPU的核心信息"""
         return self.cores.get(logical_id)
@@ -108,6 +169,82 @@ class CPUTopology:
                 return True
         return False
 
+    @staticmethod
+    def to_mask(logical_ids: Iterable[int]) -> int:
+        mask = 0
+        for logical_id in logical_ids:
+            mask |= 1 << logical_id
+        return mask
+
+    @staticmethod
+    def from_mask(mask: int) -> List[int]:
+        """位掩码转为升序的逻辑CPU列表"""
+        ids = []
+        while mask:
+            low = mask & -mask
+            ids.append(low.bit_length() - 1)
+            mask ^= low
+        return ids
+
+    def sync_online(self):
+        """从 /sys/devices/system/cpu/online 重新读取全部在线状态"""
+        try:
+            online = parse_cpu_list(sysfs_read(f"{CPU_SYSFS_PATH}/online"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取在线CPU失败，假设全部在线: {e}")
+            online = self.cores.keys()
+        mask = self.to_mask(online) & self.to_mask(self.cores)
+        with self._lock:
+            for logical_id in self.from_mask(self.online_mask & ~mask):
+                self._freqNodes.pop(logical_id, None)
+            self.online_mask = mask
+
+    def set_online(self, logical_id: int, online: bool):
+        """更新单个CPU的在线状态，由热插拔事件和 online/offline 写入调用"""
+        if logical_id not in self.cores:
+            return
+        bit = 1 << logical_id
+        with self._lock:
+            if online:
+                self.online_mask |= bit
+            else:
+                self.online_mask &= ~bit
+            # 重新上线后 cpufreq 策略可能变化，下次使用时重新解析
+            self._freqNodes.pop(logical_id, None)
+
+    def is_online(self, logical_id: int) -> bool:
+        return bool(self.online_mask >> logical_id & 1)
+
+    def set_core_types(self, core_type_mapping: Dict[str, List[int]]):
+        """设置核心类型，参数为硬件检测结果中的 core_type_mapping"""
+        self._typeMasks = {
+            core_type: self.to_mask(cpus)
+            for core_type, cpus in core_type_mapping.items()
+        }
+
+    def get_online_mask(self, core_type: Optional[str] = None) -> int:
+        """在线CPU的位掩码，指定 core_type 时只包含该类型的核心"""
+        if core_type is None:
+            return self.online_mask
+        return self.online_mask & self._typeMasks.get(core_type, 0)
+
+    def get_online_ids(self, core_type: Optional[str] = None) -> List[int]:
+        return self.from_mask(self.get_online_mask(core_type))
+
+    def get_freq_node(self, logical_id: int) -> Optional[SysfsNode]:
+        """CPU所属 cpufreq 策略的 scaling_cur_freq 节点，同一策略的CPU共用一个"""
+        node = self._freqNodes.get(logical_id)
+        if node is not None:
+            return node
+        cpufreq_path = f"{CPU_SYSFS_PATH}/cpu{logical_id}/cpufreq"
+        if not os.path.isdir(cpufreq_path):
+            return None
+        node = get_sysfs_node(f"{os.path.realpath(cpufreq_path)}/scaling_cur_freq")
+        with self._lock:
+            if self.is_online(logical_id):
+                self._freqNodes[logical_id] = node
+        return node
+
     def get_max_freq_range(self) -> Tuple[int, int]:
         """获取所有CPU的频率范围"""
         if not self.cores:
@@ -121,19 +258,70 @@ class CPUTopology:
         return (min_freq, max_freq)
 
 
-class CPUAutoMaxFreqManager(threading.Thread):
-    def __init__(self, cpuManager: "CPUManager") -> None:
+# 自动性能上限控制器的设置项: {"mode": 控制器模式, "tunables": {模式: 参数}}
+CPU_AUTO_CONTROLLER_KEY = "cpuAutoController"
+
+
+def get_auto_controller_settings() -> Tuple[str, Dict[str, Dict[str, float]]]:
+    """读取控制器模式和各模式的参数，缺失或无效的值使用默认值"""
+    settings = confManager.getSettings() or {}
+    conf = settings.get(CPU_AUTO_CONTROLLER_KEY) or {}
+    mode = conf.get("mode", CONTROLLER_STEP)
+    if mode not in CONTROLLER_MODES:
+        mode = CONTROLLER_STEP
+    saved = conf.get("tunables") or {}
+    tunables = {m: normalize_tunables(m, saved.get(m)) for m in CONTROLLER_MODES}
+    return mode, tunables
+
+
+class CPUAutoMaxFreqManager:
+    """自动调节 CPU 性能上限，作为调节器注册到 powerArbiter 上运行"""
+
+    name = DOMAIN_CPU
+
+    def __init__(
+        self, cpuManager: "CPUManager", start_pct: Optional[int] = None
+    ) -> None:
         self._cpu_enableAutoMaxFreq = False  # 标记是否开启CPU频率优化
-        self._cpu_autoFreqCheckInterval = 0.005  # cpu占用率数据检测间隔
-        self._cpu_adjustFreqInterval = 0.5  # cpu调整间隔
-        self._cpu_addPctBase = 5  # 自动优化性能百分比的基准大小 (5%)
-        self._cpu_minBusyPercent = 40  # 优化占用率的区间最小值
-        self._cpu_maxBusyPercent = 70  # 优化占用率的区间最大值
-        self._isRunning = False  # 标记是否正在运行cpu频率优化
+        self.interval = 0.5  # cpu调整间隔
         self._cpuManager = cpuManager  # 用来获取和设置cpu频率
-        self._current_pct = 100  # 当前性能百分比
-
-        threading.Thread.__init__(self)
+        # 当前性能百分比，有学习到的起点时从起点开始调节
+        self._current_pct = 100 if start_pct is None else start_pct
+        self._lastAdjustTime = None  # 上次调整的时间
+
+        mode, tunables = get_auto_controller_settings()
+        self._controllerMode = mode
+        self._controller = create_controller(mode, tunables[mode])
+        self._controllerMaxPct = self._controller.max_pct  # 控制器设置的上限
+        self._controller.reset(self._current_pct)
+
+    def set_controller(self, mode: str, tunables: Optional[dict] = None):
+        """切换控制器，新控制器从当前性能上限开始调节"""
+        controller = create_controller(mode, tunables)
+        controller.reset(self._current_pct)
+        self._controllerMode = mode
+        self._controller = controller
+        self._controllerMaxPct = controller.max_pct
+        self.on_budget_changed()
+        logger.info(f"CPU 自动性能上限控制器: {mode} {normalize_tunables(mode, tunables)}")
+
+    def warm_start(self, pct: int):
+        """运行中切换到新的起点，控制器从该值重新开始调节"""
+        limit = self._controller.max_pct
+        pct = max(self._controller.min_pct, min(limit, pct))
+        self._controller.reset(pct)
+        self.Set_cpuMaxPct(pct)
+        logger.info(f"CPU 自动性能上限从 {pct}% 重新开始")
+
+    def on_budget_changed(self):
+        """powerArbiter 调整 CPU 上限后限制控制器输出，超出时立即降低"""
+        ceiling = powerArbiter.cpu_ceiling
+        limit = self._controllerMaxPct
+        if ceiling is not None:
+            limit = max(self._controller.min_pct, min(limit, ceiling))
+        self._controller.max_pct = limit
+        if self._cpu_enableAutoMaxFreq and self._current_pct > limit:
+            self.Set_cpuMaxPct(limit)
 
     def Set_cpuMaxPct(self, pct: int):
         """设置 CPU 最大性能百分比
@@ -149,76 +337,45 @@ class CPUAutoMaxFreqManager(threading.Thread):
             return False
 
     def CPU_enableAutoMaxFreq(self, enable):
-        # 初始化并开启自动优化线程
         self._cpu_enableAutoMaxFreq = enable
         # 自动频率开启时去开启数据收集，避免不必要的性能浪费
-        sysInfo.sysInfoManager.EnableCPUINFO(enable)
-        if enable and not self._isRunning:
-            self.start()
+        sysInfo.sysInfoManager.EnableCPUINFO(enable, "cpu_auto")
+        if enable:
+            logger.info("开始自动优化CPU性能上限")
+            powerArbiter.register(self)
+        else:
+            powerArbiter.unregister(self)
+            logger.debug("退出自动优化CPU性能上限")
 
-    def optimization_CPUFreq(self):
+    def optimization_CPUFreq(self, cpu_avgPercent: float):
         try:
-            cpu_avgPercent = sysInfo.cpu_busyPercent
-
-            # 判断cpu占用率 过高时认定cpu不够用 增加性能百分比
-            if cpu_avgPercent >= self._cpu_maxBusyPercent:
-                pct_add = (
-                    self._cpu_addPctBase * 2
-                    if cpu_avgPercent >= 99
-                    else self._cpu_addPctBase
-                )
-                new_pct = min(100, self._current_pct + pct_add)
-                if new_pct != self._current_pct:
-                    self.Set_cpuMaxPct(new_pct)
-                    logger.debug(
-                        f"当前平均CPU使用率::{cpu_avgPercent}% 大于目标范围最大值:{self._cpu_maxBusyPercent}% 增加{pct_add}% CPU性能上限 增加后的性能上限:{new_pct}%"
-                    )
-            # 判断cpu占用率 过低时认定cpu富余 降低性能百分比
-            elif cpu_avgPercent <= self._cpu_minBusyPercent:
-                pct_sub = self._cpu_addPctBase
-                new_pct = max(30, self._current_pct - pct_sub)  # 保持最低 30% 性能
-                if new_pct != self._current_pct:
-                    self.Set_cpuMaxPct(new_pct)
-                    logger.debug(
-                        f"当前平均CPU使用率::{cpu_avgPercent}% 小于目标范围最小值:{self._cpu_minBusyPercent}% 降低{pct_sub}% CPU性能上限 降低后的性能上限:{new_pct}%"
-                    )
-            # 不做任何调整
-            else:
+            now = time.monotonic()
+            dt = (
+                self.interval
+                if self._lastAdjustTime is None
+                else now - self._lastAdjustTime
+            )
+            self._lastAdjustTime = now
+
+            new_pct = self._controller.update(cpu_avgPercent, self._current_pct, dt)
+            # 只有上限变化时才写入 sysfs
+            if new_pct != self._current_pct:
                 logger.debug(
-                    f"当前平均CPU使用率::{cpu_avgPercent}% 处于目标范围{self._cpu_minBusyPercent}%-{self._cpu_maxBusyPercent}% 无需修改CPU性能上限 当前的性能上限:{self._current_pct}%"
+                    f"当前平均CPU使用率::{cpu_avgPercent}% 控制器:{self._controllerMode} CPU性能上限 {self._current_pct}% -> {new_pct}%"
                 )
+                self.Set_cpuMaxPct(new_pct)
         except Exception as e:
             logger.error(e)
 
     def isRunning(self) -> bool:
-        return self._isRunning
+        return powerArbiter.is_registered(self)
 
-    def run(self):
-        logger.info("开始自动优化CPU性能上限:" + self.name)
-        adjust_count = 0
-        self._isRunning = True
-        while True:
-            try:
-                if not self._cpu_enableAutoMaxFreq:
-                    self._isRunning = False
-                    logger.debug("退出自动优化CPU性能上限：" + self.name)
-                    break
-                if not sysInfo.has_cpuData:
-                    self.CPU_enableAutoMaxFreq(False)
-                    self.Set_cpuMaxPct(100)  # 退出时恢复到 100% 性能
-                    self._isRunning = False
-                    logger.debug("退出自动优化CPU性能上限：" + self.name)
-                    break
-                adjust_count = adjust_count + 1
-                if adjust_count >= int(
-                    self._cpu_adjustFreqInterval / self._cpu_autoFreqCheckInterval
-                ):
-                    self.optimization_CPUFreq()
-                    adjust_count = 0
-                time.sleep(self._cpu_autoFreqCheckInterval)
-            except Exception as e:
-                logger.error(e)
-                time.sleep(self._cpu_autoFreqCheckInterval)
+    def tick(self, sample: ArbiterSample):
+        if not sample.has_cpu:
+            self.CPU_enableAutoMaxFreq(False)
+            self.Set_cpuMaxPct(100)  # 退出时恢复到 100% 性能
+            return
+        self.optimization_CPUFreq(sample.cpu_busy)
 
 
 class CPUManager:
@@ -271,19 +428,47 @@ class CPUManager:
 
         # CPU自动优化线程
         self._cpuAutoMaxFreqManager = None
+        self._cpuAutoStartPct: Optional[int] = None  # 自动性能上限的起始百分比
+
+        # CPU 热插拔事件，更新拓扑中的在线状态
+        self._hotplugListener = UeventListener("cpu", self._on_cpu_uevent)
 
         # 初始化CPU信息
         self.__init_cpu_info()
+        self._init_online_tracking()
 
     def __init_cpu_info(self) -> None:
-        """初始化CPU信息 - 使用新拓扑系统"""
-        self.set_enable_All()  # 先开启所有cpu, 否则拓扑信息不全
-        self.set_cpuBoost(True)  # 先开启cpu boost, 否则频率信息范围不准确
-        self.get_isSupportSMT()  # 获取 is_support_smt
-        # self.__get_tdpMax()  # 获取 cpu_tdpMax
+        """初始化CPU信息 - 使用新拓扑系统
 
-        # 获取新的拓扑信息
-        self.cpu_topology = self.get_cpu_topology_extended()
+        拓扑、SMT 支持和核心类型检测结果按硬件指纹缓存，命中时跳过检测
+        """
+        cached = hardwareCache.get("cpu")
+        if cached:
+            try:
+                self.cpu_topology = CPUTopology.from_list(cached["topology"])
+                self.is_support_smt = cached["smt"]
+                self.detector = None
+                self.hw_analysis = cached["hw_analysis"]
+            except (KeyError, TypeError) as e:
+                logger.warning(f"CPU 硬件缓存无效: {e}")
+                cached = None
+        if cached:
+            # 上次运行可能关闭了部分核心，只有存在离线核心时才需要重新开启
+            try:
+                with open("/sys/devices/system/cpu/offline", "r") as f:
+                    offline = f.read().strip()
+            except OSError:
+                offline = "unknown"
+            if offline:
+                self.set_enable_All()
+        else:
+            self.set_enable_All()  # 先开启所有cpu, 否则拓扑信息不全
+            self.set_cpuBoost(True)  # 先开启cpu boost, 否则频率信息范围不准确
+            self.get_isSupportSMT()  # 获取 is_support_smt
+            # self.__get_tdpMax()  # 获取 cpu_tdpMax
+
+            # 获取新的拓扑信息
+            self.cpu_topology = self.get_cpu_topology_extended()
 
         # 保持现有属性的兼容性
         self.cps_ids = self.cpu_topology.get_physical_core_ids()
@@ -308,8 +493,64 @@ class CPUManager:
             logical_ids = logical_by_core[core_id]
             logger.debug(f"物理核心{core_id}: 逻辑CPU {logical_ids}")
 
+        if cached:
+            return
+
         # 🔥 新增：硬件检测增强
         self._init_hardware_detection()
+        if self.hw_analysis:
+            # 检测失败时不写入缓存，下次启动重新检测
+            hardwareCache.set(
+                "cpu",
+                {
+                    "topology": self.cpu_topology.to_list(),
+                    "smt": self.is_support_smt,
+                    "hw_analysis": self.hw_analysis,
+                },
+            )
+
+    def _init_online_tracking(self):
+        """初始化内存中的在线状态和核心类型，并开始监听热插拔事件"""
+        hw_analysis = getattr(self, "hw_analysis", None) or {}
+        core_type_mapping = hw_analysis.get("core_type_mapping", {})
+        self.cpu_topology.set_core_types(core_type_mapping)
+        self.cpu_topology.sync_online()
+        if not self._hotplugListener.start():
+            logger.warning("无法监听 CPU 热插拔事件，每次查询时重新读取在线状态")
+        self._hotplugPlanner = HotplugPlanner(self.cpu_topology, self.set_cpu_online)
+
+    def _on_cpu_uevent(self, event: Optional[Dict[str, str]]):
+        """CPU 上线/下线事件，event 为 None 表示有事件丢失"""
+        if event is None or event["ACTION"] in ("add", "remove"):
+            self.cpu_topology.sync_online()
+            return
+        if event["ACTION"] not in ("online", "offline"):
+            return
+        match = re.search(r"/cpu(\d+)$", event["DEVPATH"])
+        if match:
+            logical_id = int(match.group(1))
+            self.cpu_topology.set_online(logical_id, event["ACTION"] == "online")
+            logger.debug(f"CPU{logical_id} {event['ACTION']}")
+
+    def unload(self):
+        self._hotplugPlanner.stop()
+        self._hotplugListener.stop()
+
+    def _apply_online_set(self, online: Iterable[int]) -> bool:
+        """通过 HotplugPlanner 只切换状态需要改变的CPU"""
+        if not self._hotplugListener.active:
+            self.cpu_topology.sync_online()
+        return self._hotplugPlanner.apply(online)
+
+    def set_hotplug_interval(self, interval_ms: float) -> bool:
+        """设置两次CPU上线/下线之间的间隔(毫秒)，0为不限速"""
+        interval = self._hotplugPlanner.set_interval(interval_ms / 1000)
+        logger.info(f"CPU 热插拔间隔: {interval * 1000:.0f}ms")
+        return True
+
+    def get_hotplug_stats(self) -> dict:
+        """CPU 上线/下线的次数和耗时统计"""
+        return self._hotplugPlanner.get_stats()
 
     def _init_hardware_detection(self):
         """初始化硬件检测功能"""
@@ -413,6 +654,13 @@ class CPUManager:
         logger.info("get tdpMax by amd ryzenadj")
         # 使用 ryzenadj 设置 200w 的 stapm-limit， 然后使用 ryzenadj -i 获取实际设置的 STAPM LIMIT， 保留整数
         try:
+            ryzenadj_lib = get_ryzenadj_lib()
+            if ryzenadj_lib is not None:
+                ryzenadj_lib.set_stapm_limit(200000)
+                tdp = int(ryzenadj_lib.get_stapm_limit())
+                logger.info(f"get_cpuTDP_AMD by libryzenadj: {tdp}")
+                return tdp
+
             run_ryzenadj(["-a", "200000"])
             process = run_ryzenadj(["-i"])
             stdout, stderr = process.stdout, process.stderr
@@ -622,6 +870,12 @@ class CPUManager:
                 slow_limit = tdp
                 tctl_temp = 90
 
+                ryzenadj_lib = get_ryzenadj_lib()
+                if ryzenadj_lib is not None:
+                    logger.debug(f"set_cpuTDP {value} by libryzenadj")
+                    ryzenadj_lib.set_tdp(stapm_limit, fast_minit, slow_limit, tctl_temp)
+                    return True
+
                 command_args = [
                     "-a",
                     str(stapm_limit),
@@ -708,14 +962,8 @@ class CPUManager:
 
             logger.debug(f"最终关闭的逻辑CPU: {sorted(to_offline)}")
 
-            # 遍历所有实际存在的逻辑CPU
-            for logical_id in self.cpu_topology.get_all_logical_ids():
-                if logical_id in to_offline:
-                    self.offline_cpu(logical_id)
-                else:
-                    self.online_cpu(logical_id)
-
-            return True
+            online = set(self.cpu_topology.get_all_logical_ids()) - to_offline
+            return self._apply_online_set(online)
         except Exception:
             logger.error(
                 f"Failed to set CPU online status: value={value}", exc_info=True
@@ -1127,37 +1375,33 @@ class CPUManager:
                     core_info.cluster_cpus = logical_ids.copy()
 
     def get_cpu_online_status(self, logical_id: int) -> bool:
-        """实时获取CPU在线状态"""
+        """获取CPU在线状态"""
         if logical_id == 0:  # CPU0总是在线
             return True
-        online_path = f"/sys/devices/system/cpu/cpu{logical_id}/online"
-        try:
-            if os.path.exists(online_path):
-                with open(online_path, "r") as f:
-                    return f.read().strip() == "1"
-        except:
-            pass
-        return False
+        if not self.cpu_topology:
+            return False
+        if not self._hotplugListener.active:
+            self.cpu_topology.sync_online()
+        return self.cpu_topology.is_online(logical_id)
 
     def get_cpu_current_freq(self, logical_id: int) -> int:
         """实时获取CPU当前频率"""
-        freq_path = f"/sys/devices/system/cpu/cpu{logical_id}/cpufreq/scaling_cur_freq"
+        node = self.cpu_topology.get_freq_node(logical_id) if self.cpu_topology else None
         try:
-            if os.path.exists(freq_path):
-                with open(freq_path, "r") as f:
-                    return int(f.read().strip())
-        except:
+            if node is not None:
+                return node.read_int()
+        except (OSError, ValueError):
             pass
         return 0
 
     def get_online_logical_cpus(self) -> List[int]:
         """获取当前在线的逻辑CPU列表"""
-        online_cpus = []
-        if self.cpu_topology:
-            for logical_id in self.cpu_topology.get_all_logical_ids():
-                if self.get_cpu_online_status(logical_id):
-                    online_cpus.append(logical_id)
-        return online_cpus
+        if not self.cpu_topology:
+            return []
+        # 无法接收热插拔事件时才需要重新读取
+        if not self._hotplugListener.active:
+            self.cpu_topology.sync_online()
+        return self.cpu_topology.get_online_ids()
 
     def get_cpu_topology(self) -> Dict[int, int]:
         """保持向后兼容的拓扑接口
@@ -1181,8 +1425,9 @@ class CPUManager:
         if int(cpu_number) == 0:
             return
         cpu_online_path = f"/sys/devices/system/cpu/cpu{cpu_number}/online"
-        with open(cpu_online_path, "w") as file:
-            file.write("0")
+        sysfs_write(cpu_online_path, "0", force=True)
+        if self.cpu_topology:
+            self.cpu_topology.set_online(int(cpu_number), False)
 
     def online_cpu(self, cpu_number: int) -> None:
         """启用CPU核心。
@@ -1193,8 +1438,11 @@ class CPUManager:
         if int(cpu_number) == 0:
             return
         cpu_online_path = f"/sys/devices/system/cpu/cpu{cpu_number}/online"
-        with open(cpu_online_path, "w") as file:
-            file.write("1")
+        sysfs_write(cpu_online_path, "1", force=True)
+        # 核心重新上线后 cpufreq 节点可能被重建，清除其写入缓存
+        sysfs_invalidate(f"/sys/devices/system/cpu/cpu{cpu_number}/")
+        if self.cpu_topology:
+            self.cpu_topology.set_online(int(cpu_number), True)
 
     def set_cpu_online(self, cpu_number: int, online: bool) -> None:
         """设置CPU核心状态。
@@ -1215,6 +1463,10 @@ class CPUManager:
             str: Ryzenadj信息
         """
         try:
+            ryzenadj_lib = get_ryzenadj_lib()
+            if ryzenadj_lib is not None:
+                return ryzenadj_lib.get_info()
+
             process = run_ryzenadj(["-i"])
             stdout, stderr = process.stdout, process.stderr
             if stderr and stdout == "":
@@ -1248,6 +1500,13 @@ class CPUManager:
 
         try:
             baseline = 0x100000
+
+            ryzenadj_lib = get_ryzenadj_lib()
+            if ryzenadj_lib is not None:
+                logger.info(f"设置 RyzenAdj 降压: set_coall({hex(baseline - value)})")
+                ryzenadj_lib.set_coall(baseline - value)
+                return True
+
             command_args = [f"--set-coall={hex(baseline - value)}"]
 
             logger.info(f"设置 RyzenAdj 降压: ryzenadj {' '.join(command_args)}")
@@ -1359,8 +1618,7 @@ class CPUManager:
         """
         max_perf_pct_path = "/sys/devices/system/cpu/intel_pstate/max_perf_pct"
         if os.path.exists(max_perf_pct_path):
-            with open(max_perf_pct_path, "r") as file:
-                return int(file.read().strip())
+            return sysfs_read_int(max_perf_pct_path)
         else:
             return 0
 
@@ -1378,8 +1636,7 @@ class CPUManager:
             if value < 10 or value > 100:
                 return False
             if os.path.exists(max_perf_pct_path):
-                with open(max_perf_pct_path, "w") as file:
-                    file.write(str(value))
+                sysfs_write(max_perf_pct_path, value)
                 return True
             else:
                 return False
@@ -1405,7 +1662,13 @@ class CPUManager:
             ):
                 # 没有管理器或者当前管理器已经停止运行，则实例化一个并开启
                 if value:
-                    self._cpuAutoMaxFreqManager = CPUAutoMaxFreqManager(self)
+                    self._cpuAutoMaxFreqManager = CPUAutoMaxFreqManager(
+                        self, self._cpuAutoStartPct
+                    )
+                    if self._cpuAutoStartPct is not None:
+                        self._cpuAutoMaxFreqManager.Set_cpuMaxPct(
+                            self._cpuAutoStartPct
+                        )
                     self._cpuAutoMaxFreqManager.CPU_enableAutoMaxFreq(True)
             else:
                 # 有管理器且管理器正在运行，则直接关闭当前的管理器
@@ -1417,6 +1680,63 @@ class CPUManager:
             logger.error(e)
             return False
 
+    def set_auto_cpumax_start(self, pct: Optional[int]) -> None:
+        """设置开启自动性能上限时的起始百分比，None 为从 100% 开始。
+
+        自动性能上限已在运行时立即从该值重新开始。
+
+        Args:
+            pct (int): 起始性能百分比，由 ProfileLearner 按应用学习得到
+        """
+        if pct is not None:
+            pct = max(10, min(100, int(pct)))
+        self._cpuAutoStartPct = pct
+        # 自动性能上限在应用切换时通常保持运行，直接应用到正在运行的调节器
+        manager = self._cpuAutoMaxFreqManager
+        if pct is not None and manager is not None and manager.isRunning():
+            manager.warm_start(pct)
+
+    def get_auto_cpumax_controller(self) -> dict:
+        """获取自动性能上限的控制器模式和参数。
+
+        Returns:
+            dict: {"mode": 当前模式, "modes": 可选模式, "tunables": {模式: 参数}}
+        """
+        mode, tunables = get_auto_controller_settings()
+        return {"mode": mode, "modes": list(CONTROLLER_MODES), "tunables": tunables}
+
+    def set_auto_cpumax_controller(
+        self, mode: str, tunables: Optional[dict] = None
+    ) -> bool:
+        """设置自动性能上限的控制器模式和参数，保存到设置并应用到运行中的管理器。
+
+        Args:
+            mode (str): 控制器模式 step/pid/predictive
+            tunables (dict): 该模式的参数，未提供的参数使用默认值
+
+        Returns:
+            bool: True如果设置成功，否则False
+        """
+        try:
+            if mode not in CONTROLLER_MODES:
+                logger.error(f"无效的控制器模式: {mode}")
+                return False
+            params = normalize_tunables(mode, tunables)
+
+            settings = confManager.getSettings() or {}
+            conf = settings.get(CPU_AUTO_CONTROLLER_KEY) or {}
+            saved = conf.get("tunables") or {}
+            saved[mode] = params
+            settings[CPU_AUTO_CONTROLLER_KEY] = {"mode": mode, "tunables": saved}
+            confManager.setSettings(settings)
+
+            if self._cpuAutoMaxFreqManager is not None:
+                self._cpuAutoMaxFreqManager.set_controller(mode, params)
+            return True
+        except Exception as e:
+            logger.error(e)
+            return False
+
     def get_cpu_governor(self) -> str:
         """获取当前 CPU 调度器。
 
@@ -1540,23 +1860,7 @@ class CPUManager:
             List[int]: 在线的 CPU ID 列表
         """
         try:
-            cpu_pattern = "/sys/devices/system/cpu/cpu[0-9]*"
-            cpu_dirs = glob.glob(cpu_pattern)
-            cpu_ids = []
-            for cpu_dir in cpu_dirs:
-                try:
-                    cpu_id = int(cpu_dir.split("cpu")[-1])
-                    # 检查 CPU 是否在线
-                    online_path = f"{cpu_dir}/online"
-                    # cpu0 没有 online 文件，默认总是在线
-                    if cpu_id == 0 or (
-                        os.path.exists(online_path)
-                        and open(online_path).read().strip() == "1"
-                    ):
-                        cpu_ids.append(cpu_id)
-                except (ValueError, IOError):
-                    continue
-            return sorted(cpu_ids)
+            return self.get_online_logical_cpus()
         except Exception as e:
             logger.error(f"获取在线 CPU 列表失败: {str(e)}")
             return []
@@ -1687,8 +1991,7 @@ class CPUManager:
             scaling_max_freq_path = (
                 f"/sys/devices/system/cpu/cpu{cpu_id}/cpufreq/scaling_max_freq"
             )
-            with open(scaling_max_freq_path, "w") as f:
-                f.write(str(freq))
+            sysfs_write(scaling_max_freq_path, freq)
 
             logger.debug(f"CPU{cpu_id}最大频率已设置为 {freq}kHz")
             return True
@@ -1746,8 +2049,7 @@ class CPUManager:
                 return False
 
             # 获取在线CPU列表
-            online_cpus = self.get_online_logical_cpus()
-            if not online_cpus:
+            if not self.get_online_logical_cpus():
                 logger.error("没有检测到在线CPU")
                 return False
 
@@ -1763,15 +2065,11 @@ class CPUManager:
                     logger.warning(f"未知的核心类型: {core_type}，跳过")
                     continue
 
-                cpu_list = core_type_mapping[core_type]
-                logger.debug(f"核心类型 {core_type} 包含CPU: {cpu_list}")
+                cpu_list = self.cpu_topology.get_online_ids(core_type)
+                logger.debug(f"核心类型 {core_type} 在线的CPU: {cpu_list}")
 
-                # 遍历该核心类型的所有CPU
+                # 遍历该核心类型在线的CPU
                 for cpu_id in cpu_list:
-                    if cpu_id not in online_cpus:
-                        logger.debug(f"CPU{cpu_id} 不在线，跳过")
-                        continue
-
                     total_count += 1
                     if self._set_cpu_max_freq_direct(cpu_id, target_freq):
                         success_count += 1
@@ -1835,14 +2133,8 @@ class CPUManager:
                 f"total={len(all_logical_ids)}"
             )
 
-            for logical_id in all_logical_ids:
-                if logical_id in online_set:
-                    self.online_cpu(logical_id)
-                else:
-                    self.offline_cpu(logical_id)
-
             self.enable_cpu_num = len(online_set)
-            return True
+            return self._apply_online_set(online_set)
         except Exception:
             logger.error(
                 "Failed to set CPU online list", exc_info=True
@@ -1959,4 +2251,4 @@ class CPUManager:
         return result
 
 
-cpuManager = CPUManager()
+cpuManager = serviceRegistry.lazy("cpu", CPUManager)
@@ -0,0 +1,335 @@
+"""CPU 性能上限(max_perf_pct)的自动调节控制器
+
+控制器只根据 CPU 占用率计算新的性能上限，不直接访问硬件，
+由 CPUAutoMaxFreqManager 周期调用。本模块不依赖插件环境，可以单独运行
+回放录制的 /proc/stat 数据比较不同控制器:
+
+    python cpu_controller.py --record trace.txt --duration 60
+    python cpu_controller.py trace.txt
+"""
+
+import argparse
+import time
+from typing import Dict, List, Optional, Tuple
+
+CONTROLLER_STEP = "step"  # 原有的区间步进控制
+CONTROLLER_PID = "pid"  # 以目标占用率为设定值的 PID 控制
+CONTROLLER_PREDICTIVE = "predictive"  # 使用占用率趋势预测的 PID 控制
+
+CONTROLLER_MODES = (CONTROLLER_STEP, CONTROLLER_PID, CONTROLLER_PREDICTIVE)
+
+# 各模式的默认参数，设置中未提供的参数使用默认值
+DEFAULT_TUNABLES: Dict[str, Dict[str, float]] = {
+    CONTROLLER_STEP: {
+        "min_busy": 40,  # 占用率低于该值时降低上限
+        "max_busy": 70,  # 占用率高于该值时提高上限
+        "step": 5,  # 每次调整的百分比
+        "min_pct": 30,
+        "max_pct": 100,
+    },
+    CONTROLLER_PID: {
+        "target": 60,  # 目标占用率
+        "kp": 0.2,
+        "ki": 1.0,  # 每秒
+        "kd": 0.0,
+        "min_pct": 30,
+        "max_pct": 100,
+        "min_delta": 3,  # 变化小于该值时不写入
+        "deadband": 10,  # 占用率与目标相差小于该值时视为无误差
+    },
+    CONTROLLER_PREDICTIVE: {
+        "target": 60,
+        "kp": 0.5,
+        "ki": 1.5,
+        "kd": 0.0,
+        "min_pct": 30,
+        "max_pct": 100,
+        "min_delta": 3,
+        "deadband": 10,
+        "alpha": 0.5,  # 占用率 EWMA 系数
+        "beta": 0.3,  # 趋势 EWMA 系数
+        "horizon": 1.0,  # 预测时长(秒)
+    },
+}
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return max(low, min(high, value))
+
+
+def normalize_tunables(mode: str, tunables: Optional[dict]) -> Dict[str, float]:
+    """合并默认参数，忽略未知参数和非数值参数"""
+    result = dict(DEFAULT_TUNABLES[mode])
+    for key, value in (tunables or {}).items():
+        if key in result and isinstance(value, (int, float)):
+            result[key] = float(value)
+    return result
+
+
+class StepController:
+    """占用率超出区间时按固定步长调整，与原有行为一致"""
+
+    def __init__(self, min_busy=40, max_busy=70, step=5, min_pct=30, max_pct=100):
+        self.min_busy = min_busy
+        self.max_busy = max_busy
+        self.step = step
+        self.min_pct = min_pct
+        self.max_pct = max_pct
+
+    def reset(self, current_pct: int):
+        pass
+
+    def update(self, busy: float, current_pct: int, dt: float) -> int:
+        if busy >= self.max_busy:
+            step = self.step * 2 if busy >= 99 else self.step
+            return int(min(self.max_pct, current_pct + step))
+        if busy <= self.min_busy:
+            return int(max(self.min_pct, current_pct - self.step))
+        return current_pct
+
+
+class PIDController:
+    """以目标占用率为设定值的位置式 PID
+
+    积分项以当前上限为初值，输出饱和且误差继续推向饱和方向时停止积分(抗积分饱和)。
+    """
+
+    def __init__(
+        self,
+        target=60,
+        kp=0.2,
+        ki=1.0,
+        kd=0.0,
+        min_pct=30,
+        max_pct=100,
+        min_delta=3,
+        deadband=10,
+    ):
+        self.target = target
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.min_pct = min_pct
+        self.max_pct = max_pct
+        self.min_delta = min_delta
+        self.deadband = deadband
+        self._integral = float(max_pct)
+        self._lastError: Optional[float] = None
+
+    def reset(self, current_pct: int):
+        self._integral = float(_clamp(current_pct, self.min_pct, self.max_pct))
+        self._lastError = None
+
+    def _measure(self, busy: float, dt: float) -> float:
+        return busy
+
+    def update(self, busy: float, current_pct: int, dt: float) -> int:
+        dt = max(dt, 1e-3)
+        error = self._measure(busy, dt) - self.target
+        # 死区内不调节，避免占用率噪声导致频繁写入
+        if abs(error) < self.deadband:
+            error = 0.0
+        else:
+            error -= self.deadband if error > 0 else -self.deadband
+        derivative = 0.0 if self._lastError is None else (error - self._lastError) / dt
+        self._lastError = error
+
+        integral = self._integral + self.ki * error * dt
+        output = integral + self.kp * error + self.kd * derivative
+        if (output > self.max_pct and error > 0) or (output < self.min_pct and error < 0):
+            integral = self._integral
+            output = integral + self.kp * error + self.kd * derivative
+        self._integral = _clamp(integral, self.min_pct, self.max_pct)
+
+        new_pct = int(round(_clamp(output, self.min_pct, self.max_pct)))
+        # 小幅变化不写入，但到达上下限时总是写入
+        if abs(new_pct - current_pct) < self.min_delta and new_pct not in (
+            self.min_pct,
+            self.max_pct,
+        ):
+            return current_pct
+        return new_pct
+
+
+class PredictiveController(PIDController):
+    """用 EWMA 平滑占用率并估计趋势，以预测 horizon 秒后的占用率作为 PID 输入"""
+
+    def __init__(self, alpha=0.5, beta=0.3, horizon=1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.alpha = alpha
+        self.beta = beta
+        self.horizon = horizon
+        self._level: Optional[float] = None
+        self._trend = 0.0
+
+    def reset(self, current_pct: int):
+        super().reset(current_pct)
+        self._level = None
+        self._trend = 0.0
+
+    def _measure(self, busy: float, dt: float) -> float:
+        if self._level is None:
+            self._level = busy
+            return busy
+        level = self.alpha * busy + (1 - self.alpha) * self._level
+        self._trend = (
+            self.beta * (level - self._level) / dt + (1 - self.beta) * self._trend
+        )
+        self._level = level
+        return _clamp(level + self._trend * self.horizon, 0, 100)
+
+
+def create_controller(mode: str, tunables: Optional[dict] = None):
+    if mode not in CONTROLLER_MODES:
+        mode = CONTROLLER_STEP
+    params = normalize_tunables(mode, tunables)
+    if mode == CONTROLLER_PID:
+        return PIDController(**params)
+    if mode == CONTROLLER_PREDICTIVE:
+        return PredictiveController(**params)
+    return StepController(**params)
+
+
+# ---------------------------------------------------------------------------
+# 回放工具
+# ---------------------------------------------------------------------------
+
+
+def _stat_times(fields: List[str]) -> Tuple[int, int]:
+    """与 sysInfo.parse_stat_times 相同的计算方式，返回 (空闲时间, 总时间)"""
+    values = [int(v) for v in fields[1:11]]
+    values += [0] * (10 - len(values))
+    user, nice, system, idle, iowait, irq, softirq, steal, guest, guestnice = values
+    free = idle + iowait
+    total = (
+        (user - guest)
+        + (nice - guestnice)
+        + (system + irq + softirq)
+        + free
+        + steal
+        + (guest + guestnice)
+    )
+    return free, total
+
+
+def load_trace(path: str) -> List[Tuple[float, float]]:
+    """读取录制的 trace，返回 [(时间, 占用率)]
+
+    每行格式为 "<单调时间> cpu <user> <nice> ..."，即时间戳加 /proc/stat 的首行。
+    """
+    samples = []
+    last = None
+    with open(path, "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 6 or parts[1] != "cpu":
+                continue
+            timestamp = float(parts[0])
+            free, total = _stat_times(parts[1:])
+            if last is not None:
+                totalDelta = max(total - last[2], 1)
+                busy = 100 - (free - last[1]) * 100 / totalDelta
+                samples.append((timestamp, _clamp(busy, 0, 100)))
+            last = (timestamp, free, total)
+    return samples
+
+
+def record_trace(path: str, duration: float, interval: float):
+    end = time.monotonic() + duration
+    with open(path, "w") as out:
+        while time.monotonic() < end:
+            with open("/proc/stat", "r") as f:
+                out.write(f"{time.monotonic():.3f} {f.readline()}")
+            time.sleep(interval)
+
+
+def replay(
+    controller,
+    samples: List[Tuple[float, float]],
+    step_threshold: float = 20,
+    settle_tolerance: float = 3,
+) -> dict:
+    """用录制的占用率回放控制器
+
+    假设 trace 在 100% 性能上限下录制，负载不变时占用率与性能上限成反比:
+    busy = min(100, demand * 100 / pct)。
+
+    Returns:
+        dict: writes 写入次数, settling_s 负载突变后上限稳定所需的平均/最大时间,
+            overshoot 相对稳定值的最大超调(百分点), starved_s 占用率满载的时间,
+            mean_pct 平均性能上限
+    """
+    pct = 100
+    controller.reset(pct)
+    history = []  # (时间, 负载, 上限)
+    writes = 0
+    starved = 0.0
+    lastTime = samples[0][0] if samples else 0.0
+    for timestamp, demand in samples:
+        dt = max(timestamp - lastTime, 1e-3)
+        lastTime = timestamp
+        busy = min(100.0, demand * 100 / pct)
+        if busy >= 99:
+            starved += dt
+        new_pct = controller.update(busy, pct, dt)
+        if new_pct != pct:
+            writes += 1
+            pct = new_pct
+        history.append((timestamp, demand, pct))
+
+    # 负载突变点把 trace 分段，每段以末尾的上限为稳定值
+    steps = [
+        i
+        for i in range(1, len(history))
+        if abs(history[i][1] - history[i - 1][1]) >= step_threshold
+    ]
+    settling = []
+    overshoot = 0.0
+    for n, start in enumerate(steps):
+        end = steps[n + 1] if n + 1 < len(steps) else len(history)
+        segment = history[start:end]
+        final = segment[-1][2]
+        settledAt = segment[0][0]
+        for timestamp, _, value in segment:
+            if abs(value - final) > settle_tolerance:
+                settledAt = timestamp
+        settling.append(settledAt - segment[0][0])
+        direction = 1 if final >= history[start - 1][2] else -1
+        overshoot = max(
+            overshoot, max((value - final) * direction for _, _, value in segment)
+        )
+
+    return {
+        "writes": writes,
+        "settling_s": {
+            "mean": round(sum(settling) / len(settling), 2) if settling else 0,
+            "max": round(max(settling), 2) if settling else 0,
+        },
+        "overshoot": round(overshoot, 1),
+        "starved_s": round(starved, 2),
+        "mean_pct": round(sum(h[2] for h in history) / len(history), 1)
+        if history
+        else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="replay /proc/stat traces")
+    parser.add_argument("trace", help="trace file")
+    parser.add_argument("--record", action="store_true", help="record a new trace")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--interval", type=float, default=0.5)
+    args = parser.parse_args()
+
+    if args.record:
+        record_trace(args.trace, args.duration, args.interval)
+        return
+
+    samples = load_trace(args.trace)
+    print(f"{len(samples)} samples")
+    for mode in CONTROLLER_MODES:
+        print(mode, replay(create_controller(mode), samples))
+
+
+if __name__ == "__main__":
+    main()
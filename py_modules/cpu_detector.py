@@ -16,17 +16,14 @@ License: Same as PowerControl project
 """
 
 import os
-import re
-import subprocess
 from collections import defaultdict
 from dataclasses import dataclass, field
 from typing import Dict, List, Tuple
 import yaml
 
-def get_env():
-    env = os.environ.copy()
-    env["LD_LIBRARY_PATH"] = ""
-    return env
+from cpuid_reader import read_cpuid, read_cpuid_all
+
+CPUID_LEAF_HYBRID = 0x1A  # Native model ID enumeration leaf
 
 @dataclass
 class CPUCoreInfo:
@@ -101,6 +98,7 @@ class CPUDetector:
         """Initialize CPU detector"""
         self.topology = CPUTopology()
         self._populate_basic_topology()
+        self._cpuid_core_types = None
         
         # Load CPU core whitelist for hybrid strategy
         self.cpu_whitelist = load_cpu_core_whitelist()
@@ -176,61 +174,35 @@ class CPUDetector:
             core.core_type_cpuid = self._get_cpuid_core_type(core.logical_id)
             core.l3_cache_access = self._check_l3_cache_access(core.logical_id)
 
+    def _probe_cpuid_core_types(self) -> Dict[int, int]:
+        """Read CPUID.1Ah EAX[31-24] for all CPUs in parallel (cached)"""
+        if self._cpuid_core_types is not None:
+            return self._cpuid_core_types
+
+        self._cpuid_core_types = {}
+        cpus = sorted(self.topology.cores)
+        if not cpus:
+            return self._cpuid_core_types
+        # Leaves above the max basic leaf return data of the highest leaf on Intel
+        max_leaf = read_cpuid(cpus[0], 0)
+        if max_leaf is None or max_leaf[0] < CPUID_LEAF_HYBRID:
+            return self._cpuid_core_types
+
+        for logical_id, regs in read_cpuid_all(cpus, CPUID_LEAF_HYBRID).items():
+            core_type = (regs[0] >> 24) & 0xFF if regs is not None else 0
+            # 0 means the core type is not enumerated (non-hybrid CPU)
+            if core_type:
+                self._cpuid_core_types[logical_id] = core_type
+        return self._cpuid_core_types
+
     def _get_cpuid_core_type(self, logical_id: int) -> int:
         """Get core type from CPUID.1Ah for Intel CPUs"""
-        try:
-            # Method 1: Use cpuid tool if available
-            cmd = [
-                "taskset",
-                "-c",
-                str(logical_id),
-                "cpuid",
-                "-r",
-                "-1",
-                "-l",
-                "0x1a",
-                "-s",
-                "0",
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=3, env=get_env())
-
-            if result.returncode == 0:
-                lines = result.stdout.split("\n")
-                target_cpu_found = False
-
-                for line in lines:
-                    if line.strip().startswith(f"CPU {logical_id}:"):
-                        target_cpu_found = True
-                        continue
-
-                    if target_cpu_found and "eax=" in line.lower():
-                        eax_match = re.search(r"eax=0x([0-9a-fA-F]+)", line)
-                        if eax_match:
-                            eax_value = int(eax_match.group(1), 16)
-                            return (eax_value >> 24) & 0xFF
-                        break
-        except (
-            subprocess.SubprocessError,
-            FileNotFoundError,
-            PermissionError,
-            ValueError,
-        ):
-            pass
-
-        # Method 2: Try /dev/cpu/X/cpuid (needs root)
-        try:
-            cpuid_path = f"/dev/cpu/{logical_id}/cpuid"
-            if os.path.exists(cpuid_path):
-                with open(cpuid_path, "rb") as f:
-                    f.seek(0x1A * 16)  # CPUID leaf 0x1a
-                    data = f.read(16)
-                    if len(data) == 16:
-                        eax = int.from_bytes(data[0:4], "little")
-                        return (eax >> 24) & 0xFF
-        except (FileNotFoundError, PermissionError, OSError, ValueError):
-            pass
+        # Method 1: Native CPUID (/dev/cpu/X/cpuid or pinned thread)
+        core_type = self._probe_cpuid_core_types().get(logical_id)
+        if core_type is not None:
+            return core_type
 
-        # Method 3: Fallback for known CPU models
+        # Method 2: Fallback for known CPU models
         if self.topology.vendor == "GenuineIntel":
             if self.topology.family == 6 and self.topology.model == 0xAA:  # Meteor Lake
                 # Use frequency-based heuristic
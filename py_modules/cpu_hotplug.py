@@ -0,0 +1,187 @@
+"""CPU 热插拔执行器
+
+每次写入 cpuN/online 都是一次 stop-machine 操作，耗时数毫秒，期间所有核心暂停。
+HotplugPlanner 根据拓扑中缓存的在线状态只执行需要的切换:
+
+- 已处于目标状态的 CPU 不写入
+- 先上线再下线，切换过程中可用核心数不会低于目标
+- interval > 0 时第一个切换立即执行，其余由 reactor 每隔 interval 秒执行一个，
+  把停顿分散开；新的请求会取消尚未执行的切换并按最新状态重新规划
+- 记录每个方向的切换次数和耗时
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import logger
+from reactor import ReactorTimer, reactor
+
+HOTPLUG_INTERVAL = 0.0  # 默认不限速(秒)
+HOTPLUG_INTERVAL_MAX = 0.5
+
+Transition = Tuple[int, bool]  # (逻辑CPU, 是否上线)
+
+
+class _TransitionStats:
+    __slots__ = ("count", "failed", "total", "max", "last")
+
+    def __init__(self):
+        self.count = 0
+        self.failed = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, duration: float, ok: bool):
+        self.count += 1
+        if not ok:
+            self.failed += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.last = duration
+
+    def to_dict(self) -> dict:
+        avg = self.total / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "failed": self.failed,
+            "avg_ms": round(avg * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+            "last_ms": round(self.last * 1000, 2),
+        }
+
+
+class HotplugPlanner:
+    """计算并执行最少的 CPU 上线/下线切换
+
+    topology 为 cpu.CPUTopology，其 online_mask 作为当前状态；
+    write(logical_id, online) 执行单个切换并更新 topology，失败时抛出异常。
+    """
+
+    def __init__(
+        self,
+        topology,
+        write: Callable[[int, bool], None],
+        interval: float = HOTPLUG_INTERVAL,
+    ):
+        self._topology = topology
+        self._write = write
+        self.interval = interval
+        self._lock = threading.RLock()
+        self._pending: List[Transition] = []
+        self._timer: Optional[ReactorTimer] = None
+        self._skipped = 0
+        self._stats: Dict[bool, _TransitionStats] = {
+            True: _TransitionStats(),
+            False: _TransitionStats(),
+        }
+
+    def plan(self, online: Iterable[int]) -> List[Transition]:
+        """从当前状态到目标在线集合所需的切换，上线在前、下线在后
+
+        cpu0 无法下线，总是视为在线；不在拓扑中的 CPU 被忽略。
+        """
+        topology = self._topology
+        all_mask = topology.to_mask(topology.cores)
+        target = (topology.to_mask(online) | 1) & all_mask
+        current = topology.online_mask
+        to_online = topology.from_mask(target & ~current)
+        to_offline = topology.from_mask(current & ~target & ~1)
+        return [(cpu, True) for cpu in to_online] + [
+            # 从编号最大的开始下线，通常是 SMT 线程
+            (cpu, False)
+            for cpu in reversed(to_offline)
+        ]
+
+    def apply(self, online: Iterable[int]) -> bool:
+        """切换到目标在线集合
+
+        Returns:
+            bool: 已执行的切换全部成功时返回 True，限速时剩余的切换在后台执行
+        """
+        online = list(online)
+        with self._lock:
+            self._cancel_pending()
+            transitions = self.plan(online)
+            self._skipped += len(self._topology.cores) - len(transitions)
+            if not transitions:
+                logger.debug("CPU 在线状态已是目标状态，无需切换")
+                return True
+            to_online = [cpu for cpu, up in transitions if up]
+            to_offline = [cpu for cpu, up in transitions if not up]
+            logger.info(f"CPU 热插拔: 上线 {to_online}, 下线 {to_offline}")
+            if self.interval <= 0:
+                # 某个切换失败时继续执行其余切换
+                return all([self._execute(t) for t in transitions])
+
+            first, self._pending = transitions[0], transitions[1:]
+            ok = self._execute(first)
+            self._schedule_next()
+            return ok
+
+    def set_interval(self, interval: float) -> float:
+        """设置两次切换之间的间隔(秒)，限制在 0 到 HOTPLUG_INTERVAL_MAX 之间
+
+        改为不限速时立即执行剩余的切换。
+
+        Returns:
+            float: 实际使用的间隔
+        """
+        interval = min(max(float(interval), 0.0), HOTPLUG_INTERVAL_MAX)
+        with self._lock:
+            self.interval = interval
+            if interval <= 0 and self._pending:
+                pending = self._pending
+                self._cancel_pending()
+                for transition in pending:
+                    self._execute(transition)
+        return interval
+
+    def _execute(self, transition: Transition) -> bool:
+        logical_id, online = transition
+        start = time.perf_counter()
+        try:
+            self._write(logical_id, online)
+            ok = True
+        except Exception as e:
+            logger.error(f"CPU{logical_id} {'上线' if online else '下线'}失败: {e}")
+            ok = False
+        duration = time.perf_counter() - start
+        self._stats[online].add(duration, ok)
+        logger.debug(
+            f"CPU{logical_id} {'online' if online else 'offline'} "
+            f"{duration * 1000:.2f}ms"
+        )
+        return ok
+
+    def _schedule_next(self):
+        if self._pending:
+            self._timer = reactor.call_later(self.interval, self._run_next)
+
+    def _run_next(self):
+        with self._lock:
+            self._timer = None
+            if not self._pending:
+                return
+            self._execute(self._pending.pop(0))
+            self._schedule_next()
+
+    def _cancel_pending(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._pending = []
+
+    def stop(self):
+        with self._lock:
+            self._cancel_pending()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "online": self._stats[True].to_dict(),
+                "offline": self._stats[False].to_dict(),
+                "skipped": self._skipped,
+                "pending": len(self._pending),
+            }
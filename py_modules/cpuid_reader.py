@@ -0,0 +1,155 @@
+"""
+Native CPUID reader for PowerControl
+
+Reads CPUID leaves for a given logical CPU without spawning external tools:
+
+1. pread() on /dev/cpu/N/cpuid (Linux cpuid driver). The file offset selects
+   the leaf (low 32 bits) and subleaf (high 32 bits); each read returns
+   EAX, EBX, ECX, EDX as four little-endian 32-bit values.
+2. When the cpuid module is not loaded, a worker thread pins itself to the
+   target CPU with os.sched_setaffinity() and executes the CPUID instruction
+   through a small x86-64 code stub called via ctypes.
+
+read_cpuid_all() probes several CPUs in parallel.
+"""
+
+import ctypes
+import mmap
+import os
+import platform
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+CpuidRegs = Tuple[int, int, int, int]  # (eax, ebx, ecx, edx)
+
+CPUID_DEV_PATH = "/dev/cpu/{}/cpuid"
+MAX_WORKERS = 32
+
+_REGS = struct.Struct("<4I")
+
+# void cpuid(uint32_t leaf, uint32_t subleaf, uint32_t out[4])  (System V ABI)
+_CPUID_STUB = bytes(
+    [
+        0x53,  # push rbx
+        0x49, 0x89, 0xD0,  # mov r8, rdx
+        0x89, 0xF8,  # mov eax, edi
+        0x89, 0xF1,  # mov ecx, esi
+        0x0F, 0xA2,  # cpuid
+        0x41, 0x89, 0x00,  # mov [r8], eax
+        0x41, 0x89, 0x58, 0x04,  # mov [r8+4], ebx
+        0x41, 0x89, 0x48, 0x08,  # mov [r8+8], ecx
+        0x41, 0x89, 0x50, 0x0C,  # mov [r8+12], edx
+        0x5B,  # pop rbx
+        0xC3,  # ret
+    ]
+)  # fmt: skip
+
+_stubLock = threading.Lock()
+_stub: Optional[Callable] = None
+_stubFailed = False
+
+
+def read_cpuid_dev(logical_id: int, leaf: int, subleaf: int = 0) -> Optional[CpuidRegs]:
+    """Read a CPUID leaf through /dev/cpu/N/cpuid, None if unavailable"""
+    try:
+        fd = os.open(CPUID_DEV_PATH.format(logical_id), os.O_RDONLY | os.O_CLOEXEC)
+    except OSError:
+        return None
+    try:
+        data = os.pread(fd, _REGS.size, (subleaf << 32) | leaf)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+    if len(data) != _REGS.size:
+        return None
+    return _REGS.unpack(data)
+
+
+def _get_stub() -> Optional[Callable]:
+    """Map the CPUID code stub once, None on non-x86-64 or if W+X mappings are denied"""
+    global _stub, _stubFailed
+    with _stubLock:
+        if _stub is not None or _stubFailed:
+            return _stub
+        try:
+            if platform.machine() not in ("x86_64", "AMD64"):
+                raise OSError(f"unsupported architecture {platform.machine()}")
+            buf = mmap.mmap(
+                -1,
+                mmap.PAGESIZE,
+                prot=mmap.PROT_READ | mmap.PROT_WRITE | mmap.PROT_EXEC,
+            )
+            buf.write(_CPUID_STUB)
+            address = ctypes.addressof(ctypes.c_char.from_buffer(buf))
+            func = ctypes.CFUNCTYPE(
+                None, ctypes.c_uint32, ctypes.c_uint32, ctypes.POINTER(ctypes.c_uint32)
+            )(address)
+            # The mapping must outlive the function pointer
+            func._buffer = buf
+            _stub = func
+        except (OSError, ValueError, AttributeError):
+            _stubFailed = True
+        return _stub
+
+
+def read_cpuid_pinned(logical_id: int, leaf: int, subleaf: int = 0) -> Optional[CpuidRegs]:
+    """Execute CPUID on the target CPU by pinning the calling thread to it
+
+    The thread's previous affinity is restored afterwards.
+    """
+    stub = _get_stub()
+    if stub is None:
+        return None
+    try:
+        previous = os.sched_getaffinity(0)
+        os.sched_setaffinity(0, {logical_id})
+    except OSError:
+        return None
+    try:
+        out = (ctypes.c_uint32 * 4)()
+        stub(leaf, subleaf, out)
+        return tuple(out)
+    finally:
+        try:
+            os.sched_setaffinity(0, previous)
+        except OSError:
+            pass
+
+
+def read_cpuid(logical_id: int, leaf: int, subleaf: int = 0) -> Optional[CpuidRegs]:
+    """Read a CPUID leaf for one logical CPU, None if no method works"""
+    regs = read_cpuid_dev(logical_id, leaf, subleaf)
+    if regs is None:
+        regs = read_cpuid_pinned(logical_id, leaf, subleaf)
+    return regs
+
+
+def read_cpuid_all(
+    logical_ids: Iterable[int], leaf: int, subleaf: int = 0
+) -> Dict[int, Optional[CpuidRegs]]:
+    """Read the same CPUID leaf on several CPUs in parallel"""
+    logical_ids = list(logical_ids)
+    if not logical_ids:
+        return {}
+    workers = min(len(logical_ids), MAX_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cpuid") as pool:
+        results = pool.map(lambda cpu: read_cpuid(cpu, leaf, subleaf), logical_ids)
+        return dict(zip(logical_ids, results))
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    leaf = int(sys.argv[1], 0) if len(sys.argv) > 1 else 0x1A
+    cpus = sorted(os.sched_getaffinity(0))
+    start = time.perf_counter()
+    regs = read_cpuid_all(cpus, leaf)
+    elapsed = (time.perf_counter() - start) * 1000
+    for cpu, value in regs.items():
+        text = " ".join(f"{r:#010x}" for r in value) if value else "unavailable"
+        print(f"CPU {cpu}: {text}")
+    print(f"{len(cpus)} CPUs in {elapsed:.2f} ms")
@@ -0,0 +1,596 @@
+"""Minimal pure-Python D-Bus client over the bus unix socket.
+
+Keeps one authenticated connection open, pipelines method calls and
+dispatches signals from a reader thread. Only the parts of the protocol
+PowerControl needs are implemented (no unix fd passing, no object export).
+"""
+
+import os
+import socket
+import struct
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import logger
+
+SYSTEM_BUS_ADDRESS = "unix:path=/run/dbus/system_bus_socket"
+
+BUS_NAME = "org.freedesktop.DBus"
+BUS_PATH = "/org/freedesktop/DBus"
+PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
+
+METHOD_CALL = 1
+METHOD_RETURN = 2
+ERROR = 3
+SIGNAL = 4
+
+FLAG_NO_REPLY_EXPECTED = 0x1
+
+# Header field codes
+FIELD_PATH = 1
+FIELD_INTERFACE = 2
+FIELD_MEMBER = 3
+FIELD_ERROR_NAME = 4
+FIELD_REPLY_SERIAL = 5
+FIELD_DESTINATION = 6
+FIELD_SENDER = 7
+FIELD_SIGNATURE = 8
+
+_FIELD_TYPES = {
+    FIELD_PATH: "o",
+    FIELD_INTERFACE: "s",
+    FIELD_MEMBER: "s",
+    FIELD_ERROR_NAME: "s",
+    FIELD_REPLY_SERIAL: "u",
+    FIELD_DESTINATION: "s",
+    FIELD_SENDER: "s",
+    FIELD_SIGNATURE: "g",
+}
+
+_FIXED = {
+    "y": ("B", 1),
+    "b": ("I", 4),
+    "n": ("h", 2),
+    "q": ("H", 2),
+    "i": ("i", 4),
+    "u": ("I", 4),
+    "x": ("q", 8),
+    "t": ("Q", 8),
+    "d": ("d", 8),
+    "h": ("I", 4),
+}
+
+_ALIGN = {"s": 4, "o": 4, "g": 1, "v": 1, "a": 4, "(": 8, "{": 8}
+
+DEFAULT_TIMEOUT = 5.0
+
+
+class DBusError(Exception):
+    def __init__(self, name: str, message: str = ""):
+        super().__init__(f"{name}: {message}" if message else name)
+        self.name = name
+        self.message = message
+
+
+class Variant:
+    """Explicitly typed value for 'v' arguments."""
+
+    __slots__ = ("signature", "value")
+
+    def __init__(self, signature: str, value: Any):
+        self.signature = signature
+        self.value = value
+
+    def __repr__(self):
+        return f"Variant({self.signature!r}, {self.value!r})"
+
+
+def _type_end(sig: str, start: int) -> int:
+    """Return the index just past the single complete type at sig[start]."""
+    c = sig[start]
+    if c == "a":
+        return _type_end(sig, start + 1)
+    if c in "({":
+        close = ")" if c == "(" else "}"
+        i = start + 1
+        while sig[i] != close:
+            i = _type_end(sig, i)
+        return i + 1
+    return start + 1
+
+
+def split_signature(sig: str) -> List[str]:
+    types = []
+    i = 0
+    while i < len(sig):
+        end = _type_end(sig, i)
+        types.append(sig[i:end])
+        i = end
+    return types
+
+
+def _alignment(sig: str) -> int:
+    c = sig[0]
+    if c in _FIXED:
+        return _FIXED[c][1]
+    return _ALIGN[c]
+
+
+class _Writer:
+    def __init__(self, endian: str = "<"):
+        self.endian = endian
+        self.buf = bytearray()
+
+    def align(self, n: int):
+        self.buf.extend(b"\0" * (-len(self.buf) % n))
+
+    def write(self, sig: str, value):
+        c = sig[0]
+        if c in _FIXED:
+            fmt, size = _FIXED[c]
+            self.align(size)
+            if c == "b":
+                value = 1 if value else 0
+            self.buf.extend(struct.pack(self.endian + fmt, value))
+        elif c in "so":
+            data = value.encode()
+            self.align(4)
+            self.buf.extend(struct.pack(self.endian + "I", len(data)))
+            self.buf.extend(data + b"\0")
+        elif c == "g":
+            data = value.encode()
+            self.buf.extend(struct.pack("B", len(data)) + data + b"\0")
+        elif c == "v":
+            if not isinstance(value, Variant):
+                value = Variant(*value)
+            self.write("g", value.signature)
+            self.write(value.signature, value.value)
+        elif c == "a":
+            elem = sig[1:]
+            self.align(4)
+            length_pos = len(self.buf)
+            self.buf.extend(b"\0\0\0\0")
+            self.align(_alignment(elem))
+            start = len(self.buf)
+            items = value.items() if elem[0] == "{" else value
+            for item in items:
+                self.write(elem, item)
+            struct.pack_into(
+                self.endian + "I", self.buf, length_pos, len(self.buf) - start
+            )
+        elif c in "({":
+            self.align(8)
+            for field_sig, field in zip(split_signature(sig[1:-1]), value):
+                self.write(field_sig, field)
+        else:
+            raise ValueError(f"unsupported D-Bus type {sig!r}")
+
+
+class _Reader:
+    def __init__(self, data: bytes, endian: str, offset: int = 0):
+        self.data = data
+        self.endian = endian
+        self.pos = offset
+
+    def align(self, n: int):
+        self.pos += -self.pos % n
+
+    def _unpack(self, fmt: str, size: int):
+        value = struct.unpack_from(self.endian + fmt, self.data, self.pos)[0]
+        self.pos += size
+        return value
+
+    def read(self, sig: str):
+        c = sig[0]
+        if c in _FIXED:
+            fmt, size = _FIXED[c]
+            self.align(size)
+            value = self._unpack(fmt, size)
+            return bool(value) if c == "b" else value
+        if c in "so":
+            self.align(4)
+            length = self._unpack("I", 4)
+            value = self.data[self.pos : self.pos + length].decode()
+            self.pos += length + 1
+            return value
+        if c == "g":
+            length = self._unpack("B", 1)
+            value = self.data[self.pos : self.pos + length].decode()
+            self.pos += length + 1
+            return value
+        if c == "v":
+            return self.read(self.read("g"))
+        if c == "a":
+            elem = sig[1:]
+            self.align(4)
+            length = self._unpack("I", 4)
+            self.align(_alignment(elem))
+            end = self.pos + length
+            items = []
+            while self.pos < end:
+                items.append(self.read(elem))
+            return dict(items) if elem[0] == "{" else items
+        if c in "({":
+            self.align(8)
+            return tuple(self.read(t) for t in split_signature(sig[1:-1]))
+        raise ValueError(f"unsupported D-Bus type {sig!r}")
+
+
+class Message:
+    __slots__ = ("type", "flags", "serial", "fields", "body")
+
+    def __init__(self, type_: int, fields: Dict[int, Any], body: tuple = (), flags=0):
+        self.type = type_
+        self.flags = flags
+        self.serial = 0
+        self.fields = fields
+        self.body = body
+
+    @property
+    def path(self) -> Optional[str]:
+        return self.fields.get(FIELD_PATH)
+
+    @property
+    def interface(self) -> Optional[str]:
+        return self.fields.get(FIELD_INTERFACE)
+
+    @property
+    def member(self) -> Optional[str]:
+        return self.fields.get(FIELD_MEMBER)
+
+    @property
+    def sender(self) -> Optional[str]:
+        return self.fields.get(FIELD_SENDER)
+
+    @property
+    def reply_serial(self) -> Optional[int]:
+        return self.fields.get(FIELD_REPLY_SERIAL)
+
+    def to_bytes(self, serial: int) -> bytes:
+        signature = self.fields.get(FIELD_SIGNATURE, "")
+        body = _Writer()
+        for sig, value in zip(split_signature(signature), self.body):
+            body.write(sig, value)
+
+        header = _Writer()
+        header.write("y", ord("l"))
+        header.write("y", self.type)
+        header.write("y", self.flags)
+        header.write("y", 1)
+        header.write("u", len(body.buf))
+        header.write("u", serial)
+        fields = [
+            (code, Variant(_FIELD_TYPES[code], value))
+            for code, value in self.fields.items()
+            if value
+        ]
+        header.write("a(yv)", fields)
+        header.align(8)
+        return bytes(header.buf + body.buf)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Message":
+        endian = "<" if data[0:1] == b"l" else ">"
+        reader = _Reader(data, endian, 12)
+        fields = dict(reader.read("a(yv)"))
+        reader.align(8)
+        msg = cls(data[1], fields, flags=data[2])
+        msg.serial = struct.unpack_from(endian + "I", data, 8)[0]
+        signature = fields.get(FIELD_SIGNATURE, "")
+        msg.body = tuple(reader.read(sig) for sig in split_signature(signature))
+        return msg
+
+    @staticmethod
+    def total_length(data: bytes) -> Optional[int]:
+        """Length of the message at the start of data, None if not enough bytes."""
+        if len(data) < 16:
+            return None
+        endian = "<" if data[0:1] == b"l" else ">"
+        body_len, _, fields_len = struct.unpack_from(endian + "III", data, 4)
+        header_len = 16 + fields_len
+        header_len += -header_len % 8
+        return header_len + body_len
+
+
+def method_call(
+    destination: str,
+    path: str,
+    interface: str,
+    member: str,
+    signature: str = "",
+    body: Sequence = (),
+) -> Message:
+    fields = {
+        FIELD_PATH: path,
+        FIELD_INTERFACE: interface,
+        FIELD_MEMBER: member,
+        FIELD_DESTINATION: destination,
+    }
+    if signature:
+        fields[FIELD_SIGNATURE] = signature
+    return Message(METHOD_CALL, fields, tuple(body))
+
+
+class _PendingReply:
+    __slots__ = ("event", "message", "sock")
+
+    def __init__(self, sock: socket.socket):
+        self.event = threading.Event()
+        self.message: Optional[Message] = None
+        self.sock = sock  # connection the call was sent on
+
+
+def _connect_address(address: str) -> socket.socket:
+    for part in address.split(";"):
+        transport, _, params = part.partition(":")
+        if transport != "unix":
+            continue
+        options = dict(item.split("=", 1) for item in params.split(",") if "=" in item)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            if "path" in options:
+                sock.connect(options["path"])
+            elif "abstract" in options:
+                sock.connect("\0" + options["abstract"])
+            else:
+                raise OSError(f"unsupported D-Bus address {part}")
+            return sock
+        except OSError:
+            sock.close()
+            raise
+    raise OSError(f"no usable D-Bus address in {address}")
+
+
+class DBusConnection:
+    """One long-lived bus connection shared by all callers."""
+
+    def __init__(self, address: Optional[str] = None):
+        self._address = (
+            address or os.environ.get("DBUS_SYSTEM_BUS_ADDRESS") or SYSTEM_BUS_ADDRESS
+        )
+        self._sock: Optional[socket.socket] = None
+        self._serial = 0
+        self._sendLock = threading.Lock()
+        self._pending: Dict[int, _PendingReply] = {}
+        self._pendingLock = threading.Lock()
+        self._matches: List[Tuple[Dict[str, str], Callable[[Message], None]]] = []
+        self._reader: Optional[threading.Thread] = None
+        self._connectLock = threading.Lock()
+        self.unique_name: Optional[str] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def connect(self):
+        with self._connectLock:
+            if self._sock is not None:
+                return
+            sock = _connect_address(self._address)
+            try:
+                sock.settimeout(DEFAULT_TIMEOUT)
+                self._authenticate(sock)
+                sock.settimeout(None)
+            except Exception:
+                sock.close()
+                raise
+            self._sock = sock
+            self._reader = threading.Thread(
+                target=self._read_loop, args=(sock,), name="DBusReader", daemon=True
+            )
+            self._reader.start()
+            # Hello must be the first call on the connection
+            self.unique_name = self.call(BUS_NAME, BUS_PATH, BUS_NAME, "Hello")[0]
+            # Re-register match rules after a reconnect
+            for rule, _ in list(self._matches):
+                self._send_add_match(rule)
+
+    @staticmethod
+    def _authenticate(sock: socket.socket):
+        uid = str(os.geteuid()).encode().hex()
+        sock.sendall(b"\0AUTH EXTERNAL " + uid.encode() + b"\r\n")
+        response = b""
+        while not response.endswith(b"\r\n"):
+            chunk = sock.recv(256)
+            if not chunk:
+                raise OSError("D-Bus connection closed during auth")
+            response += chunk
+        if not response.startswith(b"OK"):
+            raise OSError(f"D-Bus auth rejected: {response.strip().decode()}")
+        sock.sendall(b"BEGIN\r\n")
+
+    def _read_loop(self, sock: socket.socket):
+        buf = b""
+        try:
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                buf += chunk
+                while True:
+                    length = Message.total_length(buf)
+                    if length is None or len(buf) < length:
+                        break
+                    data, buf = buf[:length], buf[length:]
+                    try:
+                        self._dispatch(Message.from_bytes(data))
+                    except Exception as e:
+                        logger.error(f"D-Bus message handling failed: {e}", exc_info=True)
+        except OSError as e:
+            logger.debug(f"D-Bus reader stopped: {e}")
+        finally:
+            self._on_disconnect(sock)
+
+    def _on_disconnect(self, sock: socket.socket):
+        with self._connectLock:
+            if self._sock is sock:
+                self._sock = None
+        try:
+            sock.close()
+        except OSError:
+            pass
+        # Only fail calls sent on this socket; after a reconnect the old
+        # reader may finish after calls were sent on the new connection
+        with self._pendingLock:
+            failed = [
+                self._pending.pop(serial)
+                for serial, reply in list(self._pending.items())
+                if reply.sock is sock
+            ]
+        for reply in failed:
+            reply.event.set()
+
+    def _dispatch(self, msg: Message):
+        if msg.type in (METHOD_RETURN, ERROR):
+            with self._pendingLock:
+                reply = self._pending.pop(msg.reply_serial, None)
+            if reply is not None:
+                reply.message = msg
+                reply.event.set()
+        elif msg.type == SIGNAL:
+            for rule, callback in list(self._matches):
+                if self._match(rule, msg):
+                    try:
+                        callback(msg)
+                    except Exception as e:
+                        logger.error(f"D-Bus signal callback failed: {e}", exc_info=True)
+
+    @staticmethod
+    def _match(rule: Dict[str, str], msg: Message) -> bool:
+        if rule.get("interface") not in (None, msg.interface):
+            return False
+        if rule.get("member") not in (None, msg.member):
+            return False
+        if rule.get("path") not in (None, msg.path):
+            return False
+        if "path_namespace" in rule and not (msg.path or "").startswith(
+            rule["path_namespace"]
+        ):
+            return False
+        if "arg0" in rule and (not msg.body or msg.body[0] != rule["arg0"]):
+            return False
+        return True
+
+    def _send(self, messages: Sequence[Message]) -> List[_PendingReply]:
+        if self._sock is None:
+            self.connect()
+        replies = []
+        data = bytearray()
+        with self._sendLock:
+            for msg in messages:
+                self._serial += 1
+                msg.serial = self._serial
+                reply = None
+                if not msg.flags & FLAG_NO_REPLY_EXPECTED:
+                    reply = _PendingReply(self._sock)
+                    with self._pendingLock:
+                        self._pending[msg.serial] = reply
+                replies.append(reply)
+                data += msg.to_bytes(msg.serial)
+            try:
+                self._sock.sendall(data)
+            except OSError:
+                self.close()
+                raise
+        return replies
+
+    @staticmethod
+    def _wait(reply: _PendingReply, timeout: float) -> tuple:
+        if not reply.event.wait(timeout):
+            raise DBusError("org.freedesktop.DBus.Error.Timeout", "no reply")
+        msg = reply.message
+        if msg is None:
+            raise DBusError("org.freedesktop.DBus.Error.Disconnected", "bus closed")
+        if msg.type == ERROR:
+            text = msg.body[0] if msg.body and isinstance(msg.body[0], str) else ""
+            raise DBusError(msg.fields.get(FIELD_ERROR_NAME, "unknown"), text)
+        return msg.body
+
+    def call(
+        self,
+        destination: str,
+        path: str,
+        interface: str,
+        member: str,
+        signature: str = "",
+        body: Sequence = (),
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> tuple:
+        msg = method_call(destination, path, interface, member, signature, body)
+        return self._wait(self._send([msg])[0], timeout)
+
+    def call_many(
+        self, messages: Sequence[Message], timeout: float = DEFAULT_TIMEOUT
+    ) -> List[tuple]:
+        """Send several calls in one write and wait for all replies.
+
+        All replies are awaited before any error is raised, so one failing
+        call does not leave the others unread.
+        """
+        replies = self._send(messages)
+        results = []
+        error = None
+        for reply in replies:
+            try:
+                results.append(self._wait(reply, timeout))
+            except DBusError as e:
+                results.append(None)
+                error = error or e
+        if error is not None:
+            raise error
+        return results
+
+    def get_property(self, destination: str, path: str, interface: str, name: str):
+        return self.call(
+            destination, path, PROPERTIES_INTERFACE, "Get", "ss", (interface, name)
+        )[0]
+
+    def get_all_properties(
+        self, destination: str, path: str, interface: str
+    ) -> Dict[str, Any]:
+        return self.call(
+            destination, path, PROPERTIES_INTERFACE, "GetAll", "s", (interface,)
+        )[0]
+
+    @staticmethod
+    def set_property_message(
+        destination: str, path: str, interface: str, name: str, value: Variant
+    ) -> Message:
+        return method_call(
+            destination,
+            path,
+            PROPERTIES_INTERFACE,
+            "Set",
+            "ssv",
+            (interface, name, value),
+        )
+
+    def set_property(
+        self, destination: str, path: str, interface: str, name: str, value: Variant
+    ):
+        msg = self.set_property_message(destination, path, interface, name, value)
+        self._wait(self._send([msg])[0], DEFAULT_TIMEOUT)
+
+    def name_has_owner(self, name: str) -> bool:
+        return self.call(BUS_NAME, BUS_PATH, BUS_NAME, "NameHasOwner", "s", (name,))[0]
+
+    def _send_add_match(self, rule: Dict[str, str]):
+        text = ",".join(["type='signal'"] + [f"{k}='{v}'" for k, v in rule.items()])
+        self.call(BUS_NAME, BUS_PATH, BUS_NAME, "AddMatch", "s", (text,))
+
+    def add_match(self, callback: Callable[[Message], None], **rule: str):
+        """Subscribe to signals matching the given rule keys
+        (interface, member, path, path_namespace, arg0)."""
+        self._matches.append((rule, callback))
+        if self._sock is not None:
+            self._send_add_match(rule)
+
+    def close(self):
+        with self._connectLock:
+            sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
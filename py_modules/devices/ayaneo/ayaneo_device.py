@@ -1,8 +1,6 @@
-import sys
-import threading
-
 from config import logger
-from ec import EC
+from ec import ECSession
+from power_supply import powerSupplyMonitor
 from utils import version_compare
 
 from ..firmware_attribute_device import FirmwareAttributeDevice
@@ -24,17 +22,13 @@ class AyaneoDevice(FirmwareAttributeDevice):
         self.ec_bypass_charge_open = EC_BYPASS_CHARGE_OPEN
         self.ec_bypass_charge_close = EC_BYPASS_CHARGE_CLOSE
         self._charge_limit: int | None = None
-        self._monitor_thread = None
+        self._monitoring = False  # 是否正在监控电池状态
+        self._bypass_state: bool | None = None  # 最近一次读取或写入的旁路供电状态
         self.ec_version_of_bypass_charge = None
 
     def _get_ec_version(self) -> list[int]:
-        return [
-            EC.Read(0x00),
-            EC.Read(0x01),
-            EC.Read(0x02),
-            EC.Read(0x03),
-            EC.Read(0x04),
-        ]
+        with ECSession() as session:
+            return list(session.read_range(0x00, 5))
 
     def supports_bypass_charge(self) -> bool:
         # If bypass charge EC version requirement is not configured, return False
@@ -78,6 +72,7 @@ class AyaneoDevice(FirmwareAttributeDevice):
             self.ec_bypass_charge_addr,
             self.ec_bypass_charge_open if value else self.ec_bypass_charge_close,
         )
+        self._bypass_state = value
 
     def set_bypass_charge(self, value: bool) -> None:
         """
@@ -97,128 +92,53 @@ class AyaneoDevice(FirmwareAttributeDevice):
 
         self._set_bypass_charge(value)
 
-    class _MonitorThread(threading.Thread):
-        def __init__(self, *args, **kwargs):
-            super().__init__(*args, **kwargs)
-            self.exc = None
-
-        def run(self):
-            try:
-                super().run()
-            except Exception:
-                self.exc = sys.exc_info()
-
-    def _monitor_battery(self):
+    def _on_power_supply(self, state: dict):
         """
-        监控电池状态的线程函数
+        电源状态变化时调整旁路供电，由 powerSupplyMonitor 在电量或充电状态变化时调用
         """
-        import sys
-        import time
-
-        from config import logger
-        from utils import get_battery_percentage, is_battery_charging
-
-        SLEEP_TIME = 10
+        if self._charge_limit is None:
+            return
+        battery_percentage = state["capacity"]
+        if battery_percentage < 0:
+            return
 
-        logger.info("Start monitoring battery status")
-        logger.debug(
-            f"Thread status: {self._monitor_thread and self._monitor_thread.is_alive()}"
+        # 旁路供电状态只在开始监控时从 EC 读取，之后由 _set_bypass_charge 维护
+        current_bypass = self._bypass_state
+        logger.info(
+            f"Battery status: {battery_percentage}%, charging: {state['charging']}, bypass: {current_bypass}, limit: {self._charge_limit}%"
         )
 
-        last_battery_status = None
-
-        logger.info(f"Battery limit: {self._charge_limit}%")
-
-        while self._monitor_thread and self._monitor_thread.is_alive():
-            try:
-                battery_percentage = get_battery_percentage()
-                is_charging = is_battery_charging()
-
-                logger.debug(
-                    f"Battery status: {battery_percentage}%, charging: {is_charging}, limit: {self._charge_limit}%"
-                )
-
-                # 获取当前旁路供电状态
-                current_bypass = self.get_bypass_charge()
-
-                # Only log when status changes
-                current_status = (
-                    battery_percentage,
-                    is_charging,
-                    current_bypass,
-                    self._charge_limit,
-                )
-                if current_status != last_battery_status:
-                    logger.info(
-                        f"Battery status: {battery_percentage}%, charging: {is_charging}, bypass: {current_bypass}, limit: {self._charge_limit}%"
-                    )
-                    last_battery_status = current_status
-
-                if (
-                    battery_percentage >= self._charge_limit
-                    and not current_bypass
-                    # and is_charging
-                ):
-                    logger.info(
-                        f"Battery level >= limit {self._charge_limit}%, enabling bypass charge"
-                    )
-                    self._set_bypass_charge(True)
-                elif (
-                    battery_percentage < self._charge_limit
-                    and current_bypass
-                    # and not is_charging
-                ):
-                    logger.info(
-                        f"Battery level < limit {self._charge_limit}%, disabling bypass charge"
-                    )
-                    self._set_bypass_charge(False)
-            except Exception as e:
-                logger.error(f"Error monitoring battery status: {str(e)}")
-                logger.error(f"Error details: {str(sys.exc_info())}")
-                raise  # 重新抛出异常，让外部能够捕获
-
-            time.sleep(SLEEP_TIME)
+        if battery_percentage >= self._charge_limit and not current_bypass:
+            logger.info(
+                f"Battery level >= limit {self._charge_limit}%, enabling bypass charge"
+            )
+            self._set_bypass_charge(True)
+        elif battery_percentage < self._charge_limit and current_bypass:
+            logger.info(
+                f"Battery level < limit {self._charge_limit}%, disabling bypass charge"
+            )
+            self._set_bypass_charge(False)
 
     def _start_monitor(self):
         """
-        启动电池监控线程
+        开始监控电池状态
         """
-        if self._monitor_thread and self._monitor_thread.is_alive():
-            # logger.info(f"Monitor thread is already running, thread ID: {id(self._monitor_thread)}")
+        if self._monitoring:
             return
-
-        logger.info("Creating new monitor thread")
-        self._monitor_thread = self._MonitorThread(
-            target=self._monitor_battery, daemon=True
-        )
-        thread_id = id(self._monitor_thread)
-        self._monitor_thread.start()
-        logger.debug(
-            f"Monitor thread started, thread ID: {thread_id}, is alive: {self._monitor_thread.is_alive()}"
-        )
+        logger.info(f"Start monitoring battery status, limit: {self._charge_limit}%")
+        self._bypass_state = self.get_bypass_charge()
+        self._monitoring = True
+        powerSupplyMonitor.subscribe(self._on_power_supply)
 
     def _stop_monitor(self):
         """
-        停止电池监控线程
+        停止监控电池状态
         """
-        if self._monitor_thread and self._monitor_thread.is_alive():
-            logger.info("Stopping monitor thread")
-            self._monitor_thread.join()
-
-            # 检查线程是否有异常
-            if hasattr(self._monitor_thread, "exc") and self._monitor_thread.exc:
-                logger.error("Monitor thread encountered an error")
-                exc_type, exc_value, exc_traceback = self._monitor_thread.exc
-                logger.error(f"Exception type: {exc_type}")
-                logger.error(f"Exception value: {exc_value}")
-                import traceback
-
-                logger.error(
-                    f"Exception traceback: {''.join(traceback.format_tb(exc_traceback))}"
-                )
-
-            self._monitor_thread = None
-            logger.info("Monitor thread stopped")
+        if not self._monitoring:
+            return
+        powerSupplyMonitor.unsubscribe(self._on_power_supply)
+        self._monitoring = False
+        logger.info("Stop monitoring battery status")
 
     def load(self) -> None:
         """
@@ -250,6 +170,11 @@ class AyaneoDevice(FirmwareAttributeDevice):
 
         self._charge_limit = value
         self._start_monitor()
+        # 监控可能已在运行，立即按新的限制检查一次；
+        # 电池已充满等情况下可能不会再有电量或状态变化的事件
+        state = powerSupplyMonitor.get_state()
+        if state is not None:
+            self._on_power_supply(state)
 
     def unload(self) -> None:
         """
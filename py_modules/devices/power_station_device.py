@@ -1,11 +1,15 @@
-import re
-import shutil
-import subprocess
+import threading
 import time
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional
 
 from config import logger
-from utils import get_env  # Import environment variable cleanup function
+from dbus_client import (
+    PROPERTIES_INTERFACE,
+    DBusConnection,
+    DBusError,
+    Message,
+    Variant,
+)
 
 from .power_device import PowerDevice
 
@@ -17,74 +21,85 @@ DBUS_GPU_INTERFACE = "org.shadowblip.GPU"
 DBUS_GPU_CARD_INTERFACE = "org.shadowblip.GPU.Card"
 DBUS_TDP_INTERFACE = "org.shadowblip.GPU.Card.TDP"
 
-# Command execution constants
-COMMAND_TIMEOUT = 5.0  # Command execution timeout (seconds)
-CACHE_TIMEOUT = 30.0  # GPU card path cache timeout (seconds)
+# TDP properties that only change when PowerStation says so
+CACHED_TDP_PROPERTIES = ("MinTdp", "MaxTdp", "MaxBoost")
 
 
 class PowerStationDevice(PowerDevice):
-    def __init__(self):
+    def __init__(self, bus_address: Optional[str] = None):
         super().__init__()
+        self._bus_address = bus_address
+        self._bus: Optional[DBusConnection] = None
+        self._bus_lock = threading.Lock()
         self._gpu_card_path: Optional[str] = None
-        self._card_path_timestamp: float = 0
+        self._tdp_cache: Dict[str, float] = {}
         self._last_error_time: float = 0
         self._error_cooldown: float = 10.0  # Error cooldown time
         self._support_power_station: bool = None
 
-    def _check_busctl_available(self) -> bool:
-        """
-        Check if busctl tool is available
-
-        Returns:
-            bool: True if busctl is available
-        """
-        return shutil.which("busctl") is not None
+    def unload(self) -> None:
+        super().unload()
+        if self._bus is not None:
+            self._bus.close()
+            self._bus = None
 
-    def _run_busctl_command(self, args: List[str]) -> Tuple[bool, str]:
+    def _get_bus(self) -> DBusConnection:
         """
-        Execute busctl command and return result
-
-        Args:
-            args (List[str]): busctl command arguments
-
-        Returns:
-            Tuple[bool, str]: (success, output)
-        """
-        cmd = ["busctl"] + args
-
-        try:
-            logger.debug(f"Executing busctl command: {' '.join(cmd)}")
+        Return the shared system bus connection, subscribing to PowerStation
+        signals on first use
 
-            # Use get_env() to clear LD_LIBRARY_PATH
-            env = get_env()
-
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=COMMAND_TIMEOUT, env=env
-            )
-
-            success = result.returncode == 0
-            output = result.stdout.strip() if success else result.stderr.strip()
-
-            if not success:
-                logger.debug(
-                    f"Busctl command failed with return code {result.returncode}: {output}"
+        Raises:
+            OSError: The bus socket is not reachable
+        """
+        with self._bus_lock:
+            if self._bus is None:
+                bus = DBusConnection(self._bus_address)
+                bus.add_match(
+                    self._on_properties_changed,
+                    interface=PROPERTIES_INTERFACE,
+                    member="PropertiesChanged",
+                    path_namespace=DBUS_BASE_PATH,
                 )
+                bus.add_match(
+                    self._on_name_owner_changed,
+                    interface="org.freedesktop.DBus",
+                    member="NameOwnerChanged",
+                    arg0=DBUS_SERVICE_NAME,
+                )
+                bus.connect()
+                self._bus = bus
+            return self._bus
 
-            return success, output
-
-        except subprocess.TimeoutExpired:
-            logger.error(f"Busctl command timeout after {COMMAND_TIMEOUT}s")
-            return False, "Command timeout"
-        except Exception as e:
-            logger.error(f"Busctl command execution failed: {e}")
-            return False, str(e)
+    def _on_properties_changed(self, msg: Message) -> None:
+        """Keep the cached TDP range in sync with PropertiesChanged signals"""
+        if msg.path != self._gpu_card_path or not msg.body:
+            return
+        interface, changed, invalidated = msg.body
+        if interface != DBUS_TDP_INTERFACE:
+            return
+        for name, value in changed.items():
+            if name in CACHED_TDP_PROPERTIES:
+                self._tdp_cache[name] = float(value)
+        for name in invalidated:
+            self._tdp_cache.pop(name, None)
+        logger.debug(f"PowerStation TDP properties changed: {changed} {invalidated}")
+
+    def _on_name_owner_changed(self, msg: Message) -> None:
+        """PowerStation restarted or exited, drop everything learnt from it"""
+        logger.info(f"PowerStation owner changed: {msg.body}")
+        self._invalidate_cache()
+        self._support_power_station = None
+
+    def _invalidate_cache(self) -> None:
+        self._gpu_card_path = None
+        self._tdp_cache = {}
 
     def supports_power_station(self) -> bool:
         """
         Check if PowerStation functionality is supported
 
         Returns:
-            bool: True if busctl is available and PowerStation service is running
+            bool: True if the system bus is reachable and PowerStation service is running
         """
 
         if self._support_power_station is not None:
@@ -124,76 +139,6 @@ class PowerStationDevice(PowerDevice):
             return False
         return True
 
-    def _parse_busctl_property(self, output: str) -> Optional[float]:
-        """
-        Parse busctl get-property output
-
-        Args:
-            output (str): busctl command output, format like "d 15.000000"
-
-        Returns:
-            Optional[float]: Parsed value, None if failed
-        """
-        try:
-            # busctl output format: "d 15.000000" (type + value)
-            parts = output.strip().split(maxsplit=1)
-            if len(parts) >= 2 and parts[0] == "d":
-                return float(parts[1])
-        except (ValueError, IndexError) as e:
-            logger.error(f"Failed to parse busctl property output '{output}': {e}")
-        return None
-
-    def _parse_busctl_string_property(self, output: str) -> Optional[str]:
-        """
-        Parse busctl get-property string output
-
-        Args:
-            output (str): busctl command output, format like 's "discrete"'
-
-        Returns:
-            Optional[str]: Parsed string value, None if failed
-        """
-        try:
-            # busctl string output format: 's "discrete"'
-            parts = output.strip().split(maxsplit=1)
-            if len(parts) >= 2 and parts[0] == "s":
-                return parts[1].strip('"')
-        except (ValueError, IndexError) as e:
-            logger.error(f"Failed to parse busctl string output '{output}': {e}")
-        return None
-
-    def _parse_busctl_array(self, output: str) -> List[str]:
-        """
-        Parse busctl call returned object path array
-
-        Args:
-            output (str): busctl command output
-
-        Returns:
-            List[str]: Parsed card name list
-        """
-        cards = []
-        try:
-            # busctl object path array output format: ao 2 "/path1" "/path2"
-            # Extract all quoted paths
-            path_pattern = r'"/[^"]*"'
-            matches = re.findall(path_pattern, output)
-
-            for match in matches:
-                path = match.strip('"')
-                # Extract card name from path
-                if DBUS_BASE_PATH in path:
-                    card_name = path.replace(DBUS_BASE_PATH + "/", "")
-                    if card_name.startswith(DBUS_CARD_PREFIX):
-                        cards.append(card_name)
-
-            logger.debug(f"Parsed GPU cards from busctl output: {cards}")
-
-        except Exception as e:
-            logger.error(f"Failed to parse busctl array output '{output}': {e}")
-
-        return cards
-
     def _check_dbus_service(self) -> bool:
         """
         Check if PowerStation DBus service is running
@@ -201,16 +146,12 @@ class PowerStationDevice(PowerDevice):
         Returns:
             bool: True if service is available
         """
-        if not self._check_busctl_available():
-            logger.debug("busctl not available")
+        try:
+            return self._get_bus().name_has_owner(DBUS_SERVICE_NAME)
+        except (OSError, DBusError) as e:
+            logger.debug(f"System bus not available: {e}")
             return False
 
-        success, output = self._run_busctl_command(["list"])
-        if success:
-            return DBUS_SERVICE_NAME in output
-
-        return False
-
     def _get_power_info_via_power_station(self) -> Optional[str]:
         """Return PowerStation power info, or None if unavailable."""
         if not self.supports_power_station():
@@ -290,7 +231,7 @@ class PowerStationDevice(PowerDevice):
 
     def _find_gpu_card_path(self) -> str:
         """
-        Find appropriate GPU card path with caching mechanism
+        Find appropriate GPU card path, cached until PowerStation restarts
 
         Returns:
             str: GPU card DBus path
@@ -298,38 +239,24 @@ class PowerStationDevice(PowerDevice):
         Raises:
             Exception: No suitable GPU card found
         """
-        current_time = time.time()
-
-        # Check if cache is valid
-        if (
-            self._gpu_card_path
-            and current_time - self._card_path_timestamp < CACHE_TIMEOUT
-        ):
+        if self._gpu_card_path:
             return self._gpu_card_path
 
-        # Re-discover GPU cards
         try:
-            if not self._check_dbus_service():
-                raise Exception("PowerStation service not available")
-
             cards = self._query_gpu_cards()
             if not cards:
                 raise Exception("No GPU cards found")
 
             card_path = self._select_appropriate_card(cards)
-
-            # Update cache
             self._gpu_card_path = card_path
-            self._card_path_timestamp = current_time
+            self._tdp_cache = {}
 
             logger.info(f"Selected GPU card path: {card_path}")
             return card_path
 
         except Exception as e:
             logger.error(f"Failed to find GPU card path: {e}")
-            # Clear invalid cache
-            self._gpu_card_path = None
-            self._card_path_timestamp = 0
+            self._invalidate_cache()
             raise
 
     def _query_gpu_cards(self) -> List[str]:
@@ -339,22 +266,17 @@ class PowerStationDevice(PowerDevice):
         Returns:
             List[str]: GPU card name list
         """
-        cmd_args = [
-            "call",
-            DBUS_SERVICE_NAME,
-            DBUS_BASE_PATH,
-            DBUS_GPU_INTERFACE,
-            "EnumerateCards",
-        ]
-
-        success, output = self._run_busctl_command(cmd_args)
-        if success:
-            cards = self._parse_busctl_array(output)
-            logger.debug(f"Found GPU cards: {cards}")
-            return cards
-
-        logger.error("Failed to query GPU cards")
-        return []
+        paths = self._get_bus().call(
+            DBUS_SERVICE_NAME, DBUS_BASE_PATH, DBUS_GPU_INTERFACE, "EnumerateCards"
+        )[0]
+        cards = []
+        for path in paths:
+            if path.startswith(DBUS_BASE_PATH + "/"):
+                card_name = path[len(DBUS_BASE_PATH) + 1 :]
+                if card_name.startswith(DBUS_CARD_PREFIX):
+                    cards.append(card_name)
+        logger.debug(f"Found GPU cards: {cards}")
+        return cards
 
     def _select_appropriate_card(self, cards: List[str]) -> str:
         """
@@ -399,19 +321,9 @@ class PowerStationDevice(PowerDevice):
         Returns:
             Optional[str]: GPU type ("discrete" or "integrated")
         """
-        cmd_args = [
-            "get-property",
-            DBUS_SERVICE_NAME,
-            card_path,
-            DBUS_GPU_CARD_INTERFACE,
-            "Class",
-        ]
-
-        success, output = self._run_busctl_command(cmd_args)
-        if success:
-            return self._parse_busctl_string_property(output)
-
-        return None
+        return self._get_bus().get_property(
+            DBUS_SERVICE_NAME, card_path, DBUS_GPU_CARD_INTERFACE, "Class"
+        )
 
     def _set_tdp_via_power_station(self, tdp: int) -> bool:
         """Write TDP via PowerStation only. Returns False on failure (no fallback)."""
@@ -427,9 +339,8 @@ class PowerStationDevice(PowerDevice):
                 tdp = max(min_tdp, min(max_tdp, tdp))
                 logger.info(f"Clamped TDP to {tdp}W")
 
-            self._set_tdp_property("TDP", float(tdp))
             max_boost = self._get_tdp_property("MaxBoost")
-            self._set_tdp_property("Boost", max_boost)
+            self._set_tdp_properties({"TDP": float(tdp), "Boost": max_boost})
             logger.info(f"Successfully set PowerStation TDP to {tdp}W")
             return True
         except Exception as e:
@@ -456,7 +367,8 @@ class PowerStationDevice(PowerDevice):
 
     def _get_tdp_property(self, property_name: str) -> float:
         """
-        Get TDP related property value
+        Get TDP related property value. MinTdp, MaxTdp and MaxBoost are
+        served from cache, which PropertiesChanged keeps up to date
 
         Args:
             property_name (str): Property name (TDP, MinTdp, MaxTdp, MaxBoost)
@@ -467,54 +379,58 @@ class PowerStationDevice(PowerDevice):
         Raises:
             Exception: Failed to get property
         """
-        card_path = self._find_gpu_card_path()
+        cached = self._tdp_cache.get(property_name)
+        if cached is not None:
+            return cached
 
-        cmd_args = [
-            "get-property",
-            DBUS_SERVICE_NAME,
-            card_path,
-            DBUS_TDP_INTERFACE,
-            property_name,
-        ]
-
-        success, output = self._run_busctl_command(cmd_args)
-        if success:
-            value = self._parse_busctl_property(output)
-            if value is not None:
-                logger.debug(f"Got {property_name}: {value}")
-                return value
-
-        raise Exception(f"Failed to get {property_name}")
+        card_path = self._find_gpu_card_path()
+        bus = self._get_bus()
+        if property_name in CACHED_TDP_PROPERTIES:
+            # One GetAll fills the whole range cache
+            props = bus.get_all_properties(
+                DBUS_SERVICE_NAME, card_path, DBUS_TDP_INTERFACE
+            )
+            for name in CACHED_TDP_PROPERTIES:
+                if name in props:
+                    self._tdp_cache[name] = float(props[name])
+            if property_name not in self._tdp_cache:
+                raise Exception(f"Failed to get {property_name}")
+            value = self._tdp_cache[property_name]
+        else:
+            value = float(
+                bus.get_property(
+                    DBUS_SERVICE_NAME, card_path, DBUS_TDP_INTERFACE, property_name
+                )
+            )
+        logger.debug(f"Got {property_name}: {value}")
+        return value
 
-    def _set_tdp_property(self, property_name: str, value: float) -> None:
+    def _set_tdp_properties(self, values: Dict[str, float]) -> None:
         """
-        Set TDP related property value
+        Set several TDP properties, all Set calls go out in one round trip
 
         Args:
-            property_name (str): Property name
-            value (float): Property value
+            values (Dict[str, float]): Property name to value
 
         Raises:
             Exception: Failed to set property
         """
         card_path = self._find_gpu_card_path()
-
-        cmd_args = [
-            "set-property",
-            DBUS_SERVICE_NAME,
-            card_path,
-            DBUS_TDP_INTERFACE,
-            property_name,
-            "d",  # double type
-            str(value),
+        messages = [
+            DBusConnection.set_property_message(
+                DBUS_SERVICE_NAME,
+                card_path,
+                DBUS_TDP_INTERFACE,
+                name,
+                Variant("d", float(value)),
+            )
+            for name, value in values.items()
         ]
-
-        success, output = self._run_busctl_command(cmd_args)
-        if success:
-            logger.debug(f"Set {property_name} to {value}")
-            return
-
-        raise Exception(f"Failed to set {property_name} to {value}: {output}")
+        try:
+            self._get_bus().call_many(messages)
+        except DBusError as e:
+            raise Exception(f"Failed to set {values}: {e}")
+        logger.debug(f"Set {values}")
 
     def _set_tdp_unlimited_via_power_station(self) -> bool:
         if not self.supports_power_station() or not self._has_valid_power_station_tdp_range():
@@ -556,5 +472,4 @@ class PowerStationDevice(PowerDevice):
             logger.error(f"PowerStation command error during {operation}: {error}")
 
         # Clear cache to force re-discovery
-        self._gpu_card_path = None
-        self._card_path_timestamp = 0
+        self._invalidate_cache()
@@ -1,4 +1,7 @@
+import os
+import threading
 import time
+from typing import Dict, Iterable, Optional
 
 import portio
 from config import logger
@@ -10,6 +13,16 @@ EC_OBF_BIT = 0
 RD_EC = 0x80  # Read Embedded Controller
 WR_EC = 0x81  # Write Embedded Controller
 
+EC_SPACE_SIZE = 256
+# ec_sys 模块提供的 EC 空间，可一次读取全部 256 字节
+EC_DEBUGFS_IO_PATH = "/sys/kernel/debug/ec/ec0/io"
+
+EC_SPIN_COUNT = 2000  # 忙等的轮询次数，超过后开始让出 CPU
+EC_WAIT_TIMEOUT = 0.2  # 等待 IBF/OBF 的最长时间(秒)
+
+# 所有 EC 端口访问共用一把锁，避免多线程交错读写寄存器
+_ecLock = threading.RLock()
+
 # for register in [EC_DATA_REGISTER_PORT, EC_CMD_STATUS_REGISTER_PORT]:
 #    status = portio.ioperm(register, 1, 1)
 status = portio.iopl(3)
@@ -17,64 +30,89 @@ status = portio.iopl(3)
 
 class EC:
     @staticmethod
-    def Wait(port, flag, value):
-        for i in range(200):
-            data = portio.inb(port)
-            if ((data >> flag) & 0x1) == value:
-                condition = True
-                break
-            time.sleep(0.001)
+    def Wait(port, flag, value) -> bool:
+        """等待状态位，先忙等，超过 EC_SPIN_COUNT 次后让出 CPU 直到超时"""
+        spins = 0
+        deadline = None
+        while True:
+            if ((portio.inb(port) >> flag) & 0x1) == value:
+                return True
+            spins += 1
+            if spins < EC_SPIN_COUNT:
+                continue
+            now = time.monotonic()
+            if deadline is None:
+                deadline = now + EC_WAIT_TIMEOUT
+            elif now > deadline:
+                logger.debug(f"EC wait timeout port:{hex(port)} flag:{flag}")
+                return False
+            time.sleep(0)
 
     @staticmethod
-    def Read(address: int):
+    def _read(address: int) -> int:
         EC.Wait(EC_CMD_STATUS_REGISTER_PORT, EC_IBF_BIT, 0)
         portio.outb(RD_EC, EC_CMD_STATUS_REGISTER_PORT)
         EC.Wait(EC_CMD_STATUS_REGISTER_PORT, EC_IBF_BIT, 0)
         portio.outb(address, EC_DATA_REGISTER_PORT)
         EC.Wait(EC_CMD_STATUS_REGISTER_PORT, EC_OBF_BIT, 1)
-        result = portio.inb(EC_DATA_REGISTER_PORT)
+        return portio.inb(EC_DATA_REGISTER_PORT)
+
+    @staticmethod
+    def Read(address: int):
+        with _ecLock:
+            result = EC._read(address)
         logger.debug(f"ECRead  address:{hex(address)} value:{result}")
         return result
 
     @staticmethod
     def ReadLonger(address: int, length: int):
-        sum = 0
-        for len in range(length):
-            value = EC.Read(address + len)
-            sum = (sum << 8) + value
-            # logger.debug(f"count={len} sum={sum} address={address+len} value={value}")
+        with ECSession() as session:
+            sum = int.from_bytes(session.read_range(address, length), "big")
         logger.debug(f"ECReadLonger  address:{hex(address)} value:{sum}")
         return sum
 
     @staticmethod
     def Write(address: int, data: int):
-        EC.Wait(EC_CMD_STATUS_REGISTER_PORT, EC_IBF_BIT, 0)
-        portio.outb(WR_EC, EC_CMD_STATUS_REGISTER_PORT)
-        EC.Wait(EC_CMD_STATUS_REGISTER_PORT, EC_IBF_BIT, 0)
-        portio.outb(address, EC_DATA_REGISTER_PORT)
-        EC.Wait(EC_CMD_STATUS_REGISTER_PORT, EC_IBF_BIT, 0)
-        portio.outb(data, EC_DATA_REGISTER_PORT)
-        EC.Wait(EC_CMD_STATUS_REGISTER_PORT, EC_IBF_BIT, 0)
+        with _ecLock:
+            EC.Wait(EC_CMD_STATUS_REGISTER_PORT, EC_IBF_BIT, 0)
+            portio.outb(WR_EC, EC_CMD_STATUS_REGISTER_PORT)
+            EC.Wait(EC_CMD_STATUS_REGISTER_PORT, EC_IBF_BIT, 0)
+            portio.outb(address, EC_DATA_REGISTER_PORT)
+            EC.Wait(EC_CMD_STATUS_REGISTER_PORT, EC_IBF_BIT, 0)
+            portio.outb(data, EC_DATA_REGISTER_PORT)
+            EC.Wait(EC_CMD_STATUS_REGISTER_PORT, EC_IBF_BIT, 0)
+            ecSnapshotCache.invalidate()
         logger.debug(f"ECWrite  address:{hex(address)} value:{data}")
 
     @staticmethod
-    def RamWrite(comm_port: int, data_port: int, address: int, data: int):
-        high_byte = (address >> 8) & 0xFF
-        low_byte = address & 0xFF
+    def _ram_select(comm_port: int, data_port: int, address: int):
         portio.outb(0x2E, comm_port)
         portio.outb(0x11, data_port)
         portio.outb(0x2F, comm_port)
-        portio.outb(high_byte, data_port)
+        portio.outb((address >> 8) & 0xFF, data_port)
 
         portio.outb(0x2E, comm_port)
         portio.outb(0x10, data_port)
         portio.outb(0x2F, comm_port)
-        portio.outb(low_byte, data_port)
+        portio.outb(address & 0xFF, data_port)
 
         portio.outb(0x2E, comm_port)
         portio.outb(0x12, data_port)
         portio.outb(0x2F, comm_port)
-        portio.outb(data, data_port)
+
+    @staticmethod
+    def _ram_read(comm_port: int, data_port: int, address: int) -> int:
+        EC._ram_select(comm_port, data_port, address)
+        return portio.inb(data_port)
+
+    @staticmethod
+    def RamWrite(comm_port: int, data_port: int, address: int, data: int):
+        high_byte = (address >> 8) & 0xFF
+        low_byte = address & 0xFF
+        with _ecLock:
+            EC._ram_select(comm_port, data_port, address)
+            portio.outb(data, data_port)
+            ecSnapshotCache.invalidate()
         logger.debug(
             f"ECRamWrite high_byte={hex(high_byte)} low_byte={hex(low_byte)} address:{hex(address)} value:{data}"
         )
@@ -83,20 +121,8 @@ class EC:
     def RamRead(comm_port: int, data_port: int, address: int):
         high_byte = (address >> 8) & 0xFF
         low_byte = address & 0xFF
-        portio.outb(0x2E, comm_port)
-        portio.outb(0x11, data_port)
-        portio.outb(0x2F, comm_port)
-        portio.outb(high_byte, data_port)
-
-        portio.outb(0x2E, comm_port)
-        portio.outb(0x10, data_port)
-        portio.outb(0x2F, comm_port)
-        portio.outb(low_byte, data_port)
-
-        portio.outb(0x2E, comm_port)
-        portio.outb(0x12, data_port)
-        portio.outb(0x2F, comm_port)
-        data = portio.inb(data_port)
+        with _ecLock:
+            data = EC._ram_read(comm_port, data_port, address)
         logger.debug(
             f"ECRamRead high_byte={hex(high_byte)} low_byte={hex(low_byte)} address:{hex(address)} value:{data}"
         )
@@ -104,11 +130,9 @@ class EC:
 
     @staticmethod
     def RamReadLonger(reg_addr: int, reg_data: int, address: int, length: int):
-        sum = 0
-        for len in range(length):
-            value = EC.RamRead(reg_addr, reg_data, address + len)
-            sum = (sum << 8) + value
-            # logger.debug(f"count={len} sum={sum} address={address+len} value={value}")
+        with ECSession() as session:
+            data = session.ram_read_range(reg_addr, reg_data, address, length)
+        sum = int.from_bytes(data, "big")
         logger.debug(f"ECReadLonger  address:{hex(address)} value:{sum}")
         return sum
 
@@ -123,3 +147,140 @@ class EC:
                     print(hex(x), "\t", end="")
                 print(EC.Read((x << 4) + y), "\t", end="")
             print()
+
+
+def _open_debugfs_io() -> int:
+    try:
+        if os.path.exists(EC_DEBUGFS_IO_PATH):
+            return os.open(EC_DEBUGFS_IO_PATH, os.O_RDONLY | os.O_CLOEXEC)
+    except OSError as e:
+        logger.debug(f"EC debugfs io unavailable: {e}")
+    return -1
+
+
+class ECSession:
+    """一次持有 EC 端口锁，批量完成多次读写
+
+    with ECSession() as session:
+        data = session.read_range(0x40, 4)
+
+    内核提供 /sys/kernel/debug/ec/ec0/io 时，EC 空间的读取直接通过 pread 完成。
+    """
+
+    _debugfsFd: Optional[int] = None
+
+    def __enter__(self):
+        _ecLock.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _ecLock.release()
+        return False
+
+    @classmethod
+    def _debugfs_fd(cls) -> int:
+        if cls._debugfsFd is None:
+            cls._debugfsFd = _open_debugfs_io()
+        return cls._debugfsFd
+
+    def read_all(self) -> bytes:
+        """读取完整的 256 字节 EC 空间"""
+        return self.read_range(0, EC_SPACE_SIZE)
+
+    def read_range(self, start: int, length: int) -> bytes:
+        fd = self._debugfs_fd()
+        if fd >= 0:
+            try:
+                data = os.pread(fd, length, start)
+                if len(data) == length:
+                    return data
+            except OSError as e:
+                logger.debug(f"EC debugfs read failed, fallback to port io: {e}")
+        return bytes(EC._read(start + i) for i in range(length))
+
+    def read_offsets(self, offsets: Iterable[int]) -> Dict[int, int]:
+        offsets = sorted(set(offsets))
+        if not offsets:
+            return {}
+        if self._debugfs_fd() >= 0:
+            data = self.read_range(offsets[0], offsets[-1] - offsets[0] + 1)
+            return {off: data[off - offsets[0]] for off in offsets}
+        return {off: EC._read(off) for off in offsets}
+
+    def write(self, address: int, data: int):
+        EC.Write(address, data)
+
+    def ram_read_range(
+        self, comm_port: int, data_port: int, address: int, length: int
+    ) -> bytes:
+        return bytes(
+            EC._ram_read(comm_port, data_port, address + i) for i in range(length)
+        )
+
+
+class ECSnapshot:
+    """某一时刻的 EC 字节快照，未包含的地址读取时抛出 KeyError"""
+
+    def __init__(self, values: Dict[int, int], timestamp: float):
+        self._values = values
+        self.timestamp = timestamp
+
+    def __contains__(self, offset: int) -> bool:
+        return offset in self._values
+
+    def byte(self, offset: int) -> int:
+        return self._values[offset]
+
+    def read_longer(self, offset: int, length: int) -> int:
+        """与 EC.ReadLonger 一致，按大端拼接多个字节"""
+        value = 0
+        for i in range(length):
+            value = (value << 8) + self._values[offset + i]
+        return value
+
+
+class ECSnapshotCache:
+    """同一控制周期内共享的 EC 快照
+
+    风扇和设备模块注册需要的地址，每个周期只读取一次。可用 debugfs 时一次读取全部
+    256 字节，否则只读取注册过的地址。任何 EC 写入都会使快照失效。
+    """
+
+    DEFAULT_MAX_AGE = 0.5  # 快照的最长复用时间(秒)
+
+    def __init__(self):
+        self._offsets = set()
+        self._snapshot: Optional[ECSnapshot] = None
+        self._lock = threading.Lock()
+
+    def register(self, *offsets: int):
+        with self._lock:
+            self._offsets.update(off for off in offsets if off is not None)
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def get(self, *offsets: int, max_age: float = DEFAULT_MAX_AGE) -> ECSnapshot:
+        """返回包含 offsets 的快照，过期或缺少地址时重新读取"""
+        with self._lock:
+            self._offsets.update(offsets)
+            snapshot = self._snapshot
+            if (
+                snapshot is not None
+                and time.monotonic() - snapshot.timestamp <= max_age
+                and all(off in snapshot for off in offsets)
+            ):
+                return snapshot
+
+            with ECSession() as session:
+                if session._debugfs_fd() >= 0:
+                    data = session.read_all()
+                    values = dict(enumerate(data))
+                else:
+                    values = session.read_offsets(self._offsets)
+            snapshot = ECSnapshot(values, time.monotonic())
+            self._snapshot = snapshot
+            return snapshot
+
+
+ecSnapshotCache = ECSnapshotCache()
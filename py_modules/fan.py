@@ -1,12 +1,16 @@
 import json
 import os
 import re
-from typing import List
+import threading
+import time
+from typing import Callable, List, Optional
 
 from conf_manager import confManager
 from config import FAN_EC_CONFIG, FAN_HWMON_LIST, PRODUCT_NAME, PRODUCT_VERSION, logger
-from ec import EC
+from ec import EC, ecSnapshotCache
 from pfuse import umount_fuse_igpu
+from service_registry import serviceRegistry
+from utils import sysfs_invalidate, sysfs_read, sysfs_read_int, sysfs_write
 
 
 class FanConfig:
@@ -58,6 +62,236 @@ class FanConfig:
         self.latest_fanRPM = -1
 
 
+FAN_MODE_FIX = "FIX"  # 固定转速
+FAN_MODE_CURVE = "CURVE"  # 曲线
+FAN_MODE_AUTO = "AUTO"  # 自动
+
+FAN_CONTROL_INTERVAL = 1.0  # 风扇曲线控制周期(秒)
+FAN_CURVE_HYSTERESIS = 3.0  # 降温时的温度回差(°C)，温度下降超过该值才降速
+FAN_SLEW_UP_RATE = 20.0  # 每秒最大升速(%)
+FAN_SLEW_DOWN_RATE = 5.0  # 每秒最大降速(%)
+FAN_CURVE_TEMP_MIN, FAN_CURVE_TEMP_MAX = 0, 100  # 与前端 FanPosition 的范围一致
+FAN_CURVE_PWM_MIN, FAN_CURVE_PWM_MAX = 0, 100
+
+
+def interpolate_fan_curve(points: List[tuple], temperature: float) -> float:
+    """按曲线点线性插值出转速百分比
+
+    与前端原有逻辑一致: 曲线前补 (0, 0)，曲线后补 (100, 100)
+    """
+    line = (
+        [(FAN_CURVE_TEMP_MIN, FAN_CURVE_PWM_MIN)]
+        + sorted(points)
+        + [(FAN_CURVE_TEMP_MAX, FAN_CURVE_PWM_MAX)]
+    )
+    if temperature <= line[0][0]:
+        return line[0][1]
+    for (t0, p0), (t1, p1) in zip(line, line[1:]):
+        if t0 < temperature <= t1:
+            if t1 == t0:
+                return p1
+            return p0 + (temperature - t0) / (t1 - t0) * (p1 - p0)
+    return line[-1][1]
+
+
+class FanControlState:
+    def __init__(self):
+        self.mode = FAN_MODE_AUTO  # 当前控制模式
+        self.fix_percent = 0  # 固定模式的转速百分比
+        self.points: list[tuple] = []  # 曲线点 (温度, 转速百分比)
+        self.firmware_curve = False  # 曲线已交给固件执行(hwmon_mode 2)
+        self.need_manual = False  # 下次写入前需要切换到手动控制
+
+        self.rpm = 0  # 当前转速
+        self.temperature = 0.0  # 当前温度(°C)
+        self.effective_temp: Optional[float] = None  # 经过回差处理的温度
+        self.target_percent = 0.0  # 曲线给出的目标转速百分比
+        self.output_percent: Optional[float] = None  # 限速后的输出百分比
+        self.written_percent: Optional[int] = None  # 最后一次写入的百分比
+        self.last_tick: Optional[float] = None
+
+    def reset_output(self):
+        self.effective_temp = None
+        self.output_percent = None
+        self.written_percent = None
+        self.last_tick = None
+
+    def to_dict(self, index: int, rpm_max: int) -> dict:
+        return {
+            "index": index,
+            "mode": self.mode,
+            "rpm": self.rpm,
+            "rpm_percent": (self.rpm / rpm_max * 100) if rpm_max > 0 else 0,
+            "temperature": self.temperature,
+            "effective_temp": self.effective_temp,
+            "target_percent": self.target_percent,
+            "output_percent": self.output_percent,
+        }
+
+
+class FanCurveController(threading.Thread):
+    """在后端定时执行风扇曲线
+
+    每个周期读取温度和转速，经过温度回差和转速变化率限制后计算输出，
+    只在输出变化时写入。状态通过 status listener 推送给前端，
+    前端只需上传曲线，不再每秒轮询和计算。
+    """
+
+    def __init__(self, fanManager):
+        self._fanManager = fanManager
+        self._states: list[FanControlState] = []
+        self._statusListener: Optional[Callable[[list], None]] = None
+        self._cond = threading.Condition()
+        self._running = False
+        threading.Thread.__init__(self, name="FanCurveController", daemon=True)
+
+    def _get_state(self, index: int) -> FanControlState:
+        while len(self._states) <= index:
+            self._states.append(FanControlState())
+        return self._states[index]
+
+    def set_status_listener(self, listener: Optional[Callable[[list], None]]):
+        self._statusListener = listener
+
+    def set_control(
+        self,
+        index: int,
+        mode: str,
+        fix_percent: int = 0,
+        temp_list: Optional[List[int]] = None,
+        pwm_list: Optional[List[int]] = None,
+    ):
+        fc = self._fanManager.fan_config_list[index]
+        points = list(zip(temp_list or [], pwm_list or []))
+        with self._cond:
+            state = self._get_state(index)
+            changed = (
+                state.mode != mode
+                or state.fix_percent != fix_percent
+                or state.points != points
+            )
+            state.mode = mode
+            state.fix_percent = fix_percent
+            state.points = points
+            state.firmware_curve = False
+            if mode == FAN_MODE_AUTO:
+                state.need_manual = False
+                state.reset_output()
+            elif fc.hwmon_mode == 2 and fc.is_found_hwmon:
+                # 固件曲线模式，上传一次即可，不需要周期写入
+                state.firmware_curve = True
+            elif changed or state.written_percent is None:
+                state.need_manual = True
+                state.written_percent = None
+            self._cond.notify_all()
+
+        if mode == FAN_MODE_AUTO:
+            return self._fanManager.set_fanAuto(index, True)
+        if state.firmware_curve:
+            temps = [p[0] for p in points]
+            pwms = [p[1] for p in points]
+            return self._fanManager.set_fanCurve(index, temps, pwms)
+        return True
+
+    def invalidate(self):
+        """清除写入记录，下个周期重新进入手动控制并写入(如休眠唤醒后)"""
+        with self._cond:
+            for state in self._states:
+                if state.mode != FAN_MODE_AUTO and not state.firmware_curve:
+                    state.need_manual = True
+                    state.written_percent = None
+            self._cond.notify_all()
+
+    def get_status(self) -> list:
+        with self._cond:
+            return [
+                state.to_dict(index, fc.pwm_value_max)
+                for index, (state, fc) in enumerate(
+                    zip(self._states, self._fanManager.fan_config_list)
+                )
+            ]
+
+    def _update_effective_temp(self, state: FanControlState):
+        # 升温立即跟随，降温超过回差才跟随，避免在曲线点附近来回调整
+        if (
+            state.effective_temp is None
+            or state.temperature > state.effective_temp
+            or state.effective_temp - state.temperature >= FAN_CURVE_HYSTERESIS
+        ):
+            state.effective_temp = state.temperature
+
+    def _update_output(self, state: FanControlState, now: float):
+        if state.mode == FAN_MODE_FIX:
+            state.target_percent = state.fix_percent
+        else:
+            state.target_percent = interpolate_fan_curve(
+                state.points, state.effective_temp
+            )
+        if state.output_percent is None or state.last_tick is None:
+            state.output_percent = state.target_percent
+        else:
+            dt = min(now - state.last_tick, FAN_CONTROL_INTERVAL * 5)
+            delta = state.target_percent - state.output_percent
+            delta = max(-FAN_SLEW_DOWN_RATE * dt, min(FAN_SLEW_UP_RATE * dt, delta))
+            state.output_percent += delta
+        state.last_tick = now
+
+    def _tick_fan(self, index: int, state: FanControlState, now: float):
+        fanManager = self._fanManager
+        state.rpm = fanManager.get_fanRPM(index)
+        temp = fanManager.get_fanTemp(index)
+        if temp <= 0:
+            return
+        state.temperature = temp / 1000
+        if state.mode == FAN_MODE_AUTO or state.firmware_curve:
+            return
+
+        self._update_effective_temp(state)
+        self._update_output(state, now)
+        output = int(round(state.output_percent))
+        if output == state.written_percent and not state.need_manual:
+            return
+        if state.need_manual:
+            if not fanManager.set_fanAuto(index, False):
+                return
+            state.need_manual = False
+        if fanManager.set_fanPercent(index, output):
+            state.written_percent = output
+
+    def run(self):
+        self._running = True
+        logger.info("风扇曲线控制线程启动")
+        while True:
+            with self._cond:
+                if not self._running:
+                    break
+                # 持锁执行，避免与 set_control 切换模式的写入交错
+                now = time.monotonic()
+                for index, state in enumerate(self._states):
+                    try:
+                        self._tick_fan(index, state, now)
+                    except Exception:
+                        logger.error(f"风扇{index} 曲线控制异常:", exc_info=True)
+
+            listener = self._statusListener
+            if listener is not None:
+                try:
+                    listener(self.get_status())
+                except Exception as e:
+                    logger.error(f"推送风扇状态异常:{e}")
+
+            with self._cond:
+                if not self._running:
+                    break
+                self._cond.wait(FAN_CONTROL_INTERVAL)
+        logger.info("风扇曲线控制线程退出")
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+
 class FanManager:
     def __init__(self):
         self.fansSettings = confManager.fansSettings
@@ -65,8 +299,10 @@ class FanManager:
         self.fan_config_list: list[FanConfig] = []  # 记录每一个风扇的配置
         self.cpu_temp_path = ""  # CPU温度路径
         self.gpu_temp_path = ""  # GPU温度路径
+        self.gpu_hwmon_path = None  # amdgpu hwmon目录 None为未扫描
         self.parse_fan_configuration()  ##转化风扇配置
         self.device_init_quirks()  # 设备特殊初始化
+        self.curveController = FanCurveController(self)  # 后端风扇曲线控制
 
     # 自动更新风扇最大值
     def update_fan_max_value(self, cpu_temp: int):
@@ -524,10 +760,12 @@ class FanManager:
             # Detect external pwm_enable resets (e.g. by ASUS firmware)
             if fc.is_found_hwmon and fc.hwmon_enable_path and fc.hwmon_mode == 2:
                 try:
-                    cur = open(fc.hwmon_enable_path).read().strip()
+                    cur = sysfs_read(fc.hwmon_enable_path)
                     prev = getattr(fc, '_last_logged_enable', None)
                     if prev is not None and prev != cur:
                         logger.info(f"[FanDebug] pwm_enable changed: fan[{index}] {prev}->{cur}")
+                        # 固件重置了控制模式，曲线需要重新完整写入
+                        sysfs_invalidate(os.path.dirname(fc.hwmon_enable_path))
                     fc._last_logged_enable = cur
                 except Exception:
                     pass
@@ -556,7 +794,7 @@ class FanManager:
             hwmon_input_path = fc.hwmon_input_path
             if hwmon_input_path is None:
                 return 0
-            fanRPM = int(open(hwmon_input_path).read().strip())
+            fanRPM = sysfs_read_int(hwmon_input_path)
             return fanRPM
         except Exception:
             logger.error("使用hwmon获取风扇转速异常:", exc_info=True)
@@ -565,7 +803,11 @@ class FanManager:
     def __get_fanRPM_ECIO(self, fc: FanConfig):
         try:
             rpm_read_offset = fc.pwm_read_offset
-            fanRPM = EC.ReadLonger(rpm_read_offset, 2)
+            # 转速和控制位在同一个快照中读取，同一周期内的其它读取直接复用
+            if fc.manual_offset:
+                ecSnapshotCache.register(fc.manual_offset)
+            snapshot = ecSnapshotCache.get(rpm_read_offset, rpm_read_offset + 1)
+            fanRPM = snapshot.read_longer(rpm_read_offset, 2)
             logger.debug(
                 f"使用ECIO数据 当前机型:{PRODUCT_NAME} EC地址:{hex(rpm_read_offset)} 风扇转速:{fanRPM}"
             )
@@ -582,7 +824,6 @@ class FanManager:
             ram_rpm_read_length = fc.ram_pwm_read_length
             rpm_write_max = fc.pwm_write_max
             rpm_value_max = fc.pwm_value_max
-            ram_manual_offset = fc.ram_manual_offset
 
             if ram_rpm_read_length > 0:
                 fanRPM = EC.RamReadLonger(
@@ -607,10 +848,6 @@ class FanManager:
             logger.debug(
                 f"使用ECRAM数据 当前机型:{PRODUCT_NAME} EC_ADDR:{hex(ram_reg_addr)} EC_DATA={hex(ram_reg_data)} EC地址:{hex(ram_read_offset)} 风扇转速:{fanRPM}"
             )
-            fanIsManual = EC.RamRead(ram_reg_addr, ram_reg_data, ram_manual_offset)
-            logger.debug(
-                f"使用ECRAM数据 读取EC地址:{hex(ram_manual_offset)} 风扇控制位:{fanIsManual}"
-            )
             return fanRPM
         except Exception:
             logger.error("获取风扇转速异常:", exc_info=True)
@@ -653,7 +890,7 @@ class FanManager:
                 and os.path.exists(hwmon_pwm_enable_second_path)
             ):
                 hwmon_pwm_enable_path = hwmon_pwm_enable_second_path
-            fanIsManual = int(open(hwmon_pwm_enable_path).read().strip())
+            fanIsManual = sysfs_read_int(hwmon_pwm_enable_path)
             logger.debug(
                 f"使用hwmon数据 读取hwmon地址:{hwmon_pwm_enable_path} 风扇是否控制:{fanIsManual == enable_auto_value}"
             )
@@ -666,7 +903,7 @@ class FanManager:
         try:
             manual_offset = fc.manual_offset
             enable_auto_value = fc.hwmon_auto_val
-            fanIsManual = EC.Read(manual_offset)
+            fanIsManual = ecSnapshotCache.get(manual_offset).byte(manual_offset)
             logger.debug(
                 f"使用ECIO数据 读取EC地址:{hex(manual_offset)} 风扇是否控制:{fanIsManual == enable_auto_value}"
             )
@@ -703,7 +940,7 @@ class FanManager:
 
             if fc.is_found_hwmon and fc.hwmon_enable_path:
                 try:
-                    cur = open(fc.hwmon_enable_path).read().strip()
+                    cur = sysfs_read(fc.hwmon_enable_path)
                     logger.info(f"[FanDebug] set_fanAuto: pwm_enable={cur} -> auto={value}")
                 except Exception:
                     pass
@@ -756,14 +993,16 @@ class FanManager:
                 fanIsManual = manual_value
 
             # GPD 设备没有实际的单独的控制位。但是在oxpec中有控制位，写入手动控制时会将转速设置为 70%。所以添加判断，只在需要时写入控制位
-            currentFanIsManual = int(open(pwm_enable_path).read().strip())
+            currentFanIsManual = sysfs_read_int(pwm_enable_path)
             if currentFanIsManual == fanIsManual:
                 logger.debug(
                     f"currentFanIsManual:{currentFanIsManual} fanIsManual:{fanIsManual} 无需写入"
                 )
                 return True
 
-            open(pwm_enable_path, "w").write(str(fanIsManual))
+            sysfs_write(pwm_enable_path, fanIsManual, force=True)
+            # 切换控制模式后固件可能重置曲线，之前的写入缓存不再可信
+            sysfs_invalidate(os.path.dirname(pwm_enable_path))
             logger.debug(
                 f"写入hwmon数据 写入hwmon地址:{pwm_enable_path} 写入风扇是否控制:{fanIsManual}"
             )
@@ -775,16 +1014,16 @@ class FanManager:
                     # 写入转速
                     fanWriteValue = hwmon_default_curve[index]["pwm_value"]
                     pwm_path = point["pwm_write"]
-                    open(pwm_path, "w").write(str(fanWriteValue))
+                    sysfs_write(pwm_path, fanWriteValue)
                     # 写入温度 (skip if read-only / None)
                     temp_path = point["temp_write"]
                     if temp_path is not None:
                         temp = hwmon_default_curve[index]["temp_value"]
-                        open(temp_path, "w").write(str(temp))
+                        sysfs_write(temp_path, temp)
                     logger.debug(
                         f"写入hwmon数据 写入hwmon转速地址:{pwm_path} 风扇转速写入值:{fanWriteValue} 温度地址:{temp_path} 温度大小:{temp}"
                     )
-                open(pwm_enable_path, "w").write(str(fanIsManual))
+                sysfs_write(pwm_enable_path, fanIsManual, force=True)
                 logger.debug(
                     f"写入hwmon数据 写入hwmon地址:{pwm_enable_path} 写入风扇是否控制:{fanIsManual}"
                 )
@@ -886,7 +1125,7 @@ class FanManager:
                 fanWriteValue = max(
                     min(int(value / 100 * rpm_write_max), rpm_write_max), 0
                 )
-                currentVal = int(open(pwm_path).read().strip())
+                currentVal = sysfs_read_int(pwm_path)
                 # 转速相差小于5%时不写入
                 if (
                     currentVal > 0
@@ -896,7 +1135,7 @@ class FanManager:
                         f"当前风扇转速{currentVal} 与目标转速{fanWriteValue} 相差小于5% 不写入"
                     )
                     return True
-                open(pwm_path, "w").write(str(fanWriteValue))
+                sysfs_write(pwm_path, fanWriteValue)
                 logger.debug(
                     f"写入hwmon数据 写入hwmon地址:{pwm_path} 风扇转速百分比{value} 风扇最大值{rpm_write_max} 风扇转速写入值:{fanWriteValue}"
                 )
@@ -911,18 +1150,18 @@ class FanManager:
                     for point in hwmon_curve_paths:
                         # 写入转速
                         pwm_path = point["pwm_write"]
-                        open(pwm_path, "w").write(str(fanWriteValue))
+                        sysfs_write(pwm_path, fanWriteValue)
                         # 写入温度 (skip if read-only / None)
                         temp = temp + addTemp
                         temp_path = point["temp_write"]
                         if temp_path is not None:
-                            open(temp_path, "w").write(str(temp))
+                            sysfs_write(temp_path, temp)
                         logger.debug(
                             f"写入hwmon数据 写入hwmon转速地址:{pwm_path} 风扇转速百分比{value} 风扇最大值{rpm_write_max} 风扇转速写入值:{fanWriteValue} 温度地址:{temp_path} 温度大小:{temp}"
                         )
                 fanIsManual = manual_val
 
-                open(enable_path, "w").write(str(fanIsManual))
+                sysfs_write(enable_path, fanIsManual, force=True)
                 logger.debug(
                     f"写入hwmon数据 写入hwmon地址:{enable_path} 写入风扇是否控制:{fanIsManual}"
                 )
@@ -1024,13 +1263,13 @@ class FanManager:
             if hwmon_mode == 2 and fc.is_found_hwmon:
                 if fc.hwmon_enable_path:
                     try:
-                        before = open(fc.hwmon_enable_path).read().strip()
+                        before = sysfs_read(fc.hwmon_enable_path)
                     except Exception:
                         before = "?"
                 result = self.__set_fanCurve_HWMON(fc, temp_list, pwm_list)
                 if fc.hwmon_enable_path:
                     try:
-                        after = open(fc.hwmon_enable_path).read().strip()
+                        after = sysfs_read(fc.hwmon_enable_path)
                         logger.info(f"[FanDebug] set_fanCurve: pwm_enable {before}->{after} result={result}")
                     except Exception:
                         pass
@@ -1058,17 +1297,17 @@ class FanManager:
                     fanWritePwmValue = max(
                         min(int(pwm_list[i] / 100 * rpm_write_max), rpm_write_max), 0
                     )
-                    open(pwm_path, "w").write(str(fanWritePwmValue))
+                    sysfs_write(pwm_path, fanWritePwmValue)
                     fanWriteTempValue = None
                     if temp_path is not None:
                         fanWriteTempValue = max(min(int(temp_list[i]), rpm_write_max), 0)
-                        open(temp_path, "w").write(str(fanWriteTempValue))
+                        sysfs_write(temp_path, fanWriteTempValue)
                     logger.debug(
                         f"hwmon写入数据, pwm_path:{pwm_path}, pwm_value:{fanWritePwmValue}; temp_path:{temp_path}, temp_value:{fanWriteTempValue}"
                     )
-                currentEnable = open(enable_path, "r").read().strip()
+                currentEnable = sysfs_read(enable_path)
                 if currentEnable != str(manual_val):
-                    open(enable_path, "w").write(str(manual_val))
+                    sysfs_write(enable_path, manual_val, force=True)
                     logger.debug(
                         f"写入hwmon数据 写入hwmon地址:{enable_path} 写入风扇是否控制:{manual_val}"
                     )
@@ -1077,6 +1316,85 @@ class FanManager:
             logger.error("使用hwmon写入风扇曲线异常:", exc_info=True)
             return False
 
+    def start_fanControl(self, status_listener: Optional[Callable[[list], None]] = None):
+        """启动后端风扇曲线控制线程"""
+        if len(self.fan_config_list) == 0:
+            return
+        controller = self.curveController
+        controller.set_status_listener(status_listener)
+        for index in range(len(self.fan_config_list)):
+            controller._get_state(index)
+        if not controller.is_alive():
+            controller.start()
+
+    def stop_fanControl(self):
+        controller = self.curveController
+        controller.set_status_listener(None)
+        if controller.is_alive():
+            controller.stop()
+            controller.join(timeout=2)
+        self.curveController = FanCurveController(self)
+
+    def set_fanControl(
+        self,
+        index: int,
+        mode: str,
+        fix_percent: int,
+        temp_list: List[int],
+        pwm_list: List[int],
+    ):
+        try:
+            logger.info(
+                f"[FanDebug] set_fanControl fan[{index}] mode={mode} fix={fix_percent} temps={temp_list} pwms={pwm_list}"
+            )
+            if index > len(self.fan_config_list) - 1:
+                logger.error(
+                    f"风扇下标越界 index:{index} len:{len(self.fan_config_list)}"
+                )
+                return False
+            if mode not in (FAN_MODE_FIX, FAN_MODE_CURVE, FAN_MODE_AUTO):
+                logger.error(f"未知的风扇模式:{mode}")
+                return False
+            return self.curveController.set_control(
+                index, mode, fix_percent, temp_list, pwm_list
+            )
+        except Exception:
+            logger.error("设置风扇控制异常:", exc_info=True)
+            return False
+
+    def get_fanStatus(self):
+        try:
+            return self.curveController.get_status()
+        except Exception:
+            logger.error("获取风扇状态异常:", exc_info=True)
+            return []
+
+    def get_fanTelemetry(self):
+        """一次读取所有风扇的转速和温度(毫摄氏度)，CPU/GPU 温度只各读取一次"""
+        result = []
+        try:
+            temps = {}
+
+            def read_temp(source: str):
+                if source not in temps:
+                    if source == "gpu":
+                        temps[source] = self.get_gpuTemp()
+                    elif os.path.exists(self.cpu_temp_path):
+                        temps[source] = sysfs_read_int(self.cpu_temp_path)
+                    else:
+                        temps[source] = -1
+                return temps[source]
+
+            for index, fc in enumerate(self.fan_config_list):
+                order = ("gpu", "cpu") if fc.temp_mode == 1 else ("cpu", "gpu")
+                temp = read_temp(order[0])
+                if temp == -1:
+                    temp = read_temp(order[1])
+                result.append({"rpm": self.get_fanRPM(index), "temp": temp})
+        except Exception:
+            logger.error("获取风扇数据异常:", exc_info=True)
+        return result
+
     def get_fanTemp(self, index: int):
         try:
             if index < len(self.fan_config_list):
@@ -1103,17 +1421,29 @@ class FanManager:
             logger.error("获取温度异常:", exc_info=True)
             return 0
 
+    def get_gpu_hwmon_path(self):
+        """amdgpu 的 hwmon 目录，只扫描一次，未找到时返回空字符串"""
+        if self.gpu_hwmon_path is None:
+            self.gpu_hwmon_path = ""
+            hwmon_path = "/sys/class/hwmon"
+            for file in os.listdir(hwmon_path):
+                path = hwmon_path + "/" + file
+                try:
+                    name = sysfs_read(path + "/name")
+                except OSError:
+                    continue
+                if name == "amdgpu":
+                    self.gpu_hwmon_path = path
+        return self.gpu_hwmon_path
+
     def get_gpuTemp(self):
         try:
             if self.gpu_temp_path == "":
-                hwmon_path = "/sys/class/hwmon"
-                hwmon_files = os.listdir(hwmon_path)
-                for file in hwmon_files:
-                    path = hwmon_path + "/" + file
-                    name = open(path + "/name").read().strip()
-                    if name == "amdgpu":
-                        self.gpu_temp_path = path + "/temp1_input"
-            temp = int(open(self.gpu_temp_path).read().strip())
+                gpu_hwmon_path = self.get_gpu_hwmon_path()
+                if gpu_hwmon_path == "":
+                    return -1
+                self.gpu_temp_path = gpu_hwmon_path + "/temp1_input"
+            temp = sysfs_read_int(self.gpu_temp_path)
             logger.debug(f"获取gpu温度:{temp}")
             return temp
         except Exception as e:
@@ -1123,7 +1453,7 @@ class FanManager:
     def get_cpuTemp(self):
         try:
             if os.path.exists(self.cpu_temp_path):
-                temp = int(open(self.cpu_temp_path).read().strip())
+                temp = sysfs_read_int(self.cpu_temp_path)
 
                 self.update_fan_max_value(temp)
             else:
@@ -1174,4 +1504,4 @@ class FanManager:
             return []
 
 
-fanManager = FanManager()
+fanManager = serviceRegistry.lazy("fan", FanManager)
@@ -95,6 +95,8 @@ class FuseManager:
         if not self._initialized:
             return
 
+        if self.power_manager:
+            self.power_manager.remove_tdp_listener(self.update_tdp)
         try:
             # 1. 设置退出标志
             if self.should_exit:
@@ -149,6 +151,17 @@ class FuseManager:
         logger.info(f"QAM Set TDPLimit: {tdp}")
         asyncio.run(decky.emit("QAM_setTDP", tdp))
 
+    def update_tdp(self, tdp):
+        """
+        插件侧 TDP 变化时推送到 FUSE 驱动，由 PowerManager 在每次写入 TDP 后调用
+        驱动缓存该值，Steam 读取 power1_cap 时不需要经过 socket
+        tdp 为 None 表示解除限制，显示为最大值
+        """
+        if tdp is None:
+            tdp = self.max_tdp
+        if self._initialized and self.t_sys:
+            self.t_sys.push_tdp(tdp)
+
     def apply_tdp(self, tdp):
         """
         直接应用TDP
@@ -222,6 +235,8 @@ class FuseManager:
                     self.max_tdp,
                 )
                 self._initialized = True
+                if self.power_manager:
+                    self.power_manager.add_tdp_listener(self.update_tdp)
                 logger.info("FuseManager successfully initialized")
                 return True
             else:
@@ -1,10 +1,13 @@
 import os
+import pwd
 import re
 import subprocess
-import threading
 import time
+from typing import Optional, Tuple
 
+import decky
 import sysInfo
+from conf_manager import confManager
 from config import (
     AMD_GPUFREQ_PATH,
     AMD_GPULEVEL_PATH,
@@ -14,26 +17,52 @@ from config import (
     INTEL_GPU_MIN_LIMIT,
     logger,
 )
+from gpu_governor import (
+    DEFAULT_GUARD,
+    FrameTimeGovernor,
+    FrameTimeSocketReader,
+    FrameTimeSource,
+)
+from hardware_cache import hardwareCache
 from inotify import IN_MODIFY, notify
-from utils import fix_gpuFreqSlider_AMD, fix_gpuFreqSlider_INTEL, get_env
+from power_arbiter import DOMAIN_GPU, ArbiterSample, powerArbiter
+from service_registry import serviceRegistry
+from utils import (
+    fix_gpuFreqSlider_AMD,
+    fix_gpuFreqSlider_INTEL,
+    get_env,
+    sysfs_read,
+    sysfs_read_int,
+    sysfs_write,
+)
+
+# 按帧时间调节时每个应用学习到的起始频率: {app_id: 频率}
+GPU_FRAMETIME_START_KEY = "gpuFrameTimeStartFreq"
+
+
+def _frametime_socket_owner() -> Optional[Tuple[int, int]]:
+    """帧时间 socket 的所有者，即 Decky 用户的 (uid, gid)"""
+    try:
+        user = pwd.getpwnam(decky.DECKY_USER)
+    except KeyError:
+        logger.error(f"未找到用户 {decky.DECKY_USER}，帧时间 socket 只允许 root 写入")
+        return None
+    return user.pw_uid, user.pw_gid
+
 
+class GPUAutoFreqManager:
+    """自动调节 GPU 频率，作为调节器注册到 powerArbiter 上运行"""
+
+    name = DOMAIN_GPU
 
-class GPUAutoFreqManager(threading.Thread):
     def __init__(self, gpuManager):
         self._gpu_enableAutoFreq = False  # 标记是否开启GPU频率优化
-        self._gpu_autoFreqCheckInterval = 0.005  # gpu占用率数据检测间隔
-        self._gpu_adjustFreqInterval = 0.2  # gpu调整间隔
+        self.interval = 0.2  # gpu调整间隔
         self._gpu_addFreqBase = 50  # 自动优化频率的基准大小
         self._gpu_minBusyPercent = 75  # 优化占用率的区间最小值
         self._gpu_maxBusyPercent = 90  # 优化占用率的区间最大值
-        self._cpu_maxBusyPercent = (
-            80  # cpu最大占用率 超过该占用率认定为gpu抢电 需要降低频率给cpu供电
-        )
-        self._isRunning = False  # 标记是否正在运行gpu频率优化
         self._gpuManager = gpuManager  # 用来获取和设置gpu频率
 
-        threading.Thread.__init__(self)
-
     def Set_gpuFreq(self, freq: int):
         try:
             return self._gpuManager.set_gpuFreq(freq, freq)
@@ -42,35 +71,79 @@ class GPUAutoFreqManager(threading.Thread):
             return False
 
     def GPU_enableAutoFreq(self, enable):
-        # 初始化并开启自动优化线程
         self._gpu_enableAutoFreq = enable
         # 自动频率开启时去开启数据收集，避免不必要的性能浪费
-        sysInfo.sysInfoManager.EnableCPUINFO(enable)
-        sysInfo.sysInfoManager.EnableGPUINFO(enable)
-        if enable and not self._isRunning:
-            self.start()
+        sysInfo.sysInfoManager.EnableGPUINFO(enable, "gpu_auto")
+        if enable:
+            logger.info("开始自动优化频率")
+            powerArbiter.register(self)
+        else:
+            powerArbiter.unregister(self)
+            logger.debug("退出自动优化频率")
+
+    def isRunning(self) -> bool:
+        return powerArbiter.is_registered(self)
+
+    def freq_limits(self):
+        """用户设置的自动频率区间"""
+        freqRange = self._gpuManager.gpu_autoFreqRange
+        return freqRange[0], freqRange[1]
+
+    def _freq_range(self):
+        """自动频率区间再受 powerArbiter 分配的频率上限限制"""
+        freqMin, freqMax = self.freq_limits()
+        ceiling = powerArbiter.gpu_ceiling
+        if ceiling is not None:
+            freqMax = max(freqMin, min(freqMax, ceiling))
+        return freqMin, freqMax
+
+    def on_budget_changed(self):
+        _, freqMax = self._freq_range()
+        if self._gpu_enableAutoFreq and self._gpuManager.gpu_nowFreq[0] > freqMax:
+            self.Set_gpuFreq(freqMax)
+
+    def tick(self, sample: ArbiterSample):
+        if not sample.has_gpu:
+            self.GPU_enableAutoFreq(False)
+            freqMin, freqMax = self.freq_limits()
+            self._gpuManager.set_gpuFreq(freqMin, freqMax)
+            return
+        self.optimization_GPUFreq(sample.gpu_busy)
 
-    def optimization_GPUFreq(self):
+    def optimization_GPUFreq(self, gpu_avgPercent: float):
+        # 设置了目标帧时间且有帧时间数据时按帧时间调节，否则按占用率调节
+        governor = self._gpuManager.frametimeGovernor
+        frametime = (
+            self._gpuManager.frametimeSource.percentile() if governor else None
+        )
+        if frametime is not None:
+            self.optimization_GPUFreq_frametime(governor, frametime, gpu_avgPercent)
+        else:
+            self.optimization_GPUFreq_busy(gpu_avgPercent)
+
+    def optimization_GPUFreq_frametime(
+        self, governor: FrameTimeGovernor, frametime: float, gpu_avgPercent: float
+    ):
         try:
-            gpu_nowFreq = self._gpuManager.gpu_nowFreq[0]
-            gpu_autoFreqMin = self._gpuManager.gpu_autoFreqRange[0]
-            gpu_autoFreqMax = self._gpuManager.gpu_autoFreqRange[1]
-            gpu_addFreqOnce = self._gpu_addFreqBase
-            gpu_avgPercent = sysInfo.gpu_busyPercent
-            cpu_avgPercent = sysInfo.cpu_busyPercent
-            # cpu占用率过高 判定为被抢电 降低一点频率让电
-            if cpu_avgPercent >= self._cpu_maxBusyPercent:
-                gpu_addFreqOnce = min(
-                    gpu_nowFreq - gpu_autoFreqMin, self._gpu_addFreqBase
-                )
-                gpu_nowFreq = gpu_nowFreq - gpu_addFreqOnce
-                if gpu_addFreqOnce != 0:
-                    self.Set_gpuFreq(gpu_nowFreq)
+            _, gpu_autoFreqMax = self._freq_range()
+            gpu_nowFreq = self._gpuManager.gpu_nowFreq[0] or gpu_autoFreqMax
+            new_freq = min(
+                gpu_autoFreqMax, governor.update(frametime, gpu_avgPercent, gpu_nowFreq)
+            )
+            if new_freq != gpu_nowFreq:
+                self.Set_gpuFreq(new_freq)
                 logger.debug(
-                    f"当前平均CPU使用率::{cpu_avgPercent}% 当前平均GPU使用率::{gpu_avgPercent}% 大于最大值:{self._cpu_maxBusyPercent}% 降低{gpu_addFreqOnce}mhz GPU频率 降低后的GPU频率:{gpu_nowFreq} "
+                    f"当前帧时间:{frametime:.2f}ms 目标帧时间:{governor.target_ms:.2f}ms 当前平均GPU使用率::{gpu_avgPercent}% GPU频率 {gpu_nowFreq} -> {new_freq}"
                 )
-            # 未抢电则判断gpu占用率 过高时认定gpu不够用 增加频率
-            elif gpu_avgPercent >= self._gpu_maxBusyPercent:
+        except Exception as e:
+            logger.error(e)
+
+    def optimization_GPUFreq_busy(self, gpu_avgPercent: float):
+        try:
+            gpu_nowFreq = self._gpuManager.gpu_nowFreq[0]
+            gpu_autoFreqMin, gpu_autoFreqMax = self._freq_range()
+            # gpu占用率过高时认定gpu不够用 增加频率
+            if gpu_avgPercent >= self._gpu_maxBusyPercent:
                 gpu_addFreqOnce = min(
                     gpu_autoFreqMax - gpu_nowFreq, self._gpu_addFreqBase
                 )
@@ -79,59 +152,31 @@ class GPUAutoFreqManager(threading.Thread):
                     if gpu_avgPercent >= 99
                     else gpu_nowFreq + gpu_addFreqOnce
                 )
-                if gpu_addFreqOnce != 0:
+                gpu_nowFreq = min(gpu_nowFreq, gpu_autoFreqMax)
+                if gpu_addFreqOnce > 0:
                     self.Set_gpuFreq(gpu_nowFreq)
                 logger.debug(
-                    f"当前平均CPU使用率::{cpu_avgPercent}% 当前平均GPU使用率::{gpu_avgPercent}% 大于目标范围最大值:{self._gpu_maxBusyPercent}% 增加{gpu_addFreqOnce}mhz GPU频率 增加后的GPU频率:{gpu_nowFreq}"
+                    f"当前平均GPU使用率::{gpu_avgPercent}% 大于目标范围最大值:{self._gpu_maxBusyPercent}% 增加{gpu_addFreqOnce}mhz GPU频率 增加后的GPU频率:{gpu_nowFreq}"
                 )
-            # 未抢电则判断gpu占用率 过低时认定gpu富余 降低频率
+            # gpu占用率过低时认定gpu富余 降低频率
             elif gpu_avgPercent <= self._gpu_minBusyPercent:
                 gpu_addFreqOnce = min(
                     gpu_nowFreq - gpu_autoFreqMin, self._gpu_addFreqBase
                 )
                 gpu_nowFreq = gpu_nowFreq - gpu_addFreqOnce
-                if gpu_addFreqOnce != 0:
+                if gpu_addFreqOnce > 0:
                     self.Set_gpuFreq(gpu_nowFreq)
                 logger.debug(
-                    f"当前平均CPU使用率::{cpu_avgPercent}% 当前平均GPU使用率::{gpu_avgPercent}% 小于目标范围最小值:{self._gpu_minBusyPercent}% 降低{gpu_addFreqOnce}mhz GPU频率 降低后的GPU频率:{gpu_nowFreq} "
+                    f"当前平均GPU使用率::{gpu_avgPercent}% 小于目标范围最小值:{self._gpu_minBusyPercent}% 降低{gpu_addFreqOnce}mhz GPU频率 降低后的GPU频率:{gpu_nowFreq} "
                 )
             # 不做任何调整
             else:
                 logger.debug(
-                    f"当前平均CPU使用率::{cpu_avgPercent}% 当前平均GPU使用率::{gpu_avgPercent}% 处于目标范围{self._gpu_minBusyPercent}%-{self._gpu_maxBusyPercent}% 无需修改GPU频率  当前的GPU频率:{gpu_nowFreq}"
+                    f"当前平均GPU使用率::{gpu_avgPercent}% 处于目标范围{self._gpu_minBusyPercent}%-{self._gpu_maxBusyPercent}% 无需修改GPU频率  当前的GPU频率:{gpu_nowFreq}"
                 )
         except Exception as e:
             logger.error(e)
 
-    def run(self):
-        logger.info("开始自动优化频率:" + self.name)
-        adjust_count = 0
-        self._isRunning = True
-        gpu_autoFreqMin = self._gpuManager.gpu_autoFreqRange[0]
-        gpu_autoFreqMax = self._gpuManager.gpu_autoFreqRange[1]
-        while True:
-            try:
-                if not self._gpu_enableAutoFreq:
-                    self._isRunning = False
-                    logger.debug("退出自动优化频率：" + self.name)
-                    break
-                if not sysInfo.has_gpuData:
-                    self.GPU_enableAutoFreq(False)
-                    self.Set_gpuFreq(gpu_autoFreqMin, gpu_autoFreqMax)
-                    self._isRunning = False
-                    logger.debug("退出自动优化频率：" + self.name)
-                    break
-                adjust_count = adjust_count + 1
-                if adjust_count >= int(
-                    self._gpu_adjustFreqInterval / self._gpu_autoFreqCheckInterval
-                ):
-                    self.optimization_GPUFreq()
-                    adjust_count = 0
-                time.sleep(self._gpu_autoFreqCheckInterval)
-            except Exception as e:
-                logger.error(e)
-                time.sleep(self._gpu_autoFreqCheckInterval)
-
 
 class GPUFreqNotifier:
     def __init__(self, manager: "GPUManager"):
@@ -150,7 +195,7 @@ class GPUFreqNotifier:
             )
 
     def gpuLevel_IN_MODIFY(self, path, mask):
-        level_string = open(AMD_GPULEVEL_PATH, "r").read().strip()
+        level_string = sysfs_read(AMD_GPULEVEL_PATH)
         logger.info(
             f"gpuLevel_IN_MODIFY path:{path} mask:{mask} minFreq:{self._gpuManager.gpu_nowFreq[0]} maxFreq:{self._gpuManager.gpu_nowFreq[1]} level:{level_string}"
         )
@@ -163,7 +208,7 @@ class GPUFreqNotifier:
             logger.info(
                 f"set_gpuFreq: gpu_nowFreq={self._gpuManager.gpu_nowFreq} level: manual"
             )
-            open(AMD_GPULEVEL_PATH, "w").write("manual")
+            sysfs_write(AMD_GPULEVEL_PATH, "manual", force=True)
             self._gpuManager.set_gpuFreq(
                 self._gpuManager.gpu_nowFreq[0], self._gpuManager.gpu_nowFreq[1]
             )
@@ -174,7 +219,7 @@ class GPUFreqNotifier:
         try:
             # 可查询gpu设置频率时，判断当前设置是否与系统相同
             if os.path.exists(AMD_GPUFREQ_PATH):
-                freq_string = open(AMD_GPUFREQ_PATH, "r").read()
+                freq_string = sysfs_read(AMD_GPUFREQ_PATH)
                 # 使用正则表达式提取频率信息
                 od_sclk_matches = re.findall(
                     r"OD_SCLK:?\s*0:\s*(\d+)Mhz\s*1:\s*(\d+)Mhz", freq_string
@@ -239,13 +284,24 @@ class GPUManager:
         self._gpuAutoFreqManager = None
         self.gpu_nowFreq = [0, 0]  # 当前设置的gpu频率
         self.gpu_freqRange = [0, 0]  # 系统gpu频率调整的区间
+        self.gpu_autoStartFreq: Optional[int] = None  # 自动频率的起始频率
         self.gpu_autoFreqRange = [0, 0]  # 自动gpu频率调整的区间
+        self.frametimeSource = FrameTimeSource()  # 帧时间数据
+        self.frametimeGovernor = None  # 未设置目标帧时间时为 None
+        self._frametimeAppId = ""  # 当前目标帧时间对应的应用
+        self._frametimeReader = None  # 统计 socket 读取线程
         self.__init_gpu_info()  # 初始化gpu信息
         self._gpu_notifier = GPUFreqNotifier(self)  # 监视gpu频率文件
         # self._gpu_notifier.run()
 
     def __init_gpu_info(self):
-        self.get_gpuFreqRange()  # 获取gpu频率范围
+        cached = hardwareCache.get("gpu_freq_range")
+        if cached:
+            self.gpu_freqRange = list(cached)
+        else:
+            self.get_gpuFreqRange()  # 获取gpu频率范围
+            if self.gpu_freqRange[1] > 0:
+                hardwareCache.set("gpu_freq_range", self.gpu_freqRange)
         self.gpu_autoFreqRange = [
             self.gpu_freqRange[0],
             self.gpu_freqRange[1],
@@ -253,6 +309,7 @@ class GPUManager:
 
     def unload(self):
         self.set_gpuAuto(False)
+        self.set_gpuFrameTimeTarget("", 0)
         self._gpu_notifier.stop()
 
     def start_gpu_notify(self):
@@ -264,7 +321,7 @@ class GPUManager:
     def get_gpuFreqRange(self):
         try:
             if os.path.exists(AMD_GPUFREQ_PATH):
-                freq_string = open(AMD_GPUFREQ_PATH, "r").read()
+                freq_string = sysfs_read(AMD_GPUFREQ_PATH)
                 # 使用正则表达式提取频率信息
                 od_sclk_matches = re.findall(
                     r"OD_RANGE:?\s*SCLK:\s*(\d+)Mhz\s*(\d+)Mhz", freq_string
@@ -286,10 +343,8 @@ class GPUManager:
                     f"get_gpuFreqRange intel gpu, max_limit: {INTEL_GPU_MAX_LIMIT}, min_limit: {INTEL_GPU_MIN_LIMIT}"
                 )
                 # intel gpu
-                with open(INTEL_GPU_MAX_LIMIT, "r") as file:
-                    max_freq = int(file.read().strip())
-                with open(INTEL_GPU_MIN_LIMIT, "r") as file:
-                    min_freq = int(file.read().strip())
+                max_freq = sysfs_read_int(INTEL_GPU_MAX_LIMIT)
+                min_freq = sysfs_read_int(INTEL_GPU_MIN_LIMIT)
                 self.gpu_freqRange = [min_freq, max_freq]
 
                 return min_freq, max_freq
@@ -306,10 +361,11 @@ class GPUManager:
             # 判断是否已经有自动频率管理
             if (
                 self._gpuAutoFreqManager is None
-                or not self._gpuAutoFreqManager._isRunning
+                or not self._gpuAutoFreqManager.isRunning()
             ):
                 # 没有管理器或者当前管理器已经停止运行，则实例化一个并开启
                 if value:
+                    self._apply_auto_start_freq()
                     self._gpuAutoFreqManager = GPUAutoFreqManager(self)
                     self._gpuAutoFreqManager.GPU_enableAutoFreq(True)
             else:
@@ -329,10 +385,109 @@ class GPUManager:
                 min(max(value1, self.gpu_freqRange[0]), self.gpu_freqRange[1]),
                 min(max(value2, self.gpu_freqRange[0]), self.gpu_freqRange[1]),
             ]
+            if self.frametimeGovernor is not None:
+                self.frametimeGovernor.min_freq = self.gpu_autoFreqRange[0]
+                self.frametimeGovernor.max_freq = self.gpu_autoFreqRange[1]
         except Exception as e:
             logger.error(e)
             return False
 
+    def _save_frametime_start_freq(self):
+        """保存当前应用学习到的起始频率"""
+        if self.frametimeGovernor is None or not self._frametimeAppId:
+            return
+        freq = self.frametimeGovernor.get_learned_freq()
+        if freq is None:
+            return
+        settings = confManager.getSettings() or {}
+        startFreqs = settings.get(GPU_FRAMETIME_START_KEY) or {}
+        if startFreqs.get(self._frametimeAppId) == freq:
+            return
+        startFreqs[self._frametimeAppId] = freq
+        settings[GPU_FRAMETIME_START_KEY] = startFreqs
+        confManager.setSettings(settings)
+        logger.info(f"保存应用 {self._frametimeAppId} 的 GPU 起始频率: {freq}")
+
+    def _apply_auto_start_freq(self):
+        """自动频率运行前先设置到学习到的起始频率，减少收敛时间
+
+        优先使用帧时间调节学习到的频率，其次使用 ProfileLearner 推荐的频率。
+        """
+        governor = self.frametimeGovernor
+        if governor is not None and governor.start_freq:
+            self.set_gpuFreq(governor.start_freq, governor.start_freq)
+        elif self.gpu_autoStartFreq:
+            self.set_gpuFreq(self.gpu_autoStartFreq, self.gpu_autoStartFreq)
+
+    def set_gpuAutoStartFreq(self, freq: Optional[int]):
+        """设置开启自动频率时的起始频率，None 为不设置，自动频率已在运行时立即生效
+
+        Args:
+            freq (int): 起始频率(MHz)，由 ProfileLearner 按应用学习得到
+        """
+        if freq is not None and self.gpu_freqRange[1] > 0:
+            freq = min(max(int(freq), self.gpu_freqRange[0]), self.gpu_freqRange[1])
+        self.gpu_autoStartFreq = freq
+        # 自动频率已在运行时直接跳到起始频率，之后由调节器继续调整
+        manager = self._gpuAutoFreqManager
+        if freq is not None and manager is not None and manager.isRunning():
+            self._apply_auto_start_freq()
+
+    def set_gpuFrameTimeTarget(
+        self, app_id: str, target_ms: float, guard: float = DEFAULT_GUARD
+    ):
+        """设置自动频率的目标帧时间
+
+        Args:
+            app_id (str): 当前运行的应用，用于保存和读取学习到的起始频率
+            target_ms (float): 目标帧时间(ms)，小于等于 0 时关闭帧时间调节
+            guard (float): 渲染余量比例
+        """
+        try:
+            logger.debug(f"set_gpuFrameTimeTarget {app_id} {target_ms}ms guard:{guard}")
+            app_id = str(app_id)
+            governor = self.frametimeGovernor
+            if (
+                governor is not None
+                and app_id == self._frametimeAppId
+                and governor.target_ms == target_ms
+                and governor.guard == guard
+            ):
+                return True
+
+            self._save_frametime_start_freq()
+            self.frametimeSource.clear()
+            if target_ms <= 0:
+                self.frametimeGovernor = None
+                self._frametimeAppId = ""
+                if self._frametimeReader is not None:
+                    self._frametimeReader.stop()
+                    self._frametimeReader = None
+                return True
+
+            startFreqs = (confManager.getSettings() or {}).get(
+                GPU_FRAMETIME_START_KEY
+            ) or {}
+            self.frametimeGovernor = FrameTimeGovernor(
+                target_ms,
+                self.gpu_autoFreqRange[0],
+                self.gpu_autoFreqRange[1],
+                guard=guard,
+                start_freq=startFreqs.get(app_id),
+            )
+            self._frametimeAppId = app_id
+            if self._frametimeReader is None:
+                self._frametimeReader = FrameTimeSocketReader(
+                    self.frametimeSource, owner=_frametime_socket_owner()
+                )
+                self._frametimeReader.start()
+            if self._gpuAutoFreqManager is not None:
+                self._apply_auto_start_freq()
+            return True
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return False
+
     def set_gpuFreq(self, minValue: int, maxValue: int):
         try:
             logger.debug(
@@ -350,13 +505,16 @@ class GPUManager:
                 logger.debug(f"set_gpuFreq: gpu_nowFreq={self.gpu_nowFreq}")
                 if os.path.exists(AMD_GPULEVEL_PATH):
                     # amd gpu
+                    # 先回读，级别被外部程序修改过时写入缓存失效，不会被跳过
+                    sysfs_read(AMD_GPULEVEL_PATH)
                     if minValue == 0 and maxValue == 0:
-                        open(AMD_GPULEVEL_PATH, "w").write("auto")
+                        sysfs_write(AMD_GPULEVEL_PATH, "auto")
                     else:
-                        open(AMD_GPULEVEL_PATH, "w").write("manual")
-                        open(AMD_GPUFREQ_PATH, "w").write("s 0 {}".format(minValue))
-                        open(AMD_GPUFREQ_PATH, "w").write("s 1 {}".format(maxValue))
-                        open(AMD_GPUFREQ_PATH, "w").write("c")
+                        sysfs_write(AMD_GPULEVEL_PATH, "manual")
+                        # OD 表命令每次都要写入，"c" 提交前面的修改
+                        sysfs_write(AMD_GPUFREQ_PATH, f"s 0 {minValue}", force=True)
+                        sysfs_write(AMD_GPUFREQ_PATH, f"s 1 {maxValue}", force=True)
+                        sysfs_write(AMD_GPUFREQ_PATH, "c", force=True)
                     return True
                 elif os.path.exists(INTEL_GPU_MAX_FREQ) and os.path.exists(
                     INTEL_GPU_MIN_FREQ
@@ -370,10 +528,8 @@ class GPUManager:
                         maxValue = self.gpu_freqRange[1]
                     currentMin = 0
                     currentMax = 0
-                    with open(INTEL_GPU_MIN_FREQ, "r") as file:
-                        currentMin = int(file.read().strip())
-                    with open(INTEL_GPU_MAX_FREQ, "r") as file:
-                        currentMax = int(file.read().strip())
+                    currentMin = sysfs_read_int(INTEL_GPU_MIN_FREQ)
+                    currentMax = sysfs_read_int(INTEL_GPU_MAX_FREQ)
                     logger.debug(
                         f"set_gpuFreq: intel gpu, currentMin={currentMin} currentMax={currentMax}"
                     )
@@ -384,15 +540,13 @@ class GPUManager:
                         )
                         try:
                             if maxValue != currentMax:
-                                with open(INTEL_GPU_MAX_FREQ, "w") as file:
-                                    file.write(str(maxValue))
+                                sysfs_write(INTEL_GPU_MAX_FREQ, maxValue)
                                 time.sleep(0.1)
                         except Exception as e:
                             logger.error(e, exc_info=True)
                         try:
                             if minValue != currentMin:
-                                with open(INTEL_GPU_MIN_FREQ, "w") as file:
-                                    file.write(str(minValue))
+                                sysfs_write(INTEL_GPU_MIN_FREQ, minValue)
                         except Exception as e:
                             logger.error(e, exc_info=True)
                     else:
@@ -401,15 +555,13 @@ class GPUManager:
                         )
                         try:
                             if minValue != currentMin:
-                                with open(INTEL_GPU_MIN_FREQ, "w") as file:
-                                    file.write(str(minValue))
+                                sysfs_write(INTEL_GPU_MIN_FREQ, minValue)
                             time.sleep(0.1)
                         except Exception as e:
                             logger.error(e, exc_info=True)
                         try:
                             if maxValue != currentMax:
-                                with open(INTEL_GPU_MAX_FREQ, "w") as file:
-                                    file.write(str(maxValue))
+                                sysfs_write(INTEL_GPU_MAX_FREQ, maxValue)
                             time.sleep(0.1)
                         except Exception as e:
                             logger.error(e, exc_info=True)
@@ -494,4 +646,4 @@ class GPUManager:
         return gpuFreqMax
 
 
-gpuManager = GPUManager()
+gpuManager = serviceRegistry.lazy("gpu", GPUManager)
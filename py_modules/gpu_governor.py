@@ -0,0 +1,195 @@
+"""按帧时间调节 GPU 频率
+
+FrameTimeGovernor 以目标帧时间为准，把 GPU 频率降到刚好能维持目标的最低值。
+帧时间由外部工具写入统计 socket (gamescope / MangoHud 的替代)，
+socket 只允许 owner 指定的用户(游戏所用的用户)写入:
+
+    echo "frametime=16.6" | socat - UNIX-SENDTO:/run/powercontrol/frametime.sock
+
+每个数据包可以包含多行，每行可以是 "frametime=<ms>"、单独的数字，
+或 MangoHud CSV 日志的一行 (第二列为帧时间)。本模块不依赖插件环境。
+"""
+
+import os
+import socket
+import threading
+import time
+from collections import deque
+from typing import Iterable, Optional, Tuple
+
+FRAMETIME_SOCKET_PATH = "/run/powercontrol/frametime.sock"
+FRAMETIME_MAX_SAMPLES = 240
+FRAMETIME_WINDOW = 0.5  # 计算帧时间分位数的时间窗口(秒)，窗口内没有数据时视为无数据
+FRAMETIME_PERCENTILE = 90  # 使用 p90 帧时间，避免只看平均值忽略卡顿
+FRAMETIME_LIMIT_MS = 1000  # 超出 (0, 1000) 毫秒的数据视为无效
+
+DEFAULT_GUARD = 0.1  # 保留 10% 的渲染余量
+LEARN_RATE = 0.1  # 学习起始频率的 EWMA 系数
+
+
+def parse_frametime_line(line: str) -> Optional[float]:
+    """解析一行统计数据，返回帧时间(ms)，无法解析时返回 None"""
+    line = line.strip()
+    if not line:
+        return None
+    value = None
+    try:
+        if "=" in line or ":" in line:
+            pairs = line.replace(": ", "=").replace(":", "=").replace(",", " ")
+            for pair in pairs.split():
+                key, sep, raw = pair.partition("=")
+                if sep and key.lower() in ("frametime", "frame_time", "ft"):
+                    value = float(raw)
+                    break
+        elif "," in line:
+            value = float(line.split(",")[1])
+        else:
+            value = float(line)
+    except (ValueError, IndexError):
+        return None
+    if value is None or not 0 < value < FRAMETIME_LIMIT_MS:
+        return None
+    return value
+
+
+class FrameTimeSource:
+    """最近的帧时间样本，线程安全"""
+
+    def __init__(self, max_samples: int = FRAMETIME_MAX_SAMPLES):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=max_samples)  # (时间, 帧时间 ms)
+
+    def push(self, frametimes: Iterable[float], timestamp: Optional[float] = None):
+        now = time.monotonic() if timestamp is None else timestamp
+        with self._lock:
+            for value in frametimes:
+                if 0 < value < FRAMETIME_LIMIT_MS:
+                    self._samples.append((now, float(value)))
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def percentile(
+        self, pct: float = FRAMETIME_PERCENTILE, window: float = FRAMETIME_WINDOW
+    ) -> Optional[float]:
+        """最近 window 秒内帧时间的分位数，没有数据时返回 None"""
+        since = time.monotonic() - window
+        with self._lock:
+            values = sorted(v for t, v in self._samples if t >= since)
+        if not values:
+            return None
+        index = min(len(values) - 1, int(len(values) * pct / 100))
+        return values[index]
+
+
+class FrameTimeSocketReader(threading.Thread):
+    """从 UNIX datagram socket 读取帧时间写入 FrameTimeSource
+
+    socket 权限为 0600，owner 为 (uid, gid) 时属于该用户，否则只有 root 可以写入。
+    """
+
+    def __init__(
+        self,
+        source: FrameTimeSource,
+        path: str = FRAMETIME_SOCKET_PATH,
+        owner: Optional[Tuple[int, int]] = None,
+    ):
+        super().__init__(daemon=True)
+        self._source = source
+        self._path = path
+        self._owner = owner
+        self._running = False
+        self._sock: Optional[socket.socket] = None
+
+    def start(self):
+        os.makedirs(os.path.dirname(self._path), mode=0o755, exist_ok=True)
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        # bind 时就限制权限，避免 chmod 之前被其他用户写入
+        umask = os.umask(0o177)
+        try:
+            self._sock.bind(self._path)
+        finally:
+            os.umask(umask)
+        if self._owner is not None:
+            # 插件以 root 运行，游戏以普通用户运行
+            os.chown(self._path, *self._owner)
+        self._sock.settimeout(1.0)
+        self._running = True
+        super().start()
+
+    def run(self):
+        while self._running:
+            try:
+                data = self._sock.recv(4096)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            lines = data.decode(errors="ignore").splitlines()
+            values = [v for v in map(parse_frametime_line, lines) if v is not None]
+            if values:
+                self._source.push(values)
+
+    def stop(self):
+        self._running = False
+        if self._sock is not None:
+            self._sock.close()
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+
+
+class FrameTimeGovernor:
+    """把 GPU 频率调到能维持目标帧时间的最低值
+
+    GPU 的渲染时间近似为 帧时间 * 占用率，且与频率成反比，
+    维持目标所需的频率 = 当前频率 * 渲染时间 / (目标帧时间 * (1 - guard))。
+    达到帧率上限时占用率下降，所需频率随之降低；渲染跟不上时直接升到所需频率，
+    降频每次最多 down_step，避免场景切换时掉帧。
+    """
+
+    def __init__(
+        self,
+        target_ms: float,
+        min_freq: int,
+        max_freq: int,
+        guard: float = DEFAULT_GUARD,
+        step: int = 25,
+        down_step: int = 100,
+        start_freq: Optional[int] = None,
+    ):
+        self.target_ms = target_ms
+        self.min_freq = min_freq
+        self.max_freq = max_freq
+        self.guard = min(max(guard, 0.0), 0.5)
+        self.step = step
+        self.down_step = down_step
+        self.start_freq = start_freq
+        self.learned_freq: Optional[float] = start_freq  # 满足目标时频率的 EWMA
+
+    def _quantize(self, freq: float) -> int:
+        freq = int(round(freq / self.step)) * self.step
+        return max(self.min_freq, min(self.max_freq, freq))
+
+    def update(self, frametime_ms: float, gpu_busy: float, current_freq: int) -> int:
+        busy = min(max(gpu_busy, 1), 100) / 100
+        budget = self.target_ms * (1 - self.guard)
+        required = current_freq * frametime_ms * busy / budget
+
+        if required < current_freq:
+            required = max(required, current_freq - self.down_step)
+        new_freq = self._quantize(required)
+
+        if frametime_ms <= self.target_ms * (1 + self.guard):
+            if self.learned_freq is None:
+                self.learned_freq = float(new_freq)
+            else:
+                self.learned_freq += LEARN_RATE * (new_freq - self.learned_freq)
+        return new_freq
+
+    def get_learned_freq(self) -> Optional[int]:
+        if self.learned_freq is None:
+            return None
+        return self._quantize(self.learned_freq)
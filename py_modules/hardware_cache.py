@@ -0,0 +1,175 @@
+"""硬件信息缓存和启动耗时统计
+
+冷启动时 CPU 拓扑、核心类型检测(每个逻辑 CPU 一次 taskset cpuid)、风扇配置解析等
+都是同步完成的。这些结果只取决于硬件、内核和配置文件，本模块把它们按硬件指纹
+缓存到插件运行目录，指纹一致时直接使用缓存。
+
+指纹包含 DMI 信息、CPU 型号、内核版本和 fan_config、cpu_core_whitelist.yaml 的
+内容哈希，任一变化(换机、升级内核、更新插件配置)都会使整个缓存失效。
+
+config.py 会导入本模块，为避免循环导入这里不导入 config，由调用方记录日志。
+"""
+
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, List, Optional, Tuple
+
+import decky
+
+# 缓存格式变化时递增，使旧缓存失效
+CACHE_VERSION = 1
+CACHE_FILE = os.path.join(decky.DECKY_PLUGIN_RUNTIME_DIR, "hardware_cache.json")
+
+DMI_PATH = "/sys/devices/virtual/dmi/id"
+DMI_FIELDS = (
+    "sys_vendor",
+    "product_name",
+    "product_version",
+    "board_vendor",
+    "board_name",
+    "bios_version",
+)
+PY_MODULES_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_GLOBS = (
+    "fan_config/**/*.yml",
+    "fan_config/schema/*.json",
+    "cpu_core_whitelist.yaml",
+)
+
+
+def _read(path: str) -> str:
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return ""
+
+
+def compute_fingerprint() -> str:
+    digest = hashlib.sha256()
+
+    def add(key: str, value: str):
+        digest.update(f"{key}={value}\0".encode())
+
+    add("version", str(CACHE_VERSION))
+    for name in DMI_FIELDS:
+        add(name, _read(f"{DMI_PATH}/{name}"))
+    add("cpu", _cpu_model())
+    add("kernel", os.uname().release)
+    for pattern in CONFIG_GLOBS:
+        for path in sorted(
+            glob.glob(os.path.join(PY_MODULES_DIR, pattern), recursive=True)
+        ):
+            add("file", os.path.relpath(path, PY_MODULES_DIR))
+            try:
+                with open(path, "rb") as f:
+                    digest.update(hashlib.sha256(f.read()).digest())
+            except OSError:
+                pass
+    return digest.hexdigest()
+
+
+class HardwareCache:
+    """按硬件指纹失效的 JSON 缓存
+
+    get 在指纹不一致或缓存损坏时返回 None，调用方执行完整检测后用 set 写入。
+    值必须可以 JSON 序列化。
+    """
+
+    def __init__(self, path: str = CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = None
+        self._data: Optional[dict] = None
+        self.hits: List[str] = []
+        self.misses: List[str] = []
+
+    def _load(self) -> dict:
+        """第一次访问时计算指纹并读取缓存文件，调用时需持有锁"""
+        if self._data is not None:
+            return self._data
+        self._fingerprint = compute_fingerprint()
+        data = {}
+        try:
+            with open(self.path, "r") as f:
+                saved = json.load(f)
+            if saved.get("fingerprint") == self._fingerprint:
+                data = saved.get("entries") or {}
+        except (OSError, ValueError, AttributeError):
+            pass
+        self._data = data
+        return data
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._load().get(key)
+            (self.misses if value is None else self.hits).append(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            data = self._load()
+            data[key] = value
+            self._save(data)
+
+    def _save(self, data: dict):
+        tmp = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump({"fingerprint": self._fingerprint, "entries": data}, f)
+            os.replace(tmp, self.path)
+        except (OSError, TypeError, ValueError):
+            # 无法写入时只是下次启动重新检测
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._data = None
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+hardwareCache = HardwareCache()
+
+
+_startupPhases: List[Tuple[str, float]] = []
+
+
+@contextmanager
+def startup_phase(name: str):
+    """记录启动阶段的耗时，由 main 在启动完成后统一输出"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _startupPhases.append((name, time.perf_counter() - start))
+
+
+def format_startup_phases() -> str:
+    total = sum(duration for _, duration in _startupPhases)
+    parts = [f"{name}={duration * 1000:.0f}ms" for name, duration in _startupPhases]
+    parts.append(f"total={total * 1000:.0f}ms")
+    cache = f"cache hit={hardwareCache.hits} miss={hardwareCache.misses}"
+    return f"{' '.join(parts)} ({cache})"
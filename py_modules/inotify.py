@@ -3,9 +3,10 @@ import os
 import struct
 import sys
 from ctypes import CDLL, get_errno
-from threading import Thread, Timer
 
 from config import logger
+from reactor import reactor
+from service_registry import serviceRegistry
 
 IN_ACCESS = 0x00000001  # 文件被访问
 IN_MODIFY = 0x00000002  # 文件被修改
@@ -21,12 +22,26 @@ IN_DELETE_SELF = 0x00000400  # 自身（被监视的项本身）被删除
 IN_MOVE_SELF = 0x00000800  # 自身（被监视的项本身）被移动
 
 
+IN_IGNORED = 0x00008000  # 监视被移除
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+EVENT_HEADER = struct.Struct("iIII")
+
+
 class Inotify:
+    """inotify 文件监视，注册到 reactor 上，同一文件的连续事件合并为一次回调"""
+
     def __init__(self):
+        self.fd = -1
+        self._wdMap = {}
+        self._delay = 0.5
+        self._delaytimer = {}
+        self._running = False
         try:
             self._libc = CDLL(None, use_errno=True)
-            self._libc.inotify_init.argtypes = []
-            self._libc.inotify_init.restype = ctypes.c_int
+            self._libc.inotify_init1.argtypes = [ctypes.c_int]
+            self._libc.inotify_init1.restype = ctypes.c_int
             self._libc.inotify_add_watch.argtypes = [
                 ctypes.c_int,
                 ctypes.c_char_p,
@@ -36,52 +51,40 @@ class Inotify:
             self._libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
             self._libc.inotify_rm_watch.restype = ctypes.c_int
 
-            self.fd = self._libc.inotify_init()
-
-            self._wdMap = {}
-            self._delay = 0.5
-            self._delaytimer = {}
-            self._runThread = None
+            self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if self.fd < 0:
+                raise OSError(get_errno(), os.strerror(get_errno()))
         except Exception as e:
             logger.error(e)
 
-    def _process(self):
+    def _process(self, events: int):
         try:
-            if self._runThread:
-                nowThread = self._runThread.name
-            while self._runThread and self._runThread.name == nowThread:
-                buf = os.read(self.fd, 4096)
+            while True:
+                try:
+                    buf = os.read(self.fd, 4096)
+                except BlockingIOError:
+                    break
                 pos = 0
-                wdMap = self._wdMap.copy()
                 while pos < len(buf):
-                    (wd, mask, cookie, name_len) = struct.unpack(
-                        "iIII", buf[pos : pos + 16]
-                    )
-                    pos += 16
-                    (name,) = struct.unpack("%ds" % name_len, buf[pos : pos + name_len])
-                    pos += name_len
-                    item = wdMap.get(wd)
-                    if item and self._runThread and self._runThread.name == nowThread:
+                    (wd, mask, cookie, name_len) = EVENT_HEADER.unpack_from(buf, pos)
+                    pos += EVENT_HEADER.size + name_len
+                    item = self._wdMap.get(wd)
+                    if item and not mask & IN_IGNORED:
                         self._delayCall(wd, item["callback"], item["path"], mask)
         except Exception as e:
             logger.error(e)
 
     def _delayCall(self, wd, callfunc, *args):
-        try:
-            if (
-                wd in self._delaytimer
-                and self._delaytimer[wd] is not None
-                and self._delaytimer[wd].is_alive()
-            ):
-                self._delaytimer[wd].cancel()
-            self._delaytimer[wd] = Timer(
-                self._delay, lambda: self._onCallBack(callfunc, *args)
-            )
-            self._delaytimer[wd].start()
-        except Exception as e:
-            logger.error(e)
+        """在 reactor 上延时回调，延时内的新事件会重新计时"""
+        timer = self._delaytimer.get(wd)
+        if timer is not None:
+            timer.cancel()
+        self._delaytimer[wd] = reactor.call_later(
+            self._delay, self._onCallBack, wd, callfunc, *args
+        )
 
-    def _onCallBack(self, callfunc, *args):
+    def _onCallBack(self, wd, callfunc, *args):
+        self._delaytimer.pop(wd, None)
         logger.debug(f"callback path:{args[0]}, mask:{args[1]}")
         callfunc(*args)
 
@@ -94,11 +97,12 @@ class Inotify:
                 path.encode(sys.getfilesystemencoding())
             )
             wd = self._libc.inotify_add_watch(self.fd, path_buf, mask)
-            self._wdMap[wd] = {"path": path, "callback": callback}
             if wd < 0:
                 sys.stderr.write(
                     f"can't add watch for {path_buf}: {os.strerror(get_errno())}\n"
                 )
+            else:
+                self._wdMap[wd] = {"path": path, "callback": callback}
             return wd
         except Exception as e:
             logger.error(e)
@@ -107,28 +111,39 @@ class Inotify:
         try:
             for wd in list(self._wdMap):
                 if path == self._wdMap[wd]["path"]:
+                    timer = self._delaytimer.pop(wd, None)
+                    if timer is not None:
+                        timer.cancel()
+                    self._wdMap.pop(wd)
                     if self._libc.inotify_rm_watch(self.fd, wd) < 0:
                         sys.stderr.write(
                             f"can't remove watch: {os.strerror(get_errno())}\n"
                         )
-                    else:
-                        self._wdMap.pop(wd)
         except Exception as e:
             logger.error(e)
 
     def run(self):
         try:
-            if self._runThread:
-                pass
-            else:
-                self._runThread = Thread(target=self._process)
-                self._runThread.start()
+            if not self._running and self.fd >= 0:
+                reactor.add_reader(self.fd, self._process)
+                self._running = True
         except Exception as e:
             logger.error(e)
 
     def stop(self):
-        self._runThread = None
+        if not self._running:
+            return
+        reactor.remove_reader(self.fd)
+        for timer in self._delaytimer.values():
+            timer.cancel()
+        self._delaytimer.clear()
+        self._running = False
+
+
+def _create_notify() -> Inotify:
+    inotify = Inotify()
+    inotify.run()
+    return inotify
 
 
-notify = Inotify()
-notify.run()
+notify = serviceRegistry.lazy("inotify", Inotify, _create_notify)
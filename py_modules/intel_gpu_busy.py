@@ -0,0 +1,276 @@
+import collections
+import ctypes
+import os
+import platform
+import shutil
+import struct
+import subprocess
+import threading
+import time
+
+from config import logger
+from utils import get_env
+
+I915_PMU_PATH = "/sys/bus/event_source/devices/i915"
+
+# perf_event_open 的系统调用号
+PERF_EVENT_OPEN_NR = {
+    "x86_64": 298,
+    "aarch64": 241,
+}
+PERF_ATTR_SIZE_VER0 = 64
+
+
+class I915PMUReader:
+    """通过 perf_event_open 直接读取 i915 PMU 的 rcs0-busy 计数器
+
+    计数器的值是渲染引擎累计的忙碌时间(ns)，两次读取的差值除以经过的时间即为占用率，
+    不需要启动任何子进程。
+    """
+
+    def __init__(self):
+        self._fd = -1
+        self._lastBusy = 0
+        self._lastTime = 0
+
+    @staticmethod
+    def is_supported() -> bool:
+        return os.path.exists(f"{I915_PMU_PATH}/events/rcs0-busy") and (
+            platform.machine() in PERF_EVENT_OPEN_NR
+        )
+
+    def _read_event_config(self) -> int:
+        # 文件内容形如 "config=0x1"
+        with open(f"{I915_PMU_PATH}/events/rcs0-busy", "r") as f:
+            for item in f.read().strip().split(","):
+                key, _, value = item.partition("=")
+                if key.strip() == "config":
+                    return int(value, 0)
+        raise ValueError("rcs0-busy event has no config field")
+
+    def _open(self):
+        with open(f"{I915_PMU_PATH}/type", "r") as f:
+            pmu_type = int(f.read().strip())
+        cpu = 0
+        if os.path.exists(f"{I915_PMU_PATH}/cpumask"):
+            with open(f"{I915_PMU_PATH}/cpumask", "r") as f:
+                cpu = int(f.read().strip().split(",")[0].split("-")[0])
+
+        attr = bytearray(PERF_ATTR_SIZE_VER0)
+        struct.pack_into(
+            "IIQ", attr, 0, pmu_type, PERF_ATTR_SIZE_VER0, self._read_event_config()
+        )
+        attr_buf = ctypes.create_string_buffer(bytes(attr), len(attr))
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        # pid=-1, 指定 cpu, 无 group, flags=0 (PMU 是 uncore 类型，只能按 cpu 打开)
+        fd = libc.syscall(
+            PERF_EVENT_OPEN_NR[platform.machine()],
+            attr_buf,
+            ctypes.c_int(-1),
+            ctypes.c_int(cpu),
+            ctypes.c_int(-1),
+            ctypes.c_ulong(0),
+        )
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"perf_event_open failed: {os.strerror(errno)}")
+        self._fd = fd
+        self._lastBusy = self._read_counter()
+        self._lastTime = time.monotonic_ns()
+
+    def _read_counter(self) -> int:
+        return struct.unpack("Q", os.read(self._fd, 8))[0]
+
+    def get_busy_percent(self) -> float:
+        if self._fd < 0:
+            self._open()
+            return 0
+        busy = self._read_counter()
+        now = time.monotonic_ns()
+        elapsed = now - self._lastTime
+        percent = 0
+        if elapsed > 0:
+            percent = min(max((busy - self._lastBusy) * 100 / elapsed, 0), 100)
+        self._lastBusy = busy
+        self._lastTime = now
+        return percent
+
+    def close(self):
+        if self._fd >= 0:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = -1
+
+
+class IntelGPUTopReader:
+    """常驻的 intel_gpu_top 读取器
+
+    只启动一个 intel_gpu_top -l 子进程，由读取线程逐行解析输出写入环形缓冲区，
+    子进程异常退出时自动按退避时间重启。
+    """
+
+    RESTART_DELAY_MIN = 1.0  # 子进程重启的最小等待时间(秒)
+    RESTART_DELAY_MAX = 30.0  # 子进程重启的最大等待时间(秒)
+
+    def __init__(self, period_ms: int = 100, buffer_size: int = 16):
+        self._period_ms = period_ms
+        self._samples = collections.deque(maxlen=buffer_size)  # 占用率环形缓冲区
+        self._lock = threading.Lock()
+        self._process = None
+        self._thread = None
+        self._running = False
+        self._stopEvent = threading.Event()
+
+    def is_running(self) -> bool:
+        return self._running
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            # 等待上一次的读取线程退出，避免同时存在两个子进程
+            if self._thread is not None and self._thread.is_alive():
+                self._thread.join(timeout=3)
+            self._running = True
+            self._stopEvent.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            self._stopEvent.set()
+            process = self._process
+        if process is not None and process.poll() is None:
+            process.terminate()
+        self._samples.clear()
+
+    def get_busy_percent(self) -> float:
+        """返回最新一次解析到的占用率，尚无数据时返回 0"""
+        try:
+            return self._samples[-1]
+        except IndexError:
+            return 0
+
+    def get_samples(self) -> list:
+        return list(self._samples)
+
+    @staticmethod
+    def _parse_line(line: str):
+        parts = line.strip().split()
+        # 表头行以非数字开头，数据行的第七项是 RCS 占用率
+        if len(parts) < 7:
+            return None
+        try:
+            float(parts[0])
+            return float(parts[6])
+        except ValueError:
+            return None
+
+    def _run(self):
+        delay = self.RESTART_DELAY_MIN
+        while self._running:
+            started = time.monotonic()
+            try:
+                self._process = subprocess.Popen(
+                    [
+                        "stdbuf",
+                        "-oL",
+                        "intel_gpu_top",
+                        "-l",
+                        "-s",
+                        str(self._period_ms),
+                    ],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                    env=get_env(),
+                )
+                logger.info(f"intel_gpu_top started pid={self._process.pid}")
+                for line in self._process.stdout:
+                    if not self._running:
+                        break
+                    percent = self._parse_line(line)
+                    if percent is not None:
+                        self._samples.append(percent)
+            except Exception as e:
+                logger.error(f"intel_gpu_top reader error: {e}")
+            finally:
+                self._cleanup_process()
+
+            if not self._running:
+                break
+            # 运行足够久后的退出视为偶发异常，重置退避时间
+            if time.monotonic() - started > self.RESTART_DELAY_MAX:
+                delay = self.RESTART_DELAY_MIN
+            logger.warning(f"intel_gpu_top exited, restart in {delay}s")
+            self._stopEvent.wait(delay)
+            delay = min(delay * 2, self.RESTART_DELAY_MAX)
+
+    def _cleanup_process(self):
+        process = self._process
+        self._process = None
+        if process is None:
+            return
+        try:
+            if process.poll() is None:
+                process.terminate()
+            process.wait(timeout=2)
+        except Exception:
+            process.kill()
+        finally:
+            if process.stdout:
+                process.stdout.close()
+
+
+_intel_gpu_top_path = None
+_intel_gpu_top_checked = False
+
+
+def has_intel_gpu_top() -> bool:
+    """检查 intel_gpu_top 是否可用，结果只查询一次"""
+    global _intel_gpu_top_path, _intel_gpu_top_checked
+    if not _intel_gpu_top_checked:
+        _intel_gpu_top_path = shutil.which("intel_gpu_top")
+        _intel_gpu_top_checked = True
+    return _intel_gpu_top_path is not None
+
+
+class IntelGPUBusyReader:
+    """Intel GPU 占用率读取，优先使用 i915 PMU，不可用时使用常驻 intel_gpu_top"""
+
+    def __init__(self, period_ms: int = 100):
+        self._period_ms = period_ms
+        self._pmu = I915PMUReader() if I915PMUReader.is_supported() else None
+        self._gpuTop = None
+
+    def is_available(self) -> bool:
+        return self._pmu is not None or has_intel_gpu_top()
+
+    def get_busy_percent(self) -> float:
+        if self._pmu is not None:
+            try:
+                return self._pmu.get_busy_percent()
+            except Exception as e:
+                logger.warning(f"i915 PMU unavailable, fallback to intel_gpu_top: {e}")
+                self._pmu.close()
+                self._pmu = None
+
+        if not has_intel_gpu_top():
+            return 0
+        if self._gpuTop is None:
+            self._gpuTop = IntelGPUTopReader(self._period_ms)
+        if not self._gpuTop.is_running():
+            self._gpuTop.start()
+        return self._gpuTop.get_busy_percent()
+
+    def stop(self):
+        if self._pmu is not None:
+            self._pmu.close()
+        if self._gpuTop is not None:
+            self._gpuTop.stop()
@@ -1,12 +1,30 @@
+import atexit
 import logging
 import os
-import subprocess
+import queue
+import socket
+import struct
+import threading
+from logging.handlers import QueueHandler
 
 LOG = "/tmp/PowerControl_systemd.log"
 LOG_TAG = "powercontrol"
+LOG_MAX_BYTES = 1024 * 1024  # 备用日志文件的最大大小
+
+JOURNAL_SOCKET = "/run/systemd/journal/socket"
+JOURNAL_SEND_TIMEOUT = 1.0  # 发送到 journald 的最长等待时间(秒)
+
+QUEUE_MAX_SIZE = 2048  # 日志队列最大长度，超出时丢弃
+BATCH_MAX_SIZE = 64  # 每次从队列中批量取出的最大记录数
 
 
 class SystemdHandler(logging.Handler):
+    """通过 journald 原生协议(unix datagram)写日志
+
+    每条记录一个数据报，不再为每条日志启动 systemd-cat 进程。
+    journald 不可用时写入备用日志文件。
+    """
+
     PRIORITY_MAP = {
         logging.DEBUG: "7",  # debug
         logging.INFO: "6",  # info
@@ -15,26 +33,171 @@ class SystemdHandler(logging.Handler):
         logging.CRITICAL: "2",  # crit
     }
 
+    def __init__(self, socket_path: str = JOURNAL_SOCKET):
+        super().__init__()
+        self._socket_path = socket_path
+        self._sock = None
+
+    def _get_socket(self):
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            # journald 卡住时不能让后台线程一直阻塞
+            sock.settimeout(JOURNAL_SEND_TIMEOUT)
+            try:
+                sock.connect(self._socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._sock = sock
+        return self._sock
+
+    @staticmethod
+    def _field(key: str, value) -> bytes:
+        data = str(value).encode("utf-8", "replace")
+        # 含换行的值需要使用长度前缀的二进制格式
+        if b"\n" in data:
+            return key.encode() + b"\n" + struct.pack("<Q", len(data)) + data + b"\n"
+        return key.encode() + b"=" + data + b"\n"
+
+    def _build_entry(self, record, msg: str) -> bytes:
+        priority = self.PRIORITY_MAP.get(record.levelno, "6")
+        return b"".join(
+            (
+                self._field("MESSAGE", msg),
+                self._field("PRIORITY", priority),
+                self._field("SYSLOG_IDENTIFIER", LOG_TAG),
+                self._field("CODE_FILE", record.pathname),
+                self._field("CODE_LINE", record.lineno),
+                self._field("CODE_FUNC", record.funcName),
+            )
+        )
+
     def emit(self, record):
         msg = self.format(record)
-        priority = self.PRIORITY_MAP.get(record.levelno, "6")
         try:
-            # 使用系统的 systemd-cat
-            env = os.environ.copy()
-            env["LD_LIBRARY_PATH"] = ""  # 清除 LD_LIBRARY_PATH
-            subprocess.run(
-                ["systemd-cat", "-t", LOG_TAG, "-p", priority],
-                input=msg,
-                text=True,
-                env=env,
-            )
+            self._get_socket().send(self._build_entry(record, msg))
         except Exception as e:
-            self.write_log(f"systemd-cat error: {e}")
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+            self.write_log(f"journal error: {e}")
+            self.write_log(msg)
 
     def write_log(self, msg):
         try:
+            # 超过大小上限时截断，避免备用日志无限增长
+            if os.path.exists(LOG) and os.path.getsize(LOG) > LOG_MAX_BYTES:
+                os.replace(LOG, f"{LOG}.1")
             with open(LOG, "a") as f:
                 f.write(msg)
                 f.write("\n")
         except Exception as e:
             print(e)
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        super().close()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """队列满时丢弃日志并计数，不阻塞调用方"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock_dropped = threading.Lock()
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock_dropped:
+                self.dropped += 1
+
+    def take_dropped(self) -> int:
+        with self._lock_dropped:
+            dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class BatchQueueListener:
+    """后台线程批量取出队列中的日志交给目标 handler 输出
+
+    被丢弃的日志在下一批中合并为一条警告。
+    """
+
+    _sentinel = None
+
+    def __init__(self, log_queue: queue.Queue, handler, source: DroppingQueueHandler):
+        self.queue = log_queue
+        self.handler = handler
+        self._source = source
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._monitor, name="LogListener", daemon=True
+        )
+        self._thread.start()
+
+    def _take_batch(self):
+        batch = [self.queue.get()]
+        while len(batch) < BATCH_MAX_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _monitor(self):
+        while True:
+            batch = self._take_batch()
+            stop = False
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                    continue
+                self.handler.handle(record)
+            dropped = self._source.take_dropped()
+            if dropped:
+                self.handler.handle(
+                    logging.makeLogRecord(
+                        {
+                            "levelno": logging.WARNING,
+                            "levelname": "WARNING",
+                            "msg": f"log queue full, dropped {dropped} records",
+                        }
+                    )
+                )
+            if stop:
+                break
+
+    def stop(self):
+        if self._thread is None:
+            return
+        try:
+            # 队列已满时也要保证停止信号送达
+            self.queue.put(self._sentinel, timeout=1)
+        except queue.Full:
+            return
+        self._thread.join(timeout=2)
+        self._thread = None
+
+
+def create_systemd_handler(formatter: logging.Formatter) -> DroppingQueueHandler:
+    """创建异步的 journald 日志 handler
+
+    调用方线程只做格式化和入队，实际写入由后台线程批量完成。
+    """
+    log_queue = queue.Queue(maxsize=QUEUE_MAX_SIZE)
+    systemd_handler = SystemdHandler()
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.setFormatter(formatter)
+
+    listener = BatchQueueListener(log_queue, systemd_handler, queue_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    queue_handler.listener = listener
+    return queue_handler
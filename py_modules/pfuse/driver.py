@@ -6,21 +6,20 @@
 #    Copyright (C) 2006  Csaba Henk  <csaba.henk@creo.hu>
 
 # Protocol:
-# The server sends commands to the client.
-# It may not send multiple commands without waiting for a reply.
-# The reply is always to the last command.
-# All commands are 1024 bytes long.
+# The server sends requests to the client over a unix stream socket using the
+# length-prefixed binary frames defined in protocol.py. Every request carries an
+# id and the client replies with the same id, so several requests (e.g. from
+# concurrent FUSE threads) may be in flight at once.
 #
-# Commands have the following format:
-# "cmd:<command_name>:<arg1>:<arg2>\n"
-# "ack:<response>\n"
+# The following requests are supported:
+# OP_GET "<name>"        -> OP_ACK "<value>"
+# OP_SET "<name>=<val>"  -> OP_ACK ""
 #
-# The following commands are supported:
-# "cmd:get:<name>\n"
-# "cmd:set:<name>:<val>\n"
+# Errors are replied with OP_ERR "<message>".
 #
-# The get command will return the current value of the attribute ("ack:<value>\n").
-# The set command will set the value of the attribute and just ack ("ack\n").
+# The client also pushes OP_UPDATE "<name>=<val>" after connecting and whenever
+# a value changes. Those values are cached and served to open() without a round
+# trip; OP_GET is only used for attributes that were never pushed.
 from __future__ import print_function
 
 import fcntl
@@ -33,10 +32,12 @@ import sys
 import time
 from errno import *  # type: ignore
 from stat import *  # type: ignore
-from threading import Lock, Thread
+from threading import Condition, Lock, Thread
+from typing import Optional
 
 import fuse
 from fuse import Fuse
+from protocol import OP_GET, OP_SET, VIRTUAL_FILES, RequestChannel
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -44,7 +45,6 @@ logger.setLevel(logging.INFO)
 FUSE_MOUNT_DIR = "/run/powercontrol/"
 FUSE_MOUNT_SOCKET = "/run/powercontrol/socket"
 TIMEOUT = 1
-PACK_SIZE = 1024
 SOCKET_ACCEPT_TIMEOUT = 0.5  # 增加到 500ms
 SOCKET_OPERATION_TIMEOUT = 1.0  # socket 操作超时时间
 fuse.fuse_python_api = (0, 2)
@@ -142,18 +142,6 @@ class VirtualStat(fuse.Stat):
         self.st_ctime = 0
 
 
-VIRTUAL_FILES = [
-    "power1_cap_default",
-    "power1_cap_min",
-    "power1_cap_max",
-    "power1_cap",
-    "power2_cap_default",
-    "power2_cap_min",
-    "power2_cap_max",
-    "power2_cap",
-]
-
-
 def is_virtual_file(path):
     return path.split("/")[-1] in VIRTUAL_FILES
 
@@ -289,38 +277,40 @@ class Handler:
     def __init__(self, sock: socket.socket):
         logger.info("Initializing Handler")
         self.sock = sock
-        self.conn = None
-
-    def get_conn(self, retry: bool = False):
-        if not retry and self.conn:
-            logger.debug("Using existing connection")
-            return self.conn
+        self.channel: Optional[RequestChannel] = None
+        self.cond = Condition()
+        Thread(target=self._accept_loop, daemon=True).start()
 
-        for attempt in range(3):  # 最多尝试3次
+    def _accept_loop(self):
+        # Blocking accept, the newest connection replaces the previous one
+        while True:
             try:
-                logger.debug(f"Connection attempt {attempt + 1} (retry={retry})")
-                self.sock.settimeout(SOCKET_ACCEPT_TIMEOUT)
                 conn, addr = self.sock.accept()
-                logger.info(f"New connection accepted from {addr}")
-
-                if self.conn:
+            except OSError as e:
+                logger.info(f"Stop accepting connections: {e}")
+                return
+            logger.info(f"New connection accepted from {addr}")
+            with self.cond:
+                if self.channel:
                     logger.info("Closing existing connection")
-                    self.conn.close()
-
-                self.conn = conn
-                return self.conn
-
-            except socket.timeout as e:
-                logger.debug(f"Connection attempt {attempt + 1} timed out: {e}")
-                if attempt == 2:  # 最后一次尝试
-                    logger.warning("All connection attempts timed out")
-
-            except Exception as e:
-                logger.error(f"Error accepting connection: {e}", exc_info=True)
-                break
-
-        logger.debug("Returning existing connection (might be None)")
-        return self.conn
+                    self.channel.close()
+                self.channel = RequestChannel(conn, self._on_update)
+                self.cond.notify_all()
+
+    def _on_update(self, name: str, value: bytes):
+        logger.debug(f"Pushed value for {name}: {value}")
+        XmpFile.cache[name] = value
+
+    def get_channel(self) -> Optional[RequestChannel]:
+        with self.cond:
+            self.cond.wait_for(
+                lambda: self.channel is not None and not self.channel.closed,
+                SOCKET_ACCEPT_TIMEOUT,
+            )
+            channel = self.channel
+        if channel is None or channel.closed:
+            return None
+        return channel
 
 
 class XmpFile:
@@ -337,61 +327,30 @@ class XmpFile:
         passthrough = XmpFile.passthrough and path.endswith("_cap")
 
         if power_attr and not passthrough:
-            logger.info(f"GPU Attribute access: {path} {flags} {mode}")
+            logger.debug(f"GPU Attribute access: {path} {flags} {mode}")
 
             endpoint = path.split("/")[-1]
-            cmd = f"cmd:get:{endpoint}\n".encode()
-            contents = None
-
-            for i in range(2):
-                logger.debug(f"Attempt {i+1} to get GPU attributes")
+            # Values pushed by the client are served without a round trip
+            contents = XmpFile.cache.get(endpoint)
+            if contents is None:
+                channel = self.h.get_channel()
+                if not channel:
+                    logger.error("Failed to get connection")
+                    raise RuntimeError(
+                        "No active connection. Can not access GPU attributes."
+                    )
                 try:
-                    conn = self.h.get_conn(bool(i))
-                    if not conn:
-                        logger.error("Failed to get connection")
-                        if i == 1:  # 只在第二次尝试失败时抛出异常
-                            raise RuntimeError(
-                                "No active connection. Can not access GPU attributes."
-                            )
-                        continue  # 第一次失败时继续尝试
-
-                    conn.settimeout(SOCKET_OPERATION_TIMEOUT)
-                    logger.debug(f"Sending command: {cmd}")
-                    conn.send(cmd + bytes(PACK_SIZE - len(cmd)))
-
-                    resp = b"/"
-                    start_time = time.time()
-                    while resp and not resp.startswith(b"ack:"):
-                        if time.time() - start_time > SOCKET_OPERATION_TIMEOUT:
-                            logger.error("Response timeout")
-                            break
-                        conn.settimeout(SOCKET_OPERATION_TIMEOUT)
-                        resp = conn.recv(PACK_SIZE)
-                        logger.debug(f"Received response: {resp}")
-
-                    if not resp.startswith(b"ack:"):
-                        logger.error("Invalid response format")
-                        continue
-
-                    contents = resp[4:]
-                    XmpFile.cache[endpoint] = contents
-                    logger.info(
-                        f"Successfully received and cached contents for {endpoint}"
+                    contents = channel.request(
+                        OP_GET, endpoint.encode(), SOCKET_OPERATION_TIMEOUT
                     )
-                    break
-
                 except Exception as e:
-                    logger.error(f"Error in attempt {i+1}: {str(e)}", exc_info=True)
-                    if i:
-                        if endpoint in XmpFile.cache:
-                            logger.warning(f"Using cached value for {endpoint}")
-                            contents = XmpFile.cache[endpoint]
-                        else:
-                            logger.error("No cached value available and socket failed")
-                            raise
+                    logger.error(f"Failed to get {endpoint}: {str(e)}")
+                    raise
+                XmpFile.cache[endpoint] = contents
+                logger.debug(f"Received and cached contents for {endpoint}")
 
             if not contents:
-                raise RuntimeError("Failed to get contents after all attempts")
+                raise RuntimeError(f"Empty contents for {endpoint}")
 
             self.file = io.BytesIO(contents)
             self.fd = -1
@@ -439,31 +398,20 @@ class XmpFile:
             if self.virtual and self.wrote:
                 # Send file contents to hhd
                 endpoint = self.path.split("/")[-1]
-                conn = self.h.get_conn()
-                if not conn:
+                channel = self.h.get_channel()
+                if not channel:
                     raise RuntimeError(
                         "No active connection. Can not access GPU attributes."
                     )
 
-                cmd = f"cmd:set:{endpoint}:".encode()
                 self.file.seek(0)
                 contents = self.file.read()
                 if b"\0" in contents:
                     contents = contents[: contents.index(b"\0")]
-                if len(contents) + len(cmd) + 1 > PACK_SIZE:
-                    raise ValueError(f"Contents too large to send:\n{contents}")
-                stcmd = (
-                    cmd
-                    + contents
-                    + b"\n"
-                    + bytes(PACK_SIZE - len(cmd) - len(contents) - 1)
-                )
-                conn.settimeout(SOCKET_OPERATION_TIMEOUT)
-                conn.send(stcmd)
-                resp = b""
-                while resp and not resp.startswith(b"ack\n"):
-                    conn.settimeout(SOCKET_OPERATION_TIMEOUT)
-                    resp = conn.recv(1024).strip()
+                # Pipelined: the reply is matched by request id and not waited
+                # for, later requests are still handled in order by the client
+                channel.send(OP_SET, endpoint.encode() + b"=" + contents.strip())
+                XmpFile.cache[endpoint] = contents.strip() + b"\n"
         except Exception as e:
             logger.error(f"Error sending file contents to hhd: {str(e)}", exc_info=True)
         finally:
@@ -0,0 +1,263 @@
+"""FUSE 驱动与插件之间的 TDP socket 协议
+
+每个帧由 9 字节的头和负载组成:
+
+    <I 负载长度> <B 操作码> <I 请求 id> <负载>
+
+- OP_GET: 负载为属性名，如 b"power1_cap"
+- OP_SET: 负载为 b"<属性名>=<值>"
+- OP_ACK: 负载为 get 的结果，set 的结果为空
+- OP_ERR: 负载为错误信息
+- OP_UPDATE: 插件主动推送的新值，负载为 b"<属性名>=<值>"，请求 id 为 0
+
+FUSE 驱动发送请求，插件按顺序处理并用相同的请求 id 回复，
+驱动可以连续发送多个请求而不必等待回复。
+插件在连接后和值变化时推送 OP_UPDATE，驱动据此缓存属性值，读取时无需往返。
+本模块同时被驱动进程(作为脚本运行)和插件导入，只依赖标准库。
+
+单独运行时测量请求往返延迟，或者读取挂载后的文件测量完整路径的延迟:
+
+    python protocol.py
+    python protocol.py --path /sys/class/hwmon/hwmonN/power1_cap
+"""
+
+import argparse
+import socket
+import struct
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+HEADER = struct.Struct("<IBI")
+MAX_PAYLOAD = 4096
+
+OP_GET = 1
+OP_SET = 2
+OP_ACK = 3
+OP_ERR = 4
+OP_UPDATE = 5
+
+# 驱动虚拟化的 hwmon 属性，插件连接后全部推送一次
+VIRTUAL_FILES = [
+    "power1_cap_default",
+    "power1_cap_min",
+    "power1_cap_max",
+    "power1_cap",
+    "power2_cap_default",
+    "power2_cap_min",
+    "power2_cap_max",
+    "power2_cap",
+]
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def encode_frame(op: int, request_id: int, payload: bytes = b"") -> bytes:
+    if len(payload) > MAX_PAYLOAD:
+        raise ProtocolError(f"payload too large: {len(payload)}")
+    return HEADER.pack(len(payload), op, request_id) + payload
+
+
+class FrameReader:
+    """从流式 socket 读取帧，使用预分配的缓冲区和 recv_into
+
+    read_frame 返回的负载是缓冲区的 memoryview，在下一次读取前有效。
+    socket 设置了超时时，只有在帧开始前超时才会抛出 socket.timeout，
+    读到一半的帧会继续等待，保证不会错位。
+    """
+
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+        self._buffer = bytearray(HEADER.size + MAX_PAYLOAD)
+        self._view = memoryview(self._buffer)
+
+    def _recv_exact(self, start: int, end: int):
+        view = self._view
+        got = start
+        while got < end:
+            try:
+                n = self._sock.recv_into(view[got:end])
+            except socket.timeout:
+                if got == 0:
+                    raise
+                continue
+            if n == 0:
+                raise ConnectionError("socket closed")
+            got += n
+
+    def read_frame(self) -> Tuple[int, int, memoryview]:
+        self._recv_exact(0, HEADER.size)
+        length, op, request_id = HEADER.unpack_from(self._buffer)
+        if length > MAX_PAYLOAD:
+            raise ProtocolError(f"payload too large: {length}")
+        self._recv_exact(HEADER.size, HEADER.size + length)
+        return op, request_id, self._view[HEADER.size : HEADER.size + length]
+
+
+class _Pending:
+    __slots__ = ("event", "op", "payload")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.op = OP_ERR
+        self.payload = b""
+
+
+class RequestChannel:
+    """驱动端: 在一个连接上并发发送请求，由读取线程按请求 id 分发回复
+
+    收到 OP_UPDATE 时在读取线程中调用 on_update(name, value)。
+    """
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        on_update: Optional[Callable[[str, bytes], None]] = None,
+    ):
+        self._sock = sock
+        self._onUpdate = on_update
+        self._sendLock = threading.Lock()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._nextId = 0
+        self._closed = False
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _read_loop(self):
+        reader = FrameReader(self._sock)
+        try:
+            while True:
+                op, request_id, payload = reader.read_frame()
+                if op == OP_UPDATE:
+                    if self._onUpdate:
+                        name, _, value = bytes(payload).partition(b"=")
+                        self._onUpdate(name.decode(errors="ignore"), value)
+                    continue
+                with self._lock:
+                    pending = self._pending.pop(request_id, None)
+                if pending is not None:
+                    pending.op = op
+                    pending.payload = bytes(payload)
+                    pending.event.set()
+        except (OSError, ProtocolError):
+            pass
+        finally:
+            self.close()
+
+    def send(self, op: int, payload: bytes) -> Optional[_Pending]:
+        with self._lock:
+            if self._closed:
+                raise ConnectionError("channel closed")
+            self._nextId = (self._nextId + 1) & 0xFFFFFFFF
+            request_id = self._nextId
+            pending = _Pending()
+            self._pending[request_id] = pending
+        with self._sendLock:
+            self._sock.sendall(encode_frame(op, request_id, payload))
+        return pending
+
+    def request(self, op: int, payload: bytes, timeout: float) -> bytes:
+        """发送请求并等待回复，超时或连接断开时抛出异常"""
+        pending = self.send(op, payload)
+        if not pending.event.wait(timeout):
+            raise TimeoutError(f"request timeout: {bytes(payload)}")
+        if pending.op != OP_ACK:
+            raise ProtocolError(pending.payload.decode(errors="ignore"))
+        return pending.payload
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            pending, self._pending = list(self._pending.values()), {}
+        for item in pending:
+            item.payload = b"connection closed"
+            item.event.set()
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+
+def encode_update(name: str, value: bytes) -> bytes:
+    return encode_frame(OP_UPDATE, 0, name.encode() + b"=" + value)
+
+
+def serve(
+    sock: socket.socket,
+    handle: Callable[[int, bytes], bytes],
+    should_exit: Optional[Callable[[], bool]] = None,
+    send_lock: Optional[threading.Lock] = None,
+):
+    """插件端: 按顺序处理请求并回复，直到连接关闭或 should_exit 返回 True
+
+    handle(op, payload) 返回回复的负载，抛出异常时回复 OP_ERR。
+    socket 的超时只用于定期检查 should_exit，不影响请求的延迟。
+    其他线程同时推送 OP_UPDATE 时需传入共用的 send_lock。
+    """
+    send_lock = send_lock or threading.Lock()
+    reader = FrameReader(sock)
+    while not (should_exit and should_exit()):
+        try:
+            op, request_id, payload = reader.read_frame()
+        except socket.timeout:
+            continue
+        except ConnectionError:
+            return
+        try:
+            frame = encode_frame(OP_ACK, request_id, handle(op, bytes(payload)))
+        except Exception as e:
+            frame = encode_frame(OP_ERR, request_id, str(e).encode()[:MAX_PAYLOAD])
+        with send_lock:
+            sock.sendall(frame)
+
+
+def _percentiles(samples: List[float]) -> str:
+    samples = sorted(samples)
+
+    def pick(pct):
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))] * 1e6
+
+    return f"p50={pick(50):.0f}us p99={pick(99):.0f}us max={samples[-1] * 1e6:.0f}us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TDP socket latency benchmark")
+    parser.add_argument("--path", help="read this file instead, e.g. power1_cap")
+    parser.add_argument("--count", type=int, default=2000)
+    args = parser.parse_args()
+
+    samples = []
+    if args.path:
+        for _ in range(args.count):
+            start = time.perf_counter()
+            with open(args.path, "rb") as f:
+                f.read()
+            samples.append(time.perf_counter() - start)
+        print(f"read {args.path}: {_percentiles(samples)}")
+        return
+
+    server, client = socket.socketpair()
+    threading.Thread(
+        target=serve, args=(client, lambda op, payload: b"15000000"), daemon=True
+    ).start()
+    channel = RequestChannel(server)
+    for _ in range(args.count):
+        start = time.perf_counter()
+        channel.request(OP_GET, b"power1_cap", 1.0)
+        samples.append(time.perf_counter() - start)
+    print(f"get round trip: {_percentiles(samples)}")
+    channel.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,13 @@ import logging
 import os
 import subprocess
 import time
-from threading import Event, Thread
+from threading import Event, Lock, Thread
 
 import decky
 from config import logger
 
+from .protocol import OP_GET, OP_SET, VIRTUAL_FILES, encode_update, serve
+
 TDP_MOUNT = "/run/powercontrol/hwmon"
 FUSE_MOUNT_SOCKET = "/run/powercontrol/socket"
 
@@ -233,120 +235,131 @@ def prepare_tdp_mount(debug: bool = False, passhtrough: bool = False):
     return True
 
 
-def _tdp_client(should_exit: Event, set_tdp, min_tdp, default_tdp, max_tdp):
-    import socket
+class TdpClient(Thread):
+    """连接 FUSE 驱动的 socket，处理 Steam 对 powerN_cap 的写入，并推送属性值"""
 
     CLIENT_TIMEOUT_WAIT = 0.3
-    CLIENT_MAX_CMD_T = 0.05
     CONNECT_TIMEOUT = 1.0
-
-    # Sleep until the socket is created
-    sock = None
-    try:
-        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        logger.info("TDP client socket created")
-
-        connect_attempts = 0
-        while not should_exit.is_set():
-            try:
-                logger.debug(
-                    f"Attempting to connect to socket (attempt {connect_attempts + 1})"
-                )
-                sock.settimeout(CONNECT_TIMEOUT)
-                sock.connect(FUSE_MOUNT_SOCKET)
-                logger.info("Connected to TDP socket")
-                break
-            except Exception as e:
-                connect_attempts += 1
-                logger.warning(f"Connection attempt {connect_attempts} failed: {e}")
-                if connect_attempts >= 10:
-                    logger.error("Max connection attempts reached")
-                    return
-                time.sleep(CLIENT_TIMEOUT_WAIT)
-
-        def send_cmd(cmd: bytes):
-            try:
-                sock.send(cmd + bytes(1024 - len(cmd)))
-                logger.debug(f"Sent command: {cmd}")
-            except Exception as e:
-                logger.error(f"Failed to send command: {e}")
-
-        tdp = default_tdp
-        logger.info(f"Starting command loop with default TDP: {tdp}")
-
-        while not should_exit.is_set():
-            try:
-                sock.settimeout(0.5)
-                data = sock.recv(1024)
-                logger.debug(f"Received data: {data}")
-            except socket.timeout:
-                time.sleep(CLIENT_TIMEOUT_WAIT)
-                continue
-            except Exception as e:
-                logger.error(f"Error receiving data: {e}")
-                break
-
-            if not data:
-                logger.warning("Received empty data")
-                continue
-
-            if not data.startswith(b"cmd:"):
-                logger.debug("Received non-command data")
-                continue
-
-            try:
-                if b"set" in data and b"power1_cap" in data:
-                    try:
-                        tdp = int(int(data.split(b"\0")[0].split(b":")[-1]) / 1_000_000)
-                        if tdp:
-                            logger.info(f"Received TDP value {tdp} from /sys")
-                            set_tdp(tdp)
-                        else:
-                            logger.info("Received TDP value 0, ignoring")
-                            set_tdp(None)
-                    except Exception as e:
-                        logger.error(f"Failed to process TDP value: {e}", exc_info=True)
-                    send_cmd(b"ack")
-
-                elif b"get" in data:
-                    if b"min" in data:
-                        send_cmd(b"ack:" + str(min_tdp).encode() + b"000000")
-                    elif b"max" in data:
-                        send_cmd(b"ack:" + str(max_tdp).encode() + b"000000")
-                    elif b"default" in data:
-                        send_cmd(b"ack:" + str(default_tdp).encode() + b"000000")
-                    else:
-                        send_cmd(b"ack:" + str(tdp).encode() + b"000000")
+    # recv 的超时只用于检查 should_exit，请求到达时立即返回
+    EXIT_CHECK_INTERVAL = 0.5
+
+    def __init__(self, should_exit: Event, set_tdp, min_tdp, default_tdp, max_tdp):
+        super().__init__()
+        self.should_exit = should_exit
+        self.set_tdp = set_tdp
+        self.min_tdp = min_tdp
+        self.default_tdp = default_tdp
+        self.max_tdp = max_tdp
+        self.tdp = default_tdp
+        self._sock = None
+        self._sendLock = Lock()
+
+    def _value(self, name: str) -> bytes:
+        if "min" in name:
+            value = self.min_tdp
+        elif "max" in name:
+            value = self.max_tdp
+        elif "default" in name:
+            value = self.default_tdp
+        else:
+            value = self.tdp
+        return str(value).encode() + b"000000\n"
+
+    def _push(self, names):
+        sock = self._sock
+        if sock is None:
+            return
+        frames = b"".join(encode_update(name, self._value(name)) for name in names)
+        try:
+            with self._sendLock:
+                sock.sendall(frames)
+        except OSError as e:
+            logger.error(f"Failed to push TDP values: {e}")
+
+    def push_tdp(self, tdp: int):
+        """插件侧 TDP 变化时更新驱动缓存，下次读取 power1_cap 时生效"""
+        if tdp == self.tdp:
+            return
+        self.tdp = tdp
+        self._push(("power1_cap", "power2_cap"))
+
+    def _handle(self, op: int, payload: bytes) -> bytes:
+        logger.debug(f"Received command {op}: {payload}")
+        if op == OP_SET:
+            name, _, value = payload.partition(b"=")
+            if name == b"power1_cap":
+                tdp = int(int(value.split(b"\0")[0].strip()) / 1_000_000)
+                self.push_tdp(tdp)
+                if tdp:
+                    logger.info(f"Received TDP value {tdp} from /sys")
+                    self.set_tdp(tdp)
                 else:
-                    send_cmd(b"ack")
-
-            except Exception as e:
-                logger.error(f"Error processing command: {e}", exc_info=True)
-
-            time.sleep(CLIENT_MAX_CMD_T)
-
-    except Exception as e:
-        logger.error(f"Fatal error in TDP client: {e}", exc_info=True)
-    finally:
-        if sock:
-            try:
-                sock.close()
-                logger.info("TDP client socket closed")
-            except Exception as e:
-                logger.error(f"Error closing socket: {e}")
+                    logger.info("Received TDP value 0, ignoring")
+                    self.set_tdp(None)
+            return b""
+        if op == OP_GET:
+            return self._value(payload.decode(errors="ignore"))
+        raise ValueError(f"Unknown command {op}")
+
+    def run(self):
+        import socket
+
+        # Sleep until the socket is created
+        sock = None
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            logger.info("TDP client socket created")
+
+            connect_attempts = 0
+            while not self.should_exit.is_set():
+                try:
+                    logger.debug(
+                        "Attempting to connect to socket "
+                        f"(attempt {connect_attempts + 1})"
+                    )
+                    sock.settimeout(self.CONNECT_TIMEOUT)
+                    sock.connect(FUSE_MOUNT_SOCKET)
+                    logger.info("Connected to TDP socket")
+                    break
+                except Exception as e:
+                    connect_attempts += 1
+                    logger.warning(
+                        f"Connection attempt {connect_attempts} failed: {e}"
+                    )
+                    if connect_attempts >= 10:
+                        logger.error("Max connection attempts reached")
+                        return
+                    time.sleep(self.CLIENT_TIMEOUT_WAIT)
+
+            logger.info(f"Starting command loop with default TDP: {self.tdp}")
+            self._sock = sock
+            self._push(VIRTUAL_FILES)
+
+            sock.settimeout(self.EXIT_CHECK_INTERVAL)
+            serve(sock, self._handle, self.should_exit.is_set, self._sendLock)
+            logger.info("TDP command loop ended")
+
+        except Exception as e:
+            logger.error(f"Fatal error in TDP client: {e}", exc_info=True)
+        finally:
+            self._sock = None
+            if sock:
+                try:
+                    sock.close()
+                    logger.info("TDP client socket closed")
+                except Exception as e:
+                    logger.error(f"Error closing socket: {e}")
 
 
 def start_tdp_client(
     should_exit: Event, emit, min_tdp: int, default_tdp: int, max_tdp: int
-):
+) -> TdpClient:
     def set_tdp(tdp):
         return emit and emit(tdp)
         # return emit and emit({"type": "tdp", "tdp": tdp})
 
     logger.info(f"Starting TDP client on socket:\n'{FUSE_MOUNT_SOCKET}'")
-    t = Thread(
-        target=_tdp_client, args=(should_exit, set_tdp, min_tdp, default_tdp, max_tdp)
-    )
+    t = TdpClient(should_exit, set_tdp, min_tdp, default_tdp, max_tdp)
     t.start()
     return t
 
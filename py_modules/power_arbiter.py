@@ -0,0 +1,239 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import sysInfo
+from config import logger
+from fan import fanManager
+from utils import PackagePowerReader
+
+ARBITER_BUDGET_INTERVAL = 0.5  # 重新分配功耗预算的间隔(秒)
+ARBITER_LIMITED_RATIO = 0.95  # 功耗达到上限的该比例时认为处于功耗墙
+ARBITER_RELAX_RATIO = 0.85  # 功耗低于上限的该比例时逐步放开限制
+ARBITER_CPU_STEP = 5  # 每次调整的 CPU 性能上限(%)
+ARBITER_GPU_STEP = 50  # 每次调整的 GPU 频率上限(MHz)
+ARBITER_CPU_MIN_PCT = 30
+
+DOMAIN_CPU = "cpu"
+DOMAIN_GPU = "gpu"
+
+
+@dataclass
+class ArbiterSample:
+    """一次采样的结果，同一周期内所有调节器共用"""
+
+    timestamp: float
+    cpu_busy: float
+    gpu_busy: float
+    has_cpu: bool
+    has_gpu: bool
+    package_power: float = -1  # W，无法获取时为 -1
+    power_limit: float = -1  # W，无法获取时为 -1
+
+
+class PowerArbiter(threading.Thread):
+    """CPU 和 GPU 自动调节共用的调度线程
+
+    CPU 性能上限和 GPU 频率的自动调节作为调节器(domain)注册到这里，
+    由同一个线程按各自的间隔调用，每个周期只采样一次。
+
+    两者同时运行且处于功耗墙时，按占用率在两者之间分配功耗预算:
+    帧率受占用率更高的一方限制，因此降低另一方的上限，把功耗让给瓶颈一方；
+    功耗回落后逐步放开限制。调节器的输出不会超过分配到的上限。
+
+    调节器需要提供 name、interval 和 tick(sample)，可选 on_budget_changed()。
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self._cond = threading.Condition()
+        self._domains: Dict[str, object] = {}
+        self._nextTick: Dict[str, float] = {}
+        self._running = False
+        self._stopped = False
+        self._powerReader = PackagePowerReader(fanManager.get_gpu_hwmon_path)
+        self._nextBudget = 0.0
+        self._lastPower = (-1.0, -1.0)  # 最近一次读取的 (功耗, 功耗上限)
+
+        self.cpu_ceiling: Optional[int] = None  # CPU 性能上限(%)，None 为不限制
+        self.gpu_ceiling: Optional[int] = None  # GPU 频率上限(MHz)，None 为不限制
+
+    def register(self, domain):
+        with self._cond:
+            self._domains[domain.name] = domain
+            self._nextTick[domain.name] = time.monotonic() + domain.interval
+            if not self._running:
+                self._running = True
+                self.start()
+            self._cond.notify()
+        logger.info(f"power arbiter 注册调节器: {domain.name}")
+
+    def unregister(self, domain):
+        with self._cond:
+            if self._domains.get(domain.name) is not domain:
+                return
+            del self._domains[domain.name]
+            del self._nextTick[domain.name]
+            # 只有参与预算分配的调节器离开时才需要恢复上限
+            notify = []
+            if domain.name in (DOMAIN_CPU, DOMAIN_GPU):
+                notify = self._reset_ceilings()
+            self._cond.notify()
+        for other in notify:
+            self._notify_budget(other)
+        logger.info(f"power arbiter 注销调节器: {domain.name}")
+
+    def is_registered(self, domain) -> bool:
+        with self._cond:
+            return self._domains.get(domain.name) is domain
+
+    def _reset_ceilings(self) -> list:
+        """清除上限，返回需要通知的调节器，调用时需持有锁"""
+        if self.cpu_ceiling is None and self.gpu_ceiling is None:
+            return []
+        self.cpu_ceiling = None
+        self.gpu_ceiling = None
+        return list(self._domains.values())
+
+    @staticmethod
+    def _notify_budget(domain):
+        callback = getattr(domain, "on_budget_changed", None)
+        if callback is None:
+            return
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"power arbiter {domain.name} budget error: {e}")
+
+    def _sample(self, with_power: bool) -> ArbiterSample:
+        sample = ArbiterSample(
+            timestamp=time.monotonic(),
+            cpu_busy=sysInfo.cpu_busyPercent,
+            gpu_busy=sysInfo.gpu_busyPercent,
+            has_cpu=sysInfo.has_cpuData,
+            has_gpu=sysInfo.has_gpuData,
+        )
+        if with_power:
+            try:
+                sample.package_power = self._powerReader.read_power()
+                sample.power_limit = self._powerReader.read_limit()
+            except Exception as e:
+                logger.debug(f"power arbiter read power error: {e}")
+            self._lastPower = (sample.package_power, sample.power_limit)
+        return sample
+
+    def _arbitrate(self, sample: ArbiterSample) -> list:
+        """按采样结果调整上限，返回上限发生变化的调节器"""
+        with self._cond:
+            cpu = self._domains.get(DOMAIN_CPU)
+            gpu = self._domains.get(DOMAIN_GPU)
+        if cpu is None or gpu is None:
+            return []
+        if sample.package_power <= 0 or sample.power_limit <= 0:
+            return []
+
+        cpu_min, cpu_max = ARBITER_CPU_MIN_PCT, 100
+        gpu_min, gpu_max = gpu.freq_limits()
+        cpu_ceiling = self.cpu_ceiling if self.cpu_ceiling is not None else cpu_max
+        gpu_ceiling = self.gpu_ceiling if self.gpu_ceiling is not None else gpu_max
+
+        if sample.package_power >= sample.power_limit * ARBITER_LIMITED_RATIO:
+            # 处于功耗墙: 把预算从非瓶颈一方移给瓶颈一方
+            if sample.gpu_busy >= sample.cpu_busy:
+                cpu_ceiling = max(cpu_min, cpu_ceiling - ARBITER_CPU_STEP)
+                gpu_ceiling = min(gpu_max, gpu_ceiling + ARBITER_GPU_STEP)
+            else:
+                gpu_ceiling = max(gpu_min, gpu_ceiling - ARBITER_GPU_STEP)
+                cpu_ceiling = min(cpu_max, cpu_ceiling + ARBITER_CPU_STEP)
+        elif sample.package_power < sample.power_limit * ARBITER_RELAX_RATIO:
+            cpu_ceiling = min(cpu_max, cpu_ceiling + ARBITER_CPU_STEP)
+            gpu_ceiling = min(gpu_max, gpu_ceiling + ARBITER_GPU_STEP)
+
+        cpu_ceiling = None if cpu_ceiling >= cpu_max else cpu_ceiling
+        gpu_ceiling = None if gpu_ceiling >= gpu_max else gpu_ceiling
+        if cpu_ceiling != self.cpu_ceiling or gpu_ceiling != self.gpu_ceiling:
+            logger.debug(
+                f"power arbiter 功耗:{sample.package_power:.1f}W 上限:{sample.power_limit:.1f}W CPU占用率:{sample.cpu_busy}% GPU占用率:{sample.gpu_busy}% CPU上限:{cpu_ceiling} GPU上限:{gpu_ceiling}"
+            )
+            changed = []
+            if cpu_ceiling != self.cpu_ceiling:
+                changed.append(cpu)
+            if gpu_ceiling != self.gpu_ceiling:
+                changed.append(gpu)
+            with self._cond:
+                # 计算期间 CPU 或 GPU 调节器已注销时上限已被清除
+                if (
+                    self._domains.get(DOMAIN_CPU) is not cpu
+                    or self._domains.get(DOMAIN_GPU) is not gpu
+                ):
+                    return []
+                self.cpu_ceiling = cpu_ceiling
+                self.gpu_ceiling = gpu_ceiling
+            return changed
+        return []
+
+    def get_status(self) -> dict:
+        with self._cond:
+            return {
+                "domains": sorted(self._domains),
+                "cpu_ceiling": self.cpu_ceiling,
+                "gpu_ceiling": self.gpu_ceiling,
+                "package_power": self._lastPower[0],
+                "power_limit": self._lastPower[1],
+            }
+
+    def run(self):
+        logger.info("power arbiter 开始运行")
+        while True:
+            # 锁内只确定到期的调节器，采样和回调在锁外执行，
+            # 避免调节器自身的锁与 _cond 交叉等待，也不阻塞 RPC 调用
+            with self._cond:
+                if self._stopped:
+                    break
+                if not self._domains:
+                    self._cond.wait()
+                    continue
+                now = time.monotonic()
+                due = [
+                    (name, self._domains[name])
+                    for name, deadline in self._nextTick.items()
+                    if deadline <= now
+                ]
+                if not due:
+                    self._cond.wait(min(self._nextTick.values()) - now)
+                    continue
+                for name, domain in due:
+                    self._nextTick[name] = now + domain.interval
+
+                arbitrate = (
+                    DOMAIN_CPU in self._domains
+                    and DOMAIN_GPU in self._domains
+                    and now >= self._nextBudget
+                )
+                if arbitrate:
+                    self._nextBudget = now + ARBITER_BUDGET_INTERVAL
+
+            sample = self._sample(arbitrate)
+            if arbitrate:
+                for domain in self._arbitrate(sample):
+                    self._notify_budget(domain)
+            for name, domain in due:
+                # 等待期间可能已被注销
+                if not self.is_registered(domain):
+                    continue
+                try:
+                    domain.tick(sample)
+                except Exception as e:
+                    logger.error(f"power arbiter {name} tick error: {e}")
+        logger.info("power arbiter 已停止")
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._domains.clear()
+            self._nextTick.clear()
+            self._cond.notify()
+
+
+powerArbiter = PowerArbiter()
@@ -1,7 +1,10 @@
+from typing import Callable, List, Optional
+
 from config import logger
 from devices import IDevice
 from tdp_backend import (
     list_backends,
+    resolve_active_backend,
     resolve_power_info,
     resolve_tdp_max,
     resolve_tdp_min,
@@ -14,11 +17,39 @@ class PowerManager:
         self._device = IDevice.get_current()
         logger.info(f"当前使用的设备类型: {type(self._device)}")
         self._device.load()
+        # TDP 变化时的回调，参数为新的 TDP，None 表示解除限制
+        self._tdpListeners: List[Callable[[Optional[int]], None]] = []
 
     def __getattr__(self, name):
         """动态委托到设备实例"""
         return getattr(self._device, name)
 
+    def add_tdp_listener(self, listener: Callable[[Optional[int]], None]):
+        if listener not in self._tdpListeners:
+            self._tdpListeners.append(listener)
+
+    def remove_tdp_listener(self, listener: Callable[[Optional[int]], None]):
+        if listener in self._tdpListeners:
+            self._tdpListeners.remove(listener)
+
+    def _notify_tdp(self, tdp: Optional[int]):
+        for listener in list(self._tdpListeners):
+            try:
+                listener(tdp)
+            except Exception as e:
+                logger.error(f"TDP listener failed: {e}", exc_info=True)
+
+    def set_tdp(self, tdp: int):
+        """所有 TDP 写入都经过这里，写入后通知监听者(如 FUSE 驱动缓存)"""
+        result = self._device.set_tdp(tdp)
+        self._notify_tdp(tdp)
+        return result
+
+    def set_tdp_unlimited(self):
+        result = self._device.set_tdp_unlimited()
+        self._notify_tdp(None)
+        return result
+
     def get_tdpMax(self) -> int:
         return resolve_tdp_max(self._device)
 
@@ -31,6 +62,9 @@ class PowerManager:
     def get_tdp_backends(self) -> dict:
         return list_backends(self._device)
 
+    def get_active_tdp_backend(self) -> str:
+        return resolve_active_backend(self._device)
+
     def set_tdp_backend(self, backend_id: str) -> bool:
         info = list_backends(self._device)
         available_ids = {item["id"] for item in info["available"]}
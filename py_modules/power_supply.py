@@ -0,0 +1,179 @@
+import os
+import socket
+import threading
+from typing import Callable, Dict, List, Optional
+
+from config import logger
+from reactor import ReactorTimer, reactor
+from uevent import UeventListener
+
+POWER_SUPPLY_PATH = "/sys/class/power_supply"
+
+# 部分固件不会为每次电量变化发送 uevent，每隔该时间重新读取一次(秒)
+FALLBACK_INTERVAL = 60
+POLL_INTERVAL = 10  # 无法监听 uevent 时的轮询间隔(秒)
+
+
+class PowerSupplyMonitor:
+    """监听 power_supply 的 uevent，缓存电池和电源适配器状态并推送变化
+
+    订阅者在监听线程中被调用，参数为状态字典:
+    capacity 电量百分比(-1 为未知), status 电池状态, charging 是否充电,
+    ac_online 是否接入电源(None 为未知)。
+    netlink socket 注册在 reactor 上，没有订阅者时关闭。
+    """
+
+    def __init__(self, sock_factory: Optional[Callable[[], socket.socket]] = None):
+        self._listener = UeventListener("power_supply", self._on_uevent, sock_factory)
+        self._lock = threading.Lock()
+        self._subscribers: List[Callable[[dict], None]] = []
+        self._started = False
+        self._timer: Optional[ReactorTimer] = None  # 定时重新读取状态
+
+        self._batteryPath: Optional[str] = None  # None 为未查找
+        self._acPath: Optional[str] = None
+        self._state: Optional[dict] = None
+
+    def _scan_devices(self):
+        """查找电池和电源适配器，结果缓存到下次设备增删"""
+        self._batteryPath = ""
+        self._acPath = ""
+        usbPath = ""
+        try:
+            for device in sorted(os.listdir(POWER_SUPPLY_PATH)):
+                path = os.path.join(POWER_SUPPLY_PATH, device)
+                deviceType = self._read(path, "type")
+                if deviceType == "Battery" and not self._batteryPath:
+                    self._batteryPath = path
+                elif deviceType == "Mains" and not self._acPath:
+                    self._acPath = path
+                elif deviceType == "USB" and not usbPath:
+                    usbPath = path
+        except OSError as e:
+            logger.error(f"扫描 {POWER_SUPPLY_PATH} 失败: {e}")
+        if not self._acPath and usbPath and os.path.exists(f"{usbPath}/online"):
+            self._acPath = usbPath
+        logger.info(f"电池: {self._batteryPath} 电源适配器: {self._acPath}")
+
+    @staticmethod
+    def _read(path: str, name: str) -> str:
+        try:
+            with open(os.path.join(path, name), "r") as f:
+                return f.read().strip()
+        except OSError:
+            return ""
+
+    def _event_value(
+        self, event: Dict[str, str], name: str, path: str, attr: str
+    ) -> str:
+        """事件来自该设备且包含该属性时直接使用，否则读取 sysfs"""
+        key = f"POWER_SUPPLY_{attr.upper()}"
+        if name == os.path.basename(path) and event.get(key):
+            return event[key]
+        return self._read(path, attr)
+
+    def _read_state(self, event: Optional[Dict[str, str]] = None) -> dict:
+        """读取当前状态，事件中已包含的属性直接使用"""
+        if self._batteryPath is None:
+            self._scan_devices()
+        event = event or {}
+        name = event.get("POWER_SUPPLY_NAME") or os.path.basename(
+            event.get("DEVPATH", "")
+        )
+        state = dict(self._state or {})
+
+        if self._batteryPath:
+            capacity = self._event_value(event, name, self._batteryPath, "capacity")
+            status = self._event_value(event, name, self._batteryPath, "status")
+            try:
+                state["capacity"] = min(max(int(capacity), 0), 100)
+            except ValueError:
+                state["capacity"] = -1
+            state["status"] = status
+            state["charging"] = status == "Charging"
+        else:
+            state.update(capacity=-1, status="", charging=False)
+
+        if self._acPath:
+            online = self._event_value(event, name, self._acPath, "online")
+            state["ac_online"] = online == "1" if online else None
+        else:
+            state["ac_online"] = None
+        return state
+
+    def _update(self, event: Optional[Dict[str, str]] = None):
+        state = self._read_state(event)
+        with self._lock:
+            if state == self._state:
+                return
+            self._state = state
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(dict(state))
+            except Exception as e:
+                logger.error(f"power supply subscriber error: {e}", exc_info=True)
+
+    def handle_uevent(self, data: bytes):
+        self._listener.handle(data)
+
+    def _on_uevent(self, event: Optional[Dict[str, str]]):
+        # event 为 None 时消息被内核丢弃，重新读取一次状态
+        if event is not None and event["ACTION"] in ("add", "remove"):
+            self._batteryPath = None
+        self._update(event)
+
+    def _on_refresh(self):
+        if self._timer is None:
+            return
+        self._update()
+        self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        interval = FALLBACK_INTERVAL if self._listener.active else POLL_INTERVAL
+        self._timer = reactor.call_later(interval, self._on_refresh)
+
+    def _start(self):
+        if not self._listener.start():
+            logger.error(f"改为每 {POLL_INTERVAL} 秒读取电源状态")
+        self._started = True
+        self._schedule_refresh()
+        logger.info("power supply monitor 开始运行")
+
+    def _stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._listener.stop()
+        self._started = False
+        self._state = None
+        logger.info("power supply monitor 已停止")
+
+    def subscribe(self, callback: Callable[[dict], None]):
+        """注册订阅者并立即推送一次当前状态"""
+        with self._lock:
+            if callback in self._subscribers:
+                return
+            self._subscribers.append(callback)
+            if not self._started:
+                self._start()
+        state = self._read_state()
+        with self._lock:
+            self._state = state
+        callback(dict(state))
+
+    def unsubscribe(self, callback: Callable[[dict], None]):
+        with self._lock:
+            if callback not in self._subscribers:
+                return
+            self._subscribers.remove(callback)
+            if not self._subscribers:
+                self._stop()
+
+    def get_state(self) -> Optional[dict]:
+        """最近一次的状态，没有订阅者时为 None"""
+        with self._lock:
+            return dict(self._state) if self._state is not None else None
+
+
+powerSupplyMonitor = PowerSupplyMonitor()
@@ -0,0 +1,338 @@
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from conf_manager import confManager
+from config import logger
+from cpu import cpuManager
+from fan import fanManager
+from gpu import gpuManager
+from power_arbiter import ArbiterSample, powerArbiter
+from sysInfo import sysInfoManager
+from utils import PackagePowerReader, sysfs_read, sysfs_read_int
+
+PROFILE_INTERVAL = 1.0  # 采样间隔(秒)
+PROFILE_SAVE_INTERVAL = 60  # 学习中的配置保存间隔(秒)
+PROFILE_MIN_SAMPLES = 120  # 样本数达到该值后才给出推荐
+PROFILE_MAX_COUNT = 3600  # 直方图总数超过该值时所有计数减半，旧数据逐渐淡出
+PROFILE_CONSUMER = "profile"
+PROFILE_LEARNING_KEY = "appProfileLearning"  # 是否开启学习，默认关闭
+
+BUSY_TARGET = 70  # 推荐核心数时的目标占用率(%)
+BUSY_SATURATED = 95  # p90 占用率达到该值时认为性能不足，不推荐降低 TDP
+TDP_HEADROOM = 1.1  # 推荐 TDP = p95 功耗 * 余量
+GPU_FREQ_STEP = 50
+
+SMT_ACTIVE_PATH = "/sys/devices/system/cpu/smt/active"
+
+# 直方图名称: (下限, 上限, 区间宽度)
+HISTOGRAM_SPECS = {
+    "cpu_busy": (0, 100, 5),  # %
+    "gpu_busy": (0, 100, 5),  # %
+    "busy_cores": (0, 16, 0.5),  # 折算成物理核心的忙碌核心数
+    "temp": (20, 110, 2),  # °C
+    "power": (0, 60, 1),  # W
+    "gpu_freq": (0, 3000, GPU_FREQ_STEP),  # MHz
+    "max_perf_pct": (0, 100, 5),  # %
+}
+
+
+class BoundedHistogram:
+    """区间固定的计数直方图，总数超过 PROFILE_MAX_COUNT 时衰减"""
+
+    def __init__(self, low: float, high: float, width: float):
+        self.low = low
+        self.high = high
+        self.width = width
+        self.counts: List[int] = [0] * (int(math.ceil((high - low) / width)) + 1)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def add(self, value: float):
+        index = int((min(max(value, self.low), self.high) - self.low) / self.width)
+        self.counts[min(index, len(self.counts) - 1)] += 1
+        if self.total > PROFILE_MAX_COUNT:
+            self.counts = [count // 2 for count in self.counts]
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """返回分位数所在区间的中点，没有数据时返回 None"""
+        total = self.total
+        if total == 0:
+            return None
+        threshold = total * pct / 100
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if count and cumulative >= threshold:
+                return min(self.high, self.low + (index + 0.5) * self.width)
+        return self.high
+
+    def to_list(self) -> List[int]:
+        return list(self.counts)
+
+    def load(self, counts: List[int]):
+        # 区间定义变化时丢弃旧数据
+        if isinstance(counts, list) and len(counts) == len(self.counts):
+            self.counts = [int(count) for count in counts]
+
+
+class AppProfile:
+    """单个应用的运行数据分布"""
+
+    def __init__(self, app_id: str, data: Optional[dict] = None):
+        self.app_id = app_id
+        self.histograms: Dict[str, BoundedHistogram] = {
+            name: BoundedHistogram(*spec) for name, spec in HISTOGRAM_SPECS.items()
+        }
+        self.samples = 0
+        data = data or {}
+        self.samples = int(data.get("samples", 0))
+        for name, counts in (data.get("histograms") or {}).items():
+            if name in self.histograms:
+                self.histograms[name].load(counts)
+
+    def add(self, name: str, value: Optional[float]):
+        if value is not None and value >= 0:
+            self.histograms[name].add(value)
+
+    def percentile(self, name: str, pct: float) -> Optional[float]:
+        return self.histograms[name].percentile(pct)
+
+    def to_dict(self) -> dict:
+        return {
+            "samples": self.samples,
+            "histograms": {
+                name: hist.to_list() for name, hist in self.histograms.items()
+            },
+        }
+
+    def recommend(
+        self, tdp_range: tuple, cpu_max_num: int, gpu_range: tuple
+    ) -> Optional[dict]:
+        """根据分布推荐运行参数，样本不足时返回 None
+
+        Returns:
+            dict: tdp 最低 TDP(性能不足时为 None), gpu_freq_range GPU 频率区间,
+                gpu_start_freq GPU 自动频率起点, cpu_num 在线核心数,
+                cpu_max_pct CPU 自动性能上限起点，没有对应数据的项为 None
+        """
+        if self.samples < PROFILE_MIN_SAMPLES:
+            return None
+
+        cpu_p90 = self.percentile("cpu_busy", 90) or 0
+        gpu_p90 = self.percentile("gpu_busy", 90) or 0
+        saturated = cpu_p90 >= BUSY_SATURATED or gpu_p90 >= BUSY_SATURATED
+
+        tdp = None
+        power_p95 = self.percentile("power", 95)
+        if power_p95 is not None and not saturated and tdp_range[1] > 0:
+            tdp = int(math.ceil(power_p95 * TDP_HEADROOM))
+            tdp = max(tdp_range[0], min(tdp_range[1], tdp))
+
+        gpu_freq_range = None
+        gpu_start_freq = None
+        freq_p10 = self.percentile("gpu_freq", 10)
+        freq_p95 = self.percentile("gpu_freq", 95)
+        if freq_p10 is not None and freq_p95 is not None and gpu_range[1] > 0:
+
+            def clamp_freq(freq: float) -> int:
+                freq = int(freq // GPU_FREQ_STEP * GPU_FREQ_STEP)
+                return max(gpu_range[0], min(gpu_range[1], freq))
+
+            gpu_freq_range = [clamp_freq(freq_p10), clamp_freq(freq_p95)]
+            gpu_start_freq = clamp_freq(self.percentile("gpu_freq", 50))
+
+        cpu_num = None
+        cores_p95 = self.percentile("busy_cores", 95)
+        if cores_p95 is not None and cpu_max_num > 0:
+            cpu_num = int(math.ceil(cores_p95 * 100 / BUSY_TARGET))
+            cpu_num = max(1, min(cpu_max_num, cpu_num))
+
+        cpu_max_pct = self.percentile("max_perf_pct", 50)
+
+        return {
+            "tdp": tdp,
+            "gpu_freq_range": gpu_freq_range,
+            "gpu_start_freq": gpu_start_freq,
+            "cpu_num": cpu_num,
+            "cpu_max_pct": int(cpu_max_pct) if cpu_max_pct else None,
+        }
+
+
+class ProfileLearner:
+    """按应用记录运行数据并推荐运行参数
+
+    学习默认关闭，由 set_enabled 开启并保存到设置中；关闭时不采样也不注册调节器。
+    前端在应用切换时调用 set_app。开启学习且有应用运行时作为调节器注册到 powerArbiter，
+    每秒记录一次 CPU/GPU 占用率、温度、功耗、GPU 频率和忙碌核心数。
+    数据以有界直方图保存在设置目录下的 app_profiles 文件中。
+
+    切换到已有推荐的应用时，把 CPU 自动性能上限和 GPU 自动频率的起点设为推荐值，
+    自动调节已在运行时直接从推荐值重新开始。
+    TDP、核心数等用户在前端固定设置的参数不会被覆盖，只通过 get_profile 提供推荐。
+    """
+
+    name = "profile"
+
+    def __init__(self, power_manager):
+        self._powerManager = power_manager
+        self._lock = threading.Lock()
+        self.interval = PROFILE_INTERVAL
+        self._appId = ""  # 正在学习的应用
+        self._requestedApp = ""  # 前端最近一次通知的应用
+        self._profile: Optional[AppProfile] = None
+        self.enabled = bool(
+            (confManager.getSettings() or {}).get(PROFILE_LEARNING_KEY, False)
+        )
+        self._lastSave = 0.0
+        self._powerReader = PackagePowerReader(fanManager.get_gpu_hwmon_path)
+
+    def _load(self, app_id: str) -> AppProfile:
+        data = confManager.getAppProfile(app_id)
+        return AppProfile(app_id, data)
+
+    def _save(self):
+        if self._profile is None:
+            return
+        confManager.setAppProfile(self._appId, self._profile.to_dict())
+        self._lastSave = time.monotonic()
+
+    def _ranges(self):
+        tdp_range = (self._powerManager.get_tdpMin(), self._powerManager.get_tdpMax())
+        return tdp_range, cpuManager.get_cpuMaxNum(), tuple(gpuManager.gpu_freqRange)
+
+    def _warm_start(self, profile: AppProfile):
+        recommendation = profile.recommend(*self._ranges())
+        if recommendation is None:
+            return
+        logger.info(f"应用 {profile.app_id} 使用学习到的运行参数: {recommendation}")
+        cpuManager.set_auto_cpumax_start(recommendation["cpu_max_pct"])
+        gpuManager.set_gpuAutoStartFreq(recommendation["gpu_start_freq"])
+
+    def set_enabled(self, enabled: bool) -> bool:
+        """开启或关闭学习并保存，开启时立即开始学习当前应用"""
+        enabled = bool(enabled)
+        settings = confManager.getSettings() or {}
+        settings[PROFILE_LEARNING_KEY] = enabled
+        confManager.setSettings(settings)
+        self.enabled = enabled
+        logger.info(f"应用运行参数学习: {'开启' if enabled else '关闭'}")
+        return self._switch(self._requestedApp if enabled else "")
+
+    def set_app(self, app_id: str) -> bool:
+        """前端通知当前运行的应用，app_id 为空或 "0" 时停止学习
+
+        未开启学习时只记录应用，不采样
+        """
+        self._requestedApp = str(app_id or "")
+        return self._switch(self._requestedApp if self.enabled else "")
+
+    def _switch(self, app_id: str) -> bool:
+        """切换当前学习的应用
+
+        只在锁内切换状态；注册调节器和设置起点需要其他模块的锁，
+        powerArbiter 线程调用 tick 时会获取 self._lock，两者在锁外执行避免死锁。
+        """
+        app_id = str(app_id or "")
+        with self._lock:
+            if app_id == self._appId:
+                return True
+            self._save()
+            self._appId = ""
+            self._profile = None
+            if app_id not in ("", "0"):
+                self._appId = app_id
+                self._profile = self._load(app_id)
+                self._lastSave = time.monotonic()
+            profile = self._profile
+
+        if profile is None:
+            cpuManager.set_auto_cpumax_start(None)
+            gpuManager.set_gpuAutoStartFreq(None)
+            sysInfoManager.EnableCPUINFO(False, PROFILE_CONSUMER)
+            sysInfoManager.EnableGPUINFO(False, PROFILE_CONSUMER)
+            powerArbiter.unregister(self)
+            return True
+
+        self._warm_start(profile)
+        sysInfoManager.EnableCPUINFO(True, PROFILE_CONSUMER)
+        sysInfoManager.EnableGPUINFO(True, PROFILE_CONSUMER)
+        powerArbiter.register(self)
+        return True
+
+    @staticmethod
+    def _threads_per_core() -> int:
+        try:
+            if os.path.exists(SMT_ACTIVE_PATH) and sysfs_read(SMT_ACTIVE_PATH) == "1":
+                return 2
+        except OSError:
+            pass
+        return 1
+
+    def _read_gpu_freq(self) -> Optional[float]:
+        gpu_hwmon_path = fanManager.get_gpu_hwmon_path()
+        if gpu_hwmon_path and os.path.exists(f"{gpu_hwmon_path}/freq1_input"):
+            return sysfs_read_int(f"{gpu_hwmon_path}/freq1_input") / 1000000
+        return gpuManager.gpu_nowFreq[0] or None
+
+    def tick(self, sample: ArbiterSample):
+        with self._lock:
+            profile = self._profile
+            if profile is None:
+                return
+            if sample.has_cpu:
+                profile.add("cpu_busy", sample.cpu_busy)
+                online = len(cpuManager.get_online_cpus())
+                profile.add(
+                    "busy_cores",
+                    sample.cpu_busy / 100 * online / self._threads_per_core(),
+                )
+            if sample.has_gpu:
+                profile.add("gpu_busy", sample.gpu_busy)
+            temp = fanManager.get_cpuTemp()
+            profile.add("temp", temp / 1000 if temp > 0 else None)
+            profile.add("power", self._powerReader.read_power())
+            profile.add("gpu_freq", self._read_gpu_freq())
+            max_perf_pct = cpuManager.get_max_perf_pct()
+            profile.add("max_perf_pct", max_perf_pct or None)
+            profile.samples += 1
+
+            if time.monotonic() - self._lastSave >= PROFILE_SAVE_INTERVAL:
+                self._save()
+
+    def get_profile(self, app_id: str) -> dict:
+        """应用的数据分布摘要和推荐参数"""
+        app_id = str(app_id)
+        with self._lock:
+            if app_id == self._appId and self._profile is not None:
+                profile = self._profile
+            else:
+                profile = self._load(app_id)
+        summary = {
+            name: {
+                "p50": profile.percentile(name, 50),
+                "p95": profile.percentile(name, 95),
+            }
+            for name in HISTOGRAM_SPECS
+        }
+        return {
+            "app_id": app_id,
+            "samples": profile.samples,
+            "summary": summary,
+            "recommendation": profile.recommend(*self._ranges()),
+        }
+
+    def reset_profile(self, app_id: str) -> bool:
+        app_id = str(app_id)
+        with self._lock:
+            confManager.setAppProfile(app_id, None)
+            if app_id == self._appId:
+                self._profile = AppProfile(app_id)
+        return True
+
+    def stop(self):
+        self._switch("")
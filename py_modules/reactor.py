@@ -0,0 +1,206 @@
+import heapq
+import itertools
+import os
+import select
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from config import logger
+
+EPOLLIN = select.EPOLLIN
+EPOLLPRI = select.EPOLLPRI
+EPOLLERR = select.EPOLLERR
+
+
+class ReactorTimer:
+    """call_later 返回的定时器，cancel 后不会再被调用"""
+
+    __slots__ = ("deadline", "callback", "args", "cancelled")
+
+    def __init__(self, deadline: float, callback: Callable, args: tuple):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class SysfsWatch:
+    """sysfs 属性文件的 POLLPRI 通知
+
+    支持 sysfs_notify 的属性(如 hwmon 告警、power_supply 部分属性)在值变化时
+    使文件描述符可读。每次通知后需要从头重新读取才能接收下一次通知。
+    """
+
+    def __init__(
+        self, reactor: "Reactor", path: str, callback: Callable[[str, str], None]
+    ):
+        self._reactor = reactor
+        self.path = path
+        self._callback = callback
+        self._fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+        self.value = self._read()
+        reactor.add_reader(self._fd, self._on_event, EPOLLPRI | EPOLLERR)
+
+    def _read(self) -> str:
+        return os.pread(self._fd, 4096, 0).decode(errors="ignore").strip()
+
+    def _on_event(self, events: int):
+        self.value = self._read()
+        self._callback(self.path, self.value)
+
+    def close(self):
+        if self._fd < 0:
+            return
+        self._reactor.remove_reader(self._fd)
+        os.close(self._fd)
+        self._fd = -1
+
+
+class Reactor:
+    """基于 epoll 的事件循环，所有文件监听和延时调用共用一个线程
+
+    - add_reader/remove_reader: 文件描述符可读(或 POLLPRI)时回调 callback(events)
+    - call_later: 延时调用，到期时间由 epoll 的超时实现，不创建额外线程
+    - watch_sysfs: sysfs 属性的 POLLPRI 通知
+    回调在事件循环线程中执行，应尽快返回。其他线程注册或停止时通过 eventfd 唤醒循环。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._epoll: Optional[select.epoll] = None
+        self._eventFd = -1
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._handlers: Dict[int, Callable[[int], None]] = {}
+        self._timers: List[tuple] = []  # (到期时间, 序号, ReactorTimer) 的最小堆
+        self._seq = itertools.count()
+
+    def _ensure_running(self):
+        """第一次注册时创建 epoll 和事件循环线程，调用时需持有锁"""
+        if self._thread is not None:
+            return
+        self._epoll = select.epoll()
+        self._eventFd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        self._epoll.register(self._eventFd, EPOLLIN)
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="reactor", daemon=True)
+        self._thread.start()
+        logger.info("reactor 开始运行")
+
+    def _wakeup(self):
+        if self._eventFd >= 0:
+            os.eventfd_write(self._eventFd, 1)
+
+    def add_reader(
+        self, fd: int, callback: Callable[[int], None], events: int = EPOLLIN
+    ):
+        with self._lock:
+            self._ensure_running()
+            if fd in self._handlers:
+                self._epoll.modify(fd, events)
+            else:
+                self._epoll.register(fd, events)
+            self._handlers[fd] = callback
+
+    def remove_reader(self, fd: int):
+        with self._lock:
+            if self._handlers.pop(fd, None) is None:
+                return
+            try:
+                self._epoll.unregister(fd)
+            except (OSError, ValueError):
+                # 文件描述符已被关闭时内核已自动移除
+                pass
+
+    def call_later(self, delay: float, callback: Callable, *args) -> ReactorTimer:
+        timer = ReactorTimer(time.monotonic() + max(delay, 0.0), callback, args)
+        with self._lock:
+            self._ensure_running()
+            heapq.heappush(self._timers, (timer.deadline, next(self._seq), timer))
+            # 新定时器可能比循环当前的超时更早到期
+            if self._timers[0][2] is timer:
+                self._wakeup()
+        return timer
+
+    def watch_sysfs(
+        self, path: str, callback: Callable[[str, str], None]
+    ) -> SysfsWatch:
+        return SysfsWatch(self, path, callback)
+
+    def _next_timeout(self) -> float:
+        with self._lock:
+            while self._timers and self._timers[0][2].cancelled:
+                heapq.heappop(self._timers)
+            if not self._timers:
+                return -1
+            return max(self._timers[0][0] - time.monotonic(), 0.0)
+
+    def _pop_due_timers(self) -> List[ReactorTimer]:
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            while self._timers and self._timers[0][0] <= now:
+                timer = heapq.heappop(self._timers)[2]
+                if not timer.cancelled:
+                    due.append(timer)
+        return due
+
+    def _run(self):
+        epoll, eventFd = self._epoll, self._eventFd
+        try:
+            while True:
+                try:
+                    events = epoll.poll(self._next_timeout())
+                except InterruptedError:
+                    continue
+                for fd, mask in events:
+                    if fd == eventFd:
+                        try:
+                            os.eventfd_read(eventFd)
+                        except BlockingIOError:
+                            pass
+                        continue
+                    handler = self._handlers.get(fd)
+                    if handler is None:
+                        continue
+                    try:
+                        handler(mask)
+                    except Exception as e:
+                        logger.error(
+                            f"reactor fd {fd} handler error: {e}", exc_info=True
+                        )
+                if self._stopping:
+                    break
+                for timer in self._pop_due_timers():
+                    try:
+                        timer.callback(*timer.args)
+                    except Exception as e:
+                        logger.error(f"reactor timer error: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                epoll.close()
+                os.close(eventFd)
+                self._handlers.clear()
+                self._timers.clear()
+                self._epoll = None
+                self._eventFd = -1
+                self._thread = None
+            logger.info("reactor 已停止")
+
+    def stop(self):
+        """停止事件循环，未触发的定时器被丢弃，已注册的文件描述符由各自的所有者关闭"""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stopping = True
+            self._wakeup()
+        if thread is not threading.current_thread():
+            thread.join(timeout=1)
+
+
+reactor = Reactor()
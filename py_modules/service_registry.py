@@ -0,0 +1,181 @@
+"""按需创建的全局服务
+
+cpuManager、gpuManager、fanManager、sysInfoManager、notify 原来在模块导入时创建，
+其中任何一个失败都会使 main.py 的导入整体失败，并且用户关闭的功能也要付出初始化的代价。
+现在模块只定义一个 LazyService 代理，第一次使用时才创建实例:
+
+- 代理上访问的属性转发到实例；实例尚未创建时访问方法会得到一个延迟调用，
+  调用时才创建实例，因此构造函数里保存 cpuManager.set_smt 这类方法不会触发创建
+- main._main 中 prefetch 在线程池里并发创建所有服务
+- 其他线程正在创建时，使用者最多等待 SERVICE_WAIT_TIMEOUT 秒，
+  超时或创建失败时抛出 ServiceUnavailable，由 RPC 的异常处理返回默认值
+- RPC 运行在 Decky 的事件循环中，先 await wait_ready("cpu", ...) 只等待自己用到的服务，
+  等待在线程池中进行，不会阻塞事件循环；某个服务失败或很慢时不影响其他 RPC
+"""
+
+import asyncio
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from config import logger
+from hardware_cache import startup_phase
+
+SERVICE_WAIT_TIMEOUT = 15  # 等待其他线程创建服务的最长时间(秒)
+
+
+class ServiceUnavailable(Exception):
+    pass
+
+
+class _ServiceState:
+    __slots__ = ("factory", "instance", "error", "creating", "owner", "ready")
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+        self.instance = None
+        self.error: Optional[BaseException] = None
+        self.creating = False
+        self.owner: Optional[int] = None  # 正在创建的线程
+        self.ready = threading.Event()
+
+
+class ServiceRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._services: Dict[str, _ServiceState] = {}
+
+    def lazy(
+        self, name: str, cls: type, factory: Optional[Callable[[], Any]] = None
+    ) -> "LazyService":
+        """注册服务并返回代理，factory 默认为 cls()"""
+        with self._lock:
+            self._services[name] = _ServiceState(factory or cls)
+        return LazyService(self, name, cls)
+
+    def peek(self, name: str) -> Optional[Any]:
+        """已创建的实例，未创建或创建失败时返回 None，不会触发创建"""
+        state = self._services.get(name)
+        return state.instance if state is not None else None
+
+    def get(self, name: str, timeout: float = SERVICE_WAIT_TIMEOUT) -> Any:
+        state = self._services[name]
+        if state.ready.is_set():
+            if state.error is not None:
+                raise ServiceUnavailable(f"{name}: {state.error}") from state.error
+            return state.instance
+
+        with self._lock:
+            create = not state.creating
+            if create:
+                state.creating = True
+                state.owner = threading.get_ident()
+            elif state.owner == threading.get_ident():
+                raise ServiceUnavailable(f"{name}: recursive initialization")
+
+        if create:
+            self._create(name, state)
+        elif not state.ready.wait(timeout):
+            raise ServiceUnavailable(f"{name}: initialization timed out")
+        return self.get(name)
+
+    async def wait_ready(self, *names: str, timeout: float = SERVICE_WAIT_TIMEOUT):
+        """在事件循环中等待服务创建结束，names 为空时等待全部服务
+
+        尚未开始创建的服务会在线程池中创建。超时或创建失败时直接返回，
+        之后使用服务时由 get 抛出 ServiceUnavailable。
+        """
+        names = names or tuple(self._services)
+        pending = [name for name in names if not self._services[name].ready.is_set()]
+        if not pending:
+            return
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(None, self._wait, name, timeout) for name in pending)
+        )
+
+    def _wait(self, name: str, timeout: float):
+        try:
+            self.get(name, timeout)
+        except ServiceUnavailable:
+            pass
+
+    def _create(self, name: str, state: _ServiceState):
+        try:
+            with startup_phase(name):
+                state.instance = state.factory()
+            logger.info(f"服务 {name} 初始化完成")
+        except Exception as e:
+            state.error = e
+            logger.error(f"服务 {name} 初始化失败: {e}", exc_info=True)
+        finally:
+            state.ready.set()
+
+    def prefetch(
+        self,
+        names: Optional[List[str]] = None,
+        on_done: Optional[Callable[[], None]] = None,
+    ):
+        """在线程池中并发创建服务，立即返回，全部结束后在线程池中调用 on_done"""
+        names = names or list(self._services)
+        if not names:
+            return
+        remaining = [len(names)]
+        lock = threading.Lock()
+
+        def run(name: str):
+            try:
+                self.get(name)
+            except ServiceUnavailable:
+                # 已在 _create 中记录
+                pass
+            with lock:
+                remaining[0] -= 1
+                done = remaining[0] == 0
+            if done and on_done:
+                on_done()
+
+        executor = ThreadPoolExecutor(
+            max_workers=len(names), thread_name_prefix="service"
+        )
+        for name in names:
+            executor.submit(run, name)
+        # 不等待完成，线程在创建结束后退出
+        executor.shutdown(wait=False)
+
+
+class LazyService:
+    """服务实例的代理，见模块说明"""
+
+    __slots__ = ("_registry", "_name", "_cls")
+
+    def __init__(self, registry: ServiceRegistry, name: str, cls: type):
+        object.__setattr__(self, "_registry", registry)
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_cls", cls)
+
+    def __getattr__(self, attr: str):
+        instance = self._registry.peek(self._name)
+        if instance is None and inspect.isfunction(
+            inspect.getattr_static(self._cls, attr, None)
+        ):
+            registry, name = self._registry, self._name
+
+            def deferred(*args, **kwargs):
+                return getattr(registry.get(name), attr)(*args, **kwargs)
+
+            deferred.__name__ = attr
+            return deferred
+        if instance is None:
+            instance = self._registry.get(self._name)
+        return getattr(instance, attr)
+
+    def __setattr__(self, attr: str, value):
+        setattr(self._registry.get(self._name), attr, value)
+
+    def __repr__(self) -> str:
+        return f"<LazyService {self._name}: {self._registry.peek(self._name)!r}>"
+
+
+serviceRegistry = ServiceRegistry()
@@ -0,0 +1,304 @@
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import config
+from config import logger
+from cpu import cpuManager
+from gpu import gpuManager
+from utils import PackagePowerReader, get_ryzenadj_lib, sysfs_read
+
+TDP_DRIFT_TOLERANCE = 1.0  # TDP 回读与期望值相差超过该值(W)视为被外部修改
+
+
+@dataclass
+class StateEntry:
+    """一个可调和的设置项
+
+    apply: 写入期望值，返回 False 视为失败
+    probe: 读取硬件实际状态的廉价方法，返回值只用于和上次写入后的结果比较
+    group: 同组的设置项作用于同一硬件。其中一项写入后，排在它后面的同组项，
+        以及本次未提供的同组项(如固定频率和频率范围互斥)缓存失效
+    tolerance: probe 返回数值时，与期望值相差超过 tolerance 即视为外部修改。
+        写入后回读与期望值不符(该读数不反映所用的写入方式)时退回与写入后的回读比较
+    """
+
+    key: str
+    apply: Callable[[Any], Any]
+    probe: Optional[Callable[[], Any]] = None
+    group: Optional[str] = None
+    tolerance: Optional[float] = None
+
+
+@dataclass
+class _CachedState:
+    value: Any
+    probe: Any = None
+    tracks: bool = False  # 回读与期望值一致，可以按 tolerance 比较
+
+
+@dataclass
+class ApplyResult:
+    changed: List[Dict[str, Any]] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    drifted: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    unknown: List[str] = field(default_factory=list)
+    elapsed_ms: float = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "changed": self.changed,
+            "unchanged": self.unchanged,
+            "drifted": self.drifted,
+            "failed": self.failed,
+            "unknown": self.unknown,
+            "elapsed_ms": round(self.elapsed_ms, 3),
+        }
+
+
+def _normalize(value):
+    # 前端传来的 list 与缓存中的 tuple 等价
+    return json.dumps(value, sort_keys=True)
+
+
+def _gpu_state_probe():
+    """GPU 频率状态的回读，Steam 等外部程序修改频率时结果会变化"""
+    level_path = getattr(config, "AMD_GPULEVEL_PATH", None)
+    if level_path and os.path.exists(level_path):
+        return sysfs_read(level_path)
+    min_path = getattr(config, "INTEL_GPU_MIN_FREQ", None)
+    max_path = getattr(config, "INTEL_GPU_MAX_FREQ", None)
+    if min_path and max_path and os.path.exists(min_path):
+        return sysfs_read(min_path), sysfs_read(max_path)
+    return None
+
+
+_tdpReader = PackagePowerReader()
+
+
+def _tdp_probe() -> Optional[float]:
+    """当前生效的 TDP 限制(W)，AMD 读取 PM 表的 STAPM 限制，其他读取 RAPL 长时限制"""
+    if config.CPU_VENDOR == "AuthenticAMD":
+        lib = get_ryzenadj_lib()
+        if lib is not None:
+            value = lib.get_stapm_limit()
+            return None if math.isnan(value) else round(value, 1)
+    value = _tdpReader.read_limit()
+    return round(value, 1) if value > 0 else None
+
+
+def _smt_probe():
+    path = "/sys/devices/system/cpu/smt/control"
+    return sysfs_read(path) if os.path.exists(path) else None
+
+
+class StateReconciler:
+    """把期望状态与缓存的实际状态对比，只执行需要的写入
+
+    前端定时调用 apply_state 时，未变化的设置不会重复执行 ryzenadj、
+    重写 cpu online 或 GPU OD 表。已缓存的项在有 probe 时会回读一次，
+    发现被外部修改(drift)则重新写入。
+    """
+
+    def __init__(self, power_manager):
+        self._powerManager = power_manager
+        self._cache: Dict[str, _CachedState] = {}
+        self._lock = threading.Lock()
+        # 列表顺序即写入顺序
+        self._entries: List[StateEntry] = [
+            # 热插拔间隔需在切换核心之前设置
+            StateEntry("cpu_hotplug_interval", cpuManager.set_hotplug_interval),
+            StateEntry("smt", cpuManager.set_smt, _smt_probe, group="cpu_online"),
+            StateEntry(
+                "cpu_num",
+                cpuManager.set_cpuOnline,
+                cpuManager.get_online_cpus,
+                group="cpu_online",
+            ),
+            StateEntry(
+                "cpu_online_list",
+                cpuManager.set_cpu_online_list,
+                cpuManager.get_online_cpus,
+                group="cpu_online",
+            ),
+            StateEntry("cpu_boost", cpuManager.set_cpuBoost),
+            StateEntry(
+                "cpu_governor",
+                cpuManager.set_cpu_governor,
+                cpuManager.get_cpu_governor,
+            ),
+            StateEntry("epp", cpuManager.set_epp, cpuManager.get_current_epp),
+            StateEntry(
+                "auto_cpumax_pct", cpuManager.set_auto_cpumax_pct, group="max_perf"
+            ),
+            StateEntry(
+                "max_perf_pct",
+                cpuManager.set_max_perf_pct,
+                cpuManager.get_max_perf_pct,
+                group="max_perf",
+            ),
+            StateEntry("sched_ext", self._apply_sched_ext),
+            StateEntry("ryzenadj_undervolt", self._apply_undervolt),
+            StateEntry(
+                "tdp", self._apply_tdp, _tdp_probe, tolerance=TDP_DRIFT_TOLERANCE
+            ),
+            StateEntry(
+                "gpu_auto_freq_range",
+                lambda v: gpuManager.set_gpuAutoFreqRange(v[0], v[1]),
+            ),
+            StateEntry(
+                "gpu_frametime_target",
+                lambda v: gpuManager.set_gpuFrameTimeTarget(v[0], v[1], v[2]),
+            ),
+            StateEntry("gpu_auto", gpuManager.set_gpuAuto, group="gpu_freq"),
+            StateEntry(
+                "gpu_freq",
+                gpuManager.set_gpuFreqFix,
+                _gpu_state_probe,
+                group="gpu_freq",
+            ),
+            StateEntry(
+                "gpu_freq_range",
+                lambda v: gpuManager.set_gpuFreqRange(v[0], v[1]),
+                _gpu_state_probe,
+                group="gpu_freq",
+            ),
+        ]
+        self._entryMap = {entry.key: entry for entry in self._entries}
+
+    def _apply_tdp(self, value):
+        # None 表示解除 TDP 限制
+        if value is None:
+            return self._powerManager.set_tdp_unlimited()
+        return self._powerManager.set_tdp(value)
+
+    def _apply_undervolt(self, value):
+        enable, undervolt = value
+        return self._powerManager.set_ryzenadj_undervolt(enable, undervolt)
+
+    def _apply_sched_ext(self, value):
+        scheduler, param = value
+        return self._powerManager.set_sched_ext(scheduler, param)
+
+    @staticmethod
+    def _read_probe(entry: StateEntry):
+        try:
+            return entry.probe()
+        except Exception as e:
+            logger.warning(f"apply_state probe {entry.key} failed: {e}")
+            return None
+
+    @staticmethod
+    def _within_tolerance(entry: StateEntry, value, reading) -> bool:
+        return (
+            isinstance(value, (int, float))
+            and isinstance(reading, (int, float))
+            and abs(reading - value) <= entry.tolerance
+        )
+
+    def _snapshot(self, entry: StateEntry, value) -> _CachedState:
+        """写入后的缓存，有 probe 时记录一次回读"""
+        if entry.probe is None:
+            return _CachedState(_normalize(value))
+        reading = self._read_probe(entry)
+        tracks = entry.tolerance is not None and self._within_tolerance(
+            entry, value, reading
+        )
+        return _CachedState(_normalize(value), _normalize(reading), tracks)
+
+    def _is_current(self, entry: StateEntry, value) -> Optional[bool]:
+        """判断缓存是否与期望一致
+
+        Returns:
+            True 一致, False 不一致, None 缓存一致但回读发现外部修改
+        """
+        cached = self._cache.get(entry.key)
+        if cached is None or cached.value != _normalize(value):
+            return False
+        if entry.probe is None or cached.probe is None:
+            return True
+        reading = self._read_probe(entry)
+        if cached.tracks:
+            # 读取失败时不判定为外部修改
+            if reading is None or self._within_tolerance(entry, value, reading):
+                return True
+            return None
+        if _normalize(reading) != cached.probe:
+            return None
+        return True
+
+    def _invalidate_group(self, entry: StateEntry, desired: Optional[dict] = None):
+        if entry.group is None:
+            return
+        index = self._entries.index(entry)
+        for i, other in enumerate(self._entries):
+            if other.group != entry.group or other is entry:
+                continue
+            if desired is None or i > index or other.key not in desired:
+                self._cache.pop(other.key, None)
+
+    def apply_state(self, desired: dict) -> dict:
+        start = time.perf_counter()
+        result = ApplyResult()
+        with self._lock:
+            result.unknown = [key for key in desired if key not in self._entryMap]
+            for entry in self._entries:
+                if entry.key not in desired:
+                    continue
+                value = desired[entry.key]
+                current = self._is_current(entry, value)
+                if current:
+                    result.unchanged.append(entry.key)
+                    continue
+                if current is None:
+                    logger.info(f"apply_state: {entry.key} drifted, reapply")
+                    result.drifted.append(entry.key)
+
+                writeStart = time.perf_counter()
+                try:
+                    ret = entry.apply(value)
+                except Exception as e:
+                    ret = False
+                    logger.error(f"apply_state {entry.key} error: {e}", exc_info=True)
+                writeMs = (time.perf_counter() - writeStart) * 1000
+
+                # 失败时不缓存，下次调用会重试
+                if ret is False:
+                    self._cache.pop(entry.key, None)
+                    result.failed[entry.key] = f"apply failed ({writeMs:.1f}ms)"
+                    continue
+
+                self._invalidate_group(entry, desired)
+                self._cache[entry.key] = self._snapshot(entry, value)
+                result.changed.append(
+                    {"key": entry.key, "value": value, "ms": round(writeMs, 3)}
+                )
+
+        result.elapsed_ms = (time.perf_counter() - start) * 1000
+        if result.changed or result.failed:
+            logger.info(
+                f"apply_state: changed={[c['key'] for c in result.changed]} "
+                f"drifted={result.drifted} failed={list(result.failed)} "
+                f"elapsed={result.elapsed_ms:.1f}ms"
+            )
+        return result.to_dict()
+
+    def invalidate(self, *keys: str):
+        """清除缓存，不传参数时清除全部
+
+        其它接口直接修改了硬件，或唤醒后硬件状态重置时调用。
+        """
+        with self._lock:
+            if not keys:
+                self._cache.clear()
+                return
+            for key in keys:
+                self._cache.pop(key, None)
+                entry = self._entryMap.get(key)
+                if entry is not None:
+                    self._invalidate_group(entry)
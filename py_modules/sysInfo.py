@@ -1,12 +1,13 @@
-import collections
 import os
-import subprocess
 import threading
 import time
+from array import array
 
+from conf_manager import confManager
 from config import AMD_GPU_DEVICE_PATH, logger
 from helpers import get_user
-from utils import get_env
+from intel_gpu_busy import IntelGPUBusyReader
+from service_registry import serviceRegistry
 
 cpu_busyPercent = 0
 cpu_DataErrCnt = 0
@@ -20,135 +21,212 @@ statPath = "/proc/stat"
 gpu_busy_percentPath = "{}/gpu_busy_percent".format(AMD_GPU_DEVICE_PATH)
 hwmon_path = "/sys/class/hwmon"
 
+# 保存的采样间隔(秒)
+COLLECT_INTERVAL_KEY = "sysInfoCollectInterval"
 
-# GPU单次监控数据
-class GPUData:
-    def __init__(self):
-        # gpu占用率
-        self.gpuBusyPercent = 0
 
-    def setBusyPercent(self, busyPercent):
-        try:
-            self.gpuBusyPercent = int(busyPercent)
-            return True
-        except Exception as e:
-            logger.error(f"setBusyPercent数据异常{e}", exc_info=True)
-            return False
+# /proc/stat cpu 行中参与计算的时间字段数量
+STAT_FIELDS = 10
 
-    def getBusyPercent(self):
-        return self.gpuBusyPercent
 
+def read_client_language(default: str = "schinese") -> str:
+    """从 Steam 的 registry.vdf 读取客户端语言，不依赖 SysInfoManager 实例"""
+    language = default
+    try:
+        lang_path = f"/home/{get_user()}/.steam/registry.vdf"
+        if os.path.exists(lang_path):
+            with open(lang_path, "r") as f:
+                for line in f.readlines():
+                    if "language" in line:
+                        language = line.split('"')[3]
+                        break
+        else:
+            logger.error(f"語言檢測路徑{lang_path}不存在該文件")
+        logger.info(f"get_language {language} path={lang_path}")
+    except Exception as e:
+        logger.error(e)
+    return language
 
-# cpu单次监测数据
-class CPUData:
-    def __init__(self):
-        # cpu各种处于状态的时间
-        self.usertime = 0
-        self.nicetime = 0
-        self.systemtime = 0
-        self.idletime = 0
-        self.ioWait = 0
-        self.irq = 0
-        self.softIrq = 0
-        self.steal = 0
-        self.guest = 0
-        self.guestnice = 0
-
-    def setStatInfo(self, StatInfo):
-        try:
-            self.usertime = int(StatInfo[1])
-            self.nicetime = int(StatInfo[2])
-            self.systemtime = int(StatInfo[3])
-            self.idletime = int(StatInfo[4])
-            self.ioWait = int(StatInfo[5])
-            self.irq = int(StatInfo[6])
-            self.softIrq = int(StatInfo[7])
-            self.steal = int(StatInfo[8])
-            self.guest = int(StatInfo[9])
-            self.guestnice = int(StatInfo[10])
-            return True
-        except Exception as e:
-            logger.error(f"StatInfo数据异常{e} ={StatInfo}", exc_info=True)
-            return False
 
-    def getFreeTime(self):
-        idlealltime = self.idletime + self.ioWait
-        return max(idlealltime, 0)
-
-    def getTotalTime(self):
-        usertime = self.usertime - self.guest
-        nicetime = self.nicetime - self.guestnice
-        idlealltime = self.idletime + self.ioWait
-        systemalltime = self.systemtime + self.irq + self.softIrq
-        virtalltime = self.guest + self.guestnice
-        totaltime = (
-            usertime + nicetime + systemalltime + idlealltime + self.steal + virtalltime
-        )
-        return max(totaltime, 0)
+def parse_stat_times(line: bytes):
+    """解析 /proc/stat 的 cpu 行，返回 (空闲时间, 总时间)
+
+    总时间 = user + nice + system + irq + softirq + idle + iowait + steal，
+    guest/guestnice 已包含在 user/nice 中，不重复计算。
+    """
+    fields = line.split(None, STAT_FIELDS + 1)
+    if len(fields) <= STAT_FIELDS:
+        raise ValueError(f"StatInfo数据异常 {line}")
+    user, nice, system, idle, iowait, irq, softirq, steal = map(int, fields[1:9])
+    free = max(idle + iowait, 0)
+    total = user + nice + system + irq + softirq + free + steal
+    return free, max(total, 0)
 
 
 class SysInfoManager(threading.Thread):
+    # 采样间隔允许的范围(秒)
+    MIN_COLLECT_INTERVAL = 0.05
+    MAX_COLLECT_INTERVAL = 0.25
+
     def __init__(self):
-        self._cpuDataQueue = collections.deque()  # 记录cpu数据的队列
-        self._cpuDataQueueHead = 0  # 记录cpu数据的队列头元素 用于计算时间差
+        self._collectInfoInterval = 0.1  # 记录数据的间隔
+        self._cpu_sampleWindow = 0.5  # cpu占用率统计的时间窗口(秒)
+        self._gpu_sampleWindow = 0.5  # gpu占用率统计的时间窗口(秒)
+
+        # cpu数据保存在预分配的环形数组中，每次采样只记录空闲时间和总时间
+        self._cpuFreeRing = array("Q")  # 空闲时间
+        self._cpuTotalRing = array("Q")  # 总时间
+        self._cpuRingIndex = 0  # 下一次写入的位置
         self._cpu_NowQueueLength = 0  # 当前cpu记录的数据量
-        self._cpu_QueueMaxLength = 100  # cpu记录的最大数据量
-        self._enableUpdateCPUInfo = False  # 是否开启cpu数据记录收集
+        self._cpu_QueueMaxLength = 5  # cpu记录的最大数据量 由采样间隔计算
+        self._cpuConsumers = set()  # 需要cpu数据的使用者
 
-        self._gpuDataQueue = collections.deque()  # 记录gpu占用率的队列
+        self._gpuBusyRing = array("B")  # 记录gpu占用率的环形数组
+        self._gpuRingIndex = 0  # 下一次写入的位置
         self._gpu_busyPercentSum = (
             0  # 当前所有的gpu占用率总和 用于计算平均值 无需每次遍历队列
         )
         self._gpu_NowQueueLength = 0  # 当前gpu占用率个数
-        self._gpu_QueueMaxLength = 10  # gpu占用率最多记录几个
-        self._enableUpdateGPUInfo = False  # 是否开启gpu数据记录收集
+        self._gpu_QueueMaxLength = 5  # gpu占用率最多记录几个 由采样间隔计算
+        self._gpuConsumers = set()  # 需要gpu数据的使用者
+
+        self._cpuQueueDirty = False  # cpu队列需要在采样线程中重置
+        self._gpuQueueDirty = False  # gpu队列需要在采样线程中重置
 
-        self._collectInfoInterval = 0.005  # 记录数据的间隔
-        self._isRunning = False  # 标记是否正在运行gpu频率优化
+        self._statFd = -1  # 常驻打开的 /proc/stat 文件描述符
+        self._gpuBusyFd = -1  # 常驻打开的 gpu_busy_percent 文件描述符
+        self._intelGpuBusy = IntelGPUBusyReader(
+            int(self._collectInfoInterval * 1000)
+        )  # Intel GPU 占用率读取器
+
+        # 没有使用者时采样线程在条件变量上休眠，注册使用者时唤醒
+        self._cond = threading.Condition()
+        self._isRunning = False  # 标记采样线程是否正在运行
 
         self._language = "schinese"  # 当前客户端使用的语言
 
-        threading.Thread.__init__(self)
+        self._update_queue_length()
+        self._reset_cpu_queue()
+        self._reset_gpu_queue()
+        threading.Thread.__init__(self, daemon=True)
 
-    def get_language(self):
+    @property
+    def _enableUpdateCPUInfo(self) -> bool:
+        return len(self._cpuConsumers) > 0
+
+    @property
+    def _enableUpdateGPUInfo(self) -> bool:
+        return len(self._gpuConsumers) > 0
+
+    def _update_queue_length(self):
+        """根据采样间隔换算队列长度，保持统计的时间窗口不变"""
+        self._cpu_QueueMaxLength = max(
+            2, int(round(self._cpu_sampleWindow / self._collectInfoInterval)) + 1
+        )
+        self._gpu_QueueMaxLength = max(
+            1, int(round(self._gpu_sampleWindow / self._collectInfoInterval))
+        )
+
+    def set_collect_interval(self, interval: float, save: bool = True) -> bool:
+        """设置采样间隔
+
+        Args:
+            interval (float): 采样间隔(秒)，限制在 50-250ms 之间
+            save (bool): 是否保存到配置，启动时恢复
+
+        Returns:
+            bool: 设置成功返回 True
+        """
         try:
-            lang_path = f"/home/{get_user()}/.steam/registry.vdf"
-            if os.path.exists(lang_path):
-                with open(lang_path, "r") as f:
-                    for line in f.readlines():
-                        if "language" in line:
-                            self._language = line.split('"')[3]
-                            break
-            else:
-                logger.error(f"語言檢測路徑{lang_path}不存在該文件")
-            logger.info(f"get_language {self._language} path={lang_path}")
-            return self._language
+            interval = min(
+                max(float(interval), self.MIN_COLLECT_INTERVAL),
+                self.MAX_COLLECT_INTERVAL,
+            )
+            with self._cond:
+                self._collectInfoInterval = interval
+                self._update_queue_length()
+                self._cpuQueueDirty = self._gpuQueueDirty = True
+                self._cond.notify_all()
+            if save:
+                settings = confManager.getSettings() or {}
+                settings[COLLECT_INTERVAL_KEY] = interval
+                confManager.setSettings(settings)
+            logger.debug(f"set_collect_interval {interval}")
+            return True
         except Exception as e:
-            logger.error(e)
-            return self._language
+            logger.error(f"设置采样间隔异常 {e}")
+            return False
+
+    def get_collect_interval(self) -> float:
+        return self._collectInfoInterval
+
+    def get_language(self):
+        self._language = read_client_language(self._language)
+        return self._language
+
+    def _pread(self, fd: int, path: str, size: int):
+        """使用常驻的文件描述符读取文件开头，文件失效时重新打开
+
+        Returns:
+            (fd, data)
+        """
+        if fd < 0:
+            fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+        try:
+            return fd, os.pread(fd, size, 0)
+        except OSError:
+            # 设备热插拔等情况导致文件描述符失效，重新打开后重试一次
+            self._close_fd(fd)
+            fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+            return fd, os.pread(fd, size, 0)
+
+    @staticmethod
+    def _close_fd(fd: int):
+        if fd >= 0:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _readStatInfo(self) -> bytes:
+        self._statFd, data = self._pread(self._statFd, statPath, 512)
+        return data[: data.find(b"\n")]
+
+    def _reset_cpu_queue(self):
+        # 只在采样线程中调用，队列长度变化时重新分配数组
+        if len(self._cpuFreeRing) != self._cpu_QueueMaxLength:
+            self._cpuFreeRing = array("Q", [0]) * self._cpu_QueueMaxLength
+            self._cpuTotalRing = array("Q", [0]) * self._cpu_QueueMaxLength
+        self._cpuRingIndex = 0
+        self._cpu_NowQueueLength = 0
+
+    def _reset_gpu_queue(self):
+        if len(self._gpuBusyRing) != self._gpu_QueueMaxLength:
+            self._gpuBusyRing = array("B", [0]) * self._gpu_QueueMaxLength
+        self._gpuRingIndex = 0
+        self._gpu_busyPercentSum = 0
+        self._gpu_NowQueueLength = 0
 
     def updateCpuData(self):
         global cpu_DataErrCnt
         global cpu_busyPercent
+        global has_cpuData
         try:
-            cpuData = CPUData()
-            StatInfoFile = open(statPath, "r")
-            StatInfo = StatInfoFile.readline().rstrip("\n").split()
-            if not cpuData.setStatInfo(StatInfo):
-                raise Exception()
-            self._cpuDataQueue.append(cpuData)
-            self._cpu_NowQueueLength = self._cpu_NowQueueLength + 1
-            if self._cpu_NowQueueLength >= self._cpu_QueueMaxLength:
-                self._cpuDataQueueHead = self._cpuDataQueue.popleft()
-                self._cpu_NowQueueLength = self._cpu_NowQueueLength - 1
-            elif self._cpu_NowQueueLength == 1:
-                self._cpuDataQueueHead = cpuData
-            freeTimeIncrease = (
-                cpuData.getFreeTime() - self._cpuDataQueueHead.getFreeTime()
-            )
-            totaltimeIncrease = max(
-                cpuData.getTotalTime() - self._cpuDataQueueHead.getTotalTime(), 1
-            )
+            freeTime, totalTime = parse_stat_times(self._readStatInfo())
+            capacity = len(self._cpuFreeRing)
+            index = self._cpuRingIndex
+            self._cpuFreeRing[index] = freeTime
+            self._cpuTotalRing[index] = totalTime
+            self._cpuRingIndex = (index + 1) % capacity
+            if self._cpu_NowQueueLength < capacity:
+                self._cpu_NowQueueLength = self._cpu_NowQueueLength + 1
+            if self._cpu_NowQueueLength == 1:
+                # 只有一个样本时无法计算占用率
+                return
+            # 与窗口内最早的样本比较
+            head = (index + 1 - self._cpu_NowQueueLength) % capacity
+            freeTimeIncrease = freeTime - self._cpuFreeRing[head]
+            totaltimeIncrease = max(totalTime - self._cpuTotalRing[head], 1)
             cpu_busyPercent = 100 - freeTimeIncrease * 100 / totaltimeIncrease
         except Exception as e:
             logger.error(f"更新CPU信息时异常 {e}")
@@ -156,105 +234,117 @@ class SysInfoManager(threading.Thread):
             if cpu_DataErrCnt >= self._cpu_QueueMaxLength / 2:
                 has_cpuData = False
 
-    def getGpuBusyPercent(self):
-        if os.path.exists(gpu_busy_percentPath):
-            gpu_busyPercentFile = open(gpu_busy_percentPath, "r")
-            gpu_busy_percent = gpu_busyPercentFile.readline().rstrip("\n")
-            return gpu_busy_percent
+    def getGpuBusyPercent(self) -> int:
+        if self._gpuBusyFd >= 0 or os.path.exists(gpu_busy_percentPath):
+            self._gpuBusyFd, data = self._pread(
+                self._gpuBusyFd, gpu_busy_percentPath, 16
+            )
+            return int(data)
+        elif self._intelGpuBusy.is_available():
+            return round(self._intelGpuBusy.get_busy_percent())
         else:
-            # 检查 intel_gpu_top 命令 是否可用
-            if os.system("command -v intel_gpu_top") == 0:
-                return self._getGPUBusyPercentByIntelGPUTop()
-            else:
-                return 0
-
-    def _getGPUBusyPercentByIntelGPUTop(self):
-        command = ["stdbuf", "-oL", "intel_gpu_top", "-l", "-s", "1"]
-        process = subprocess.Popen(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            env=get_env(),
-        )
-        line_count = 0
-        percent = 0
-        try:
-            while True:
-                output = process.stdout.readline()
-                if output == "" and process.poll() is not None:
-                    break
-                if output:
-                    line_count += 1
-                    # logger.info(f"Line {line_count}: {output.strip()}")
-                    if line_count == 4:
-                        # 按空格分割
-                        parts = output.strip().split()
-                        if len(parts) >= 7:
-                            # 取第七项
-                            seventh_item = parts[6]
-                            # logger.info(f"The seventh item in the fourth line is: {seventh_item}")
-                            percent = seventh_item
-                        else:
-                            logger.error(
-                                "The fourth line does not have at least seven items."
-                            )
-                        process.terminate()  # 停止命令
-                        break
-            return round(float(percent))
-        except Exception as e:
-            logger.error(f"An error occurred: {e}")
             return 0
-        finally:
-            process.stdout.close()
-            process.stderr.close()
-            process.wait()
 
     def updateGpuData(self):
-        global gpuDataErrorCnt
+        global gpu_DataErrCnt
         global gpu_busyPercent
+        global has_gpuData
         try:
-            gpuData = GPUData()
-            gpu_busy_percent = self.getGpuBusyPercent()
-            if not gpuData.setBusyPercent(gpu_busy_percent):
-                raise Exception()
-            self._gpuDataQueue.append(gpuData)
-            self._gpu_NowQueueLength = self._gpu_NowQueueLength + 1
-            if self._gpu_NowQueueLength >= self._gpu_QueueMaxLength:
-                headData = self._gpuDataQueue.popleft()
+            busyPercent = min(max(self.getGpuBusyPercent(), 0), 100)
+            capacity = len(self._gpuBusyRing)
+            index = self._gpuRingIndex
+            if self._gpu_NowQueueLength < capacity:
+                self._gpu_NowQueueLength = self._gpu_NowQueueLength + 1
+            else:
+                # 覆盖最早的数据
                 self._gpu_busyPercentSum = (
-                    self._gpu_busyPercentSum - headData.getBusyPercent()
+                    self._gpu_busyPercentSum - self._gpuBusyRing[index]
                 )
-                self._gpu_NowQueueLength = self._gpu_NowQueueLength - 1
-            self._gpu_busyPercentSum = (
-                self._gpu_busyPercentSum + gpuData.getBusyPercent()
-            )
-            gpu_busyPercent = self._gpu_busyPercentSum / max(
-                self._gpu_NowQueueLength, 1
-            )
+            self._gpuBusyRing[index] = busyPercent
+            self._gpuRingIndex = (index + 1) % capacity
+            self._gpu_busyPercentSum = self._gpu_busyPercentSum + busyPercent
+            gpu_busyPercent = self._gpu_busyPercentSum / self._gpu_NowQueueLength
         except Exception as e:
             logger.error(f"更新GPU信息时异常 {e}")
             gpu_DataErrCnt = gpu_DataErrCnt + 1
             if gpu_DataErrCnt >= self._gpu_QueueMaxLength / 2:
                 has_gpuData = False
 
-    def EnableCPUINFO(self, isEnable):
-        self._enableUpdateCPUInfo = isEnable
+    def EnableCPUINFO(self, isEnable, consumer="default"):
+        """注册或注销cpu数据的使用者，有使用者时才进行采样
+
+        Args:
+            isEnable (bool): 是否需要cpu数据
+            consumer (str): 使用者标识，不同使用者之间互不影响
+        """
+        with self._cond:
+            if isEnable:
+                if not self._cpuConsumers:
+                    self._cpuQueueDirty = True
+                self._cpuConsumers.add(consumer)
+            else:
+                self._cpuConsumers.discard(consumer)
+            self._cond.notify_all()
 
-    def EnableGPUINFO(self, isEnable):
-        self._enableUpdateGPUInfo = isEnable
+    def EnableGPUINFO(self, isEnable, consumer="default"):
+        """注册或注销gpu数据的使用者，有使用者时才进行采样
+
+        Args:
+            isEnable (bool): 是否需要gpu数据
+            consumer (str): 使用者标识，不同使用者之间互不影响
+        """
+        with self._cond:
+            if isEnable:
+                if not self._gpuConsumers:
+                    self._gpuQueueDirty = True
+                self._gpuConsumers.add(consumer)
+            else:
+                self._gpuConsumers.discard(consumer)
+            self._cond.notify_all()
 
     def run(self):
         self._isRunning = True
         while True:
-            # 只在需要时开启数据更新，避免不必要的性能浪费
-            if self._enableUpdateCPUInfo:
+            with self._cond:
+                # 没有使用者时在条件变量上休眠，不产生任何唤醒
+                while not (self._cpuConsumers or self._gpuConsumers):
+                    self._close_fd(self._statFd)
+                    self._close_fd(self._gpuBusyFd)
+                    self._statFd = self._gpuBusyFd = -1
+                    self._intelGpuBusy.stop()
+                    self._cond.wait()
+                enableCPU = self._enableUpdateCPUInfo
+                enableGPU = self._enableUpdateGPUInfo
+                interval = self._collectInfoInterval
+                resetCPU, self._cpuQueueDirty = self._cpuQueueDirty, False
+                resetGPU, self._gpuQueueDirty = self._gpuQueueDirty, False
+
+            if resetCPU:
+                self._reset_cpu_queue()
+            if resetGPU:
+                self._reset_gpu_queue()
+
+            start = time.monotonic()
+            if enableCPU:
                 self.updateCpuData()
-            if self._enableUpdateGPUInfo:
+            if enableGPU:
                 self.updateGpuData()
             # logger.info(f"cpu_busyPercent={cpu_busyPercent} gpu_busyPercent={gpu_busyPercent}")
-            time.sleep(self._collectInfoInterval)
+
+            with self._cond:
+                # 按固定节奏采样，使用者变化或间隔调整时会被提前唤醒
+                self._cond.wait(max(0.0, interval - (time.monotonic() - start)))
+
+
+def _create_sysinfo_manager() -> SysInfoManager:
+    manager = SysInfoManager()
+    interval = (confManager.getSettings() or {}).get(COLLECT_INTERVAL_KEY)
+    if interval:
+        manager.set_collect_interval(interval, save=False)
+    manager.start()
+    return manager
 
 
-sysInfoManager = SysInfoManager()
-sysInfoManager.start()
+sysInfoManager = serviceRegistry.lazy(
+    "sysinfo", SysInfoManager, _create_sysinfo_manager
+)
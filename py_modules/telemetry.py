@@ -0,0 +1,257 @@
+import os
+import threading
+import time
+from typing import Optional
+
+import config
+import sysInfo
+from config import logger
+from cpu import cpuManager
+from fan import fanManager
+from power_arbiter import ArbiterSample, powerArbiter
+from reactor import ReactorTimer, reactor
+from sysInfo import sysInfoManager
+from telemetry_history import TelemetryHistory
+from utils import (
+    PackagePowerReader,
+    get_battery_info,
+    get_battery_power,
+    sysfs_read_int,
+)
+
+TELEMETRY_TTL = 0.5  # 快照缓存时间(秒)，期间的调用共享同一次读取
+TELEMETRY_LEASE = 5.0  # 超过该时间没有请求时停止占用率采样和历史记录(秒)
+TELEMETRY_CONSUMER = "telemetry"
+
+HISTORY_INTERVAL = 1.0  # 历史记录的采样间隔(秒)
+BACKGROUND_INTERVAL = 10  # 前端关闭时低频记录温度、风扇转速和功耗的间隔(秒)
+HISTORY_CHANNELS = (
+    "cpu_busy",  # %
+    "gpu_busy",  # %
+    "cpu_temp",  # °C
+    "gpu_temp",  # °C
+    "fan1_rpm",
+    "fan2_rpm",
+    "package_power",  # W
+    "cpu_freq",  # MHz，在线核心中的最高频率
+    "gpu_freq",  # MHz
+)
+
+
+class TelemetryCollector:
+    """一次读取前端需要的全部状态数据
+
+    get_snapshot 在 TELEMETRY_TTL 内返回同一个快照，并发调用只触发一次读取。
+    快照内容变化时 seq 加一，前端可以据此跳过重复渲染。
+
+    start_history 后，前端请求快照或历史期间作为调节器注册到 powerArbiter，
+    每秒把一组数据写入 TelemetryHistory，前端通过 get_history 读取图表数据。
+    空闲 TELEMETRY_LEASE 后注销并停止占用率采样。
+    前端关闭期间每 BACKGROUND_INTERVAL 秒在 reactor 上读取一次不需要占用率采样的
+    通道，只写入 10 秒和 1 分钟精度的层；1 秒精度的层以及占用率和频率通道
+    只覆盖前端打开的时间。
+    """
+
+    name = "telemetry"
+
+    def __init__(self, power_manager):
+        self._powerManager = power_manager
+        self._lock = threading.Lock()
+        self._snapshot: Optional[dict] = None
+        self._snapshotTime = 0.0
+        self._seq = 0
+        self._lastValues: Optional[dict] = None
+
+        self._lastRequest = 0.0
+        self._leaseTimer: Optional[threading.Timer] = None
+
+        self._powerReader = PackagePowerReader(fanManager.get_gpu_hwmon_path)
+
+        self.interval = HISTORY_INTERVAL
+        self.history = TelemetryHistory(HISTORY_CHANNELS)
+        self._historyEnabled = False
+        self._backgroundTimer: Optional[ReactorTimer] = None
+
+    def _hold_busy_sampling(self):
+        """有请求时保持 CPU/GPU 占用率采样和历史记录，空闲 TELEMETRY_LEASE 后释放"""
+        self._lastRequest = time.monotonic()
+        if self._leaseTimer is None:
+            sysInfoManager.EnableCPUINFO(True, TELEMETRY_CONSUMER)
+            sysInfoManager.EnableGPUINFO(True, TELEMETRY_CONSUMER)
+            if self._historyEnabled:
+                powerArbiter.register(self)
+            self._arm_lease(TELEMETRY_LEASE)
+
+    def _arm_lease(self, delay: float):
+        self._leaseTimer = threading.Timer(delay, self._check_lease)
+        self._leaseTimer.daemon = True
+        self._leaseTimer.start()
+
+    def _check_lease(self):
+        with self._lock:
+            idle = time.monotonic() - self._lastRequest
+            if idle < TELEMETRY_LEASE:
+                self._arm_lease(TELEMETRY_LEASE - idle)
+                return
+            self._release_lease()
+
+    def _release_lease(self):
+        """释放占用率采样和历史记录，调用时需持有 self._lock"""
+        self._leaseTimer = None
+        powerArbiter.unregister(self)
+        sysInfoManager.EnableCPUINFO(False, TELEMETRY_CONSUMER)
+        sysInfoManager.EnableGPUINFO(False, TELEMETRY_CONSUMER)
+
+    def _read_gpu_freq(self) -> int:
+        """当前 GPU 频率(MHz)，无法获取时返回 0"""
+        gpu_hwmon_path = fanManager.get_gpu_hwmon_path()
+        if gpu_hwmon_path and os.path.exists(f"{gpu_hwmon_path}/freq1_input"):
+            return sysfs_read_int(f"{gpu_hwmon_path}/freq1_input") // 1000000
+        cur_freq_path = getattr(config, "INTEL_GPU_CUR_FREQ", None)
+        if cur_freq_path and os.path.exists(cur_freq_path):
+            return sysfs_read_int(cur_freq_path)
+        return 0
+
+    @staticmethod
+    def _read_cpu_freq() -> int:
+        """在线核心中最高的当前频率(MHz)，无法获取时返回 0"""
+        freqs = [
+            cpuManager.get_cpu_current_freq(cpu)
+            for cpu in cpuManager.get_online_cpus()
+        ]
+        return max(freqs, default=0) // 1000
+
+    def _read_tdp_backend(self) -> str:
+        return self._powerManager.get_active_tdp_backend()
+
+    def _collect(self) -> dict:
+        values = {}
+        values["fans"] = [
+            {"rpm": fan["rpm"], "temp": fan["temp"] / 1000 if fan["temp"] > 0 else -1}
+            for fan in fanManager.get_fanTelemetry()
+        ]
+        values["cpu_busy"] = sysInfo.cpu_busyPercent if sysInfo.has_cpuData else -1
+        values["gpu_busy"] = sysInfo.gpu_busyPercent if sysInfo.has_gpuData else -1
+        for key, reader, default in (
+            ("gpu_freq", self._read_gpu_freq, 0),
+            ("package_power", self._powerReader.read_power, -1),
+            ("tdp_backend", self._read_tdp_backend, ""),
+        ):
+            try:
+                values[key] = reader()
+            except Exception as e:
+                logger.debug(f"telemetry {key} error: {e}")
+                values[key] = default
+
+        percent, charging = get_battery_info()
+        values["battery"] = {
+            "percent": percent,
+            "charging": charging,
+            "power": get_battery_power(),
+        }
+        return values
+
+    @staticmethod
+    def _round(values: dict) -> dict:
+        # 功耗按 0.1W 取整，避免测量噪声导致 seq 每次都变化
+        values["package_power"] = round(values["package_power"], 1)
+        values["battery"]["power"] = round(values["battery"]["power"], 1)
+        return values
+
+    def get_snapshot(self) -> dict:
+        with self._lock:
+            self._hold_busy_sampling()
+            now = time.monotonic()
+            if self._snapshot is not None and now - self._snapshotTime < TELEMETRY_TTL:
+                return self._snapshot
+
+            values = self._round(self._collect())
+            if values != self._lastValues:
+                self._seq += 1
+                self._lastValues = values
+            self._snapshot = {"seq": self._seq, "timestamp": time.time(), **values}
+            self._snapshotTime = now
+            return self._snapshot
+
+    def _collect_background(self) -> dict:
+        """温度、风扇转速和功耗，不依赖占用率采样"""
+        values = {}
+        for key, reader in (
+            ("cpu_temp", fanManager.get_cpuTemp),
+            ("gpu_temp", fanManager.get_gpuTemp),
+        ):
+            temp = reader()
+            values[key] = temp / 1000 if temp > 0 else -1
+        for index, fan in enumerate(fanManager.get_fanTelemetry()[:2]):
+            values[f"fan{index + 1}_rpm"] = fan["rpm"]
+        try:
+            values["package_power"] = self._powerReader.read_power()
+        except Exception as e:
+            logger.debug(f"telemetry history package_power error: {e}")
+        return values
+
+    def _collect_history(self, sample: ArbiterSample) -> dict:
+        values = {
+            "cpu_busy": sample.cpu_busy if sample.has_cpu else -1,
+            "gpu_busy": sample.gpu_busy if sample.has_gpu else -1,
+            **self._collect_background(),
+        }
+        for key, reader in (
+            ("cpu_freq", self._read_cpu_freq),
+            ("gpu_freq", self._read_gpu_freq),
+        ):
+            try:
+                values[key] = reader()
+            except Exception as e:
+                logger.debug(f"telemetry history {key} error: {e}")
+        return values
+
+    def tick(self, sample: ArbiterSample):
+        with self._lock:
+            values = self._collect_history(sample)
+        self.history.add(time.time(), values)
+
+    def _on_background(self):
+        with self._lock:
+            if self._backgroundTimer is None:
+                return
+            self._backgroundTimer = reactor.call_later(
+                BACKGROUND_INTERVAL, self._on_background
+            )
+            # 前端打开期间由 tick 每秒记录
+            if self._leaseTimer is not None:
+                return
+            values = self._collect_background()
+        self.history.add(time.time(), values, BACKGROUND_INTERVAL)
+
+    def start_history(self):
+        """开始记录历史，前端有请求期间每秒记录，其余时间低频记录"""
+        with self._lock:
+            self._historyEnabled = True
+            if self._leaseTimer is not None:
+                powerArbiter.register(self)
+            if self._backgroundTimer is None:
+                self._backgroundTimer = reactor.call_later(
+                    BACKGROUND_INTERVAL, self._on_background
+                )
+        logger.info(f"遥测历史占用内存: {self.history.nbytes // 1024} KB")
+
+    def get_history(self, channel: str, since: float, resolution: int) -> dict:
+        """读取一个通道 since(Unix 时间) 之后的历史，resolution 为期望的精度(秒)"""
+        with self._lock:
+            self._hold_busy_sampling()
+        result = self.history.get(channel, since, resolution, time.time())
+        if result is None:
+            logger.error(f"未知的遥测通道: {channel}")
+            return {}
+        return result
+
+    def stop(self):
+        with self._lock:
+            self._historyEnabled = False
+            if self._backgroundTimer is not None:
+                self._backgroundTimer.cancel()
+                self._backgroundTimer = None
+            if self._leaseTimer is not None:
+                self._leaseTimer.cancel()
+                self._release_lease()
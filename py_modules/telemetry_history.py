@@ -0,0 +1,186 @@
+"""固定内存的多通道遥测历史
+
+每个精度层(tier)是一个按时间分桶的环形缓冲区，所有通道的数据放在同一个
+array('f') 中。写入 1 秒精度的样本时同时累加到 10 秒和 1 分钟精度的层，
+桶结束时写入平均值，没有数据的桶为 NaN。默认配置下 9 个通道保存
+1 小时(1 秒)、6 小时(10 秒)、24 小时(1 分钟)的数据，共约 260 KB。
+本模块不依赖插件环境。
+"""
+
+import base64
+import math
+import sys
+import threading
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+NAN = float("nan")
+
+# (精度秒数, 桶数量)
+DEFAULT_TIERS: Tuple[Tuple[int, int], ...] = ((1, 3600), (10, 2160), (60, 1440))
+
+
+class HistoryTier:
+    """单一精度的环形缓冲区"""
+
+    def __init__(self, channels: int, resolution: int, capacity: int):
+        self.channels = channels
+        self.resolution = resolution
+        self.capacity = capacity
+        # 第 n 个桶位于 [(n % capacity) * channels, ... + channels)
+        self._values = array("f", [NAN]) * (channels * capacity)
+        self.firstBucket: Optional[int] = None  # 第一个写入的桶编号
+        self.lastBucket: Optional[int] = None  # 最后写入的桶编号
+        self._pendingBucket: Optional[int] = None  # 正在累加的桶编号
+        self._sums = [0.0] * channels
+        self._counts = [0] * channels
+
+    def _clear_range(self, first: int, last: int):
+        """把编号 first..last 的桶置为 NaN，最多清空整个缓冲区"""
+        first = max(first, last - self.capacity + 1)
+        for bucket in range(first, last + 1):
+            offset = (bucket % self.capacity) * self.channels
+            self._values[offset : offset + self.channels] = array(
+                "f", [NAN] * self.channels
+            )
+
+    def _flush(self):
+        bucket = self._pendingBucket
+        if bucket is None:
+            return
+        if self.lastBucket is not None and bucket > self.lastBucket + 1:
+            self._clear_range(self.lastBucket + 1, bucket - 1)
+        offset = (bucket % self.capacity) * self.channels
+        for channel in range(self.channels):
+            count = self._counts[channel]
+            self._values[offset + channel] = (
+                self._sums[channel] / count if count else NAN
+            )
+            self._sums[channel] = 0.0
+            self._counts[channel] = 0
+        if self.firstBucket is None:
+            self.firstBucket = bucket
+        self.lastBucket = bucket
+        self._pendingBucket = None
+
+    def add(self, timestamp: float, values: Sequence[float]):
+        bucket = int(timestamp // self.resolution)
+        if self._pendingBucket is not None and bucket != self._pendingBucket:
+            if bucket < self._pendingBucket:
+                # 系统时间回拨，丢弃之后的数据重新开始
+                self.clear()
+            else:
+                self._flush()
+        self._pendingBucket = bucket
+        for channel, value in enumerate(values):
+            if not math.isnan(value):
+                self._sums[channel] += value
+                self._counts[channel] += 1
+
+    def clear(self):
+        self._values = array("f", [NAN]) * (self.channels * self.capacity)
+        self.firstBucket = None
+        self.lastBucket = None
+        self._pendingBucket = None
+        self._sums = [0.0] * self.channels
+        self._counts = [0] * self.channels
+
+    def query(self, channel: int, since: float) -> Tuple[float, array]:
+        """返回 since 之后已完成的桶，(第一个桶的起始时间, 数据)"""
+        if self.lastBucket is None:
+            return 0.0, array("f")
+        first = max(
+            int(math.ceil(since / self.resolution)),
+            self.lastBucket - self.capacity + 1,
+            self.firstBucket,
+        )
+        result = array("f")
+        for bucket in range(first, self.lastBucket + 1):
+            result.append(
+                self._values[(bucket % self.capacity) * self.channels + channel]
+            )
+        return float(first * self.resolution), result
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._values) * self._values.itemsize
+
+
+class TelemetryHistory:
+    """多通道、多精度的遥测历史，线程安全"""
+
+    def __init__(
+        self,
+        channels: Sequence[str],
+        tiers: Sequence[Tuple[int, int]] = DEFAULT_TIERS,
+    ):
+        self.channels: List[str] = list(channels)
+        self._index: Dict[str, int] = {
+            name: index for index, name in enumerate(self.channels)
+        }
+        self._tiers = [
+            HistoryTier(len(self.channels), resolution, capacity)
+            for resolution, capacity in sorted(tiers)
+        ]
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(tier.nbytes for tier in self._tiers)
+
+    def add(
+        self, timestamp: float, values: Dict[str, float], min_resolution: int = 1
+    ):
+        """写入一个样本，缺少或小于 0 的通道视为无数据
+
+        低频采样的样本通过 min_resolution 只写入精度不低于该值的层，
+        避免在高精度层中留下孤立的点。
+        """
+        row = []
+        for name in self.channels:
+            value = values.get(name)
+            row.append(NAN if value is None or value < 0 else float(value))
+        with self._lock:
+            for tier in self._tiers:
+                if tier.resolution >= min_resolution:
+                    tier.add(timestamp, row)
+
+    def clear(self):
+        with self._lock:
+            for tier in self._tiers:
+                tier.clear()
+
+    def _select_tier(self, since: float, resolution: int, now: float) -> HistoryTier:
+        """选择不低于请求精度、且能覆盖 since 的层"""
+        candidates = [tier for tier in self._tiers if tier.resolution >= resolution]
+        if not candidates:
+            candidates = [self._tiers[-1]]
+        for tier in candidates:
+            if now - since <= tier.resolution * tier.capacity:
+                return tier
+        return candidates[-1]
+
+    def get(
+        self, channel: str, since: float, resolution: int, now: float
+    ) -> Optional[dict]:
+        """读取一个通道的历史，通道不存在时返回 None
+
+        Returns:
+            dict: channel, resolution 实际精度(秒), start 第一个点的时间,
+                count 点数, data 小端 float32 数组的 base64 编码，无数据的点为 NaN
+        """
+        index = self._index.get(channel)
+        if index is None:
+            return None
+        with self._lock:
+            tier = self._select_tier(since, max(int(resolution), 1), now)
+            start, values = tier.query(index, since)
+        if sys.byteorder != "little":
+            values.byteswap()
+        return {
+            "channel": channel,
+            "resolution": tier.resolution,
+            "start": start,
+            "count": len(values),
+            "data": base64.b64encode(values.tobytes()).decode("ascii"),
+        }
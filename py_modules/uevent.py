@@ -0,0 +1,99 @@
+import socket
+from typing import Callable, Dict, Optional
+
+from config import logger
+from reactor import reactor
+
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_KERNEL_GROUP = 1
+UEVENT_BUFFER_SIZE = 8192
+
+
+def parse_uevent(data: bytes) -> Optional[Dict[str, str]]:
+    """解析内核 uevent 消息 "action@devpath\\0KEY=VALUE\\0..."
+
+    Returns:
+        dict: 环境变量，包含 ACTION 和 DEVPATH；不是内核消息时返回 None
+    """
+    # udevd 转发的消息以 "libudev" 开头，内容与内核消息重复
+    if data.startswith(b"libudev"):
+        return None
+    header, *fields = data.split(b"\0")
+    action, sep, devpath = header.decode(errors="ignore").partition("@")
+    if not sep:
+        return None
+    event = {"ACTION": action, "DEVPATH": devpath}
+    for field in fields:
+        key, sep, value = field.partition(b"=")
+        if sep:
+            event[key.decode(errors="ignore")] = value.decode(errors="ignore")
+    return event
+
+
+def open_uevent_socket() -> socket.socket:
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+    sock.bind((0, UEVENT_KERNEL_GROUP))
+    return sock
+
+
+class UeventListener:
+    """在 reactor 上监听一个子系统的内核 uevent
+
+    callback(event) 在 reactor 线程中调用。消息过多被内核丢弃(ENOBUFS)时
+    event 为 None，调用方应重新读取完整状态。
+    """
+
+    def __init__(
+        self,
+        subsystem: str,
+        callback: Callable[[Optional[Dict[str, str]]], None],
+        sock_factory: Optional[Callable[[], socket.socket]] = None,
+    ):
+        self._subsystem = subsystem
+        self._callback = callback
+        self._sockFactory = sock_factory or open_uevent_socket
+        self._sock: Optional[socket.socket] = None
+
+    @property
+    def active(self) -> bool:
+        return self._sock is not None
+
+    def start(self) -> bool:
+        """开始监听，无法创建 netlink socket 时返回 False"""
+        if self._sock is not None:
+            return True
+        try:
+            sock = self._sockFactory()
+            sock.setblocking(False)
+            self._sock = sock
+            reactor.add_reader(sock.fileno(), self._on_readable)
+        except OSError as e:
+            logger.error(f"无法监听 {self._subsystem} uevent: {e}")
+            self._sock = None
+            return False
+        return True
+
+    def stop(self):
+        if self._sock is None:
+            return
+        reactor.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+
+    def handle(self, data: bytes):
+        event = parse_uevent(data)
+        if event is None or event.get("SUBSYSTEM") != self._subsystem:
+            return
+        self._callback(event)
+
+    def _on_readable(self, events: int):
+        while self._sock is not None:
+            try:
+                data = self._sock.recv(UEVENT_BUFFER_SIZE)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                logger.debug(f"{self._subsystem} uevent recv error: {e}")
+                self._callback(None)
+                return
+            self.handle(data)
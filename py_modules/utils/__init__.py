@@ -11,6 +11,7 @@ from config import RYZENADJ_PATH, logger
 from .battery import (
     get_battery_info,
     get_battery_percentage,
+    get_battery_power,
     get_charge_behaviour,
     get_charge_control_end_threshold,
     get_charge_type,
@@ -23,15 +24,28 @@ from .battery import (
     support_charge_type,
 )
 from .gpu_fix import fix_gpuFreqSlider_AMD, fix_gpuFreqSlider_INTEL
+from .power import PackagePowerReader
+from .ryzenadj import RyzenAdjError, close_ryzenadj_lib, get_ryzenadj_lib
+from .sysfs import (
+    SysfsNode,
+    close_sysfs_nodes,
+    get_sysfs_node,
+    sysfs_invalidate,
+    sysfs_read,
+    sysfs_read_int,
+    sysfs_write,
+)
 from .tdp import getMaxTDP
 
 __all__ = [
     "fix_gpuFreqSlider_AMD",
     "fix_gpuFreqSlider_INTEL",
     "getMaxTDP",
+    "PackagePowerReader",
     "get_env",
     "get_battery_info",
     "get_battery_percentage",
+    "get_battery_power",
     "is_battery_charging",
     "support_charge_control_end_threshold",
     "set_charge_control_end_threshold",
@@ -46,8 +60,18 @@ __all__ = [
     "get_ryzenadj_candidates",
     "get_ryzenadj_path",
     "run_ryzenadj",
+    "RyzenAdjError",
+    "get_ryzenadj_lib",
+    "close_ryzenadj_lib",
     "check_native_gpu_slider_support",
     "check_native_tdp_limit_support",
+    "SysfsNode",
+    "get_sysfs_node",
+    "sysfs_read",
+    "sysfs_read_int",
+    "sysfs_write",
+    "sysfs_invalidate",
+    "close_sysfs_nodes",
 ]
 
 
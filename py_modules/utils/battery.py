@@ -3,12 +3,17 @@ from typing import Optional, Tuple
 
 from config import logger
 
+from .sysfs import sysfs_read
+
 POWER_SUPPLY_PATH = "/sys/class/power_supply"
 CHARGE_CONTROL_END_THRESHOLD = "charge_control_end_threshold"
 CHARGE_BEHAVIOUR = "charge_behaviour"
 CHARGE_TYPE = "charge_type"
 
 
+_batteryDevice: Optional[str] = None  # 已找到的电池设备，避免每次扫描目录
+
+
 def _find_battery_device() -> Optional[str]:
     """
     查找系统中的电池设备
@@ -16,12 +21,18 @@ def _find_battery_device() -> Optional[str]:
     Returns:
         Optional[str]: 电池设备名称，如果未找到则返回 None
     """
+    global _batteryDevice
+    if _batteryDevice is not None and os.path.exists(
+        os.path.join(POWER_SUPPLY_PATH, _batteryDevice)
+    ):
+        return _batteryDevice
     try:
         for device in os.listdir(POWER_SUPPLY_PATH):
             device_type_path = os.path.join(POWER_SUPPLY_PATH, device, "type")
             if os.path.exists(device_type_path):
                 with open(device_type_path, "r") as f:
                     if f.read().strip() == "Battery":
+                        _batteryDevice = device
                         return device
         return None
     except (FileNotFoundError, IOError):
@@ -68,6 +79,29 @@ def get_battery_info() -> Tuple[int, bool]:
     return percentage, is_charging
 
 
+def get_battery_power() -> float:
+    """
+    获取电池当前功率
+
+    Returns:
+        float: 功率(W)，充电和放电均为正值，如果无法获取则返回 -1
+    """
+    battery_device = _find_battery_device()
+    if not battery_device:
+        return -1
+    battery_path = os.path.join(POWER_SUPPLY_PATH, battery_device)
+    try:
+        power_now = os.path.join(battery_path, "power_now")
+        if os.path.exists(power_now):
+            return abs(int(sysfs_read(power_now))) / 1000000
+        # 部分电池只提供电流和电压
+        current = int(sysfs_read(os.path.join(battery_path, "current_now")))
+        voltage = int(sysfs_read(os.path.join(battery_path, "voltage_now")))
+        return abs(current * voltage) / 1000000000000
+    except (FileNotFoundError, ValueError, OSError):
+        return -1
+
+
 def get_battery_percentage() -> int:
     """
     获取设备当前电量百分比
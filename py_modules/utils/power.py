@@ -0,0 +1,88 @@
+import glob
+import math
+import os
+import time
+from typing import Callable, Optional
+
+from config import logger
+
+from .ryzenadj import get_ryzenadj_lib
+from .sysfs import sysfs_read_int
+
+RAPL_GLOB = "/sys/class/powercap/intel-rapl:*"
+
+
+class PackagePowerReader:
+    """读取封装功耗和功耗上限(W)，无法获取时返回 -1
+
+    功耗依次尝试 amdgpu hwmon 的 PPT 读数、RAPL 能量计数差值、libryzenadj PM 表；
+    功耗上限依次尝试 amdgpu power1_cap、RAPL 长时限制、libryzenadj STAPM 限制。
+    """
+
+    def __init__(self, gpu_hwmon_path: Optional[Callable[[], str]] = None):
+        self._gpuHwmonPath = gpu_hwmon_path
+        self._raplPath: Optional[str] = None  # None 为未查找
+        self._raplMax = 0
+        self._raplLast: Optional[tuple] = None  # (能量 uJ, 时间)
+
+    def _hwmon_path(self) -> str:
+        return self._gpuHwmonPath() if self._gpuHwmonPath is not None else ""
+
+    def _rapl_path(self) -> str:
+        if self._raplPath is None:
+            self._raplPath = ""
+            for path in sorted(glob.glob(RAPL_GLOB)):
+                if os.path.exists(f"{path}/energy_uj"):
+                    self._raplPath = path
+                    self._raplMax = sysfs_read_int(f"{path}/max_energy_range_uj")
+                    break
+        return self._raplPath
+
+    def _read_rapl_power(self) -> float:
+        rapl_path = self._rapl_path()
+        if not rapl_path:
+            return -1
+
+        energy = sysfs_read_int(f"{rapl_path}/energy_uj")
+        now = time.monotonic()
+        last, self._raplLast = self._raplLast, (energy, now)
+        if last is None or now <= last[1]:
+            return -1
+        delta = energy - last[0]
+        if delta < 0:
+            delta += self._raplMax
+        return delta / (now - last[1]) / 1000000
+
+    @staticmethod
+    def _read_ryzenadj(name: str) -> float:
+        lib = get_ryzenadj_lib()
+        if lib is None:
+            return -1
+        try:
+            value = lib.get_values().get(name, math.nan)
+        except Exception as e:
+            logger.debug(f"read {name} from ryzenadj failed: {e}")
+            return -1
+        return -1 if math.isnan(value) or value <= 0 else value
+
+    def read_power(self) -> float:
+        hwmon_path = self._hwmon_path()
+        if hwmon_path:
+            for name in ("power1_average", "power1_input"):
+                path = f"{hwmon_path}/{name}"
+                if os.path.exists(path):
+                    return sysfs_read_int(path) / 1000000
+        power = self._read_rapl_power()
+        if power < 0 and not self._rapl_path():
+            power = self._read_ryzenadj("PPT VALUE FAST")
+        return power
+
+    def read_limit(self) -> float:
+        hwmon_path = self._hwmon_path()
+        if hwmon_path and os.path.exists(f"{hwmon_path}/power1_cap"):
+            return sysfs_read_int(f"{hwmon_path}/power1_cap") / 1000000
+        rapl_path = self._rapl_path()
+        limit_path = f"{rapl_path}/constraint_0_power_limit_uw"
+        if rapl_path and os.path.exists(limit_path):
+            return sysfs_read_int(limit_path) / 1000000
+        return self._read_ryzenadj("STAPM LIMIT")
@@ -0,0 +1,216 @@
+import ctypes
+import ctypes.util
+import math
+import os
+import threading
+from typing import Dict, List, Optional
+
+from config import LIBRYZENADJ_PATH, logger
+
+# libryzenadj 的错误码
+ADJ_ERRORS = {
+    -1: "family unsupported",
+    -2: "smu timeout",
+    -3: "smu unsupported",
+    -4: "smu rejected",
+    -5: "memory access error",
+}
+
+# (名称, getter, 对应的 ryzenadj 参数)，与 ryzenadj -i 的输出保持一致
+INFO_ROWS = [
+    ("STAPM LIMIT", "get_stapm_limit", "stapm-limit"),
+    ("STAPM VALUE", "get_stapm_value", ""),
+    ("PPT LIMIT FAST", "get_fast_limit", "fast-limit"),
+    ("PPT VALUE FAST", "get_fast_value", ""),
+    ("PPT LIMIT SLOW", "get_slow_limit", "slow-limit"),
+    ("PPT VALUE SLOW", "get_slow_value", ""),
+    ("StapmTimeConst", "get_stapm_time", "stapm-time"),
+    ("SlowPPTTimeConst", "get_slow_time", "slow-time"),
+    ("PPT LIMIT APU", "get_apu_slow_limit", "apu-slow-limit"),
+    ("PPT VALUE APU", "get_apu_slow_value", ""),
+    ("TDC LIMIT VDD", "get_vrm_current", "vrm-current"),
+    ("TDC VALUE VDD", "get_vrm_current_value", ""),
+    ("TDC LIMIT SOC", "get_vrmsoc_current", "vrmsoc-current"),
+    ("TDC VALUE SOC", "get_vrmsoc_current_value", ""),
+    ("EDC LIMIT VDD", "get_vrmmax_current", "vrmmax-current"),
+    ("EDC VALUE VDD", "get_vrmmax_current_value", ""),
+    ("EDC LIMIT SOC", "get_vrmsocmax_current", "vrmsocmax-current"),
+    ("EDC VALUE SOC", "get_vrmsocmax_current_value", ""),
+    ("THM LIMIT CORE", "get_tctl_temp", "tctl-temp"),
+    ("THM VALUE CORE", "get_tctl_temp_value", ""),
+    ("STT LIMIT APU", "get_apu_skin_temp_limit", "apu-skin-temp"),
+    ("STT VALUE APU", "get_apu_skin_temp_value", ""),
+]
+
+
+class RyzenAdjError(Exception):
+    pass
+
+
+class RyzenAdjLib:
+    """libryzenadj 的 ctypes 封装
+
+    插件生命周期内只初始化一次 ryzen_access，之后的设置和读取都复用该句柄，
+    不再为每次 TDP 修改启动 ryzenadj 进程。
+    """
+
+    def __init__(self, lib_path: str):
+        self._lib = ctypes.CDLL(lib_path)
+        self._lock = threading.Lock()
+        self._tableReady = False
+
+        self._lib.init_ryzenadj.restype = ctypes.c_void_p
+        self._lib.init_ryzenadj.argtypes = []
+        self._lib.cleanup_ryzenadj.restype = None
+        self._lib.cleanup_ryzenadj.argtypes = [ctypes.c_void_p]
+        for name in ("init_table", "refresh_table"):
+            func = getattr(self._lib, name)
+            func.restype = ctypes.c_int
+            func.argtypes = [ctypes.c_void_p]
+        for name in (
+            "set_stapm_limit",
+            "set_fast_limit",
+            "set_slow_limit",
+            "set_tctl_temp",
+            "set_coall",
+        ):
+            func = getattr(self._lib, name)
+            func.restype = ctypes.c_int
+            func.argtypes = [ctypes.c_void_p, ctypes.c_uint32]
+        self._lib.get_cpu_family.restype = ctypes.c_int
+        self._lib.get_cpu_family.argtypes = [ctypes.c_void_p]
+        self._lib.get_bios_if_ver.restype = ctypes.c_int
+        self._lib.get_bios_if_ver.argtypes = [ctypes.c_void_p]
+        self._lib.get_table_ver.restype = ctypes.c_uint32
+        self._lib.get_table_ver.argtypes = [ctypes.c_void_p]
+        self._lib.get_table_size.restype = ctypes.c_size_t
+        self._lib.get_table_size.argtypes = [ctypes.c_void_p]
+        self._lib.get_table_values.restype = ctypes.POINTER(ctypes.c_float)
+        self._lib.get_table_values.argtypes = [ctypes.c_void_p]
+
+        self._ry = self._lib.init_ryzenadj()
+        if not self._ry:
+            raise RyzenAdjError("init_ryzenadj failed")
+
+    @staticmethod
+    def _check(name: str, ret: int):
+        if ret != 0:
+            raise RyzenAdjError(f"{name} failed: {ADJ_ERRORS.get(ret, ret)}")
+
+    def _refresh_table(self):
+        # PM 表只初始化一次，之后仅刷新
+        if not self._tableReady:
+            self._check("init_table", self._lib.init_table(self._ry))
+            self._tableReady = True
+        else:
+            self._check("refresh_table", self._lib.refresh_table(self._ry))
+
+    def set_tdp(self, stapm: int, fast: int, slow: int, tctl: Optional[int] = None):
+        """一次性设置 stapm/fast/slow 限制(mW)和温度墙(°C)"""
+        with self._lock:
+            self._check("set_stapm_limit", self._lib.set_stapm_limit(self._ry, stapm))
+            self._check("set_fast_limit", self._lib.set_fast_limit(self._ry, fast))
+            self._check("set_slow_limit", self._lib.set_slow_limit(self._ry, slow))
+            if tctl is not None:
+                self._check("set_tctl_temp", self._lib.set_tctl_temp(self._ry, tctl))
+
+    def set_stapm_limit(self, value: int):
+        with self._lock:
+            self._check("set_stapm_limit", self._lib.set_stapm_limit(self._ry, value))
+
+    def set_coall(self, value: int):
+        with self._lock:
+            self._check("set_coall", self._lib.set_coall(self._ry, value))
+
+    def _get_float(self, name: str) -> float:
+        func = getattr(self._lib, name, None)
+        if func is None:
+            return math.nan
+        func.restype = ctypes.c_float
+        func.argtypes = [ctypes.c_void_p]
+        return func(self._ry)
+
+    def get_stapm_limit(self) -> float:
+        with self._lock:
+            self._refresh_table()
+            return self._get_float("get_stapm_limit")
+
+    def get_pm_table(self) -> List[float]:
+        """刷新并返回完整的 PM 表"""
+        with self._lock:
+            self._refresh_table()
+            size = self._lib.get_table_size(self._ry) // ctypes.sizeof(ctypes.c_float)
+            values = self._lib.get_table_values(self._ry)
+            return [values[i] for i in range(size)]
+
+    def get_values(self) -> Dict[str, float]:
+        with self._lock:
+            self._refresh_table()
+            return {name: self._get_float(getter) for name, getter, _ in INFO_ROWS}
+
+    def get_info(self) -> str:
+        """生成与 ryzenadj -i 相同格式的信息表"""
+        with self._lock:
+            self._refresh_table()
+            lines = [
+                f"CPU Family: {self._lib.get_cpu_family(self._ry)}",
+                f"SMU BIOS Interface Version: {self._lib.get_bios_if_ver(self._ry)}",
+                f"PM Table Version: {self._lib.get_table_ver(self._ry):x}",
+                "|        Name         |   Value   |     Parameter      |",
+                "|---------------------|-----------|--------------------|",
+            ]
+            for name, getter, param in INFO_ROWS:
+                value = self._get_float(getter)
+                lines.append(f"| {name:<19} | {value:9.3f} | {param:<18} |")
+            return "\n".join(lines) + "\n"
+
+    def close(self):
+        with self._lock:
+            if self._ry:
+                self._lib.cleanup_ryzenadj(self._ry)
+                self._ry = None
+
+
+_ryzenadjLib: Optional[RyzenAdjLib] = None
+_ryzenadjLibChecked = False
+_ryzenadjLibLock = threading.Lock()
+
+
+def get_libryzenadj_candidates() -> List[str]:
+    candidates = []
+    if os.path.exists(LIBRYZENADJ_PATH):
+        candidates.append(LIBRYZENADJ_PATH)
+    system_lib = ctypes.util.find_library("ryzenadj")
+    if system_lib:
+        candidates.append(system_lib)
+    return candidates
+
+
+def get_ryzenadj_lib() -> Optional[RyzenAdjLib]:
+    """获取常驻的 libryzenadj 实例，加载失败时返回 None (此时应使用 ryzenadj 命令行)"""
+    global _ryzenadjLib, _ryzenadjLibChecked
+    if _ryzenadjLibChecked:
+        return _ryzenadjLib
+    with _ryzenadjLibLock:
+        if _ryzenadjLibChecked:
+            return _ryzenadjLib
+        for lib_path in get_libryzenadj_candidates():
+            try:
+                _ryzenadjLib = RyzenAdjLib(lib_path)
+                logger.info(f"libryzenadj loaded: {lib_path}")
+                break
+            except Exception as e:
+                logger.warning(f"libryzenadj load failed with {lib_path}: {e}")
+        if _ryzenadjLib is None:
+            logger.info("libryzenadj unavailable, use ryzenadj command line")
+        _ryzenadjLibChecked = True
+        return _ryzenadjLib
+
+
+def close_ryzenadj_lib():
+    global _ryzenadjLib, _ryzenadjLibChecked
+    with _ryzenadjLibLock:
+        if _ryzenadjLib is not None:
+            _ryzenadjLib.close()
+        _ryzenadjLib = None
+        _ryzenadjLibChecked = False
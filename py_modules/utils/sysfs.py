@@ -0,0 +1,151 @@
+import errno
+import os
+import threading
+from typing import Dict, Optional
+
+from config import logger
+
+# 这些错误说明节点被移除或重建(热插拔、驱动重载)，需要重新打开
+_REOPEN_ERRNOS = {errno.ENODEV, errno.ENOENT, errno.EBADF, errno.ESTALE, errno.ENXIO}
+
+READ_SIZE = 4096
+
+
+class SysfsNode:
+    """保持打开的 sysfs 文件句柄
+
+    读取使用 os.pread(fd, n, 0)，写入使用 os.pwrite，避免每次访问都 open/close。
+    读写分别使用只读、只写的 fd，按需打开。节点失效时自动重新打开一次。
+    写入值与上次写入值相同时跳过写入，读取到不同值时清除该缓存。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._readFd = -1
+        self._writeFd = -1
+        self._lastWritten: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _open(self, flags: int) -> int:
+        return os.open(self.path, flags | os.O_CLOEXEC)
+
+    def _close_fds(self):
+        for fd in (self._readFd, self._writeFd):
+            if fd >= 0:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._readFd = -1
+        self._writeFd = -1
+        self._lastWritten = None
+
+    def _pread(self, size: int) -> bytes:
+        if self._readFd < 0:
+            self._readFd = self._open(os.O_RDONLY)
+        try:
+            return os.pread(self._readFd, size, 0)
+        except OSError as e:
+            if e.errno not in _REOPEN_ERRNOS:
+                raise
+            self._close_fds()
+            self._readFd = self._open(os.O_RDONLY)
+            return os.pread(self._readFd, size, 0)
+
+    def _pwrite(self, data: bytes):
+        if self._writeFd < 0:
+            self._writeFd = self._open(os.O_WRONLY)
+        try:
+            os.pwrite(self._writeFd, data, 0)
+        except OSError as e:
+            if e.errno not in _REOPEN_ERRNOS:
+                raise
+            self._close_fds()
+            self._writeFd = self._open(os.O_WRONLY)
+            os.pwrite(self._writeFd, data, 0)
+
+    def read(self, size: int = READ_SIZE) -> str:
+        with self._lock:
+            value = self._pread(size).decode("utf-8", "replace").strip()
+            # 值被外部修改过，下次写入不能跳过
+            if self._lastWritten is not None and value != self._lastWritten:
+                self._lastWritten = None
+            return value
+
+    def read_int(self) -> int:
+        return int(self.read())
+
+    def write(self, value, force: bool = False) -> bool:
+        """写入节点
+
+        Returns:
+            bool: 实际发生写入时返回 True，因值未变化而跳过时返回 False
+        """
+        data = str(value).strip()
+        with self._lock:
+            if not force and data == self._lastWritten:
+                return False
+            try:
+                self._pwrite(data.encode())
+            except Exception:
+                self._lastWritten = None
+                raise
+            self._lastWritten = data
+            return True
+
+    def invalidate(self):
+        """清除写入缓存，下次写入必定生效"""
+        with self._lock:
+            self._lastWritten = None
+
+    def close(self):
+        with self._lock:
+            self._close_fds()
+
+
+_nodes: Dict[str, SysfsNode] = {}
+_nodesLock = threading.Lock()
+
+
+def get_sysfs_node(path: str) -> SysfsNode:
+    """获取路径对应的共享 SysfsNode，同一路径只保留一组 fd"""
+    node = _nodes.get(path)
+    if node is None:
+        with _nodesLock:
+            node = _nodes.get(path)
+            if node is None:
+                node = SysfsNode(path)
+                _nodes[path] = node
+    return node
+
+
+def sysfs_read(path: str) -> str:
+    return get_sysfs_node(path).read()
+
+
+def sysfs_read_int(path: str) -> int:
+    return get_sysfs_node(path).read_int()
+
+
+def sysfs_write(path: str, value, force: bool = False) -> bool:
+    return get_sysfs_node(path).write(value, force)
+
+
+def sysfs_invalidate(prefix: str = ""):
+    """清除路径前缀下所有节点的写入缓存
+
+    用于硬件可能自行重置相关节点的场景，如切换风扇控制模式后。
+    """
+    with _nodesLock:
+        nodes = [n for p, n in _nodes.items() if p.startswith(prefix)]
+    for node in nodes:
+        node.invalidate()
+
+
+def close_sysfs_nodes():
+    with _nodesLock:
+        nodes = list(_nodes.values())
+        _nodes.clear()
+    for node in nodes:
+        node.close()
+    logger.debug(f"closed {len(nodes)} sysfs nodes")
@@ -152,6 +152,48 @@ const CPUNumComponent: FC = () => {
   );
 };
 
+const CPU_HOTPLUG_INTERVAL_MAX = 500; // ms，与后端 HOTPLUG_INTERVAL_MAX 一致
+
+const CPUHotplugIntervalComponent: FC = () => {
+  const [interval, setHotplugInterval] = useState<number>(
+    Settings.appCpuHotplugInterval()
+  );
+  useEffect(() => {
+    PluginManager.listenUpdateComponent(
+      ComponentName.CPU_HOTPLUG_INTERVAL,
+      [ComponentName.CPU_HOTPLUG_INTERVAL],
+      (_ComponentName, updateType) => {
+        switch (updateType) {
+          case UpdateType.UPDATE: {
+            setHotplugInterval(Settings.appCpuHotplugInterval());
+            break;
+          }
+        }
+      }
+    );
+  }, []);
+  return (
+    <PanelSectionRow>
+      <SlowSliderField
+        label={localizationManager.getString(
+          localizeStrEnum.CPU_HOTPLUG_INTERVAL
+        )}
+        description={localizationManager.getString(
+          localizeStrEnum.CPU_HOTPLUG_INTERVAL_DESC
+        )}
+        value={interval}
+        step={10}
+        max={CPU_HOTPLUG_INTERVAL_MAX}
+        min={0}
+        showValue={true}
+        onChangeEnd={(value: number) => {
+          Settings.setCpuHotplugInterval(value);
+        }}
+      />
+    </PanelSectionRow>
+  );
+};
+
 const CPUPerformancePerfComponent: FC = () => {
   const [supportPerf, _] = useState<boolean>(
     Backend.data.getSupportCPUMaxPct()
@@ -1122,6 +1164,7 @@ export const CPUComponent: FC<{
               <CPUSchedExtComponent />
               {!coreSelectionEnabled && <CPUNumComponent />}
               <CPUCoreSelectionComponent />
+              <CPUHotplugIntervalComponent />
               <CPUPerformancePerfComponent />
               <CPUFreqControlComponent />
               <CPURyzenadjUndervoltComponent />
@@ -37,6 +37,7 @@ import {
   Backend,
   FAN_PWM_MODE,
 } from "../util";
+import { TelemetryHistory } from "../types";
 import { localizeStrEnum, localizationManager } from "../i18n";
 import { FanCanvas } from "./fanCanvas";
 import { RiArrowDownSFill, RiArrowUpSFill } from "react-icons/ri";
@@ -555,18 +556,29 @@ const FANRPMComponent: FC<{ fanIndex: number }> = ({ fanIndex }) => {
   const [fanrpm, setFanRPM] = useState<number>(0);
   const [fanPercent, setFanPercent] = useState<number>(0);
   const [temperature, setTemperature] = useState<number | undefined>(undefined);
+  const lastSeq = useRef<number>(-1);
   const refresh = async () => {
-    setFanRPM(FanControl.fanInfo[fanIndex].fanRPM);
     setFanPercent(
       Math.trunc(FanControl.fanInfo[fanIndex].setPoint.fanRPMpercent ?? 0)
     );
-    const temperature = FanControl.fanInfo[fanIndex].nowPoint.temperature;
-    if (temperature != undefined && temperature != 0) {
-      setTemperature(Math.trunc(temperature));
+    // 一次请求获取全部状态，seq 未变化时跳过渲染
+    const snapshot = await Backend.getTelemetrySnapshot();
+    if (!snapshot || snapshot.seq == lastSeq.current) {
+      return;
+    }
+    lastSeq.current = snapshot.seq;
+    const fan = snapshot.fans[fanIndex];
+    if (!fan) {
+      return;
+    }
+    setFanRPM(fan.rpm);
+    if (fan.temp > 0) {
+      setTemperature(Math.trunc(fan.temp));
     }
   };
 
   useEffect(() => {
+    refresh();
     const fanRPMIntervalID = setInterval(() => {
       refresh();
     }, 1000);
@@ -612,6 +624,129 @@ const FANRPMComponent: FC<{ fanIndex: number }> = ({ fanIndex }) => {
   );
 };
 
+const HISTORY_WINDOW = 120; // 历史曲线显示的时长(秒)
+const HISTORY_CHANNEL_COUNT = 2; // 后端只记录前两个风扇的转速
+const historyTempColor = "#FF8C00";
+
+//风扇转速和温度历史曲线
+const FANHistoryComponent: FC<{ fanIndex: number }> = ({ fanIndex }) => {
+  const canvasRef: any = useRef(null);
+
+  const initDraw = (ref: any) => {
+    canvasRef.current = ref;
+  };
+
+  const refresh = async () => {
+    const since = Date.now() / 1000 - HISTORY_WINDOW;
+    const [rpmHistory, tempHistory] = await Promise.all([
+      Backend.getHistory(`fan${fanIndex + 1}_rpm`, since),
+      Backend.getHistory("cpu_temp", since),
+    ]);
+    refreshCanvas(rpmHistory, tempHistory);
+  };
+
+  useEffect(() => {
+    refresh();
+    const historyIntervalID = setInterval(() => {
+      refresh();
+    }, 1000);
+    return () => {
+      clearInterval(historyIntervalID);
+    };
+  }, []);
+
+  const refreshCanvas = (
+    rpmHistory?: TelemetryHistory,
+    tempHistory?: TelemetryHistory
+  ) => {
+    const canvas = canvasRef.current;
+    const ctx = canvas?.getContext("2d");
+    if (!ctx) {
+      return;
+    }
+    const dpr = window.devicePixelRatio || 1;
+    const width = CANVAS_WIDTH_SMALL;
+    const height = CANVAS_HEIGHT_SMALL / 2;
+    canvas.width = width * dpr;
+    canvas.height = height * dpr;
+    ctx.scale(dpr, dpr);
+    ctx.clearRect(0, 0, width, height);
+
+    ctx.beginPath();
+    ctx.strokeStyle = "#093455";
+    for (let i = 1; i < 4; i++) {
+      ctx.moveTo(0, (height * i) / 4);
+      ctx.lineTo(width, (height * i) / 4);
+    }
+    ctx.stroke();
+
+    const maxRPM = Backend.data.getFanMAXPRM(fanIndex);
+    drawHistory(ctx, width, height, rpmHistory, maxRPM, lineColor);
+    drawHistory(ctx, width, height, tempHistory, FanPosition.tempMax, historyTempColor);
+  };
+
+  //按时间把历史点映射到画布，NaN 表示没有记录的时段
+  const drawHistory = (
+    ctx: any,
+    width: number,
+    height: number,
+    history: TelemetryHistory | undefined,
+    maxValue: number,
+    color: string
+  ) => {
+    if (!history || maxValue <= 0) {
+      return;
+    }
+    const left = Date.now() / 1000 - HISTORY_WINDOW;
+    ctx.beginPath();
+    ctx.strokeStyle = color;
+    ctx.lineWidth = 2;
+    let drawing = false;
+    history.values.forEach((value, i) => {
+      if (isNaN(value) || value < 0) {
+        drawing = false;
+        return;
+      }
+      const time = history.start + i * history.resolution;
+      const x = ((time - left) / HISTORY_WINDOW) * width;
+      const y = height - (Math.min(value, maxValue) / maxValue) * height;
+      if (drawing) {
+        ctx.lineTo(x, y);
+      } else {
+        ctx.moveTo(x, y);
+        drawing = true;
+      }
+    });
+    ctx.stroke();
+  };
+
+  if (fanIndex >= HISTORY_CHANNEL_COUNT || Backend.data.getFanMAXPRM(fanIndex) <= 0) {
+    return null;
+  }
+  return (
+    <PanelSectionRow>
+      <FanCanvas
+        width={CANVAS_WIDTH_SMALL}
+        height={CANVAS_HEIGHT_SMALL / 2}
+        style={{
+          width: `${CANVAS_WIDTH_SMALL}px`,
+          height: `${CANVAS_HEIGHT_SMALL / 2}px`,
+          padding: "0px",
+          border: "1px solid #1a9fff",
+          // @ts-ignore
+          "background-color": "#1a1f2c",
+          "border-radius": "4px",
+          "margin-top": "10px",
+          "margin-left": "8px",
+        }}
+        initDraw={(f: any) => {
+          initDraw(f);
+        }}
+      />
+    </PanelSectionRow>
+  );
+};
+
 //创建配置文件组件
 function FANCretateProfileModelComponent({
   fanProfileName,
@@ -1543,6 +1678,7 @@ export const FANComponent: FC<{ isTab?: boolean }> = ({ isTab = false }) => {
                       <FANManageProfileComponent fanIndex={0} />
                       <FANDisplayComponent fanIndex={0} />
                       <FANRPMComponent fanIndex={0} />
+                      <FANHistoryComponent fanIndex={0} />
                     </>
                   )}
                   {fanCount.current > 1 && (
@@ -1576,6 +1712,7 @@ export const FANComponent: FC<{ isTab?: boolean }> = ({ isTab = false }) => {
                               <FANManageProfileComponent fanIndex={index} />
                               <FANDisplayComponent fanIndex={index} />
                               <FANRPMComponent fanIndex={index} />
+                      <FANHistoryComponent fanIndex={index} />
                             </>
                           )
                         );
@@ -131,9 +131,17 @@ const GPUAutoComponent: FC = () => {
   const [gpuAutoMinFreq, setGPUAutoMinFreq] = useState<number>(
     Settings.appGPUAutoMinFreq()
   );
+  const [gpuTargetFps, setGPUTargetFps] = useState<number>(
+    Settings.appGPUTargetFps()
+  );
+  const [gpuFrameTimeGuard, setGPUFrameTimeGuard] = useState<number>(
+    Settings.appGPUFrameTimeGuard()
+  );
   const refresh = () => {
     setGPUAutoMaxFreq(Settings.appGPUAutoMaxFreq());
     setGPUAutoMinFreq(Settings.appGPUAutoMinFreq());
+    setGPUTargetFps(Settings.appGPUTargetFps());
+    setGPUFrameTimeGuard(Settings.appGPUFrameTimeGuard());
   };
   //listen Settings
   useEffect(() => {
@@ -182,6 +190,39 @@ const GPUAutoComponent: FC = () => {
           }}
         />
       </PanelSectionRow>
+      <PanelSectionRow>
+        <SlowSliderField
+          label={localizationManager.getString(localizeStrEnum.GPU_TARGET_FPS)}
+          description={localizationManager.getString(
+            localizeStrEnum.GPU_TARGET_FPS_DESC
+          )}
+          value={gpuTargetFps}
+          step={5}
+          max={120}
+          min={0}
+          showValue={true}
+          onChangeEnd={(value: number) => {
+            Settings.setGPUTargetFps(value);
+          }}
+        />
+      </PanelSectionRow>
+      {gpuTargetFps > 0 && (
+        <PanelSectionRow>
+          <SlowSliderField
+            label={localizationManager.getString(
+              localizeStrEnum.GPU_FRAMETIME_GUARD
+            )}
+            value={gpuFrameTimeGuard}
+            step={5}
+            max={30}
+            min={0}
+            showValue={true}
+            onChangeEnd={(value: number) => {
+              Settings.setGPUFrameTimeGuard(value);
+            }}
+          />
+        </PanelSectionRow>
+      )}
     </div>
   );
 };
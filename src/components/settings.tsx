@@ -25,7 +25,14 @@ import {
   EACState,
   Logger,
 } from "../util";
-import { getPowerInfo } from "../util/backend";
+import {
+  getPowerInfo,
+  getProfileLearning,
+  getSysInfoCollectInterval,
+  setProfileLearning,
+  setSysInfoCollectInterval,
+} from "../util/backend";
+import { SlowSliderField } from "./SlowSliderField";
 import { localizeStrEnum, localizationManager } from "../i18n";
 import { FaExclamationCircle } from "react-icons/fa";
 
@@ -298,6 +305,89 @@ const SettingsPollingComponent: FC = () => {
   );
 };
 
+const SAMPLE_INTERVAL_MIN = 50; // ms，与后端 MIN_COLLECT_INTERVAL 一致
+const SAMPLE_INTERVAL_MAX = 250; // ms，与后端 MAX_COLLECT_INTERVAL 一致
+
+//占用率采样间隔，由后端保存
+const SettingsSampleIntervalComponent: FC = () => {
+  const [sampleInterval, setSampleInterval] = useState<number | undefined>(undefined);
+
+  useEffect(() => {
+    getSysInfoCollectInterval()
+      .then((value) => {
+        if (value > 0) {
+          setSampleInterval(Math.round(value * 1000));
+        }
+      })
+      .catch((e) => {
+        Logger.error(`getSysInfoCollectInterval failed: ${e}`);
+      });
+  }, []);
+
+  if (sampleInterval == undefined) return null;
+
+  return (
+    <PanelSectionRow>
+      <SlowSliderField
+        label={localizationManager.getString(localizeStrEnum.SAMPLE_INTERVAL)}
+        description={localizationManager.getString(
+          localizeStrEnum.SAMPLE_INTERVAL_DESC
+        )}
+        value={sampleInterval}
+        step={25}
+        min={SAMPLE_INTERVAL_MIN}
+        max={SAMPLE_INTERVAL_MAX}
+        showValue={true}
+        valueSuffix=" ms"
+        onChangeEnd={(value: number) => {
+          if (value == sampleInterval) {
+            return;
+          }
+          setSampleInterval(value);
+          setSysInfoCollectInterval(value / 1000).catch((e) => {
+            Logger.error(`setSysInfoCollectInterval failed: ${e}`);
+          });
+        }}
+      />
+    </PanelSectionRow>
+  );
+};
+
+//按应用学习运行参数，由后端保存，默认关闭
+const SettingsProfileLearningComponent: FC = () => {
+  const [enabled, setEnabled] = useState<boolean | undefined>(undefined);
+
+  useEffect(() => {
+    getProfileLearning()
+      .then((value) => {
+        setEnabled(value);
+      })
+      .catch((e) => {
+        Logger.error(`getProfileLearning failed: ${e}`);
+      });
+  }, []);
+
+  if (enabled == undefined) return null;
+
+  return (
+    <PanelSectionRow>
+      <ToggleField
+        label={localizationManager.getString(localizeStrEnum.PROFILE_LEARNING)}
+        description={localizationManager.getString(
+          localizeStrEnum.PROFILE_LEARNING_DESC
+        )}
+        checked={enabled}
+        onChange={(value) => {
+          setEnabled(value);
+          setProfileLearning(value).catch((e) => {
+            Logger.error(`setProfileLearning failed: ${e}`);
+          });
+        }}
+      />
+    </PanelSectionRow>
+  );
+};
+
 export const SettingsComponent: FC<{
   isTab?: boolean;
 }> = ({ isTab = false }) => {
@@ -336,6 +426,8 @@ export const SettingsComponent: FC<{
             <SettingsPerAppComponent />
             <SettingsPerAcStateComponent />
             <SettingsPollingComponent />
+            <SettingsSampleIntervalComponent />
+            <SettingsProfileLearningComponent />
           </>
         )}
       </PanelSection>
@@ -25,3 +25,19 @@ export interface CPUTopologyForUI {
   core_types: string[];
   is_heterogeneous: boolean;
 }
+
+export interface CPUHotplugTransitionStats {
+  count: number;
+  failed: number;
+  avg_ms: number;
+  max_ms: number;
+  last_ms: number;
+}
+
+// Returned by get_cpu_hotplug_stats; skipped counts CPUs already in the requested state
+export interface CPUHotplugStats {
+  online: CPUHotplugTransitionStats;
+  offline: CPUHotplugTransitionStats;
+  skipped: number;
+  pending: number;
+}
@@ -8,3 +8,15 @@ export interface FanConfig {
     fan_fixed_temps?: number[];
     [key: string]: unknown;
 }
+
+// Fan status pushed by the backend fan curve controller
+export interface FanStatus {
+    index: number;
+    mode: string;
+    rpm: number;
+    rpm_percent: number;
+    temperature: number;
+    effective_temp: number | null;
+    target_percent: number;
+    output_percent: number | null;
+}
@@ -1,2 +1,3 @@
 export * from "./cpu";
-export * from "./fans";
\ No newline at end of file
+export * from "./fans";
+export * from "./telemetry";
\ No newline at end of file
@@ -0,0 +1,29 @@
+// Snapshot returned by get_telemetry_snapshot; seq only changes when values change
+export interface TelemetrySnapshot {
+    seq: number;
+    timestamp: number;
+    fans: { rpm: number; temp: number }[];
+    cpu_busy: number;
+    gpu_busy: number;
+    gpu_freq: number;
+    package_power: number;
+    battery: { percent: number; charging: boolean; power: number };
+    tdp_backend: string;
+}
+
+// Packed payload returned by get_history; data is base64 of little-endian float32, NaN marks gaps
+export interface TelemetryHistoryPayload {
+    channel: string;
+    resolution: number;
+    start: number;
+    count: number;
+    data: string;
+}
+
+// Decoded history: point i was sampled at start + i * resolution (Unix seconds)
+export interface TelemetryHistory {
+    channel: string;
+    resolution: number;
+    start: number;
+    values: Float32Array;
+}
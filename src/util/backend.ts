@@ -1,5 +1,5 @@
-import { APPLYTYPE, FAN_PWM_MODE, FANMODE, GPUMODE, Patch } from "./enum";
-import { FanControl, PluginManager } from "./pluginMain";
+import { APPLYTYPE, FANMODE, GPUMODE, Patch } from "./enum";
+import { FanControl, PluginManager, RunningApps } from "./pluginMain";
 import { FanSetting, Settings, SettingsData } from "./settings";
 import {
   DEFAULT_TDP_MAX,
@@ -12,7 +12,7 @@ import {
 import { JsonSerializer } from "typescript-json-serializer";
 import { callable } from "@decky/api";
 import { Logger } from "./logger";
-import { CPUCoreInfo, CPUCoreTypeInfo, CPUTopologyForUI, FanConfig } from "../types";
+import { CPUCoreInfo, CPUCoreTypeInfo, CPUHotplugStats, CPUTopologyForUI, FanConfig, FanStatus, TelemetryHistory, TelemetryHistoryPayload, TelemetrySnapshot } from "../types";
 import { getVersionCache, setVersionCache } from "./versionCache";
 const serializer = new JsonSerializer();
 
@@ -63,9 +63,22 @@ export const setGpuFreq = callable<[number], void>("set_gpuFreq");
 export const setGpuFreqRange = callable<[number, number], void>("set_gpuFreqRange");
 export const setGpuAuto = callable<[boolean], void>("set_gpuAuto");
 export const setGpuAutoFreqRange = callable<[number, number], void>("set_gpuAutoFreqRange");
+export const setGpuFrameTimeTarget = callable<[string, number, number], boolean>("set_gpuFrameTimeTarget");
 export const setFanAuto = callable<[number, boolean], void>("set_fanAuto");
 export const setFanPercent = callable<[number, number], void>("set_fanPercent");
 export const setFanCurve = callable<[number, number[], number[]], void>("set_fanCurve");
+export const setFanControl = callable<[number, FANMODE, number, number[], number[]], boolean>("set_fanControl");
+export const getFanStatus = callable<[], FanStatus[]>("get_fanStatus");
+export const getSysInfoCollectInterval = callable<[], number>("get_sysinfo_collect_interval");
+export const setSysInfoCollectInterval = callable<[number], boolean>("set_sysinfo_collect_interval");
+export const getTelemetrySnapshot = callable<[], TelemetrySnapshot>("get_telemetry_snapshot");
+export const getHistory = callable<[string, number, number], TelemetryHistoryPayload>("get_history");
+export const getPowerArbiterStatus = callable<[], any>("get_power_arbiter_status");
+export const setProfileApp = callable<[string], boolean>("set_profile_app");
+export const getProfileLearning = callable<[], boolean>("get_profile_learning");
+export const setProfileLearning = callable<[boolean], boolean>("set_profile_learning");
+export const getAppProfile = callable<[string], any>("get_app_profile");
+export const resetAppProfile = callable<[string], boolean>("reset_app_profile");
 export const receiveSuspendEvent = callable<[], void>("receive_suspendEvent");
 export const getLatestVersion = callable<[], string>("get_latest_version");
 export const updateLatest = callable<[], any>("update_latest");
@@ -97,6 +110,8 @@ export const getSettings = callable<[], string>("get_settings");
 export const getMaxPerfPct = callable<[], number>("get_max_perf_pct");
 export const setMaxPerfPct = callable<[number], any>("set_max_perf_pct");
 export const setAutoCpumaxPct = callable<[boolean], any>("set_auto_cpumax_pct");
+export const getAutoCpumaxController = callable<[], any>("get_auto_cpumax_controller");
+export const setAutoCpumaxController = callable<[string, Record<string, number>], boolean>("set_auto_cpumax_controller");
 export const setBypassCharge = callable<[boolean], any>("set_bypass_charge");
 export const getBypassCharge = callable<[], boolean>("get_bypass_charge");
 export const setChargeLimit = callable<[number], any>("set_charge_limit");
@@ -116,6 +131,19 @@ export const supportsNativeGpuSlider = callable<[], boolean>("supports_native_gp
 export const supportsNativeTdpLimit = callable<[], boolean>("supports_native_tdp_limit");
 export const getCpuTopologyForUI = callable<[], CPUTopologyForUI>("get_cpu_topology_for_ui");
 export const setCpuOnlineList = callable<[number[]], boolean>("set_cpu_online_list");
+export const getCpuHotplugStats = callable<[], CPUHotplugStats>("get_cpu_hotplug_stats");
+export const setCpuHotplugInterval = callable<[number], boolean>("set_cpu_hotplug_interval");
+
+export type ApplyStateResult = {
+  changed: { key: string; value: any; ms: number }[];
+  unchanged: string[];
+  drifted: string[];
+  failed: Record<string, string>;
+  unknown: string[];
+  elapsed_ms: number;
+};
+
+export const applyState = callable<[Record<string, any>], ApplyStateResult>("apply_state");
 
 
 const defaultCpuCoreInfo: CPUCoreInfo = {
@@ -530,26 +558,21 @@ export class Backend {
         QAMPatch.togglePreferAppProfile(Settings.appOverWrite());
       }
 
-      // CPU 相关设置处理
       if (applyTarget === APPLYTYPE.SET_ALL) {
-        const cpuHandlers = [
-          Backend.handleCPUNum,
-          Backend.handleCPUBoost,
-          Backend.handleCPUGovernor,
-          Backend.handleEPP,
-          Backend.handleCpuMaxPerfPct,
-          Backend.handleSchedExtScheduler,
-          Backend.handleRyzenadjUndervolt,
-        ];
-        await Promise.all(cpuHandlers.map((handler) => handler()));
-
-        // GPU 相关设置处理
-        const gpuHandlers = [Backend.handleGPUMode, Backend.handleGPUSliderFix];
-        await Promise.all(gpuHandlers.map((handler) => handler()));
-
-        // TDP 相关设置处理
+        // CPU / GPU / TDP 设置交给后端按差异写入，未变化的项不会重复写硬件
+        const desired = await Backend.buildDesiredState();
+        const result = await applyState(desired);
+        Logger.info(
+          `applyState: changed=${JSON.stringify(result?.changed?.map((c) => c.key))} drifted=${JSON.stringify(result?.drifted)} failed=${JSON.stringify(result?.failed)} elapsed=${result?.elapsed_ms}ms`
+        );
+        if (desired.cpu_governor && desired.cpu_governor !== "performance") {
+          await Backend.data.refreshEPPModes();
+        }
+
+        await Backend.handleGPUSliderFix();
+
+        // TDP 范围只同步到 QAM
         await Backend.handleTDPRange();
-        await Backend.handleTDP();
 
         // 风扇控制设置处理
         await Backend.handleFanControl();
@@ -567,6 +590,143 @@ export class Backend {
     }
   }
 
+  // 构建 apply_state 的期望状态，与各 handle* 方法的逻辑保持一致
+  private static async buildDesiredState(): Promise<Record<string, any>> {
+    const desired: Record<string, any> = {};
+
+    // CPU 核心
+    desired.cpu_hotplug_interval = Settings.appCpuHotplugInterval();
+    if (Settings.appCoreSelectionEnabled()) {
+      const selection = Settings.appCpuCoreSelection();
+      if (selection.length > 0) {
+        desired.cpu_online_list = selection;
+      }
+    } else if (Settings.appCpuNum()) {
+      desired.smt = Settings.appSmt();
+      desired.cpu_num = Settings.appCpuNum();
+    }
+
+    const cpuBoost = Settings.appCpuboost();
+    if (cpuBoost !== undefined) {
+      desired.cpu_boost = cpuBoost;
+    }
+
+    const cpuGovernor = Settings.appCPUGovernor();
+    const eppMode = Settings.appEPPMode();
+    if (cpuGovernor) {
+      desired.cpu_governor = cpuGovernor;
+    }
+    if (eppMode && cpuGovernor !== "performance") {
+      desired.epp = eppMode;
+    }
+
+    const autoCPUMaxPct = Settings.appAutoCPUMaxPct();
+    desired.auto_cpumax_pct = autoCPUMaxPct;
+    if (!autoCPUMaxPct) {
+      desired.max_perf_pct = Settings.appCpuMaxPerfPct();
+    }
+
+    const schedExtScheduler = Settings.appSchedExtScheduler();
+    if (schedExtScheduler) {
+      desired.sched_ext = [schedExtScheduler, ""];
+    }
+
+    desired.ryzenadj_undervolt = [
+      Settings.appEnableRyzenadjUndervolt(),
+      Settings.appRyzenadjUndervoltValue(),
+    ];
+
+    Object.assign(desired, await Backend.buildDesiredGPUState());
+    Object.assign(desired, Backend.buildDesiredTDPState());
+    return desired;
+  }
+
+  // 自动频率的目标帧时间 [应用, 帧时间(ms), 余量比例]，目标帧率为 0 时关闭
+  private static gpuFrameTimeTarget(): [string, number, number] {
+    const targetFps = Settings.appGPUTargetFps();
+    return [
+      RunningApps.active(),
+      targetFps > 0 ? 1000 / targetFps : 0,
+      Settings.appGPUFrameTimeGuard() / 100,
+    ];
+  }
+
+  private static async buildDesiredGPUState(): Promise<Record<string, any>> {
+    const gpuMode = Settings.appGPUMode();
+
+    if (gpuMode !== Backend.lastGPUMode) {
+      if (Backend.lastGPUMode === GPUMODE.NOLIMIT) {
+        await startGpuNotify();
+      }
+      if (gpuMode === GPUMODE.NOLIMIT) {
+        await stopGpuNotify();
+      }
+      Backend.lastGPUMode = gpuMode as GPUMODE;
+    } else if (Backend.lastGPUMode === GPUMODE.NOLIMIT) {
+      return {};
+    }
+
+    switch (gpuMode) {
+      case GPUMODE.NOLIMIT:
+        return { gpu_auto: false, gpu_freq: 0 };
+      case GPUMODE.FIX:
+        return { gpu_auto: false, gpu_freq: Settings.appGPUFreq() };
+      case GPUMODE.NATIVE:
+        return {};
+      case GPUMODE.AUTO:
+        Settings.setTDPEnable(false);
+        Settings.setCpuboost(false);
+        return {
+          gpu_auto_freq_range: [
+            Settings.appGPUAutoMinFreq(),
+            Settings.appGPUAutoMaxFreq(),
+          ],
+          gpu_frametime_target: Backend.gpuFrameTimeTarget(),
+          gpu_auto: true,
+        };
+      case GPUMODE.RANGE:
+        return {
+          gpu_auto: false,
+          gpu_freq_range: [
+            Settings.appGPURangeMinFreq(),
+            Settings.appGPURangeMaxFreq(),
+          ],
+        };
+      default:
+        console.log(`出现意外的GPUmode = ${gpuMode}`);
+        return { gpu_freq: 0 };
+    }
+  }
+
+  private static buildDesiredTDPState(): Record<string, any> {
+    if (Settings.appEnableNativeTDPSlider()) {
+      return {};
+    }
+
+    const tdpEnable = Settings.appTDPEnable();
+    const lastTDPEnable = Backend.lastTDPEnable;
+    Backend.lastTDPEnable = tdpEnable;
+    QAMPatch.setTDPEanble(tdpEnable);
+
+    if (!tdpEnable) {
+      // 关闭时只解除一次限制，之后不再写入，避免和 Steam 等其它 TDP 工具冲突
+      return tdpEnable !== lastTDPEnable ? { tdp: null } : {};
+    }
+
+    const tdp = Settings.appTDP();
+    const systemTdpMin =
+      Backend.data.getTdpMin() !== 0 ? Backend.data.getTdpMin() : DEFAULT_TDP_MIN;
+    const systemTdpMax =
+      Backend.data.getTdpMax() !== 0 ? Backend.data.getTdpMax() : DEFAULT_TDP_MAX;
+    const _tdp = Settings.appEnableCustomTDPRange()
+      ? Math.min(
+          Settings.appCustomTDPRangeMax(),
+          Math.max(Settings.appCustomTDPRangeMin(), tdp)
+        )
+      : Math.min(systemTdpMax, Math.max(systemTdpMin, tdp));
+    return { tdp: _tdp };
+  }
+
   private static async handleCPUNum(): Promise<void> {
     if (Settings.appCoreSelectionEnabled()) {
       await Backend.handleCoreSelection();
@@ -576,6 +736,7 @@ export class Backend {
     const smt = Settings.appSmt();
     Logger.info(`handleCPUNum: cpuNum = ${cpuNum}, smt = ${smt}`);
     if (cpuNum) {
+      await setCpuHotplugInterval(Settings.appCpuHotplugInterval());
       await setSmt(smt);
       await setCpuOnline(cpuNum);
     }
@@ -585,6 +746,7 @@ export class Backend {
     const selection = Settings.appCpuCoreSelection();
     Logger.info(`handleCoreSelection: selection = ${JSON.stringify(selection)}`);
     if (selection.length > 0) {
+      await setCpuHotplugInterval(Settings.appCpuHotplugInterval());
       await setCpuOnlineList(selection);
     }
   }
@@ -678,6 +840,7 @@ export class Backend {
         Settings.setTDPEnable(false);
         Settings.setCpuboost(false);
         await setGpuAutoFreqRange(gpuAutoMinFreq, gpuAutoMaxFreq);
+        await setGpuFrameTimeTarget(...Backend.gpuFrameTimeTarget());
         await setGpuAuto(true);
         break;
       case GPUMODE.RANGE:
@@ -776,43 +939,33 @@ export class Backend {
     const fanProfileNames = Settings.appFanSettingNameList();
     Logger.info(`[FanDebug] handleFanControl: fanCount=${fanSettings.length}, profiles=${JSON.stringify(fanProfileNames)}`);
 
+    // 曲线由后端定时执行，这里只上传模式和曲线
     for (let index = 0; index < fanSettings.length; index++) {
       const fanSetting = Settings.appFanSettings()?.[index];
       if (!fanSetting) {
         Logger.info(`[FanDebug] fan[${index}] no config -> auto`);
-        await setFanAuto(index, true);
+        await setFanControl(index, FANMODE.AUTO, 0, [], []);
         continue;
       }
 
-      const fanMode = fanSetting.fanMode;
-      const fanRPMPercent = FanControl.fanInfo[index].setPoint.fanRPMpercent;
-      const fanWriteMode = Backend.data.getFanPwmMode(index);
-
+      const fanMode = fanSetting.fanMode ?? FANMODE.AUTO;
       switch (fanMode) {
         case FANMODE.FIX:
-        case FANMODE.CURVE:
-          if (fanWriteMode != FAN_PWM_MODE.MULTI_DIFF) {
-            if (!fanRPMPercent) {
-              Logger.info(`[FanDebug] fan[${index}] skip: rpmPercent falsy (${fanRPMPercent})`);
-              continue;
-            }
-            Logger.info(`[FanDebug] fan[${index}] ${fanMode} -> setPercent(${fanRPMPercent})`);
-            await setFanAuto(index, false);
-            await setFanPercent(index, fanRPMPercent);
-          } else {
-            const tempList = fanSetting?.curvePoints?.map((point) => point?.temperature ?? 0) ?? [];
-            const pwmList = fanSetting?.curvePoints?.map((point) => point?.fanRPMpercent ?? 0) ?? [];
-            Logger.info(`[FanDebug] fan[${index}] ${fanMode} MULTI_DIFF -> setCurve(${tempList.length} points)`);
-            await setFanCurve(index, tempList, pwmList);
-          }
+        case FANMODE.CURVE: {
+          const tempList = fanSetting?.curvePoints?.map((point) => point?.temperature ?? 0) ?? [];
+          const pwmList = fanSetting?.curvePoints?.map((point) => point?.fanRPMpercent ?? 0) ?? [];
+          const fixSpeed = fanSetting?.fixSpeed ?? 0;
+          Logger.info(`[FanDebug] fan[${index}] ${fanMode} -> setFanControl(fix=${fixSpeed}, ${tempList.length} points)`);
+          await setFanControl(index, fanMode, fixSpeed, tempList, pwmList);
           break;
+        }
         case FANMODE.AUTO:
           Logger.info(`[FanDebug] fan[${index}] auto`);
-          await setFanAuto(index, true);
+          await setFanControl(index, FANMODE.AUTO, 0, [], []);
           break;
         default:
           Logger.info(`[FanDebug] fan[${index}] unknown mode=${fanMode} -> auto`);
-          await setFanAuto(index, true);
+          await setFanControl(index, FANMODE.AUTO, 0, [], []);
       }
     }
   }
@@ -896,9 +1049,56 @@ export class Backend {
       [APPLYTYPE.SET_CPU_CORE_SELECTION, Backend.handleCoreSelection],
     ]);
 
+  public static async getFanStatus(): Promise<FanStatus[]> {
+    try {
+      return await getFanStatus();
+    } catch (error) {
+      console.error("get_fanStatus error", error);
+      return [];
+    }
+  }
+
+  // 一次获取全部状态数据，调用方可比较 seq 跳过未变化的渲染
+  public static async getTelemetrySnapshot(): Promise<TelemetrySnapshot | undefined> {
+    try {
+      return await getTelemetrySnapshot();
+    } catch (error) {
+      console.error("get_telemetry_snapshot error", error);
+      return undefined;
+    }
+  }
+
+  // 读取一个通道 since(Unix 秒) 之后的历史，resolution 为期望精度(秒)
+  public static async getHistory(
+    channel: string,
+    since: number,
+    resolution: number = 1
+  ): Promise<TelemetryHistory | undefined> {
+    try {
+      const payload = await getHistory(channel, since, resolution);
+      if (!payload?.data && payload?.count !== 0) {
+        return undefined;
+      }
+      const binary = atob(payload.data);
+      const bytes = new Uint8Array(binary.length);
+      for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+      }
+      return {
+        channel: payload.channel,
+        resolution: payload.resolution,
+        start: payload.start,
+        values: new Float32Array(bytes.buffer),
+      };
+    } catch (error) {
+      console.error("get_history error", error);
+      return undefined;
+    }
+  }
+
   public static resetFanSettings = () => {
     FanControl.fanInfo.forEach((_value, index) => {
-      setFanAuto(index, true);
+      setFanControl(index, FANMODE.AUTO, 0, [], []);
     });
   };
 
@@ -915,7 +1115,7 @@ export class Backend {
     setCpuTDPUnlimited();
     setGpuFreq(0);
     FanControl.fanInfo.forEach((_value, index) => {
-      setFanAuto(index, true);
+      setFanControl(index, FANMODE.AUTO, 0, [], []);
     });
   };
 
@@ -58,6 +58,7 @@ export enum ComponentName {
   CPU_SCHED_EXT = "CPU_SCHED_EXT",
   CPU_RYZENADJ_UNDERVOLT = "CPU_RYZENADJ_UNDERVOLT",
   CPU_CORE_SELECTION = "CPU_CORE_SELECTION",
+  CPU_HOTPLUG_INTERVAL = "CPU_HOTPLUG_INTERVAL",
   EPP_LEVEL_1 = "EPP_LEVEL_1",
   EPP_LEVEL_2 = "EPP_LEVEL_2",
   EPP_LEVEL_3 = "EPP_LEVEL_3",
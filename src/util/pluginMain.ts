@@ -2,20 +2,20 @@ import { Router } from "@decky/ui";
 import {
   APPLYTYPE,
   ComponentName,
-  FAN_PWM_MODE,
   FANMODE,
   Patch,
   PluginState,
   UpdateType,
 } from "./enum";
 import { Backend } from "./backend";
-import { receiveSuspendEvent } from "./backend";
+import { receiveSuspendEvent, setProfileApp } from "./backend";
 import { localizationManager } from "../i18n";
 import { Settings } from "./settings";
 import { EACState, AppOverviewExt, BatteryStateChange } from "./steamClient";
-import { calPointInLine, FanPosition } from "./position";
+import { FanPosition } from "./position";
+import { FanStatus } from "../types";
 import { QAMPatch } from "./patch";
-import { addEventListener } from "@decky/api";
+import { addEventListener, removeEventListener } from "@decky/api";
 import { Logger } from "./logger";
 import { Timeout } from "./timeout";
 import { SteamUtils } from ".";
@@ -103,15 +103,13 @@ export class ACStateManager {
 }
 
 export class FanControl {
-  private static intervalId: any;
+  private static statusListener: ((status: FanStatus[]) => void) | undefined;
   public static fanIsEnable: boolean = false;
   public static fanInfo: {
     nowPoint: FanPosition;
     setPoint: FanPosition;
-    lastSetPoint: FanPosition;
     fanMode: FANMODE;
     fanRPM: number;
-    bFanNotSet: Boolean;
   }[] = [];
 
   static async register() {
@@ -123,172 +121,39 @@ export class FanControl {
       this.fanInfo[index] = {
         nowPoint: new FanPosition(0, 0),
         setPoint: new FanPosition(0, 0),
-        lastSetPoint: new FanPosition(0, 0),
         fanMode: FANMODE.AUTO,
         fanRPM: 0,
-        bFanNotSet: false,
       };
     }
-    if (this.intervalId == undefined)
-      this.intervalId = setInterval(() => this.updateFan(), 1000);
+    // 风扇曲线由后端执行，这里只接收后端推送的状态用于显示
+    if (this.statusListener == undefined) {
+      this.statusListener = addEventListener<[FanStatus[]]>(
+        "fan_status",
+        (status: FanStatus[]) => FanControl.updateFanInfo(status)
+      );
+    }
+    FanControl.updateFanInfo(await Backend.getFanStatus());
     this.fanIsEnable = true;
   }
 
-  static async updateFan() {
-    //FanControl.updateFanMode();
-    FanControl.updateFanInfo();
-  }
-
-  /*
-  static async updateFanMode(){
-    var settings = Settings.appFanSettings()
-    for(var index=0;index<=settings.length;index++){
-      var fanSetting = Settings.appFanSettings()?.[index];
-      console.log("index = ",index,"fanSetiing = ",fanSetting)
-      if(!fanSetting){
-        //未设置
-        if(!FanControl.fanInfo[index].bFanNotSet){
-          FanControl.fanInfo[index].bFanNotSet = true;
-          Backend.applySettings(APPLYTYPE.SET_FANMODE);
-        }
-      }else{
-        const fanMode = fanSetting?.fanMode;
-        if(FanControl.fanInfo[index].fanMode==undefined||FanControl.fanInfo[index].fanMode!=fanMode)
-        {
-          FanControl.fanInfo[index].fanMode = fanMode!!;
-          Backend.applySettings(APPLYTYPE.SET_FANMODE);
-        }
+  static updateFanInfo(statusList: FanStatus[]) {
+    statusList?.forEach((status) => {
+      const info = FanControl.fanInfo[status.index];
+      if (!info) {
+        return;
       }
-      
-    }
-  }*/
-
-  static async updateFanInfo() {
-    Backend.data.getFanConfigs()?.forEach(async (_config, index) => {
-      await Backend.data.getFanRPM(index).then((value) => {
-        FanControl.fanInfo[index].fanRPM = value;
-        const maxRPM = Backend.data.getFanMAXPRM(index);
-        FanControl.fanInfo[index].nowPoint.fanRPMpercent =
-          maxRPM > 0 ? (value / maxRPM) * 100 : 0;
-      });
-    });
-    Settings.appFanSettings()?.forEach(async (fanSetting, index) => {
-      await Backend.data.getFanTemp(index).then((value) => {
-        FanControl.fanInfo[index].nowPoint.temperature = value;
-      });
-      const fanMode = fanSetting?.fanMode;
-      switch (fanMode) {
-        case FANMODE.AUTO: {
-          FanControl.fanInfo[index].setPoint.fanRPMpercent = 0;
-          FanControl.fanInfo[index].setPoint.temperature = -10;
-          break;
-        }
-        case FANMODE.FIX: {
-          var fixSpeed = fanSetting?.fixSpeed;
-          FanControl.fanInfo[index].setPoint.temperature =
-            FanControl.fanInfo[index].nowPoint.temperature;
-          FanControl.fanInfo[index].setPoint.fanRPMpercent = fixSpeed;
-          break;
-        }
-        case FANMODE.CURVE: {
-          var curvePoints = fanSetting?.curvePoints!!.sort(
-            (a: FanPosition, b: FanPosition) => {
-              return a.temperature == b.temperature
-                ? a.fanRPMpercent!! - b.fanRPMpercent!!
-                : a.temperature!! - b.temperature!!;
-            }
-          );
-          //每俩点判断是否在这俩点之间
-          var lineStart = new FanPosition(
-            FanPosition.tempMin,
-            FanPosition.fanMin
-          );
-          if (curvePoints?.length!! > 0) {
-            //初始点到第一个点
-            var lineEnd = curvePoints!![0];
-            if (
-              FanControl.fanInfo[index].nowPoint.temperature!! >
-              lineStart.temperature!! &&
-              FanControl.fanInfo[index].nowPoint.temperature!! <=
-              lineEnd.temperature!!
-            ) {
-              FanControl.fanInfo[index].setPoint = calPointInLine(
-                lineStart,
-                lineEnd,
-                FanControl.fanInfo[index].nowPoint.temperature!!
-              )!!;
-            }
-
-            curvePoints?.forEach((value, pointIndex) => {
-              if (pointIndex > curvePoints?.length!! - 1) return;
-              lineStart = value;
-              lineEnd =
-                pointIndex == curvePoints?.length!! - 1
-                  ? new FanPosition(FanPosition.tempMax, FanPosition.fanMax)
-                  : curvePoints!![pointIndex + 1];
-              if (
-                FanControl.fanInfo[index].nowPoint.temperature!! >
-                lineStart.temperature!! &&
-                FanControl.fanInfo[index].nowPoint.temperature!! <=
-                lineEnd.temperature!!
-              ) {
-                FanControl.fanInfo[index].setPoint = calPointInLine(
-                  lineStart,
-                  lineEnd,
-                  FanControl.fanInfo[index].nowPoint.temperature!!
-                )!!;
-                return;
-              }
-            });
-          } else {
-            var lineEnd = new FanPosition(
-              FanPosition.tempMax,
-              FanPosition.fanMax
-            );
-            if (
-              FanControl.fanInfo[index].nowPoint.temperature!! >
-              lineStart.temperature!! &&
-              FanControl.fanInfo[index].nowPoint.temperature!! <=
-              lineEnd.temperature!!
-            ) {
-              FanControl.fanInfo[index].setPoint = calPointInLine(
-                lineStart,
-                lineEnd,
-                FanControl.fanInfo[index].nowPoint.temperature!!
-              )!!;
-              break;
-            }
-          }
-
-          break;
-        }
+      info.fanRPM = status.rpm;
+      info.fanMode = status.mode as FANMODE;
+      info.nowPoint.fanRPMpercent = status.rpm_percent;
+      info.nowPoint.temperature = status.temperature;
+      if (status.mode == FANMODE.AUTO || status.output_percent == null) {
+        info.setPoint.fanRPMpercent = 0;
+        info.setPoint.temperature = -10;
+      } else {
+        info.setPoint.fanRPMpercent = status.output_percent;
+        info.setPoint.temperature = status.effective_temp ?? status.temperature;
       }
     });
-    const fanSettings = Settings.appFanSettings();
-    for (var index = 0; index < fanSettings.length; index++) {
-      const fanPwmMode = Backend.data.getFanPwmMode(index);
-      if (fanPwmMode == FAN_PWM_MODE.MULTI_DIFF) {
-        // MULTI_DIFF skips periodic RPM polling - only event-driven updates
-        continue;
-      }
-      if (!fanSettings?.[index]) {
-        FanControl.fanInfo[index].setPoint.temperature = 0;
-        FanControl.fanInfo[index].setPoint.fanRPMpercent = -10;
-      }
-      //转速变化超过3%才进行设置
-      if (
-        Math.abs(
-          (FanControl.fanInfo[index].lastSetPoint.fanRPMpercent ?? 0) -
-          (FanControl.fanInfo[index].setPoint.fanRPMpercent ?? 0)
-        ) >= 3
-      ) {
-        FanControl.fanInfo[index].lastSetPoint.fanRPMpercent =
-          FanControl.fanInfo[index].setPoint.fanRPMpercent;
-        FanControl.fanInfo[index].lastSetPoint.temperature =
-          FanControl.fanInfo[index].setPoint.temperature;
-        Backend.applySettings(APPLYTYPE.SET_FANRPM);
-      }
-    }
   }
 
   static enableFan() {
@@ -303,7 +168,10 @@ export class FanControl {
 
   static unregister() {
     Backend.resetFanSettings();
-    if (this.intervalId != undefined) clearInterval(this.intervalId);
+    if (this.statusListener != undefined) {
+      removeEventListener("fan_status", this.statusListener);
+      this.statusListener = undefined;
+    }
   }
 }
 
@@ -380,12 +248,19 @@ export class PluginManager {
       // 注册应用切换监听
       RunningApps.listenActiveChange((newAppId, oldAppId) => {
         Logger.info(`[FanDebug] App changed: new=${newAppId} old=${oldAppId}`);
+        // 按应用学习运行参数
+        setProfileApp(newAppId).catch((e) => {
+          Logger.error(`Error while switching profile app: ${e.message}`);
+        });
         if (Settings.ensureEnable()) {
           Backend.applySettings(APPLYTYPE.SET_ALL).catch((e) => {
             Logger.error(`Error while applying settings: ${e.message}`);
           });
         }
       });
+      setProfileApp(RunningApps.active()).catch((e) => {
+        Logger.error(`Error while switching profile app: ${e.message}`);
+      });
       Logger.info("App change listener registered");
 
       try {
@@ -42,6 +42,10 @@ export class AppSetting {
   @JsonProperty()
   gpuAutoMinFreq?: number;
   @JsonProperty()
+  gpuTargetFps?: number;
+  @JsonProperty()
+  gpuFrameTimeGuard?: number;
+  @JsonProperty()
   gpuRangeMaxFreq?: number;
   @JsonProperty()
   gpuRangeMinFreq?: number;
@@ -73,6 +77,8 @@ export class AppSetting {
   coreSelectionEnabled?: boolean;
   @JsonProperty()
   cpuCoreSelection?: number[];
+  @JsonProperty()
+  cpuHotplugInterval?: number; // 两次CPU上线/下线之间的间隔(毫秒)，0为不限速
 
   constructor() {
     this.smt = true;
@@ -93,6 +99,8 @@ export class AppSetting {
     this.gpuAutoMinFreq = Backend.data?.hasGpuMin()
       ? Backend.data.getGpuMin()
       : 200;
+    this.gpuTargetFps = 0; // 0 表示按占用率调节
+    this.gpuFrameTimeGuard = 10;
     this.gpuRangeMaxFreq = Backend.data?.hasGpuMax()
       ? Backend.data.getGpuMax()
       : 1600;
@@ -112,6 +120,7 @@ export class AppSetting {
     this.fanControlEnabled = false;
     this.coreSelectionEnabled = false;
     this.cpuCoreSelection = [];
+    this.cpuHotplugInterval = 0;
   }
   deepCopy(copyTarget: AppSetting) {
     // this.overwrite=copyTarget.overwrite;
@@ -125,6 +134,8 @@ export class AppSetting {
     this.gpuSliderFix = copyTarget.gpuSliderFix;
     this.gpuAutoMaxFreq = copyTarget.gpuAutoMaxFreq;
     this.gpuAutoMinFreq = copyTarget.gpuAutoMinFreq;
+    this.gpuTargetFps = copyTarget.gpuTargetFps;
+    this.gpuFrameTimeGuard = copyTarget.gpuFrameTimeGuard;
     this.gpuRangeMaxFreq = copyTarget.gpuRangeMaxFreq;
     this.gpuRangeMinFreq = copyTarget.gpuAutoMinFreq;
     this.fanProfileNameList = copyTarget.fanProfileNameList?.slice();
@@ -144,6 +155,7 @@ export class AppSetting {
     this.cpuCoreSelection = copyTarget.cpuCoreSelection
       ? [...copyTarget.cpuCoreSelection]
       : [];
+    this.cpuHotplugInterval = copyTarget.cpuHotplugInterval;
   }
 }
 
@@ -906,6 +918,40 @@ export class Settings {
     }
   }
 
+  static appGPUTargetFps() {
+    return Settings.ensureApp().gpuTargetFps ?? 0;
+  }
+
+  //写入自动gpu目标帧率
+  static setGPUTargetFps(gpuTargetFps: number) {
+    if (Settings.ensureApp().gpuTargetFps != gpuTargetFps) {
+      Settings.ensureApp().gpuTargetFps = gpuTargetFps;
+      Settings.saveSettings();
+      Backend.applySettings(APPLYTYPE.SET_GPUMODE);
+      PluginManager.updateComponent(
+        ComponentName.GPU_FREQAUTO,
+        UpdateType.UPDATE
+      );
+    }
+  }
+
+  static appGPUFrameTimeGuard() {
+    return Settings.ensureApp().gpuFrameTimeGuard ?? 10;
+  }
+
+  //写入自动gpu帧时间余量
+  static setGPUFrameTimeGuard(gpuFrameTimeGuard: number) {
+    if (Settings.ensureApp().gpuFrameTimeGuard != gpuFrameTimeGuard) {
+      Settings.ensureApp().gpuFrameTimeGuard = gpuFrameTimeGuard;
+      Settings.saveSettings();
+      Backend.applySettings(APPLYTYPE.SET_GPUMODE);
+      PluginManager.updateComponent(
+        ComponentName.GPU_FREQAUTO,
+        UpdateType.UPDATE
+      );
+    }
+  }
+
   static appGPURangeMaxFreq() {
     return Settings.ensureApp().gpuRangeMaxFreq!!;
   }
@@ -1080,6 +1126,8 @@ export class Settings {
         );
         delete this._instance.data.fanSettings[fanProfileName];
       }
+      // 曲线由后端执行，修改后需要重新上传
+      Backend.applySettings(APPLYTYPE.SET_FAN_ALL);
       return true;
     } else {
       return false;
@@ -1123,6 +1171,7 @@ export class Settings {
         }
       );
       Settings.saveSettings();
+      Backend.applySettings(APPLYTYPE.SET_FAN_ALL);
     }
   }
 
@@ -1443,4 +1492,21 @@ export class Settings {
       UpdateType.UPDATE
     );
   }
+
+  public static appCpuHotplugInterval(): number {
+    return this.ensureApp().cpuHotplugInterval ?? 0;
+  }
+
+  public static setCpuHotplugInterval(interval: number) {
+    const app = this.ensureApp();
+    if (app.cpuHotplugInterval !== interval) {
+      app.cpuHotplugInterval = interval;
+      this.saveSettings();
+      Backend.applySettings(APPLYTYPE.SET_CPUCORE);
+      PluginManager.updateComponent(
+        ComponentName.CPU_HOTPLUG_INTERVAL,
+        UpdateType.UPDATE
+      );
+    }
+  }
 }
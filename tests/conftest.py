@@ -0,0 +1,51 @@
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import types
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PY_MODULES = os.path.join(REPO_ROOT, "py_modules")
+
+# decky 模块由 Decky Loader 在运行时提供，测试时使用最小的替代
+if "decky" not in sys.modules:
+    _runtime = tempfile.mkdtemp(prefix="powercontrol-test-")
+    decky = types.ModuleType("decky")
+    decky.DECKY_PLUGIN_DIR = REPO_ROOT
+    decky.DECKY_PLUGIN_SETTINGS_DIR = _runtime
+    decky.DECKY_PLUGIN_RUNTIME_DIR = _runtime
+    decky.DECKY_PLUGIN_LOG_DIR = _runtime
+    decky.DECKY_USER = "root"
+    decky.DECKY_USER_HOME = _runtime
+    decky.HOME = _runtime
+    decky.USER = "root"
+    sys.modules["decky"] = decky
+
+if PY_MODULES not in sys.path:
+    sys.path.insert(0, PY_MODULES)
+
+
+def load_module(name: str, relpath: str):
+    """按文件路径加载 py_modules 下的模块
+
+    utils 包的 __init__ 会导入依赖 DMI 信息的模块，单独加载被测文件，
+    测试不依赖运行的机器。
+    """
+    spec = importlib.util.spec_from_file_location(name, os.path.join(PY_MODULES, relpath))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def tmpfs_dir(tmp_path):
+    """优先在 /dev/shm (tmpfs) 中创建目录，与 sysfs 一样不经过块设备"""
+    if os.access("/dev/shm", os.W_OK):
+        path = tempfile.mkdtemp(prefix="powercontrol-sysfs-", dir="/dev/shm")
+        yield path
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        yield str(tmp_path)
@@ -0,0 +1,239 @@
+"""DBusConnection 与本地 dbus-daemon 上的 PowerStation 替身通信
+
+替身服务同样基于 DBusConnection，收到的方法调用在读取线程中应答，
+覆盖 SASL EXTERNAL 认证、Hello、消息编解码(基本类型、数组、字典、variant)、
+批量调用、错误应答和信号订阅。
+"""
+
+import shutil
+import subprocess
+import threading
+
+import pytest
+
+from dbus_client import (
+    BUS_NAME,
+    BUS_PATH,
+    ERROR,
+    FIELD_DESTINATION,
+    FIELD_ERROR_NAME,
+    FIELD_INTERFACE,
+    FIELD_MEMBER,
+    FIELD_PATH,
+    FIELD_REPLY_SERIAL,
+    FIELD_SIGNATURE,
+    FLAG_NO_REPLY_EXPECTED,
+    METHOD_CALL,
+    METHOD_RETURN,
+    PROPERTIES_INTERFACE,
+    SIGNAL,
+    DBusConnection,
+    DBusError,
+    Message,
+    Variant,
+    method_call,
+)
+
+SERVICE_NAME = "org.shadowblip.PowerStation"
+GPU_PATH = "/org/shadowblip/Performance/GPU"
+CARD_PATH = f"{GPU_PATH}/card1"
+GPU_INTERFACE = "org.shadowblip.GPU"
+TDP_INTERFACE = "org.shadowblip.GPU.Card.TDP"
+UNKNOWN_METHOD = "org.freedesktop.DBus.Error.UnknownMethod"
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("dbus-daemon") is None, reason="dbus-daemon not installed"
+)
+
+
+class PowerStationStub(DBusConnection):
+    """在总线上注册 org.shadowblip.PowerStation，提供一块显卡的 TDP 属性"""
+
+    def __init__(self, address: str):
+        super().__init__(address)
+        self.props = {"MinTdp": 5.0, "MaxTdp": 30.0, "MaxBoost": 2.0, "TDP": 15.0, "Boost": 0.0}
+        self.calls = []
+        self.callsLock = threading.Lock()
+
+    def _reply(self, call: Message, type_: int, fields: dict, signature: str = "", body=()):
+        fields = {FIELD_REPLY_SERIAL: call.serial, FIELD_DESTINATION: call.sender, **fields}
+        if signature:
+            fields[FIELD_SIGNATURE] = signature
+        self._send([Message(type_, fields, body, flags=FLAG_NO_REPLY_EXPECTED)])
+
+    def _dispatch(self, msg: Message):
+        if msg.type != METHOD_CALL:
+            return super()._dispatch(msg)
+        with self.callsLock:
+            self.calls.append((msg.path, msg.interface, msg.member, msg.body))
+        if msg.member == "EnumerateCards" and msg.interface == GPU_INTERFACE:
+            self._reply(msg, METHOD_RETURN, {}, "ao", ([CARD_PATH, f"{GPU_PATH}/card0"],))
+        elif msg.member == "Get" and msg.path == CARD_PATH:
+            _, name = msg.body
+            self._reply(msg, METHOD_RETURN, {}, "v", (Variant("d", self.props[name]),))
+        elif msg.member == "GetAll" and msg.path == CARD_PATH:
+            values = {name: Variant("d", value) for name, value in self.props.items()}
+            self._reply(msg, METHOD_RETURN, {}, "a{sv}", (values,))
+        elif msg.member == "Set" and msg.path == CARD_PATH:
+            _, name, value = msg.body
+            self.props[name] = value
+            self._reply(msg, METHOD_RETURN, {})
+        else:
+            self._reply(
+                msg, ERROR, {FIELD_ERROR_NAME: UNKNOWN_METHOD}, "s", (f"no method {msg.member}",)
+            )
+
+    def emit_changed(self, changed: dict):
+        self.props.update(changed)
+        fields = {
+            FIELD_PATH: CARD_PATH,
+            FIELD_INTERFACE: PROPERTIES_INTERFACE,
+            FIELD_MEMBER: "PropertiesChanged",
+            FIELD_SIGNATURE: "sa{sv}as",
+        }
+        body = (TDP_INTERFACE, {k: Variant("d", v) for k, v in changed.items()}, [])
+        self._send([Message(SIGNAL, fields, body, flags=FLAG_NO_REPLY_EXPECTED)])
+
+
+@pytest.fixture(scope="module")
+def bus_address():
+    daemon = subprocess.Popen(
+        ["dbus-daemon", "--session", "--print-address", "--nofork"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    address = daemon.stdout.readline().strip()
+    if not address:
+        daemon.kill()
+        pytest.skip("dbus-daemon did not start")
+    yield address
+    daemon.terminate()
+    daemon.wait(5)
+
+
+@pytest.fixture
+def service(bus_address):
+    stub = PowerStationStub(bus_address)
+    stub.connect()
+    # DBUS_NAME_FLAG_DO_NOT_QUEUE
+    assert stub.call(BUS_NAME, BUS_PATH, BUS_NAME, "RequestName", "su", (SERVICE_NAME, 4)) == (1,)
+    yield stub
+    stub.close()
+
+
+@pytest.fixture
+def client(bus_address):
+    bus = DBusConnection(bus_address)
+    yield bus
+    bus.close()
+
+
+def test_auth_and_hello(client):
+    client.connect()
+    assert client.connected
+    assert client.unique_name.startswith(":")
+
+
+def test_name_has_owner(client, service):
+    assert client.name_has_owner(SERVICE_NAME)
+    assert not client.name_has_owner("org.example.Missing")
+
+
+def test_object_path_array(client, service):
+    (cards,) = client.call(SERVICE_NAME, GPU_PATH, GPU_INTERFACE, "EnumerateCards")
+    assert cards == [CARD_PATH, f"{GPU_PATH}/card0"]
+
+
+def test_get_property_variant(client, service):
+    assert client.get_property(SERVICE_NAME, CARD_PATH, TDP_INTERFACE, "MaxTdp") == 30.0
+
+
+def test_get_all_properties_dict(client, service):
+    props = client.get_all_properties(SERVICE_NAME, CARD_PATH, TDP_INTERFACE)
+    assert props == service.props
+
+
+def test_set_property(client, service):
+    client.set_property(SERVICE_NAME, CARD_PATH, TDP_INTERFACE, "TDP", Variant("d", 12.5))
+    assert service.props["TDP"] == 12.5
+    assert service.calls[-1] == (CARD_PATH, PROPERTIES_INTERFACE, "Set", (TDP_INTERFACE, "TDP", 12.5))
+
+
+def test_call_many_pipelines_set(client, service):
+    messages = [
+        client.set_property_message(SERVICE_NAME, CARD_PATH, TDP_INTERFACE, "TDP", Variant("d", 18.0)),
+        client.set_property_message(SERVICE_NAME, CARD_PATH, TDP_INTERFACE, "Boost", Variant("d", 2.0)),
+    ]
+    assert client.call_many(messages) == [(), ()]
+    assert (service.props["TDP"], service.props["Boost"]) == (18.0, 2.0)
+
+
+def test_error_reply(client, service):
+    with pytest.raises(DBusError) as info:
+        client.call(SERVICE_NAME, CARD_PATH, TDP_INTERFACE, "Missing")
+    assert info.value.name == UNKNOWN_METHOD
+
+
+def test_call_many_waits_for_all_replies(client, service):
+    messages = [
+        method_call(SERVICE_NAME, CARD_PATH, TDP_INTERFACE, "Missing"),
+        client.set_property_message(SERVICE_NAME, CARD_PATH, TDP_INTERFACE, "TDP", Variant("d", 9.0)),
+    ]
+    with pytest.raises(DBusError):
+        client.call_many(messages)
+    # 第一个调用失败时第二个调用仍然完成
+    assert service.props["TDP"] == 9.0
+    assert client.get_property(SERVICE_NAME, CARD_PATH, TDP_INTERFACE, "TDP") == 9.0
+
+
+def test_properties_changed_signal(client, service):
+    received = []
+    event = threading.Event()
+
+    def on_changed(msg: Message):
+        received.append(msg.body)
+        event.set()
+
+    client.add_match(
+        on_changed,
+        interface=PROPERTIES_INTERFACE,
+        member="PropertiesChanged",
+        path_namespace=GPU_PATH,
+    )
+    client.connect()
+    service.emit_changed({"MaxTdp": 25.0})
+    assert event.wait(5)
+    assert received == [(TDP_INTERFACE, {"MaxTdp": 25.0}, [])]
+
+
+def test_name_owner_changed_signal(client, bus_address):
+    event = threading.Event()
+    owners = []
+
+    def on_owner(msg: Message):
+        owners.append(msg.body)
+        event.set()
+
+    client.add_match(on_owner, interface=BUS_NAME, member="NameOwnerChanged", arg0=SERVICE_NAME)
+    client.connect()
+    stub = PowerStationStub(bus_address)
+    stub.connect()
+    stub.call(BUS_NAME, BUS_PATH, BUS_NAME, "RequestName", "su", (SERVICE_NAME, 4))
+    assert event.wait(5)
+    name, old, new = owners[0]
+    assert (name, old, new) == (SERVICE_NAME, "", stub.unique_name)
+
+    event.clear()
+    stub.close()
+    assert event.wait(5)
+    assert owners[-1] == (SERVICE_NAME, stub.unique_name, "")
+
+
+def test_reconnect_after_close(client, service):
+    client.connect()
+    first = client.unique_name
+    client.close()
+    assert not client.connected
+    assert client.get_property(SERVICE_NAME, CARD_PATH, TDP_INTERFACE, "MinTdp") == 5.0
+    assert client.unique_name != first
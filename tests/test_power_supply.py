@@ -0,0 +1,165 @@
+"""PowerSupplyMonitor 通过 socketpair 接收合成的 uevent
+
+sock_factory 返回 socketpair 的一端，测试从另一端写入内核格式的消息，
+消息经 reactor 线程送达监听器。电池和电源适配器的 sysfs 属性来自临时目录。
+"""
+
+import os
+import queue
+import socket
+
+import pytest
+
+import power_supply
+from power_supply import PowerSupplyMonitor
+
+TIMEOUT = 2  # 等待推送的时间(秒)
+QUIET = 0.2  # 确认没有推送时等待的时间(秒)
+
+
+def write_attrs(root, device, **attrs):
+    path = os.path.join(root, device)
+    os.makedirs(path, exist_ok=True)
+    for name, value in attrs.items():
+        with open(os.path.join(path, name), "w") as f:
+            f.write(f"{value}\n")
+
+
+def uevent(action, device, subsystem="power_supply", prefix=b"", **props):
+    """内核 uevent 消息 "action@devpath\\0KEY=VALUE\\0..." """
+    devpath = f"/devices/platform/ACPI0003:00/power_supply/{device}"
+    fields = {
+        "ACTION": action,
+        "DEVPATH": devpath,
+        "SUBSYSTEM": subsystem,
+        "POWER_SUPPLY_NAME": device,
+        **{f"POWER_SUPPLY_{key.upper()}": value for key, value in props.items()},
+    }
+    body = b"".join(f"{key}={value}\0".encode() for key, value in fields.items())
+    return prefix + f"{action}@{devpath}\0".encode() + body
+
+
+@pytest.fixture
+def sysfs_root(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    write_attrs(root, "AC", type="Mains", online=0)
+    write_attrs(root, "BAT0", type="Battery", capacity=50, status="Discharging")
+    monkeypatch.setattr(power_supply, "POWER_SUPPLY_PATH", root)
+    return root
+
+
+@pytest.fixture
+def channel():
+    """(监听端, 发送端)，监听端由 sock_factory 交给 UeventListener"""
+    listen, send = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    yield listen, send
+    listen.close()
+    send.close()
+
+
+@pytest.fixture
+def monitor(sysfs_root, channel):
+    monitor = PowerSupplyMonitor(sock_factory=lambda: channel[0])
+    pushes = queue.Queue()
+    monitor.subscribe(pushes.put)
+    yield monitor, pushes
+    monitor.unsubscribe(pushes.put)
+
+
+def expect_push(pushes):
+    return pushes.get(timeout=TIMEOUT)
+
+
+def expect_no_push(pushes):
+    with pytest.raises(queue.Empty):
+        pushes.get(timeout=QUIET)
+
+
+def test_subscribe_pushes_current_state(monitor):
+    monitor, pushes = monitor
+    assert expect_push(pushes) == {
+        "capacity": 50,
+        "status": "Discharging",
+        "charging": False,
+        "ac_online": False,
+    }
+
+
+def test_pushes_only_changes(monitor, channel, sysfs_root):
+    monitor, pushes = monitor
+    send = channel[1]
+    expect_push(pushes)
+
+    write_attrs(sysfs_root, "BAT0", capacity=49)
+    send.send(uevent("change", "BAT0", capacity=49, status="Discharging"))
+    assert expect_push(pushes)["capacity"] == 49
+
+    # 状态相同的事件不推送
+    send.send(uevent("change", "BAT0", capacity=49, status="Discharging"))
+    expect_no_push(pushes)
+
+    # 其他设备的事件从 sysfs 读取电池状态
+    write_attrs(sysfs_root, "AC", online=1)
+    send.send(uevent("change", "AC", online=1))
+    state = expect_push(pushes)
+    assert state["ac_online"] is True
+    assert state["capacity"] == 49
+
+
+def test_drops_udev_and_other_subsystems(monitor, channel):
+    monitor, pushes = monitor
+    send = channel[1]
+    expect_push(pushes)
+
+    send.send(uevent("change", "BAT0", prefix=b"libudev\0", capacity=10))
+    send.send(uevent("change", "BAT0", subsystem="usb", capacity=20))
+    expect_no_push(pushes)
+
+    # 之后的内核消息照常处理
+    send.send(uevent("change", "BAT0", capacity=30, status="Discharging"))
+    assert expect_push(pushes)["capacity"] == 30
+
+
+def test_add_and_remove_rescan_devices(monitor, channel, sysfs_root):
+    monitor, pushes = monitor
+    send = channel[1]
+    expect_push(pushes)
+
+    # 换上另一块电池，change 事件不会重新查找设备
+    os.rename(os.path.join(sysfs_root, "BAT0"), os.path.join(sysfs_root, "BAT1"))
+    write_attrs(sysfs_root, "BAT1", capacity=80, status="Charging")
+    send.send(uevent("change", "BAT1", capacity=80, status="Charging"))
+    state = expect_push(pushes)
+    assert state["capacity"] == -1
+
+    send.send(uevent("add", "BAT1"))
+    state = expect_push(pushes)
+    assert state["capacity"] == 80
+    assert state["charging"] is True
+
+    # 移除电池后重新查找，没有电池时电量未知
+    write_attrs(sysfs_root, "BAT1", type="Unknown")
+    send.send(uevent("remove", "BAT1"))
+    state = expect_push(pushes)
+    assert state["capacity"] == -1
+    assert state["status"] == ""
+
+
+def test_unsubscribe_stops_listener(sysfs_root, channel):
+    listen, send = channel
+    monitor = PowerSupplyMonitor(sock_factory=lambda: listen)
+    pushes = queue.Queue()
+    monitor.subscribe(pushes.put)
+    expect_push(pushes)
+    assert monitor._listener.active
+
+    monitor.unsubscribe(pushes.put)
+    assert not monitor._listener.active
+    assert monitor._timer is None
+    assert monitor.get_state() is None
+    assert listen.fileno() == -1
+
+    # 对端已关闭，消息无法再送达
+    with pytest.raises(OSError):
+        send.send(uevent("change", "BAT0", capacity=10))
+    expect_no_push(pushes)
@@ -0,0 +1,200 @@
+"""SysfsNode 在 tmpfs 中的假 sysfs 树上的行为和系统调用次数"""
+
+import errno
+import os
+
+import pytest
+
+from conftest import load_module
+
+sysfs = load_module("sysfs_under_test", "utils/sysfs.py")
+
+ITERATIONS = 100
+
+
+class SyscallCounter:
+    """统计 os.open / os.pread / os.pwrite / os.close 的调用次数"""
+
+    NAMES = ("open", "pread", "pwrite", "close")
+
+    def __init__(self, monkeypatch):
+        self.counts = dict.fromkeys(self.NAMES, 0)
+        for name in self.NAMES:
+            monkeypatch.setattr(sysfs.os, name, self._wrap(name, getattr(os, name)))
+
+    def _wrap(self, name, func):
+        def counted(*args, **kwargs):
+            self.counts[name] += 1
+            return func(*args, **kwargs)
+
+        return counted
+
+
+@pytest.fixture
+def fake_sysfs(tmpfs_dir):
+    """hwmon 风扇和 CPU 热插拔节点"""
+    tree = {
+        "class/hwmon/hwmon3/name": "oxpec\n",
+        "class/hwmon/hwmon3/pwm1": "128\n",
+        "class/hwmon/hwmon3/pwm1_enable": "0\n",
+        "class/hwmon/hwmon3/fan1_input": "2400\n",
+        "devices/system/cpu/cpu1/online": "1\n",
+    }
+    for relpath, content in tree.items():
+        path = os.path.join(tmpfs_dir, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+    yield tmpfs_dir
+    sysfs.close_sysfs_nodes()
+
+
+def node_path(root, relpath):
+    return os.path.join(root, relpath)
+
+
+def test_read_keeps_fd_open(fake_sysfs, monkeypatch):
+    path = node_path(fake_sysfs, "class/hwmon/hwmon3/fan1_input")
+    counter = SyscallCounter(monkeypatch)
+    for _ in range(ITERATIONS):
+        assert sysfs.sysfs_read_int(path) == 2400
+    # 原来每次读取是 open + read + close，现在只打开一次
+    assert counter.counts == {"open": 1, "pread": ITERATIONS, "pwrite": 0, "close": 0}
+
+
+def test_read_sees_new_values(fake_sysfs):
+    path = node_path(fake_sysfs, "class/hwmon/hwmon3/fan1_input")
+    assert sysfs.sysfs_read_int(path) == 2400
+    with open(path, "w") as f:
+        f.write("3100\n")
+    assert sysfs.sysfs_read_int(path) == 3100
+
+
+def test_unchanged_write_is_skipped(fake_sysfs, monkeypatch):
+    path = node_path(fake_sysfs, "class/hwmon/hwmon3/pwm1")
+    counter = SyscallCounter(monkeypatch)
+    results = [sysfs.sysfs_write(path, 200) for _ in range(ITERATIONS)]
+    assert results == [True] + [False] * (ITERATIONS - 1)
+    assert counter.counts["open"] == 1
+    assert counter.counts["pwrite"] == 1
+    # 普通文件上 pwrite 不截断，只比较写入的部分
+    with open(path) as f:
+        assert f.read().strip() == "200"
+
+
+def test_changed_write_goes_through(fake_sysfs, monkeypatch):
+    path = node_path(fake_sysfs, "class/hwmon/hwmon3/pwm1")
+    counter = SyscallCounter(monkeypatch)
+    for value in (100, 150, 150, 100):
+        sysfs.sysfs_write(path, value)
+    assert counter.counts["pwrite"] == 3
+    assert counter.counts["open"] == 1
+
+
+def test_force_write(fake_sysfs, monkeypatch):
+    path = node_path(fake_sysfs, "class/hwmon/hwmon3/pwm1_enable")
+    counter = SyscallCounter(monkeypatch)
+    assert sysfs.sysfs_write(path, 1, force=True)
+    assert sysfs.sysfs_write(path, 1, force=True)
+    assert counter.counts["pwrite"] == 2
+
+
+def test_external_change_clears_write_cache(fake_sysfs):
+    path = node_path(fake_sysfs, "devices/system/cpu/cpu1/online")
+    assert sysfs.sysfs_write(path, 0)
+    # 其他程序把节点改回去，读取到不同值后下一次写入不能跳过
+    with open(path, "w") as f:
+        f.write("1")
+    assert sysfs.sysfs_read(path) == "1"
+    assert sysfs.sysfs_write(path, 0)
+
+
+def test_invalidate_prefix(fake_sysfs):
+    pwm = node_path(fake_sysfs, "class/hwmon/hwmon3/pwm1")
+    online = node_path(fake_sysfs, "devices/system/cpu/cpu1/online")
+    sysfs.sysfs_write(pwm, 50)
+    sysfs.sysfs_write(online, 1)
+    sysfs.sysfs_invalidate(node_path(fake_sysfs, "class/hwmon"))
+    assert sysfs.sysfs_write(pwm, 50)
+    assert not sysfs.sysfs_write(online, 1)
+
+
+@pytest.mark.parametrize("err", [errno.ENODEV, errno.ENOENT, errno.EBADF])
+def test_reopen_after_hotplug(fake_sysfs, monkeypatch, err):
+    path = node_path(fake_sysfs, "class/hwmon/hwmon3/fan1_input")
+    assert sysfs.sysfs_read_int(path) == 2400
+
+    pread = os.pread
+    failures = [err]
+
+    def flaky_pread(fd, size, offset):
+        if failures:
+            raise OSError(failures.pop(), os.strerror(err))
+        return pread(fd, size, offset)
+
+    monkeypatch.setattr(sysfs.os, "pread", flaky_pread)
+    counter = SyscallCounter(monkeypatch)
+    assert sysfs.sysfs_read_int(path) == 2400
+    # 旧 fd 关闭后重新打开一次
+    assert counter.counts["close"] == 1
+    assert counter.counts["open"] == 1
+
+
+def test_reopen_after_node_recreated(fake_sysfs, monkeypatch):
+    path = node_path(fake_sysfs, "devices/system/cpu/cpu1/online")
+    node = sysfs.get_sysfs_node(path)
+    assert node.write(0)
+    # CPU 重新上线后节点被重建，旧 fd 写入返回 ENODEV
+    os.unlink(path)
+    with open(path, "w") as f:
+        f.write("1")
+    pwrite = os.pwrite
+    failures = [errno.ENODEV]
+
+    def stale_pwrite(fd, data, offset):
+        if failures:
+            raise OSError(failures.pop(), os.strerror(errno.ENODEV))
+        return pwrite(fd, data, offset)
+
+    monkeypatch.setattr(sysfs.os, "pwrite", stale_pwrite)
+    assert node.write(0, force=True)
+    with open(path) as f:
+        assert f.read() == "0"
+
+
+def test_other_errors_are_raised(fake_sysfs):
+    path = node_path(fake_sysfs, "class/hwmon/hwmon3/missing")
+    with pytest.raises(FileNotFoundError):
+        sysfs.sysfs_read(path)
+
+
+def test_failed_write_is_not_cached(fake_sysfs, monkeypatch):
+    path = node_path(fake_sysfs, "class/hwmon/hwmon3/pwm1")
+
+    def failing_pwrite(fd, data, offset):
+        raise OSError(errno.EINVAL, "Invalid argument")
+
+    monkeypatch.setattr(sysfs.os, "pwrite", failing_pwrite)
+    with pytest.raises(OSError):
+        sysfs.sysfs_write(path, 10)
+    monkeypatch.undo()
+    assert sysfs.sysfs_write(path, 10)
+
+
+def test_shared_node_per_path(fake_sysfs):
+    path = node_path(fake_sysfs, "class/hwmon/hwmon3/pwm1")
+    assert sysfs.get_sysfs_node(path) is sysfs.get_sysfs_node(path)
+
+
+def test_close_releases_fds(fake_sysfs, monkeypatch):
+    paths = [
+        node_path(fake_sysfs, "class/hwmon/hwmon3/pwm1"),
+        node_path(fake_sysfs, "class/hwmon/hwmon3/fan1_input"),
+    ]
+    for path in paths:
+        sysfs.sysfs_read(path)
+    sysfs.sysfs_write(paths[0], 64)
+    counter = SyscallCounter(monkeypatch)
+    sysfs.close_sysfs_nodes()
+    # pwm1 有读写两个 fd，fan1_input 只有读 fd
+    assert counter.counts["close"] == 3
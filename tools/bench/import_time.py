@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Measure how long `import main` takes outside of Decky
+
+A stub `decky` module (and the `settings` module Decky provides) is written to
+a temporary directory, then `import main` runs in a fresh interpreter several
+times. Reports the median wall time and the slowest modules from
+`python -X importtime`.
+
+Usage: python tools/bench/import_time.py [--repeat N] [--top N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DECKY_STUB = """\
+import logging
+logger = logging.getLogger("decky")
+DECKY_PLUGIN_DIR = {repo!r}
+DECKY_PLUGIN_SETTINGS_DIR = {tmp!r}
+DECKY_PLUGIN_RUNTIME_DIR = {tmp!r}
+DECKY_PLUGIN_LOG_DIR = {tmp!r}
+DECKY_USER = "root"
+DECKY_USER_HOME = {tmp!r}
+HOME = {tmp!r}
+USER = "root"
+
+async def emit(event, *args):
+    pass
+"""
+
+SETTINGS_STUB = """\
+class SettingsManager:
+    def __init__(self, name=None, settings_directory=None):
+        self.settings = {}
+
+    def read(self):
+        pass
+
+    def getSetting(self, key, default=None):
+        return self.settings.get(key, default)
+
+    def setSetting(self, key, value):
+        self.settings[key] = value
+        return value
+
+    def commit(self):
+        pass
+"""
+
+MEASURE = """\
+import time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(f"{elapsed * 1000:.3f} {int(hasattr(main, 'Plugin') and hasattr(main, 'cpuManager'))}")
+"""
+
+
+def write_stubs(tmp: str):
+    with open(os.path.join(tmp, "decky.py"), "w") as f:
+        f.write(DECKY_STUB.format(repo=REPO_ROOT, tmp=tmp))
+    with open(os.path.join(tmp, "settings.py"), "w") as f:
+        f.write(SETTINGS_STUB)
+
+
+def run(tmp: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [tmp, REPO_ROOT, os.path.join(REPO_ROOT, "py_modules")]
+    )
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    args = [sys.executable]
+    if importtime:
+        args += ["-X", "importtime"]
+    return subprocess.run(
+        args + ["-c", MEASURE], env=env, cwd=tmp, capture_output=True, text=True
+    )
+
+
+def slowest_modules(stderr: str, top: int):
+    """Parse `-X importtime` output into (cumulative_us, module) pairs"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [part.strip() for part in line[len("import time:") :].split("|")]
+        if parts[1].isdigit():
+            rows.append((int(parts[1]), parts[2]))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="powercontrol-bench-") as tmp:
+        write_stubs(tmp)
+        times = []
+        complete = True
+        for _ in range(args.repeat):
+            result = run(tmp)
+            if result.returncode != 0:
+                sys.stderr.write(result.stderr)
+                sys.exit(1)
+            elapsed, ok = result.stdout.split()[-2:]
+            times.append(float(elapsed))
+            complete = complete and ok == "1"
+
+        print(f"import main: median {statistics.median(times):.1f} ms, "
+              f"min {min(times):.1f} ms, max {max(times):.1f} ms ({args.repeat} runs)")
+        if not complete:
+            print("warning: main imported with errors (see decky log), timing is incomplete")
+
+        print("\nslowest modules (cumulative):")
+        for cumulative, module in slowest_modules(run(tmp, importtime=True).stderr, args.top):
+            print(f"  {cumulative / 1000:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Measure logger.debug throughput of the journald logging pipeline
+
+Compares two handlers on the same formatted records:
+
+- legacy: a replica of the previous SystemdHandler, which ran one
+  `systemd-cat` process per record on the caller's thread
+- queue: the current pipeline from logging_handler (bounded queue, batch
+  listener thread, journald native protocol)
+
+The queue pipeline sends to a temporary datagram socket that stands in for
+journald, so the run does not depend on the machine's journal. Pass
+--journal to send to the real /run/systemd/journal/socket instead.
+
+For each handler it reports the records/s seen by the caller. For the queue
+pipeline it also reports how long the listener took to deliver everything,
+and how many records were dropped when the queue was full.
+
+Usage: python tools/bench/log_throughput.py [--records N] [--legacy-records N] [--journal]
+"""
+
+import argparse
+import logging
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(REPO_ROOT, "py_modules"))
+
+import logging_handler  # noqa: E402
+
+SYSTEMD_FORMAT = "[%(filename)s:%(lineno)s:%(funcName)s] %(levelname)s: %(message)s"
+
+
+class LegacySystemdHandler(logging.Handler):
+    """The handler before the queue pipeline: one systemd-cat run per record"""
+
+    def emit(self, record):
+        msg = self.format(record)
+        priority = logging_handler.SystemdHandler.PRIORITY_MAP.get(record.levelno, "6")
+        env = os.environ.copy()
+        env["LD_LIBRARY_PATH"] = ""
+        subprocess.run(
+            ["systemd-cat", "-t", logging_handler.LOG_TAG, "-p", priority],
+            input=msg,
+            text=True,
+            env=env,
+            stderr=subprocess.DEVNULL,
+        )
+
+
+class CountingQueueHandler(logging_handler.DroppingQueueHandler):
+    """Keeps the total number of dropped records across batches"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.total_dropped = 0
+
+    def take_dropped(self) -> int:
+        dropped = super().take_dropped()
+        self.total_dropped += dropped
+        return dropped
+
+
+class FakeJournal:
+    """Datagram socket that counts what the listener delivers"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.received = 0
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(path)
+        self._sock.settimeout(0.2)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._sock.recv(65536)
+            except socket.timeout:
+                continue
+            self.received += 1
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self._sock.close()
+
+
+def make_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    handler.setFormatter(logging.Formatter(SYSTEMD_FORMAT))
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    return logger
+
+
+def emit_records(logger: logging.Logger, records: int) -> float:
+    start = time.perf_counter()
+    for i in range(records):
+        logger.debug("set_gpuFreq: gpu_nowFreq=[%d, %d]", 800 + i % 800, 1600)
+    return time.perf_counter() - start
+
+
+def bench_legacy(records: int):
+    if shutil.which("systemd-cat") is None:
+        print("legacy: skipped, systemd-cat not found")
+        return
+    logger = make_logger("bench.legacy", LegacySystemdHandler())
+    elapsed = emit_records(logger, records)
+    print(f"legacy: {records} records in {elapsed:.3f}s, {records / elapsed:,.0f} records/s")
+
+
+def bench_queue(records: int, socket_path: str):
+    log_queue = queue.Queue(maxsize=logging_handler.QUEUE_MAX_SIZE)
+    systemd_handler = logging_handler.SystemdHandler(socket_path)
+    queue_handler = CountingQueueHandler(log_queue)
+    listener = logging_handler.BatchQueueListener(log_queue, systemd_handler, queue_handler)
+    listener.start()
+    logger = make_logger("bench.queue", queue_handler)
+
+    elapsed = emit_records(logger, records)
+    start = time.perf_counter()
+    listener.stop()
+    drain = time.perf_counter() - start
+    systemd_handler.close()
+
+    print(f"queue:  {records} records in {elapsed:.3f}s, {records / elapsed:,.0f} records/s")
+    print(f"        listener drained the queue in {drain * 1000:.1f}ms after the last record")
+    queue_handler.take_dropped()
+    print(f"        dropped {queue_handler.total_dropped} records")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument(
+        "--legacy-records",
+        type=int,
+        default=200,
+        help="records for the systemd-cat handler, which is much slower",
+    )
+    parser.add_argument(
+        "--journal", action="store_true", help="send to the real journald socket"
+    )
+    args = parser.parse_args()
+
+    bench_legacy(args.legacy_records)
+
+    if args.journal:
+        if not os.path.exists(logging_handler.JOURNAL_SOCKET):
+            print(f"queue: skipped, {logging_handler.JOURNAL_SOCKET} not found")
+            return
+        bench_queue(args.records, logging_handler.JOURNAL_SOCKET)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = FakeJournal(os.path.join(tmp, "journal.sock"))
+        try:
+            bench_queue(args.records, journal.path)
+        finally:
+            # the listener has stopped; wait for the last datagrams to be read
+            time.sleep(0.3)
+            journal.close()
+        print(f"        delivered {journal.received} datagrams (records + drop warnings)")
+
+
+if __name__ == "__main__":
+    main()
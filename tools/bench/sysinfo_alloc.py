@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Measure the memory and allocation cost of sysInfo sampling
+
+Runs SysInfoManager.updateCpuData()/updateGpuData() in a loop, without the
+sampling thread, against the real /proc/stat and a temporary
+gpu_busy_percent file. Stub `decky`, `helpers` and `settings` modules are
+written to a temporary directory first, and device names missing from config
+on machines without DMI are filled in. Reports:
+
+- time per sample
+- memory still held after the loop (tracemalloc)
+- the largest transient allocation of a single sample
+- the change in allocated blocks over the run
+- garbage collector runs triggered during the loop
+
+Usage: python tools/bench/sysinfo_alloc.py [--samples N]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DECKY_STUB = """\
+import logging
+logger = logging.getLogger("decky")
+DECKY_PLUGIN_DIR = {repo!r}
+DECKY_PLUGIN_SETTINGS_DIR = {tmp!r}
+DECKY_PLUGIN_RUNTIME_DIR = {tmp!r}
+DECKY_PLUGIN_LOG_DIR = {tmp!r}
+DECKY_USER = "root"
+DECKY_USER_HOME = {tmp!r}
+HOME = {tmp!r}
+USER = "root"
+"""
+
+HELPERS_STUB = """\
+def get_user():
+    return "root"
+"""
+
+SETTINGS_STUB = """\
+class SettingsManager:
+    def __init__(self, name=None, settings_directory=None):
+        self.settings = {}
+
+    def getSetting(self, key, default=None):
+        return self.settings.get(key, default)
+
+    def setSetting(self, key, value):
+        self.settings[key] = value
+        return value
+"""
+
+
+# config sets these from /proc/cpuinfo and DMI; they stay undefined where
+# /sys/devices/virtual/dmi is missing (containers, some VMs), and utils.tdp
+# imports them
+DEVICE_NAMES = (
+    "CPU_ID",
+    "CPU_VENDOR",
+    "VENDOR_NAME",
+    "PRODUCT_NAME",
+    "BOARD_NAME",
+    "BOARD_VENDOR",
+    "PRODUCT_VERSION",
+)
+
+
+def bootstrap(tmp: str):
+    """Write the stub modules to tmp and import config, returns config"""
+    with open(os.path.join(tmp, "decky.py"), "w") as f:
+        f.write(DECKY_STUB.format(repo=REPO_ROOT, tmp=tmp))
+    with open(os.path.join(tmp, "helpers.py"), "w") as f:
+        f.write(HELPERS_STUB)
+    with open(os.path.join(tmp, "settings.py"), "w") as f:
+        f.write(SETTINGS_STUB)
+    sys.path[:0] = [tmp, os.path.join(REPO_ROOT, "py_modules")]
+
+    import config
+
+    for name in DEVICE_NAMES:
+        if not hasattr(config, name):
+            setattr(config, name, "")
+    return config
+
+
+def load_sysinfo(tmp: str):
+    config = bootstrap(tmp)
+
+    # config only defines the GPU path when an AMD GPU is found
+    if not hasattr(config, "AMD_GPU_DEVICE_PATH"):
+        config.AMD_GPU_DEVICE_PATH = tmp
+    import sysInfo
+
+    busy_path = os.path.join(tmp, "gpu_busy_percent")
+    with open(busy_path, "w") as f:
+        f.write("57\n")
+    sysInfo.gpu_busy_percentPath = busy_path
+    return sysInfo
+
+
+def sample(manager, count: int):
+    for _ in range(count):
+        manager.updateCpuData()
+        manager.updateGpuData()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="powercontrol-bench-") as tmp:
+        sysInfo = load_sysinfo(tmp)
+        manager = sysInfo.SysInfoManager()
+        # Warm up: fill the rings and open the persistent fds
+        sample(manager, 100)
+
+        gc.collect()
+        gc_before = sum(stat["collections"] for stat in gc.get_stats())
+        tracemalloc.start()
+        start = time.perf_counter()
+        sample(manager, args.samples)
+        elapsed = time.perf_counter() - start
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        gc_runs = sum(stat["collections"] for stat in gc.get_stats()) - gc_before
+
+        tracemalloc.start()
+        transient = 0
+        for _ in range(2000):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            sample(manager, 1)
+            transient = max(transient, tracemalloc.get_traced_memory()[1] - base)
+        tracemalloc.stop()
+
+        gc.disable()
+        blocks = sys.getallocatedblocks()
+        sample(manager, 1000)
+        blocks = sys.getallocatedblocks() - blocks
+        gc.enable()
+
+        print(f"samples:            {args.samples}")
+        print(f"time per sample:    {elapsed / args.samples * 1e6:.1f} us (under tracemalloc)")
+        print(f"retained memory:    {retained} B (peak {peak} B)")
+        print(f"per-sample peak:    {transient} B")
+        print(f"allocated blocks:   {blocks:+d} over 1000 samples")
+        print(f"gc runs:            {gc_runs}")
+        print(f"busy:               cpu {sysInfo.cpu_busyPercent:.1f}% gpu {sysInfo.gpu_busyPercent:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
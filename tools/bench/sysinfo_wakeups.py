@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Measure wakeups and CPU time of the sysInfo sampling thread
+
+Starts a real SysInfoManager thread and reads its scheduler statistics from
+/proc/self/task/<tid>:
+- context switches per second (one per wakeup for a sleeping thread)
+- CPU time from schedstat
+
+It runs three phases:
+- idle: no consumers registered
+- active: CPU and GPU consumers at the configured interval
+- legacy: a replica of the previous sampler, which woke every 5 ms and
+  reopened /proc/stat on each tick, for comparison
+
+Usage: python tools/bench/sysinfo_wakeups.py [--duration S] [--interval S]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sysinfo_alloc import load_sysinfo
+
+LEGACY_INTERVAL = 0.005
+
+
+class ThreadStats:
+    def __init__(self, tid: int):
+        self._task = f"/proc/self/task/{tid}"
+
+    def sample(self):
+        """(context switches, CPU time in seconds)"""
+        switches = 0
+        with open(f"{self._task}/status") as f:
+            for line in f:
+                if line.startswith(("voluntary_ctxt_switches", "nonvoluntary_ctxt_switches")):
+                    switches += int(line.split()[1])
+        with open(f"{self._task}/schedstat") as f:
+            runtime_ns = int(f.read().split()[0])
+        return switches, runtime_ns / 1e9
+
+
+def measure(tid: int, duration: float):
+    stats = ThreadStats(tid)
+    switches, cpu = stats.sample()
+    time.sleep(duration)
+    switches_after, cpu_after = stats.sample()
+    return (switches_after - switches) / duration, (cpu_after - cpu) / duration * 1000
+
+
+def legacy_sampler(stop: threading.Event):
+    while not stop.is_set():
+        with open("/proc/stat") as f:
+            f.readline()
+        time.sleep(LEGACY_INTERVAL)
+
+
+def report(name: str, wakeups: float, cpu_ms: float):
+    print(f"{name:<8} {wakeups:8.1f} wakeups/s {cpu_ms:8.3f} ms CPU/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--interval", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="powercontrol-bench-") as tmp:
+        sysInfo = load_sysinfo(tmp)
+        manager = sysInfo.SysInfoManager()
+        manager.set_collect_interval(args.interval, save=False)
+        manager.start()
+        time.sleep(0.1)
+
+        report("idle", *measure(manager.native_id, args.duration))
+
+        manager.EnableCPUINFO(True, "bench")
+        manager.EnableGPUINFO(True, "bench")
+        report("active", *measure(manager.native_id, args.duration))
+        manager.EnableCPUINFO(False, "bench")
+        manager.EnableGPUINFO(False, "bench")
+
+        stop = threading.Event()
+        legacy = threading.Thread(target=legacy_sampler, args=(stop,), daemon=True)
+        legacy.start()
+        report("legacy", *measure(legacy.native_id, args.duration))
+        stop.set()
+        legacy.join()
+
+
+if __name__ == "__main__":
+    main()
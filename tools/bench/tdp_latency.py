@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Measure set-TDP latency of libryzenadj against the ryzenadj CLI
+
+Times the two paths CPUManager.set_cpuTDP_AMD can take:
+
+- lib: RyzenAdjLib.set_tdp on the resident libryzenadj handle
+- cli: run_ryzenadj, one ryzenadj process per call
+
+Both write the same stapm/fast/slow limits and temperature limit. By default
+that is the current STAPM limit, so the run does not change the power
+settings. A path that is not available (no library, no executable, not root,
+not an AMD APU) is reported as skipped. The script exits cleanly when
+neither path works.
+
+Usage: sudo python tools/bench/tdp_latency.py [--tdp W] [--iterations N] [--cli-iterations N]
+"""
+
+import argparse
+import math
+import statistics
+import tempfile
+import time
+
+from sysinfo_alloc import bootstrap
+
+TCTL_TEMP = 90  # same temperature limit as set_cpuTDP_AMD
+
+
+def current_tdp(lib, run_ryzenadj) -> int:
+    """Current STAPM limit in W, 0 if it cannot be read"""
+    if lib is not None:
+        try:
+            value = lib.get_stapm_limit()
+            if not math.isnan(value) and value > 0:
+                return round(value)
+        except Exception:
+            pass
+    try:
+        output = run_ryzenadj(["-i"]).stdout
+    except Exception:
+        return 0
+    for line in output.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) > 2 and fields[1] == "STAPM LIMIT":
+            return round(float(fields[2]))
+    return 0
+
+
+def report(name: str, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(
+        f"{name:<4} {len(samples):4d} calls  "
+        f"mean {statistics.mean(samples):8.2f} ms  "
+        f"median {statistics.median(samples):8.2f} ms  "
+        f"p95 {p95:8.2f} ms  max {samples[-1]:8.2f} ms"
+    )
+
+
+def time_calls(func, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tdp", type=int, default=0, help="TDP in W, default the current limit")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument(
+        "--cli-iterations",
+        type=int,
+        default=20,
+        help="iterations for the CLI, which starts a process per call",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="powercontrol-bench-") as tmp:
+        bootstrap(tmp)
+        from utils import (
+            close_ryzenadj_lib,
+            get_ryzenadj_candidates,
+            get_ryzenadj_lib,
+            run_ryzenadj,
+        )
+
+        lib = get_ryzenadj_lib()
+        cli = get_ryzenadj_candidates()
+        if lib is None and not cli:
+            print("skipped: neither libryzenadj nor the ryzenadj executable is available")
+            return
+
+        tdp = args.tdp or current_tdp(lib, run_ryzenadj)
+        if tdp <= 0:
+            print("skipped: cannot read the current STAPM limit, pass --tdp")
+            return
+        limit = tdp * 1000
+        print(f"setting {tdp} W")
+
+        if lib is None:
+            print("lib  skipped: libryzenadj not loaded")
+        else:
+            try:
+                report(
+                    "lib",
+                    time_calls(
+                        lambda: lib.set_tdp(limit, limit, limit, TCTL_TEMP),
+                        args.iterations,
+                    ),
+                )
+            except Exception as e:
+                print(f"lib  skipped: {e}")
+
+        if not cli:
+            print("cli  skipped: ryzenadj executable not found")
+        else:
+            cli_args = ["-a", limit, "-b", limit, "-c", limit, "-f", TCTL_TEMP]
+            try:
+                report(
+                    "cli",
+                    time_calls(lambda: run_ryzenadj(cli_args), args.cli_iterations),
+                )
+            except Exception as e:
+                print(f"cli  skipped: {e}")
+
+        close_ryzenadj_lib()
+
+
+if __name__ == "__main__":
+    main()